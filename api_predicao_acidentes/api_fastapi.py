@@ -1,17 +1,54 @@
-from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel, ConfigDict
-import joblib
+from fastapi import FastAPI, Header, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import PlainTextResponse, Response, StreamingResponse
+from pydantic import ValidationError
+from pydantic import BaseModel, ConfigDict, Field
 import pandas as pd
 import numpy as np
 from typing import List, Optional
+import itertools
+import json
 import logging
+import os
+import threading
+import time
 from datetime import datetime
+from artefatos import (
+    CAMPOS_NUMERICOS, CODIGOS_RISCO, COLUNAS_CATEGORICAS, EXEMPLO_ACIDENTE, NIVEIS_RISCO, ArtefatosModelo,
+    carregar_artefatos, carregar_valores_imputacao, codigos_risco_lote, interpretar_risco_lote
+)
+from cache_predicoes import CachePredicoes
+from log_assincrono import configurar_logging
+from metricas_prometheus import (
+    BUCKETS_TAMANHO_LOTE, AgregadorMultiprocesso, MiddlewareMetricas, RegistroMetricas
+)
+from ingestao import (
+    LeitorRegistros, escrever_csv, iterar_linhas, ler_dataframe_bruto, limpar_dataframe_bruto,
+    normalizar_registro_bruto
+)
+from codificador import ExplicadorLinear, KernelLinearFundido, PontuadorEsparso, registros_de_cobertura
+from registro_modelos import ObservadorRegistro, RegistroModelos
+from micro_lotes import AgrupadorMicroLotes
+from monitor_drift import LINHA_BASE_PATH, MonitorDrift, carregar_linha_base
+from avaliacao_sombra import AvaliadorSombra, carregar_desafiantes
+from indice_geografico import INDICE_GEOGRAFICO_PATH, IndiceGeografico
+from formatos_colunares import (
+    DEPENDENCIAS, TIPO_POR_FORMATO, ErroValidacaoColunar, codificar_resposta, decodificar_colunas,
+    formato_disponivel, formato_do_tipo, negociar_formato_saida, validar_colunas
+)
+from treino_incremental import ArquivoFeedback, gerar_candidato
 
 # ==================== CONFIGURAÇÃO DE LOGGING ====================
-logging.basicConfig(
-    filename='api_predicoes.log',
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s'
+# Escrita em disco numa thread separada (fila + lotes), com rotação.
+# LOG_FORMATO=json grava uma linha JSON por evento de predição.
+pipeline_log = configurar_logging(
+    os.getenv("LOG_ARQUIVO", "api_predicoes.log"),
+    formato=os.getenv("LOG_FORMATO", "texto"),
+    rotacao=os.getenv("LOG_ROTACAO", "tamanho"),
+    max_bytes=int(os.getenv("LOG_MAX_BYTES", str(10 * 1024 * 1024))),
+    backups=int(os.getenv("LOG_BACKUPS", "5")),
+    intervalo=os.getenv("LOG_INTERVALO_ROTACAO", "midnight"),
+    tamanho_fila=int(os.getenv("LOG_TAMANHO_FILA", "10000"))
 )
 
 # ==================== CONFIGURAÇÃO DA API ====================
@@ -21,55 +58,57 @@ app = FastAPI(
     version="2.0"
 )
 
-# ==================== CARREGAR MODELO ====================
-MODELO_PATH = "modelo_lr.pkl"
-SCALER_PATH = "scaler.pkl"
-COLUNAS_PATH = "colunas_treino.pkl"
+# ==================== MÉTRICAS (PROMETHEUS) ====================
+# Histogramas por etapa, contadores por endpoint e tamanho de lote em GET /metrics.
+# METRICAS_ATIVAS=0 desliga toda a instrumentação.
+registro_metricas = RegistroMetricas(ativo=os.getenv("METRICAS_ATIVAS", "1") == "1")
+metrica_requisicoes = registro_metricas.contador(
+    "api_requisicoes_total", "Requisições HTTP por rota e status", ("rota", "status")
+)
+metrica_latencia_requisicao = registro_metricas.histograma(
+    "api_latencia_requisicao_segundos", "Latência total da requisição (inclui serialização)", ("rota",)
+)
+metrica_latencia_etapa = registro_metricas.histograma(
+    "api_latencia_etapa_segundos", "Latência de cada etapa da predição", ("etapa", "modo")
+)
+metrica_tamanho_lote = registro_metricas.histograma(
+    "api_tamanho_lote", "Registros por chamada em lote", ("endpoint",), buckets=BUCKETS_TAMANHO_LOTE
+)
+metrica_erros = registro_metricas.contador(
+    "api_erros_total", "Erros de predição por endpoint e tipo", ("endpoint", "tipo")
+)
+metrica_recargas = registro_metricas.contador(
+    "api_recargas_modelo_total", "Trocas de versão do modelo por resultado", ("resultado",)
+)
+metrica_feedback = registro_metricas.contador(
+    "api_feedback_total", "Desfechos recebidos em POST /feedback por rótulo", ("rotulo",)
+)
+
+def observar_etapa(etapa: str, modo: str, inicio: float) -> float:
+    """Registra a duração de uma etapa iniciada em `inicio` e retorna o instante atual."""
+    agora = time.perf_counter()
+    if registro_metricas.ativo:
+        metrica_latencia_etapa.observar(agora - inicio, etapa, modo)
+    return agora
 
-# 🎯 THRESHOLD OTIMIZADO - Leia do arquivo gerado no notebook
-try:
-    with open("threshold_otimizado.txt", "r") as f:
-        linhas = f.readlines()
-        THRESHOLD_OTIMIZADO = float(linhas[0].split("=")[1].strip())
-        F1_SCORE_OTIMIZADO = float(linhas[1].split("=")[1].strip())
-    print(f"✓ Threshold carregado do arquivo: {THRESHOLD_OTIMIZADO:.4f}")
-    print(f"✓ F1-Score associado: {F1_SCORE_OTIMIZADO:.4f}")
-except FileNotFoundError:
-    print("⚠️ Arquivo threshold_otimizado.txt não encontrado. Usando valor padrão.")
-    THRESHOLD_OTIMIZADO = 0.26
-    F1_SCORE_OTIMIZADO = None
-
-# Carregar modelo, scaler e colunas
-try:
-    modelo = joblib.load(MODELO_PATH)
-    scaler = joblib.load(SCALER_PATH)
-    colunas_treino = joblib.load(COLUNAS_PATH)
-    print(f"✓ Modelo carregado: {len(colunas_treino)} features")
-    print(f"✓ Threshold otimizado: {THRESHOLD_OTIMIZADO}")
-    logging.info(f"API iniciada com threshold={THRESHOLD_OTIMIZADO}")
-except Exception as e:
-    logging.error(f"Erro ao carregar modelo: {e}")
-    raise RuntimeError(f"❌ Erro ao carregar modelo: {e}")
+def observar_validacao(request: Request, modo: str) -> float:
+    """
+    Registra o tempo entre a chegada da requisição (marcada pelo middleware)
+    e a entrada no endpoint: leitura do corpo, parsing JSON, validação pydantic
+    e a espera por uma thread livre (endpoints síncronos).
+    """
+    agora = time.perf_counter()
+    inicio = request.scope.get("state", {}).get("inicio_requisicao")
+    if inicio is not None and registro_metricas.ativo:
+        metrica_latencia_etapa.observar(agora - inicio, "validacao", modo)
+    return agora
 
 # ==================== MODELOS DE DADOS ====================
 class AcidenteAereo(BaseModel):
     """Modelo de entrada para predição de acidentes aéreos."""
     model_config = ConfigDict(
         json_schema_extra={
-            "example": {
-                "latitude": -23.5505,
-                "longitude": -46.6333,
-                "peso_max_decolagem": 5700.0,
-                "numero_assentos": 9,
-                "fase_operacao": "DECOLAGEM",
-                "cat_aeronave": "AVIÃO",
-                "regiao": "SUDESTE",
-                "uf": "SP",
-                "modelo_aeronave": "EMB-110",
-                "nome_fabricante": "EMBRAER",
-                "ano_ocorrencia": 2023,
-                "mes_ocorrencia": 6
-            }
+            "example": EXEMPLO_ACIDENTE
         }
     )
     
@@ -86,6 +125,11 @@ class AcidenteAereo(BaseModel):
     ano_ocorrencia: int
     mes_ocorrencia: int
 
+class FeedbackAcidente(AcidenteAereo):
+    """Acidente com o desfecho real, para o retreino incremental."""
+    les_fatais_trip: int = Field(ge=0, le=1, description="1 se houve fatalidade, 0 caso contrário")
+    id_evento: Optional[str] = None
+
 class RespostaPredicao(BaseModel):
     """Modelo de resposta para predição individual."""
     probabilidade_fatal: float
@@ -95,6 +139,9 @@ class RespostaPredicao(BaseModel):
     nivel_risco: str
     recomendacao: str
     interpretacao_detalhada: str
+    versao_modelo: str
+    explicacao: Optional[List[dict]] = None
+    contexto_geografico: Optional[dict] = None
 
 class RespostaLote(BaseModel):
     """Modelo de resposta para predição em lote."""
@@ -105,9 +152,18 @@ class RespostaLote(BaseModel):
     probabilidade_media: float
     distribuicao_risco: dict
     resultados: List[dict]
+    versao_modelo: str
 
 # ==================== FUNÇÕES AUXILIARES ====================
-def preprocessar_entrada(dados: AcidenteAereo) -> np.ndarray:
+def codificar_dummies(acidentes: List[AcidenteAereo], colunas_treino: List[str]) -> pd.DataFrame:
+    """One-hot encoding das categóricas alinhado às colunas do treino (sem normalizar)."""
+    df = pd.DataFrame([acidente.model_dump() for acidente in acidentes])
+    
+    df_encoded = pd.get_dummies(df, columns=COLUNAS_CATEGORICAS)
+    
+    return df_encoded.reindex(columns=colunas_treino, fill_value=0)
+
+def preprocessar_entrada(dados: AcidenteAereo, versao: "VersaoModelo") -> np.ndarray:
     """
     Converte entrada em formato compatível com o modelo.
     
@@ -116,17 +172,17 @@ def preprocessar_entrada(dados: AcidenteAereo) -> np.ndarray:
     2. Alinhamento com as colunas do treino
     3. Normalização usando o scaler treinado
     """
-    df = pd.DataFrame([dados.model_dump()])
-    
-    colunas_categoricas = ['fase_operacao', 'cat_aeronave', 'regiao', 'uf', 
-                           'modelo_aeronave', 'nome_fabricante']
-    df_encoded = pd.get_dummies(df, columns=colunas_categoricas)
-    
-    df_encoded = df_encoded.reindex(columns=colunas_treino, fill_value=0)
-    
-    X_scaled = scaler.transform(df_encoded)
+    return versao.scaler.transform(codificar_dummies([dados], versao.colunas_treino))
+
+def preprocessar_lote(acidentes: List[AcidenteAereo], versao: "VersaoModelo") -> np.ndarray:
+    """
+    Versão vetorizada de `preprocessar_entrada` para vários acidentes.
     
-    return X_scaled
+    Monta uma única matriz de features para o lote inteiro e aplica o
+    scaler uma única vez. Cada linha é idêntica à que seria produzida
+    por `preprocessar_entrada` para o acidente correspondente.
+    """
+    return versao.scaler.transform(codificar_dummies(acidentes, versao.colunas_treino))
 
 def interpretar_risco(probabilidade: float) -> str:
     """Classifica o nível de risco baseado na probabilidade."""
@@ -139,51 +195,632 @@ def interpretar_risco(probabilidade: float) -> str:
     else:
         return "BAIXO"
 
+# Textos fixos das respostas, montados uma única vez e apenas consultados por predição
+RECOMENDACOES_FATAL = {
+    "CRÍTICO": "🚨 ALERTA CRÍTICO: Implementar medidas de segurança IMEDIATAS. Investigação prioritária obrigatória.",
+    "ALTO": "⚠️ ALERTA ALTO: Investigação detalhada recomendada. Reforçar protocolos de segurança."
+}
+RECOMENDACAO_ATENCAO = "⚠️ ATENÇÃO: Monitoramento reforçado necessário. Revisar condições operacionais."
+RECOMENDACAO_PRECAUCAO = "💡 PRECAUÇÃO: Risco presente mas baixo. Manter vigilância e seguir protocolos padrão."
+RECOMENDACAO_SEGURO = "✅ SEGURO: Risco muito baixo. Manter procedimentos normais de segurança."
+INTERPRETACOES = {
+    "CRÍTICO": "Probabilidade MUITO ALTA de fatalidade ({:.1f}%). Situação de risco extremo.",
+    "ALTO": "Probabilidade ELEVADA de fatalidade ({:.1f}%). Situação de alto risco.",
+    "MODERADO": "Probabilidade MODERADA de fatalidade ({:.1f}%). Cautela recomendada.",
+    "BAIXO": "Probabilidade BAIXA de fatalidade ({:.1f}%). Situação relativamente segura."
+}
+
 def gerar_recomendacao(predicao: int, probabilidade: float, nivel_risco: str) -> str:
     """Gera recomendação de ação baseada na predição e nível de risco."""
     if predicao == 1:
-        if nivel_risco == "CRÍTICO":
-            return "🚨 ALERTA CRÍTICO: Implementar medidas de segurança IMEDIATAS. Investigação prioritária obrigatória."
-        elif nivel_risco == "ALTO":
-            return "⚠️ ALERTA ALTO: Investigação detalhada recomendada. Reforçar protocolos de segurança."
+        return RECOMENDACOES_FATAL.get(nivel_risco, RECOMENDACAO_ATENCAO)
+    return RECOMENDACAO_PRECAUCAO if probabilidade >= 0.20 else RECOMENDACAO_SEGURO
+
+def gerar_interpretacao_detalhada(probabilidade: float, nivel_risco: str) -> str:
+    """Gera interpretação detalhada da predição."""
+    return INTERPRETACOES.get(nivel_risco, "Probabilidade: {:.1f}%").format(probabilidade * 100)
+
+# ==================== CODIFICADOR COMPILADO ====================
+def verificar_paridade_codificador(versao: "VersaoModelo") -> bool:
+    """
+    Confere se o codificador compilado gera exatamente a mesma matriz
+    que o caminho com pandas (`preprocessar_entrada`/`preprocessar_lote`),
+    cobrindo todas as dummies conhecidas e uma categoria inexistente.
+    """
+    codificador = versao.codificador
+    exemplo = AcidenteAereo.model_config["json_schema_extra"]["example"]
+    acidentes = [AcidenteAereo(**r) for r in registros_de_cobertura(codificador, exemplo)]
+    
+    X_referencia = preprocessar_lote(acidentes, versao)
+    X_compilado = codificador.codificar_lote([a.model_dump() for a in acidentes])
+    if not np.array_equal(X_referencia, X_compilado):
+        return False
+    
+    for acidente in acidentes[:5]:
+        if not np.array_equal(preprocessar_entrada(acidente, versao), codificador.codificar(acidente.model_dump())):
+            return False
+    return True
+
+def codificar_entrada(dados: AcidenteAereo, versao: "VersaoModelo") -> np.ndarray:
+    """Pré-processa um acidente pelo caminho mais rápido disponível."""
+    return codificar_lote([dados], versao, modo="individual")
+
+def codificar_lote(acidentes: List[AcidenteAereo], versao: "VersaoModelo", modo: str = "lote") -> np.ndarray:
+    """
+    Pré-processa vários acidentes pelo caminho mais rápido disponível.
+    
+    No codificador compilado a normalização acontece junto com a codificação
+    (etapa `codificacao_compilada`); no caminho pandas as etapas
+    `codificacao` e `normalizacao` são medidas separadamente.
+    """
+    inicio = time.perf_counter()
+    if versao.usar_codificador_compilado:
+        if len(acidentes) == 1:
+            X = versao.codificador.codificar(acidentes[0].model_dump())
         else:
-            return "⚠️ ATENÇÃO: Monitoramento reforçado necessário. Revisar condições operacionais."
+            X = versao.codificador.codificar_lote([acidente.model_dump() for acidente in acidentes])
+        observar_etapa("codificacao_compilada", modo, inicio)
+        return X
+    df_encoded = codificar_dummies(acidentes, versao.colunas_treino)
+    inicio = observar_etapa("codificacao", modo, inicio)
+    X = versao.scaler.transform(df_encoded)
+    observar_etapa("normalizacao", modo, inicio)
+    return X
+
+# ==================== KERNEL LINEAR FUNDIDO ====================
+# Modo opcional: scaler incorporado aos pesos da regressão logística.
+# Ative com PONTUACAO_FUNDIDA=1; só é usado se passar na checagem numérica.
+PONTUACAO_FUNDIDA = os.getenv("PONTUACAO_FUNDIDA", "0") == "1"
+TOLERANCIA_KERNEL_FUNDIDO = 1e-9
+
+def verificar_equivalencia_kernel(kernel: KernelLinearFundido, versao: "VersaoModelo") -> float:
+    """
+    Compara o kernel fundido com o caminho em duas etapas
+    (`scaler.transform` + `modelo.predict_proba`) e retorna a maior
+    diferença absoluta de probabilidade encontrada.
+    """
+    exemplo = AcidenteAereo.model_config["json_schema_extra"]["example"]
+    acidentes = [AcidenteAereo(**r) for r in registros_de_cobertura(versao.codificador, exemplo)]
+    registros = [a.model_dump() for a in acidentes]
+    
+    referencia = versao.modelo.predict_proba(preprocessar_lote(acidentes, versao))[:, 1]
+    fundido_lote = kernel.probabilidades_lote(registros)
+    fundido_individual = np.array([kernel.probabilidade(r) for r in registros])
+    
+    return float(max(np.max(np.abs(referencia - fundido_lote)),
+                     np.max(np.abs(referencia - fundido_individual))))
+
+# ==================== PONTUAÇÃO ESPARSA ====================
+# One-hot em CSR (scipy): só os campos numéricos e as dummies ativas de cada
+# registro são armazenados, então o custo não cresce com o vocabulário de
+# modelo_aeronave/nome_fabricante. Desative com PONTUACAO_ESPARSA=0.
+PONTUACAO_ESPARSA = os.getenv("PONTUACAO_ESPARSA", "1") == "1"
+
+def verificar_equivalencia_esparsa(pontuador: PontuadorEsparso, versao: "VersaoModelo") -> float:
+    """Maior diferença absoluta entre a pontuação esparsa e `predict_proba` na matriz densa."""
+    exemplo = AcidenteAereo.model_config["json_schema_extra"]["example"]
+    acidentes = [AcidenteAereo(**r) for r in registros_de_cobertura(versao.codificador, exemplo)]
+    registros = [a.model_dump() for a in acidentes]
+    
+    referencia = versao.modelo.predict_proba(preprocessar_lote(acidentes, versao))[:, 1]
+    colunas = {campo: [r[campo] for r in registros] for campo in registros[0]}
+    individual = np.array([pontuador.probabilidade(r) for r in registros])
+    return float(max(np.max(np.abs(referencia - pontuador.probabilidades_lote(registros))),
+                     np.max(np.abs(referencia - pontuador.probabilidades_colunas(colunas, len(registros)))),
+                     np.max(np.abs(referencia - individual))))
+
+def calcular_probabilidade(dados: AcidenteAereo, versao: "VersaoModelo") -> float:
+    """Probabilidade de fatalidade de um acidente."""
+    if versao.kernel_fundido is not None:
+        inicio = time.perf_counter()
+        probabilidade = versao.kernel_fundido.probabilidade(dados.model_dump())
+        observar_etapa("kernel_fundido", "individual", inicio)
+        return probabilidade
+    if versao.pontuador_esparso is not None:
+        inicio = time.perf_counter()
+        probabilidade = versao.pontuador_esparso.probabilidade(dados.model_dump())
+        observar_etapa("pontuacao_esparsa", "individual", inicio)
+        return probabilidade
+    X = codificar_entrada(dados, versao)
+    inicio = time.perf_counter()
+    probabilidade = float(versao.modelo.predict_proba(X)[0, 1])
+    observar_etapa("predict_proba", "individual", inicio)
+    return probabilidade
+
+def calcular_probabilidades_lote(acidentes: List[AcidenteAereo], versao: "VersaoModelo",
+                                 modo: str = "lote") -> np.ndarray:
+    """Probabilidades de fatalidade de vários acidentes numa chamada vetorizada."""
+    if versao.kernel_fundido is not None:
+        inicio = time.perf_counter()
+        probabilidades = versao.kernel_fundido.probabilidades_lote([acidente.model_dump() for acidente in acidentes])
+        observar_etapa("kernel_fundido", modo, inicio)
+        return probabilidades
+    if versao.pontuador_esparso is not None:
+        return calcular_probabilidades_esparsas([acidente.model_dump() for acidente in acidentes], versao, modo)
+    X = codificar_lote(acidentes, versao, modo)
+    inicio = time.perf_counter()
+    probabilidades = versao.modelo.predict_proba(X)[:, 1]
+    observar_etapa("predict_proba", modo, inicio)
+    return probabilidades
+
+def calcular_probabilidades_colunas(colunas: dict, n: int, versao: "VersaoModelo") -> np.ndarray:
+    """Probabilidades a partir de colunas já validadas."""
+    inicio = time.perf_counter()
+    if versao.kernel_fundido is not None:
+        probabilidades = versao.kernel_fundido.probabilidades_colunas(colunas, n)
+        observar_etapa("kernel_fundido", "colunar", inicio)
+        return probabilidades
+    if versao.pontuador_esparso is not None:
+        X = versao.codificador.codificar_colunas_esparso(colunas, n)
+        inicio = observar_etapa("codificacao_esparsa", "colunar", inicio)
+        probabilidades = versao.pontuador_esparso.probabilidades_matriz(X)
+        observar_etapa("pontuacao_esparsa", "colunar", inicio)
+        return probabilidades
+    if versao.usar_codificador_compilado:
+        X = versao.codificador.codificar_colunas(colunas, n)
+        inicio = observar_etapa("codificacao_compilada", "colunar", inicio)
+    else:
+        df_encoded = pd.get_dummies(pd.DataFrame(colunas), columns=COLUNAS_CATEGORICAS)
+        df_encoded = df_encoded.reindex(columns=versao.colunas_treino, fill_value=0)
+        inicio = observar_etapa("codificacao", "colunar", inicio)
+        X = versao.scaler.transform(df_encoded)
+        inicio = observar_etapa("normalizacao", "colunar", inicio)
+    probabilidades = versao.modelo.predict_proba(X)[:, 1]
+    observar_etapa("predict_proba", "colunar", inicio)
+    return probabilidades
+
+def calcular_probabilidades_esparsas(registros: List[dict], versao: "VersaoModelo", modo: str) -> np.ndarray:
+    """Codificação em CSR seguida do produto esparso com os coeficientes."""
+    inicio = time.perf_counter()
+    X = versao.codificador.codificar_esparso(registros)
+    inicio = observar_etapa("codificacao_esparsa", modo, inicio)
+    probabilidades = versao.pontuador_esparso.probabilidades_matriz(X)
+    observar_etapa("pontuacao_esparsa", modo, inicio)
+    return probabilidades
+
+# ==================== EXPLICAÇÃO DAS PREDIÇÕES ====================
+# ?explicar=k em /prever e /prever_lote devolve as k maiores contribuições
+# (coeficiente × valor padronizado) para o logit de cada predição.
+def verificar_equivalencia_explicacao(explicador: ExplicadorLinear, versao: "VersaoModelo") -> float:
+    """Maior diferença entre intercepto + Σ contribuições e o logit de `decision_function`."""
+    exemplo = AcidenteAereo.model_config["json_schema_extra"]["example"]
+    acidentes = [AcidenteAereo(**r) for r in registros_de_cobertura(versao.codificador, exemplo)]
+    referencia = versao.modelo.decision_function(preprocessar_lote(acidentes, versao))
+    return float(np.max(np.abs(referencia - explicador.logits([a.model_dump() for a in acidentes]))))
+
+def verificar_explicacao(explicar: int, versao: "VersaoModelo") -> None:
+    if explicar < 0:
+        raise HTTPException(status_code=400, detail=f"explicar inválido: {explicar}")
+    if explicar > 0 and versao.explicador is None:
+        raise HTTPException(status_code=409, detail=f"Versão {versao.nome} não suporta explicação das predições")
+
+def explicar_lote(acidentes: List[AcidenteAereo], k: int, versao: "VersaoModelo", modo: str) -> List[List[dict]]:
+    inicio = time.perf_counter()
+    explicacoes = versao.explicador.explicar_lote([acidente.model_dump() for acidente in acidentes], k)
+    observar_etapa("explicacao", modo, inicio)
+    return explicacoes
+
+# ==================== ÍNDICE GEOGRÁFICO ====================
+# ?geografico=true em /prever e /prever_lote acrescenta o contexto da coordenada
+# (eventos históricos próximos, taxa de fatalidade local, distâncias e checagem
+# da UF informada) lido de indice_geografico.bin, mapeado em memória na inicialização.
+INDICE_GEOGRAFICO = os.getenv("INDICE_GEOGRAFICO", INDICE_GEOGRAFICO_PATH)
+
+def carregar_indice_geografico() -> Optional[IndiceGeografico]:
+    if not os.path.isfile(INDICE_GEOGRAFICO):
+        return None
+    try:
+        indice = IndiceGeografico(INDICE_GEOGRAFICO)
+    except Exception as e:
+        print(f"⚠️ Índice geográfico inválido ({INDICE_GEOGRAFICO}): {e}")
+        logging.warning("Índice geográfico inválido (%s): %s", INDICE_GEOGRAFICO, e)
+        return None
+    print(f"✓ Índice geográfico carregado: {indice.linhas}×{indice.colunas} células, "
+          f"{indice.cabecalho['eventos']} eventos")
+    return indice
+
+indice_geografico = carregar_indice_geografico()
+
+def verificar_indice_geografico(geografico: bool) -> None:
+    if geografico and indice_geografico is None:
+        raise HTTPException(status_code=409, detail=f"Índice geográfico indisponível: {INDICE_GEOGRAFICO}")
+
+def contexto_geografico_lote(acidentes: List[AcidenteAereo], modo: str) -> List[dict]:
+    inicio = time.perf_counter()
+    if len(acidentes) == 1:
+        contextos = [indice_geografico.consultar(acidentes[0].latitude, acidentes[0].longitude, acidentes[0].uf)]
     else:
-        if probabilidade >= 0.20:
-            return "💡 PRECAUÇÃO: Risco presente mas baixo. Manter vigilância e seguir protocolos padrão."
+        contextos = indice_geografico.consultar_lote([a.latitude for a in acidentes],
+                                                     [a.longitude for a in acidentes],
+                                                     [a.uf for a in acidentes])
+    observar_etapa("indice_geografico", modo, inicio)
+    return contextos
+
+# ==================== VERSÃO ATIVA DO MODELO ====================
+# Artefatos vêm do registro versionado (REGISTRO_MODELOS/<versao>/, ponteiro em ATIVA).
+# Sem registro, usa os arquivos soltos do diretório atual como versão "local".
+# REGISTRO_OBSERVAR_SEGUNDOS>0 liga o observador; ADMIN_TOKEN protege /admin/*.
+# FORMATO_ARTEFATOS=auto usa modelo_pacote.bin (sem scikit-learn) quando existir.
+registro_modelos = RegistroModelos(os.getenv("REGISTRO_MODELOS", "registro_modelos"))
+FORMATO_ARTEFATOS = os.getenv("FORMATO_ARTEFATOS", "auto")
+REGISTRO_OBSERVAR_SEGUNDOS = float(os.getenv("REGISTRO_OBSERVAR_SEGUNDOS", "0"))
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
+VERSAO_LOCAL = "local"
+
+# Identidade de cada carga de versão no processo (ver `chave_cache`)
+_contador_cargas = itertools.count(1)
+
+class VersaoModelo:
+    """
+    Modelo, scaler, colunas e threshold de uma versão, já validados e aquecidos.
+    
+    A troca de versão substitui uma única referência; cada requisição lê
+    `versao_atual()` uma vez e usa o mesmo objeto até responder, então uma
+    troca no meio nunca mistura o modelo de uma versão com o threshold de outra.
+    """
+    
+    def __init__(self, nome: str, diretorio: str):
+        artefatos = carregar_artefatos(diretorio, FORMATO_ARTEFATOS)
+        self.nome = nome
+        self.diretorio = diretorio
+        self.modelo = artefatos.modelo
+        self.scaler = artefatos.scaler
+        self.colunas_treino = artefatos.colunas_treino
+        self.threshold = artefatos.threshold
+        self.f1_score = artefatos.f1_score
+        self.codificador = artefatos.codificador
+        self.formato = artefatos.formato
+        self.usar_codificador_compilado = False
+        self.kernel_fundido = None
+        self.pontuador_esparso = None
+        self.explicador = None
+        self.valores_imputacao = None
+        self.carregada_em = datetime.now().isoformat()
+        self.carga = next(_contador_cargas)
+    
+    def imputacao(self) -> dict:
+        """
+        Valores de `imputer_mediana.pkl`/`imputer_moda.pkl` da versão, lidos na
+        primeira ingestão bruta e mantidos (o unpickle importa o scikit-learn,
+        que o formato pacote evita na inicialização). Vazio se a versão não tem imputers.
+        """
+        if self.valores_imputacao is None:
+            try:
+                self.valores_imputacao = carregar_valores_imputacao(self.diretorio)
+            except FileNotFoundError:
+                self.valores_imputacao = {}
+        return self.valores_imputacao
+    
+    def descricao(self) -> dict:
+        return {
+            "versao": self.nome,
+            "diretorio": self.diretorio,
+            "formato": self.formato,
+            "carregada_em": self.carregada_em,
+            "threshold": self.threshold,
+            "f1_score": self.f1_score,
+            "features": len(self.colunas_treino),
+            "codificador_compilado": self.usar_codificador_compilado,
+            "kernel_fundido": self.kernel_fundido is not None,
+            "pontuacao_esparsa": self.pontuador_esparso is not None,
+            "explicacao": self.explicador is not None
+        }
+
+def preparar_versao(nome: str, diretorio: str) -> VersaoModelo:
+    """
+    Carrega uma versão e deixa pronta para servir antes de ativá-la:
+    confere dimensões, valida codificador compilado, kernel fundido e
+    pontuação esparsa e explicador e
+    faz predições de aquecimento. Levanta exceção se a versão for inválida.
+    """
+    versao = VersaoModelo(nome, diretorio)
+    total_features = len(versao.colunas_treino)
+    for nome_artefato, artefato in (("scaler", versao.scaler), ("modelo", versao.modelo)):
+        esperadas = getattr(artefato, "n_features_in_", total_features)
+        if esperadas != total_features:
+            raise ValueError(f"{nome_artefato} espera {esperadas} features, colunas_treino tem {total_features}")
+    
+    versao.usar_codificador_compilado = verificar_paridade_codificador(versao)
+    if not versao.usar_codificador_compilado:
+        print(f"⚠️ [{nome}] Codificador compilado divergiu do pandas. Usando pré-processamento com pandas.")
+        logging.warning("Versão %s: codificador compilado divergiu do pandas; fallback para preprocessar_entrada", nome)
+    
+    if PONTUACAO_FUNDIDA:
+        try:
+            kernel = KernelLinearFundido.a_partir_do_modelo(versao.codificador, versao.modelo)
+            diferenca = verificar_equivalencia_kernel(kernel, versao)
+            if diferenca <= TOLERANCIA_KERNEL_FUNDIDO:
+                versao.kernel_fundido = kernel
+                print(f"✓ [{nome}] Kernel linear fundido ativo (diferença máxima: {diferenca:.2e})")
+            else:
+                print(f"⚠️ [{nome}] Kernel fundido divergiu ({diferenca:.2e}). Usando scaler + predict_proba.")
+                logging.warning("Versão %s: kernel fundido desativado, diferença máxima=%.2e", nome, diferenca)
+        except Exception as e:
+            print(f"⚠️ [{nome}] Kernel fundido indisponível: {e}")
+            logging.warning("Versão %s: kernel fundido indisponível: %s", nome, e)
+    
+    # A pontuação esparsa reproduz o codificador compilado, então depende da paridade dele
+    if PONTUACAO_ESPARSA and versao.usar_codificador_compilado and versao.kernel_fundido is None:
+        try:
+            pontuador = PontuadorEsparso.a_partir_do_modelo(versao.codificador, versao.modelo)
+            diferenca = verificar_equivalencia_esparsa(pontuador, versao)
+            if diferenca <= TOLERANCIA_KERNEL_FUNDIDO:
+                versao.pontuador_esparso = pontuador
+                print(f"✓ [{nome}] Pontuação esparsa ativa (diferença máxima: {diferenca:.2e})")
+            else:
+                print(f"⚠️ [{nome}] Pontuação esparsa divergiu ({diferenca:.2e}). Usando matriz densa.")
+                logging.warning("Versão %s: pontuação esparsa desativada, diferença máxima=%.2e", nome, diferenca)
+        except Exception as e:
+            print(f"⚠️ [{nome}] Pontuação esparsa indisponível: {e}")
+            logging.warning("Versão %s: pontuação esparsa indisponível: %s", nome, e)
+    
+    # Explicações só para modelos lineares cujas contribuições somam o logit do modelo
+    if versao.usar_codificador_compilado and hasattr(versao.modelo, "coef_"):
+        try:
+            explicador = ExplicadorLinear.a_partir_do_modelo(versao.codificador, versao.modelo)
+            diferenca = verificar_equivalencia_explicacao(explicador, versao)
+            if diferenca <= TOLERANCIA_KERNEL_FUNDIDO:
+                versao.explicador = explicador
+            else:
+                logging.warning("Versão %s: explicação desativada, diferença máxima=%.2e", nome, diferenca)
+        except Exception as e:
+            logging.warning("Versão %s: explicação indisponível: %s", nome, e)
+    
+    # Aquecimento fora das métricas: primeira chamada de cada caminho (individual e lote)
+    exemplo = AcidenteAereo.model_config["json_schema_extra"]["example"]
+    registros = [AcidenteAereo(**r).model_dump() for r in registros_de_cobertura(versao.codificador, exemplo)]
+    if versao.kernel_fundido is not None:
+        probabilidades = np.append(versao.kernel_fundido.probabilidades_lote(registros),
+                                   versao.kernel_fundido.probabilidade(registros[0]))
+    elif versao.pontuador_esparso is not None:
+        probabilidades = np.append(versao.pontuador_esparso.probabilidades_lote(registros),
+                                   versao.pontuador_esparso.probabilidade(registros[0]))
+    else:
+        probabilidades = np.append(versao.modelo.predict_proba(versao.codificador.codificar_lote(registros))[:, 1],
+                                   versao.modelo.predict_proba(versao.codificador.codificar(registros[0]))[0, 1])
+    if not np.all(np.isfinite(probabilidades)):
+        raise ValueError("Predições de aquecimento não finitas")
+    
+    return versao
+
+def localizar_versao(nome: Optional[str]) -> tuple:
+    """Resolve (nome, diretório) de uma versão do registro, ou a versão local sem registro."""
+    if nome is None:
+        nome = registro_modelos.versao_ativa()
+        if nome is None:
+            return VERSAO_LOCAL, "."
+    if nome == VERSAO_LOCAL and not registro_modelos.listar_versoes():
+        return VERSAO_LOCAL, "."
+    if not registro_modelos.versao_completa(nome):
+        raise FileNotFoundError(f"Versão não encontrada no registro: {nome}")
+    return nome, registro_modelos.caminho(nome)
+
+try:
+    _versao_ativa = preparar_versao(*localizar_versao(None))
+    print(f"✓ Modelo carregado: versão {_versao_ativa.nome} ({_versao_ativa.formato}), "
+          f"{len(_versao_ativa.colunas_treino)} features")
+    print(f"✓ Threshold otimizado: {_versao_ativa.threshold}")
+    if _versao_ativa.f1_score is not None:
+        print(f"✓ F1-Score associado: {_versao_ativa.f1_score:.4f}")
+    logging.info("API iniciada com versao=%s threshold=%s", _versao_ativa.nome, _versao_ativa.threshold)
+except Exception as e:
+    logging.error(f"Erro ao carregar modelo: {e}")
+    raise RuntimeError(f"❌ Erro ao carregar modelo: {e}")
+
+_trava_recarga = threading.Lock()
+
+def versao_atual() -> VersaoModelo:
+    """Versão em uso; leia uma vez por requisição."""
+    return _versao_ativa
+
+def recarregar_modelo(nome: Optional[str] = None, persistir: bool = False) -> dict:
+    """
+    Prepara a versão `nome` (ou a apontada pelo registro) e troca a versão
+    ativa de forma atômica. Se a preparação falhar, a versão atual continua.
+    
+    `persistir=True` também grava o ponteiro `ATIVA` do registro, para que
+    outros processos (via observador) e reinícios usem a mesma versão.
+    """
+    global _versao_ativa
+    with _trava_recarga:
+        anterior = _versao_ativa
+        inicio = time.perf_counter()
+        try:
+            nome, diretorio = localizar_versao(nome)
+            nova = preparar_versao(nome, diretorio)
+            if persistir and nome != VERSAO_LOCAL:
+                registro_modelos.ativar(nome)
+        except Exception as e:
+            if registro_metricas.ativo:
+                metrica_recargas.incrementar("falha")
+            logging.error("Falha ao carregar versão %s: %s", nome, e)
+            raise
+        
+        _versao_ativa = nova
+        invalidar_cache_predicoes()
+        segundos = time.perf_counter() - inicio
+        if registro_metricas.ativo:
+            metrica_recargas.incrementar("sucesso")
+        print(f"🔄 Modelo trocado: {anterior.nome} -> {nova.nome} ({segundos:.2f}s)")
+        logging.info("Modelo trocado: %s -> %s em %.3fs", anterior.nome, nova.nome, segundos)
+        return {
+            "versao_anterior": anterior.nome,
+            "versao_ativa": nova.nome,
+            "segundos_preparacao": round(segundos, 3),
+            **nova.descricao()
+        }
+
+def iniciar_observador_registro() -> Optional[ObservadorRegistro]:
+    """Liga o observador do registro se REGISTRO_OBSERVAR_SEGUNDOS > 0."""
+    if REGISTRO_OBSERVAR_SEGUNDOS <= 0:
+        return None
+    observador = ObservadorRegistro(
+        registro_modelos, REGISTRO_OBSERVAR_SEGUNDOS,
+        versao_atual=lambda: versao_atual().nome,
+        ao_mudar=recarregar_modelo
+    )
+    observador.iniciar()
+    print(f"✓ Observando {registro_modelos.diretorio} a cada {REGISTRO_OBSERVAR_SEGUNDOS:g}s")
+    return observador
+
+# Com API_PRE_FORK=1 (servidor.py) as threads só sobem nos workers, depois do fork
+PRE_FORK = os.getenv("API_PRE_FORK", "0") == "1"
+observador_registro = None if PRE_FORK else iniciar_observador_registro()
+
+# ==================== CACHE DE PREDIÇÕES ====================
+# CACHE_PREDICOES_TAMANHO=0 desativa o cache; TTL em segundos (0 = sem expiração)
+cache_predicoes = CachePredicoes(
+    tamanho_maximo=int(os.getenv("CACHE_PREDICOES_TAMANHO", "10000")),
+    ttl_segundos=float(os.getenv("CACHE_PREDICOES_TTL", "300"))
+)
+
+def chave_cache(dados: AcidenteAereo, versao: VersaoModelo) -> tuple:
+    """
+    Chave canônica do cache: carga da versão e valores de todos os campos.
+    
+    A carga (e não o nome) na chave impede que uma requisição iniciada antes
+    de uma troca grave no cache uma probabilidade do modelo antigo, inclusive
+    quando a mesma versão é recarregada com o nome de sempre (`/admin/recarregar`).
+    """
+    return (versao.carga,) + tuple(getattr(dados, campo) for campo in AcidenteAereo.model_fields)
+
+def invalidar_cache_predicoes() -> None:
+    """Descarta as predições em cache; chamar sempre que modelo, scaler ou threshold mudarem."""
+    cache_predicoes.limpar()
+    logging.info("Cache de predições invalidado")
+
+def prever_probabilidade(dados: AcidenteAereo, versao: VersaoModelo) -> float:
+    """`calcular_probabilidade` com consulta prévia ao cache."""
+    chave = chave_cache(dados, versao)
+    probabilidade = cache_predicoes.obter(chave)
+    if probabilidade is None:
+        probabilidade = calcular_probabilidade(dados, versao)
+        cache_predicoes.armazenar(chave, probabilidade)
+    return probabilidade
+
+def prever_probabilidades_lote(acidentes: List[AcidenteAereo], versao: VersaoModelo) -> np.ndarray:
+    """`calcular_probabilidades_lote` pontuando de uma vez só o que não está em cache."""
+    if not cache_predicoes.ativo:
+        return calcular_probabilidades_lote(acidentes, versao)
+    
+    chaves = [chave_cache(acidente, versao) for acidente in acidentes]
+    probabilidades = np.empty(len(acidentes))
+    pendentes = []
+    for i, chave in enumerate(chaves):
+        valor = cache_predicoes.obter(chave)
+        if valor is None:
+            pendentes.append(i)
         else:
-            return "✅ SEGURO: Risco muito baixo. Manter procedimentos normais de segurança."
+            probabilidades[i] = valor
+    
+    if pendentes:
+        calculadas = calcular_probabilidades_lote([acidentes[i] for i in pendentes], versao)
+        probabilidades[pendentes] = calculadas
+        for i, valor in zip(pendentes, calculadas.tolist()):
+            cache_predicoes.armazenar(chaves[i], valor)
+    
+    return probabilidades
 
-def gerar_interpretacao_detalhada(probabilidade: float, nivel_risco: str) -> str:
-    """Gera interpretação detalhada da predição."""
-    prob_percentual = probabilidade * 100
+# ==================== MICRO-LOTES ====================
+# MICRO_LOTES_ATIVO=1 junta chamadas concorrentes de /prever que chegam dentro de
+# MICRO_LOTES_JANELA_MS (ou até MICRO_LOTES_TAMANHO_MAXIMO) num único predict_proba.
+MICRO_LOTES_ATIVO = os.getenv("MICRO_LOTES_ATIVO", "0") == "1"
+
+def pontuar_micro_lote(itens: List[tuple]) -> List[float]:
+    """
+    Pontua os pares `(dados, versao)` de várias requisições de uma vez.
     
-    interpretacoes = {
-        "CRÍTICO": f"Probabilidade MUITO ALTA de fatalidade ({prob_percentual:.1f}%). Situação de risco extremo.",
-        "ALTO": f"Probabilidade ELEVADA de fatalidade ({prob_percentual:.1f}%). Situação de alto risco.",
-        "MODERADO": f"Probabilidade MODERADA de fatalidade ({prob_percentual:.1f}%). Cautela recomendada.",
-        "BAIXO": f"Probabilidade BAIXA de fatalidade ({prob_percentual:.1f}%). Situação relativamente segura."
-    }
+    Uma troca de modelo pode cair no meio da janela; cada requisição é
+    pontuada pela versão que leu ao chegar, uma chamada vetorizada por versão.
+    """
+    grupos = {}
+    for i, (_, versao) in enumerate(itens):
+        grupos.setdefault(versao, []).append(i)
+    probabilidades = [0.0] * len(itens)
+    for versao, indices in grupos.items():
+        calculadas = calcular_probabilidades_lote([itens[i][0] for i in indices], versao, modo="micro_lote")
+        for i, valor in zip(indices, calculadas.tolist()):
+            probabilidades[i] = valor
+    return probabilidades
+
+def observar_micro_lote(tamanho: int, espera: float, duracao: float) -> None:
+    if registro_metricas.ativo:
+        metrica_tamanho_lote.observar(tamanho, "/prever")
+        metrica_latencia_etapa.observar(espera, "espera_micro_lote", "individual")
+
+agrupador_micro_lotes = AgrupadorMicroLotes(
+    pontuar_micro_lote,
+    janela_segundos=float(os.getenv("MICRO_LOTES_JANELA_MS", "2")) / 1000,
+    tamanho_maximo=int(os.getenv("MICRO_LOTES_TAMANHO_MAXIMO", "64")),
+    ao_despachar=observar_micro_lote
+) if MICRO_LOTES_ATIVO else None
+
+async def prever_probabilidade_micro_lote(dados: AcidenteAereo, versao: VersaoModelo) -> float:
+    """`prever_probabilidade` passando pelo agrupador; acertos de cache não esperam a janela."""
+    chave = chave_cache(dados, versao)
+    probabilidade = cache_predicoes.obter(chave)
+    if probabilidade is None:
+        probabilidade = await agrupador_micro_lotes.pontuar((dados, versao))
+        cache_predicoes.armazenar(chave, probabilidade)
+    return probabilidade
+
+# ==================== LOG DE EVENTOS ====================
+def registrar_evento(mensagem: str, args: tuple, evento) -> None:
+    """
+    Registra um evento de predição sem custo de formatação na requisição.
     
-    return interpretacoes.get(nivel_risco, f"Probabilidade: {prob_percentual:.1f}%")
+    No formato texto a mensagem é montada pela thread escritora; no
+    formato JSON `evento()` fornece os campos estruturados da linha.
+    """
+    if pipeline_log.formato == "json":
+        logging.info(mensagem, *args, extra={"evento": evento()})
+    else:
+        logging.info(mensagem, *args)
+
+# ==================== RESPOSTA ENXUTA ====================
+# ?resposta=enxuta (clientes máquina): só probabilidade_fatal, predicao_numerica e
+# codigo_risco (CODIGOS_RISCO), sem textos nem eco dos dados; a versão vai em X-Versao-Modelo
+MODOS_RESPOSTA = ("completa", "enxuta")
+
+def verificar_modo_resposta(resposta: str) -> None:
+    if resposta not in MODOS_RESPOSTA:
+        raise HTTPException(status_code=400, detail=f"resposta inválida: {resposta}")
+
+def resposta_json_enxuta(documento: dict, versao: VersaoModelo) -> Response:
+    """Serializa direto, sem passar pela validação do `response_model`."""
+    return Response(json.dumps(documento, ensure_ascii=False), media_type="application/json",
+                    headers={"X-Versao-Modelo": versao.nome})
 
 # ==================== ENDPOINTS ====================
 @app.get("/")
 def root():
     """Página inicial da API com informações básicas."""
+    versao = versao_atual()
     return {
         "message": "🛩️ API de Predição de Acidentes Aéreos Fatais",
         "modelo": "Regressão Logística (Otimizada)",
-        "threshold_atual": THRESHOLD_OTIMIZADO,
-        "f1_score_otimizado": F1_SCORE_OTIMIZADO,
+        "versao_modelo": versao.nome,
+        "threshold_atual": versao.threshold,
+        "f1_score_otimizado": versao.f1_score,
         "estrategia": "Threshold Otimizado para Máximo F1-Score",
         "versao": "2.0",
         "endpoints": {
             "GET /": "Informações da API",
             "GET /health": "Status de saúde",
             "GET /metricas": "Métricas do modelo",
-            "POST /prever": "Predição individual",
-            "POST /prever_lote": "Predição em lote",
+            "GET /metrics": "Métricas operacionais (Prometheus)",
+            "GET /drift": "Drift das entradas e probabilidades contra o treino",
+            "GET /sombra": "Comparação do modelo servido com os desafiantes",
+            "POST /prever": "Predição individual (?explicar=k para as k maiores contribuições, "
+                            "?geografico=true para o contexto da coordenada)",
+            "POST /prever_lote": "Predição em lote (?explicar=k, ?geografico=true)",
+            "POST /prever_colunar": "Predição em lote colunar (JSON/MessagePack/Arrow)",
+            "POST /prever_stream": "Predição em streaming (NDJSON/CSV)",
+            "POST /prever_bruto": "Predição de registros brutos do CENIPA, com imputação",
+            "GET /admin/versoes": "Versões do modelo no registro",
+            "POST /admin/recarregar": "Troca a versão do modelo sem reiniciar",
+            "POST /feedback": "Registra o desfecho real de acidentes",
+            "POST /admin/candidato": "Treina um candidato com o feedback novo",
             "GET /docs": "Documentação interativa"
         }
     }
@@ -191,111 +828,894 @@ def root():
 @app.get("/health")
 def health_check():
     """Verifica se a API está operacional."""
+    versao = versao_atual()
     return {
         "status": "ok",
         "timestamp": datetime.now().isoformat(),
-        "modelo_carregado": modelo is not None,
-        "scaler_carregado": scaler is not None,
-        "features_esperadas": len(colunas_treino),
-        "threshold": THRESHOLD_OTIMIZADO
+        "modelo_carregado": versao.modelo is not None,
+        "scaler_carregado": versao.scaler is not None,
+        "features_esperadas": len(versao.colunas_treino),
+        "threshold": versao.threshold,
+        "versao_modelo": versao.nome,
+        "cache": cache_predicoes.estatisticas(),
+        "log": pipeline_log.estatisticas(),
+        "micro_lotes": agrupador_micro_lotes.estatisticas() if agrupador_micro_lotes else None
     }
 
 @app.get("/metricas")
 def obter_metricas():
     """Retorna métricas do modelo treinado."""
+    versao = versao_atual()
     return {
         "modelo": "Regressão Logística",
-        "threshold_otimizado": THRESHOLD_OTIMIZADO,
-        "f1_score": F1_SCORE_OTIMIZADO,
-        "total_features": len(colunas_treino),
+        "versao_modelo": versao.nome,
+        "threshold_otimizado": versao.threshold,
+        "f1_score": versao.f1_score,
+        "total_features": len(versao.colunas_treino),
         "estrategia": "Maximização do F1-Score",
-        "interpretacao_threshold": f"Predições com probabilidade ≥ {THRESHOLD_OTIMIZADO:.2%} são classificadas como FATAL"
+        "interpretacao_threshold": f"Predições com probabilidade ≥ {versao.threshold:.2%} são classificadas como FATAL",
+        "cache_predicoes": cache_predicoes.estatisticas()
     }
 
-@app.post("/prever", response_model=RespostaPredicao)
-def prever_acidente(dados: AcidenteAereo):
-    """Prediz se um acidente aéreo será fatal."""
+@app.post("/prever", response_model=RespostaPredicao, response_model_exclude_none=True)
+async def prever_acidente(dados: AcidenteAereo, request: Request, resposta: str = "completa", explicar: int = 0,
+                          geografico: bool = False):
+    """
+    Prediz se um acidente aéreo será fatal (`?resposta=enxuta` para a forma compacta).
+    
+    Com `?explicar=k` a resposta traz em `explicacao` as k features que mais
+    pesaram no logit (coeficiente × valor padronizado), da maior para a menor.
+    Com `?geografico=true`, `contexto_geografico` traz o histórico em volta da
+    coordenada e se ela é compatível com a `uf` informada.
+    """
+    verificar_modo_resposta(resposta)
+    inicio = observar_validacao(request, "individual")
+    versao = versao_atual()
+    verificar_explicacao(explicar, versao)
+    verificar_indice_geografico(geografico)
     try:
-        X = preprocessar_entrada(dados)
-        probabilidade = float(modelo.predict_proba(X)[0, 1])
-        predicao = int(probabilidade >= THRESHOLD_OTIMIZADO)
+        if agrupador_micro_lotes is not None:
+            probabilidade = await prever_probabilidade_micro_lote(dados, versao)
+        else:
+            probabilidade = await run_in_threadpool(prever_probabilidade, dados, versao)
+        predicao = int(probabilidade >= versao.threshold)
+        if avaliador_sombra is not None:
+            avaliador_sombra.espelhar([dados], [probabilidade], versao.threshold)
+        if monitor_de_drift is not None:
+            monitor_de_drift.observar_registros([dados], [probabilidade], versao.codificador)
+        explicacao = explicar_lote([dados], explicar, versao, "individual")[0] if explicar else None
+        contexto = contexto_geografico_lote([dados], "individual")[0] if geografico else None
+        inicio_resposta = time.perf_counter()
         
         nivel_risco = interpretar_risco(probabilidade)
-        recomendacao = gerar_recomendacao(predicao, probabilidade, nivel_risco)
-        interpretacao = gerar_interpretacao_detalhada(probabilidade, nivel_risco)
         
-        logging.info(
-            f"Predição: {dados.uf}/{dados.cat_aeronave} -> "
-            f"Prob={probabilidade:.4f}, Fatal={predicao}, Risco={nivel_risco}"
+        registrar_evento(
+            "Predição: %s/%s -> Prob=%.4f, Fatal=%d, Risco=%s",
+            (dados.uf, dados.cat_aeronave, probabilidade, predicao, nivel_risco),
+            lambda: {
+                "evento": "predicao",
+                "dados_entrada": dados.model_dump(),
+                "probabilidade_fatal": probabilidade,
+                "predicao_numerica": predicao,
+                "nivel_risco": nivel_risco,
+                "threshold": versao.threshold,
+                "versao_modelo": versao.nome,
+                "latencia_ms": round((time.perf_counter() - inicio) * 1000, 3)
+            }
         )
         
-        return RespostaPredicao(
+        if resposta == "enxuta":
+            conteudo = resposta_json_enxuta({
+                "probabilidade_fatal": round(probabilidade, 4),
+                "predicao_numerica": predicao,
+                "codigo_risco": CODIGOS_RISCO[nivel_risco],
+                **({"explicacao": explicacao} if explicar else {}),
+                **({"contexto_geografico": contexto} if geografico else {})
+            }, versao)
+            observar_etapa("resposta", "individual", inicio_resposta)
+            return conteudo
+        
+        recomendacao = gerar_recomendacao(predicao, probabilidade, nivel_risco)
+        interpretacao = gerar_interpretacao_detalhada(probabilidade, nivel_risco)
+        resposta_completa = RespostaPredicao(
             probabilidade_fatal=round(probabilidade, 4),
             predicao="FATAL" if predicao == 1 else "NÃO FATAL",
             predicao_numerica=predicao,
-            threshold_utilizado=THRESHOLD_OTIMIZADO,
+            threshold_utilizado=versao.threshold,
             nivel_risco=nivel_risco,
             recomendacao=recomendacao,
-            interpretacao_detalhada=interpretacao
+            interpretacao_detalhada=interpretacao,
+            versao_modelo=versao.nome,
+            explicacao=explicacao,
+            contexto_geografico=contexto
         )
+        observar_etapa("resposta", "individual", inicio_resposta)
+        return resposta_completa
         
     except Exception as e:
+        if registro_metricas.ativo:
+            metrica_erros.incrementar("/prever", type(e).__name__)
         logging.error(f"Erro na predição: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Erro na predição: {str(e)}")
 
 @app.post("/prever_lote", response_model=RespostaLote)
-def prever_lote(acidentes: List[AcidenteAereo]):
-    """Realiza predições para múltiplos acidentes simultaneamente."""
+def prever_lote(acidentes: List[AcidenteAereo], request: Request, resposta: str = "completa", explicar: int = 0,
+                geografico: bool = False):
+    """
+    Realiza predições para múltiplos acidentes simultaneamente.
+    
+    Com `?resposta=enxuta` os resultados vêm como colunas numéricas
+    (`probabilidade_fatal`, `predicao_numerica`, `codigo_risco`) em vez
+    de um objeto por acidente com os dados de entrada. `?explicar=k`
+    acrescenta a `explicacao` de cada acidente, calculada para o lote inteiro de uma vez,
+    e `?geografico=true` o `contexto_geografico`, consultado no índice também em lote.
+    """
+    verificar_modo_resposta(resposta)
+    inicio = observar_validacao(request, "lote")
+    versao = versao_atual()
+    verificar_explicacao(explicar, versao)
+    verificar_indice_geografico(geografico)
     try:
-        resultados = []
-        probabilidades = []
-        distribuicao = {"CRÍTICO": 0, "ALTO": 0, "MODERADO": 0, "BAIXO": 0}
+        total = len(acidentes)
+        if registro_metricas.ativo:
+            metrica_tamanho_lote.observar(total, "/prever_lote")
+        distribuicao = {nivel: 0 for nivel in NIVEIS_RISCO}
         
-        for acidente in acidentes:
-            X = preprocessar_entrada(acidente)
-            probabilidade = float(modelo.predict_proba(X)[0, 1])
-            predicao = int(probabilidade >= THRESHOLD_OTIMIZADO)
-            nivel_risco = interpretar_risco(probabilidade)
+        if total > 0:
+            probabilidades = prever_probabilidades_lote(acidentes, versao)
+            predicoes = probabilidades >= versao.threshold
+            if avaliador_sombra is not None:
+                avaliador_sombra.espelhar(acidentes, probabilidades, versao.threshold)
+            if monitor_de_drift is not None:
+                monitor_de_drift.observar_registros(acidentes, probabilidades, versao.codificador)
+            codigos = codigos_risco_lote(probabilidades)
             
-            probabilidades.append(probabilidade)
-            distribuicao[nivel_risco] += 1
+            contagens = np.bincount(codigos, minlength=len(NIVEIS_RISCO))
+            for nivel, codigo in CODIGOS_RISCO.items():
+                distribuicao[nivel] = int(contagens[codigo])
             
-            resultados.append({
+            fatais = int(predicoes.sum())
+            prob_media = sum(probabilidades.tolist()) / total
+        else:
+            probabilidades = predicoes = np.empty(0)
+            codigos = np.empty(0, dtype=np.int64)
+            fatais = 0
+            prob_media = 0
+        explicacoes = explicar_lote(acidentes, explicar, versao, "lote") if explicar else None
+        contextos = contexto_geografico_lote(acidentes, "lote") if geografico else None
+        
+        inicio_resposta = time.perf_counter()
+        registrar_evento(
+            "Predição em lote: %d acidentes, %d fatais previstos, prob_media=%.4f",
+            (total, fatais, prob_media),
+            lambda: {
+                "evento": "predicao_lote",
+                "total_acidentes": total,
+                "previstos_fatais": fatais,
+                "probabilidade_media": prob_media,
+                "distribuicao_risco": distribuicao,
+                "threshold": versao.threshold,
+                "versao_modelo": versao.nome,
+                "latencia_ms": round((time.perf_counter() - inicio) * 1000, 3)
+            }
+        )
+        
+        resumo = {
+            "total_acidentes": total,
+            "previstos_fatais": fatais,
+            "previstos_nao_fatais": total - fatais,
+            "taxa_fatalidade_prevista": round(fatais / total * 100, 2) if total > 0 else 0,
+            "probabilidade_media": round(prob_media, 4),
+            "distribuicao_risco": distribuicao
+        }
+        if resposta == "enxuta":
+            conteudo = resposta_json_enxuta({
+                **resumo,
+                "probabilidade_fatal": [round(p, 4) for p in probabilidades.tolist()],
+                "predicao_numerica": predicoes.astype(np.int64).tolist(),
+                "codigo_risco": codigos.tolist(),
+                **({"explicacao": explicacoes} if explicar else {}),
+                **({"contexto_geografico": contextos} if geografico else {})
+            }, versao)
+            observar_etapa("resposta", "lote", inicio_resposta)
+            return conteudo
+        
+        niveis = interpretar_risco_lote(probabilidades) if total > 0 else np.empty(0)
+        resultados = [
+            {
                 "dados_entrada": acidente.model_dump(),
                 "probabilidade_fatal": round(probabilidade, 4),
-                "predicao": "FATAL" if predicao == 1 else "NÃO FATAL",
+                "predicao": "FATAL" if predicao else "NÃO FATAL",
                 "nivel_risco": nivel_risco
-            })
-        
-        total = len(resultados)
-        fatais = sum(1 for r in resultados if r["predicao"] == "FATAL")
-        prob_media = sum(probabilidades) / total if total > 0 else 0
+            }
+            for acidente, probabilidade, predicao, nivel_risco
+            in zip(acidentes, probabilidades.tolist(), predicoes.tolist(), niveis.tolist())
+        ]
+        if explicar:
+            for resultado, explicacao in zip(resultados, explicacoes):
+                resultado["explicacao"] = explicacao
+        if geografico:
+            for resultado, contexto in zip(resultados, contextos):
+                resultado["contexto_geografico"] = contexto
         
-        logging.info(f"Predição em lote: {total} acidentes, {fatais} fatais previstos, prob_media={prob_media:.4f}")
-        
-        return RespostaLote(
-            total_acidentes=total,
-            previstos_fatais=fatais,
-            previstos_nao_fatais=total - fatais,
-            taxa_fatalidade_prevista=round(fatais / total * 100, 2) if total > 0 else 0,
-            probabilidade_media=round(prob_media, 4),
-            distribuicao_risco=distribuicao,
-            resultados=resultados
-        )
+        resposta_completa = RespostaLote(**resumo, resultados=resultados, versao_modelo=versao.nome)
+        observar_etapa("resposta", "lote", inicio_resposta)
+        return resposta_completa
         
     except Exception as e:
+        if registro_metricas.ativo:
+            metrica_erros.incrementar("/prever_lote", type(e).__name__)
         logging.error(f"Erro na predição em lote: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Erro na predição em lote: {str(e)}")
 
+# ==================== PREDIÇÃO COLUNAR ====================
+# Lotes grandes como colunas (JSON, MessagePack ou Arrow IPC): validação vetorizada
+# por coluna em vez de um AcidenteAereo por registro. ?resposta=enxuta devolve só
+# probabilidade_fatal, predicao_numerica e codigo_risco, sem repetir os dados de entrada.
+CAMPOS_FLOAT = [campo for campo, info in AcidenteAereo.model_fields.items() if info.annotation is float]
+CAMPOS_INT = [campo for campo, info in AcidenteAereo.model_fields.items() if info.annotation is int]
+CAMPOS_TEXTO = [campo for campo, info in AcidenteAereo.model_fields.items() if info.annotation is str]
+
+def pontuar_colunas_validas(colunas: dict, total: int, resposta: str, versao: VersaoModelo) -> tuple:
+    """Pontua colunas já validadas; retorna `(saida, resumo, probabilidade_media)` da resposta colunar."""
+    distribuicao = {nivel: 0 for nivel in NIVEIS_RISCO}
+    if total > 0:
+        probabilidades = calcular_probabilidades_colunas(colunas, total, versao)
+        if monitor_de_drift is not None:
+            monitor_de_drift.observar(colunas, probabilidades, versao.codificador)
+        predicoes = (probabilidades >= versao.threshold).astype(np.int64)
+        niveis = interpretar_risco_lote(probabilidades)
+        niveis_unicos, contagens = np.unique(niveis, return_counts=True)
+        for nivel, qtd in zip(niveis_unicos, contagens):
+            distribuicao[str(nivel)] = int(qtd)
+        fatais = int(predicoes.sum())
+        prob_media = sum(probabilidades.tolist()) / total
+    else:
+        probabilidades = np.empty(0)
+        predicoes = np.empty(0, dtype=np.int64)
+        niveis = np.empty(0, dtype=str)
+        fatais = 0
+        prob_media = 0
+    
+    if resposta == "enxuta":
+        saida = {"probabilidade_fatal": probabilidades, "predicao_numerica": predicoes,
+                 "codigo_risco": codigos_risco_lote(probabilidades)}
+    else:
+        saida = {campo: colunas[campo] for campo in AcidenteAereo.model_fields}
+        saida["probabilidade_fatal"] = probabilidades
+        saida["predicao"] = np.where(predicoes == 1, "FATAL", "NÃO FATAL").tolist()
+        saida["predicao_numerica"] = predicoes
+        saida["nivel_risco"] = niveis.tolist()
+    resumo = {
+        "total_acidentes": total,
+        "previstos_fatais": fatais,
+        "previstos_nao_fatais": total - fatais,
+        "taxa_fatalidade_prevista": round(fatais / total * 100, 2) if total > 0 else 0,
+        "probabilidade_media": round(prob_media, 4),
+        "distribuicao_risco": distribuicao,
+        "threshold_utilizado": versao.threshold,
+        "versao_modelo": versao.nome
+    }
+    return saida, resumo, prob_media
+
+def pontuar_colunas(corpo: bytes, formato_entrada: str, formato_saida: str, resposta: str,
+                    versao: VersaoModelo, inicio: float) -> bytes:
+    """Decodifica, valida, pontua e serializa um lote colunar (roda no threadpool)."""
+    try:
+        colunas = decodificar_colunas(corpo, formato_entrada)
+    except ErroValidacaoColunar:
+        raise
+    except Exception as e:
+        raise ErroValidacaoColunar([{"loc": ["body"], "msg": f"Corpo {formato_entrada} inválido: {e}",
+                                     "type": "corpo_invalido"}])
+    inicio_validacao = observar_etapa("decodificacao", "colunar", inicio)
+    colunas, total = validar_colunas(colunas, CAMPOS_FLOAT, CAMPOS_INT, CAMPOS_TEXTO)
+    observar_etapa("validacao", "colunar", inicio_validacao)
+    if registro_metricas.ativo:
+        metrica_tamanho_lote.observar(total, "/prever_colunar")
+    
+    saida, resumo, prob_media = pontuar_colunas_validas(colunas, total, resposta, versao)
+    fatais, distribuicao = resumo["previstos_fatais"], resumo["distribuicao_risco"]
+    
+    registrar_evento(
+        "Predição colunar: %d acidentes, %d fatais previstos, prob_media=%.4f",
+        (total, fatais, prob_media),
+        lambda: {
+            "evento": "predicao_colunar",
+            "total_acidentes": total,
+            "previstos_fatais": fatais,
+            "probabilidade_media": prob_media,
+            "distribuicao_risco": distribuicao,
+            "threshold": versao.threshold,
+            "versao_modelo": versao.nome,
+            "formato_entrada": formato_entrada,
+            "formato_saida": formato_saida,
+            "latencia_ms": round((time.perf_counter() - inicio) * 1000, 3)
+        }
+    )
+    
+    inicio_resposta = time.perf_counter()
+    conteudo = codificar_resposta(saida, resumo, formato_saida)
+    observar_etapa("resposta", "colunar", inicio_resposta)
+    return conteudo
+
+@app.post("/prever_colunar")
+async def prever_colunar(request: Request, resposta: str = "completa"):
+    """
+    Predição em lote com entrada e saída colunares.
+    
+    O formato da entrada vem do `Content-Type` e o da saída do `Accept`
+    (padrão: o mesmo da entrada). As probabilidades saem sem arredondamento.
+    No Arrow o resumo do lote vai nos metadados do schema (chave `resumo`).
+    """
+    formato_entrada = formato_do_tipo(request.headers.get("content-type", "application/json"))
+    if formato_entrada is None:
+        raise HTTPException(status_code=415, detail=f"Content-Type não suportado; use um de {list(TIPO_POR_FORMATO.values())}")
+    if not formato_disponivel(formato_entrada):
+        raise HTTPException(status_code=415, detail=f"Formato {formato_entrada} requer o pacote {DEPENDENCIAS[formato_entrada]}")
+    formato_saida = negociar_formato_saida(request.headers.get("accept", ""), formato_entrada)
+    if formato_saida is None:
+        raise HTTPException(status_code=406, detail=f"Nenhum formato aceito disponível; use um de {list(TIPO_POR_FORMATO.values())}")
+    verificar_modo_resposta(resposta)
+    
+    corpo = await request.body()
+    # Inclui a leitura do corpo; decodificação e validação são medidas à parte
+    inicio = observar_validacao(request, "colunar")
+    versao = versao_atual()
+    try:
+        conteudo = await run_in_threadpool(
+            pontuar_colunas, corpo, formato_entrada, formato_saida, resposta, versao, inicio
+        )
+    except ErroValidacaoColunar as e:
+        raise HTTPException(status_code=422, detail=e.erros)
+    except Exception as e:
+        if registro_metricas.ativo:
+            metrica_erros.incrementar("/prever_colunar", type(e).__name__)
+        logging.error(f"Erro na predição colunar: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Erro na predição colunar: {str(e)}")
+    
+    return Response(conteudo, media_type=TIPO_POR_FORMATO[formato_saida],
+                     headers={"X-Versao-Modelo": versao.nome})
+
+# ==================== INGESTÃO DE REGISTROS BRUTOS ====================
+# Linhas no formato do CENIPA (docs/teste.csv), com nulos: a limpeza de
+# testar_api_real.py roda no servidor, vetorizada, e os nulos recebem os valores
+# persistidos dos imputers da versão (nunca mediana/moda do próprio lote).
+def pontuar_registros_brutos(corpo: bytes, formato_entrada: str, formato_saida: str, resposta: str,
+                             versao: VersaoModelo, valores_imputacao: dict, inicio: float) -> bytes:
+    """Lê, limpa, imputa, valida, pontua e serializa um lote bruto (roda no threadpool)."""
+    try:
+        df = ler_dataframe_bruto(corpo, formato_entrada)
+    except Exception as e:
+        raise ErroValidacaoColunar([{"loc": ["body"], "msg": f"Corpo {formato_entrada} inválido: {e}",
+                                     "type": "corpo_invalido"}])
+    if df.empty:
+        df = df.reindex(columns=list(AcidenteAereo.model_fields))
+    inicio_imputacao = observar_etapa("decodificacao", "bruto", inicio)
+    imputados = {}
+    df = limpar_dataframe_bruto(df, valores_imputacao, COLUNAS_CATEGORICAS, imputados)
+    inicio_validacao = observar_etapa("imputacao", "bruto", inicio_imputacao)
+    
+    # Nulos que sobraram (coluna sem imputer) viram None para a validação colunar apontar a linha
+    colunas = {}
+    for campo in AcidenteAereo.model_fields:
+        if campo not in df.columns:
+            continue
+        serie = df[campo]
+        if campo in CAMPOS_TEXTO:
+            colunas[campo] = serie.astype(str).tolist()
+        elif serie.isna().any():
+            colunas[campo] = serie.astype(object).where(serie.notna(), None).tolist()
+        else:
+            colunas[campo] = serie.to_numpy()
+    colunas, total = validar_colunas(colunas, CAMPOS_FLOAT, CAMPOS_INT, CAMPOS_TEXTO)
+    observar_etapa("validacao", "bruto", inicio_validacao)
+    if registro_metricas.ativo:
+        metrica_tamanho_lote.observar(total, "/prever_bruto")
+    
+    saida, resumo, prob_media = pontuar_colunas_validas(colunas, total, resposta, versao)
+    resumo["valores_imputados"] = {campo: imputados[campo] for campo in AcidenteAereo.model_fields
+                                   if campo in imputados}
+    
+    registrar_evento(
+        "Predição de registros brutos: %d acidentes, %d fatais previstos, %d valores imputados",
+        (total, resumo["previstos_fatais"], sum(resumo["valores_imputados"].values())),
+        lambda: {
+            "evento": "predicao_bruta",
+            "total_acidentes": total,
+            "previstos_fatais": resumo["previstos_fatais"],
+            "probabilidade_media": prob_media,
+            "distribuicao_risco": resumo["distribuicao_risco"],
+            "valores_imputados": resumo["valores_imputados"],
+            "threshold": versao.threshold,
+            "versao_modelo": versao.nome,
+            "formato_entrada": formato_entrada,
+            "latencia_ms": round((time.perf_counter() - inicio) * 1000, 3)
+        }
+    )
+    
+    inicio_resposta = time.perf_counter()
+    conteudo = codificar_resposta(saida, resumo, formato_saida)
+    observar_etapa("resposta", "bruto", inicio_resposta)
+    return conteudo
+
+@app.post("/prever_bruto")
+async def prever_bruto(request: Request, resposta: str = "completa"):
+    """
+    Pontua registros brutos no formato de `docs/teste.csv`, aceitando nulos.
+    
+    Entrada: CSV com cabeçalho (`text/csv`) ou lista JSON de objetos. Trata
+    vírgula decimal e `dt_ocorrencia` e preenche nulos com os imputers
+    persistidos da versão. A resposta segue `/prever_colunar` (JSON,
+    MessagePack ou Arrow pelo `Accept`), com os valores já limpos e a
+    contagem de `valores_imputados` por campo no resumo.
+    """
+    formato_entrada = "csv" if "csv" in request.headers.get("content-type", "") else "json"
+    formato_saida = negociar_formato_saida(request.headers.get("accept", ""), "json")
+    if formato_saida is None:
+        raise HTTPException(status_code=406, detail=f"Nenhum formato aceito disponível; use um de {list(TIPO_POR_FORMATO.values())}")
+    verificar_modo_resposta(resposta)
+    
+    corpo = await request.body()
+    inicio = observar_validacao(request, "bruto")
+    versao = versao_atual()
+    try:
+        valores_imputacao = await run_in_threadpool(versao.imputacao)
+        if not valores_imputacao:
+            raise HTTPException(status_code=409, detail=f"Versão {versao.nome} não tem imputer_mediana.pkl/imputer_moda.pkl")
+        conteudo = await run_in_threadpool(
+            pontuar_registros_brutos, corpo, formato_entrada, formato_saida, resposta, versao,
+            valores_imputacao, inicio
+        )
+    except HTTPException:
+        raise
+    except ErroValidacaoColunar as e:
+        raise HTTPException(status_code=422, detail=e.erros)
+    except Exception as e:
+        if registro_metricas.ativo:
+            metrica_erros.incrementar("/prever_bruto", type(e).__name__)
+        logging.error(f"Erro na predição de registros brutos: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Erro na predição de registros brutos: {str(e)}")
+    
+    return Response(conteudo, media_type=TIPO_POR_FORMATO[formato_saida],
+                     headers={"X-Versao-Modelo": versao.nome})
+
+# ==================== PREDIÇÃO EM STREAMING ====================
+# Registros pontuados por bloco; a memória fica limitada a um bloco por requisição
+TAMANHO_BLOCO_STREAM = int(os.getenv("TAMANHO_BLOCO_STREAM", "5000"))
+COLUNAS_SAIDA_STREAM = ["linha", "probabilidade_fatal", "predicao", "predicao_numerica", "nivel_risco", "erro"]
+
+class RespostaStreamingComUpload(StreamingResponse):
+    """
+    StreamingResponse que pode ler o corpo da requisição enquanto responde.
+    
+    A versão padrão escuta `http.disconnect` em paralelo (ASGI < 2.4, caso do
+    uvicorn) e consome as mensagens do upload, travando `request.stream()`.
+    Aqui só o gerador lê o `receive`; uma desconexão aparece como
+    `ClientDisconnect` na leitura do upload.
+    """
+    
+    async def __call__(self, scope, receive, send) -> None:
+        await self.stream_response(send)
+        if self.background is not None:
+            await self.background()
+
+def descrever_erro_validacao(erro: Exception) -> str:
+    """Mensagem curta para uma linha rejeitada no streaming."""
+    if isinstance(erro, ValidationError):
+        return "; ".join(
+            f"{'.'.join(str(parte) for parte in detalhe['loc'])}: {detalhe['msg']}"
+            for detalhe in erro.errors()
+        )
+    return str(erro)
+
+class ResumoStream:
+    """Estatísticas agregadas de uma pontuação em streaming."""
+    
+    def __init__(self, versao_modelo: str):
+        self.versao_modelo = versao_modelo
+        self.total_linhas = 0
+        self.pontuados = 0
+        self.erros = 0
+        self.previstos_fatais = 0
+        self.soma_probabilidades = 0.0
+        self.distribuicao = {nivel: 0 for nivel in NIVEIS_RISCO}
+    
+    def como_dict(self) -> dict:
+        return {
+            "total_linhas": self.total_linhas,
+            "pontuados": self.pontuados,
+            "erros": self.erros,
+            "previstos_fatais": self.previstos_fatais,
+            "previstos_nao_fatais": self.pontuados - self.previstos_fatais,
+            "probabilidade_media": round(self.soma_probabilidades / self.pontuados, 4) if self.pontuados > 0 else 0,
+            "distribuicao_risco": self.distribuicao,
+            "versao_modelo": self.versao_modelo
+        }
+
+def pontuar_bloco_stream(bloco: list, resumo: ResumoStream, versao: VersaoModelo) -> List[list]:
+    """
+    Pontua um bloco de (linha, AcidenteAereo | mensagem de erro) em uma única
+    chamada vetorizada e devolve as linhas de saída na ordem de entrada.
+    """
+    validos = [item for _, item in bloco if isinstance(item, AcidenteAereo)]
+    if registro_metricas.ativo:
+        metrica_tamanho_lote.observar(len(bloco), "/prever_stream")
+    if validos:
+        probabilidades = calcular_probabilidades_lote(validos, versao)
+        if monitor_de_drift is not None:
+            monitor_de_drift.observar_registros(validos, probabilidades, versao.codificador)
+        predicoes = probabilidades >= versao.threshold
+        niveis = interpretar_risco_lote(probabilidades)
+        
+        resumo.pontuados += len(validos)
+        resumo.previstos_fatais += int(predicoes.sum())
+        resumo.soma_probabilidades += sum(probabilidades.tolist())
+        niveis_unicos, contagens = np.unique(niveis, return_counts=True)
+        for nivel, qtd in zip(niveis_unicos, contagens):
+            resumo.distribuicao[str(nivel)] += int(qtd)
+        
+        pontuacoes = iter(zip(probabilidades.tolist(), predicoes.tolist(), niveis.tolist()))
+    
+    saida = []
+    for numero_linha, item in bloco:
+        if isinstance(item, AcidenteAereo):
+            probabilidade, predicao, nivel_risco = next(pontuacoes)
+            saida.append([numero_linha, round(probabilidade, 4), "FATAL" if predicao else "NÃO FATAL",
+                          int(predicao), nivel_risco, ""])
+        else:
+            resumo.erros += 1
+            saida.append([numero_linha, None, None, None, None, item])
+    return saida
+
+def serializar_saida_stream(linhas: List[list], formato: str) -> str:
+    """Converte linhas de saída para NDJSON ou CSV."""
+    if formato == "csv":
+        return escrever_csv([["" if v is None else v for v in linha] for linha in linhas])
+    partes = []
+    for linha in linhas:
+        if linha[-1]:
+            registro = {"linha": linha[0], "erro": linha[-1]}
+        else:
+            registro = dict(zip(COLUNAS_SAIDA_STREAM[:-1], linha[:-1]))
+        partes.append(json.dumps(registro, ensure_ascii=False) + "\n")
+    return "".join(partes)
+
+@app.post("/prever_stream")
+async def prever_stream(request: Request, formato_saida: Optional[str] = None):
+    """
+    Pontua um upload NDJSON ou CSV (formato de `docs/teste.csv`) em streaming.
+    
+    A entrada é lida em blocos de `TAMANHO_BLOCO_STREAM` registros, cada bloco
+    é pontuado de forma vetorizada e o resultado é devolvido imediatamente
+    como NDJSON ou CSV. O resumo agregado é a última linha da resposta.
+    A versão do modelo fica fixa durante todo o upload (cabeçalho `X-Versao-Modelo`).
+    """
+    tipo_conteudo = request.headers.get("content-type", "")
+    formato_entrada = "csv" if "csv" in tipo_conteudo else "ndjson"
+    if formato_saida is None:
+        formato_saida = "csv" if "text/csv" in request.headers.get("accept", "") else "ndjson"
+    if formato_saida not in ("ndjson", "csv"):
+        raise HTTPException(status_code=400, detail=f"formato_saida inválido: {formato_saida}")
+    versao = versao_atual()
+    
+    async def gerar_respostas():
+        inicio = time.perf_counter()
+        leitor = LeitorRegistros(formato_entrada)
+        resumo = ResumoStream(versao.nome)
+        bloco = []
+        
+        if formato_saida == "csv":
+            yield escrever_csv([COLUNAS_SAIDA_STREAM])
+        
+        async for linha in iterar_linhas(request.stream()):
+            try:
+                registro = leitor.interpretar(linha)
+                if registro is None:
+                    continue
+                item = AcidenteAereo.model_validate(normalizar_registro_bruto(registro))
+            except (ValidationError, ValueError) as e:
+                item = descrever_erro_validacao(e)
+                if registro_metricas.ativo:
+                    metrica_erros.incrementar("/prever_stream", "linha_invalida")
+            resumo.total_linhas += 1
+            bloco.append((resumo.total_linhas, item))
+            
+            if len(bloco) >= TAMANHO_BLOCO_STREAM:
+                saida = await run_in_threadpool(pontuar_bloco_stream, bloco, resumo, versao)
+                yield serializar_saida_stream(saida, formato_saida)
+                bloco = []
+        
+        if bloco:
+            saida = await run_in_threadpool(pontuar_bloco_stream, bloco, resumo, versao)
+            yield serializar_saida_stream(saida, formato_saida)
+        
+        estatisticas = resumo.como_dict()
+        if formato_saida == "csv":
+            yield "# resumo: " + json.dumps(estatisticas, ensure_ascii=False) + "\n"
+        else:
+            yield json.dumps({"resumo": estatisticas}, ensure_ascii=False) + "\n"
+        
+        registrar_evento(
+            "Predição em streaming: %d linhas, %d pontuadas, %d erros, %d fatais previstos",
+            (resumo.total_linhas, resumo.pontuados, resumo.erros, resumo.previstos_fatais),
+            lambda: {
+                "evento": "predicao_stream",
+                **estatisticas,
+                "threshold": versao.threshold,
+                "latencia_ms": round((time.perf_counter() - inicio) * 1000, 3)
+            }
+        )
+    
+    tipo_saida = "text/csv" if formato_saida == "csv" else "application/x-ndjson"
+    return RespostaStreamingComUpload(gerar_respostas(), media_type=tipo_saida,
+                                      headers={"X-Versao-Modelo": versao.nome})
+
+# ==================== ADMINISTRAÇÃO DE VERSÕES ====================
+def verificar_token_admin(token: Optional[str]) -> None:
+    """Exige o cabeçalho `X-Admin-Token` quando ADMIN_TOKEN estiver configurado."""
+    if ADMIN_TOKEN and token != ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Token de administração inválido")
+
+@app.get("/admin/versoes")
+def listar_versoes_modelo(x_admin_token: Optional[str] = Header(default=None)):
+    """Versão ativa e versões disponíveis no registro."""
+    verificar_token_admin(x_admin_token)
+    return {
+        "registro": registro_modelos.diretorio,
+        "versao_apontada": registro_modelos.versao_ativa(),
+        "versoes_disponiveis": registro_modelos.listar_versoes(),
+        "ativa": versao_atual().descricao(),
+        "observador_ativo": observador_registro is not None
+    }
+
+@app.post("/admin/recarregar")
+def recarregar_versao_modelo(versao: Optional[str] = None, x_admin_token: Optional[str] = Header(default=None)):
+    """
+    Carrega, valida e aquece uma versão do registro e só então a torna ativa.
+    
+    Sem `versao`, recarrega a versão apontada por `ATIVA` (ou os arquivos
+    locais, sem registro). Com `versao`, também atualiza o ponteiro.
+    Requisições em andamento terminam com a versão com que começaram.
+    """
+    verificar_token_admin(x_admin_token)
+    try:
+        return recarregar_modelo(versao, persistir=versao is not None)
+    except (FileNotFoundError, ValueError) as e:
+        raise HTTPException(status_code=404 if isinstance(e, FileNotFoundError) else 422, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erro ao carregar versão: {str(e)}")
+
+# ==================== FEEDBACK E RETREINO INCREMENTAL ====================
+# POST /feedback acrescenta desfechos rotulados em FEEDBACK_ARQUIVO (NDJSON).
+# POST /admin/candidato treina só o feedback ainda não visto (estado em
+# TREINO_INCREMENTAL_DIR) e publica o candidato no registro sem ativá-lo;
+# a promoção é feita com POST /admin/recarregar?versao=<candidato>.
+FEEDBACK_ARQUIVO = os.getenv("FEEDBACK_ARQUIVO", "feedback.ndjson")
+TREINO_INCREMENTAL_DIR = os.getenv("TREINO_INCREMENTAL_DIR", "treino_incremental")
+arquivo_feedback = ArquivoFeedback(FEEDBACK_ARQUIVO)
+_trava_treino_incremental = threading.Lock()
+
+@app.post("/feedback")
+def registrar_feedback(feedbacks: List[FeedbackAcidente]):
+    """Recebe o desfecho real (`les_fatais_trip`) de acidentes já ocorridos."""
+    if not feedbacks:
+        raise HTTPException(status_code=400, detail="Lista de feedback vazia")
+    versao = versao_atual()
+    recebido_em = datetime.now().isoformat()
+    arquivo_feedback.anexar([
+        {**f.model_dump(), "versao_modelo": versao.nome, "recebido_em": recebido_em} for f in feedbacks
+    ])
+    fatais = sum(f.les_fatais_trip for f in feedbacks)
+    if registro_metricas.ativo:
+        for rotulo, quantidade in (("1", fatais), ("0", len(feedbacks) - fatais)):
+            if quantidade:
+                metrica_feedback.incrementar(rotulo, valor=quantidade)
+    logging.info("Feedback recebido: %d registros (%d fatais)", len(feedbacks), fatais)
+    return {"recebidos": len(feedbacks), "fatais": fatais, "arquivo": FEEDBACK_ARQUIVO}
+
+@app.post("/admin/candidato")
+def treinar_candidato(x_admin_token: Optional[str] = Header(default=None)):
+    """
+    Atualiza o modelo incremental com o feedback novo e publica um candidato.
+    
+    A resposta traz a avaliação do candidato e da versão ativa na reserva
+    (feedback nunca usado no treino). Nada muda no serviço até a promoção.
+    """
+    verificar_token_admin(x_admin_token)
+    if not _trava_treino_incremental.acquire(blocking=False):
+        raise HTTPException(status_code=409, detail="Treino incremental já em andamento")
+    try:
+        versao = versao_atual()
+        artefatos = ArtefatosModelo(versao.modelo, versao.scaler, versao.colunas_treino, versao.threshold,
+                                    versao.f1_score, versao.formato)
+        resultado = gerar_candidato(arquivo_feedback, TREINO_INCREMENTAL_DIR, artefatos, versao.nome,
+                                    registro_modelos, versao.diretorio)
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except Exception as e:
+        logging.error("Erro no treino incremental: %s", e)
+        raise HTTPException(status_code=500, detail=f"Erro no treino incremental: {str(e)}")
+    finally:
+        _trava_treino_incremental.release()
+    logging.info("Candidato incremental %s publicado (base %s, %d registros novos)",
+                 resultado["candidato"], resultado["versao_base"], resultado["treinados_agora"])
+    return resultado
+
+# ==================== ENDPOINT /metrics ====================
+registro_metricas.medidor(
+    "api_cache_predicoes", "Estatísticas do cache de predições",
+    lambda: {(chave,): float(valor) for chave, valor in cache_predicoes.estatisticas().items()
+             if isinstance(valor, (int, float)) and not isinstance(valor, bool)},
+    ("estatistica",)
+)
+registro_metricas.medidor(
+    "api_modelo_versao_ativa", "Versão do modelo em uso (valor sempre 1)",
+    lambda: {(versao_atual().nome,): 1.0},
+    ("versao",)
+)
+registro_metricas.medidor(
+    "api_log_fila", "Estatísticas do pipeline de log",
+    lambda: {(chave,): float(valor) for chave, valor in pipeline_log.estatisticas().items()
+             if isinstance(valor, (int, float))},
+    ("estatistica",)
+)
+
+# ==================== MONITOR DE DRIFT ====================
+# Entradas e probabilidades de produção contra linha_base_drift.json (notebook ou
+# `python monitor_drift.py exportar`). Os endpoints observam toda probabilidade
+# servida, inclusive acertos do cache de predições. A requisição só enfileira; os
+# histogramas são atualizados em segundo plano. Com vários workers, os estados vão para
+# METRICAS_DIRETORIO e /drift soma todos. Desative com DRIFT_ATIVO=0.
+DRIFT_ATIVO = os.getenv("DRIFT_ATIVO", "1") == "1"
+DRIFT_LINHA_BASE = os.getenv("DRIFT_LINHA_BASE", LINHA_BASE_PATH)
+
+def criar_monitor_drift() -> Optional[MonitorDrift]:
+    if not DRIFT_ATIVO:
+        return None
+    if not os.path.isfile(DRIFT_LINHA_BASE):
+        print(f"⚠️ Monitor de drift desligado: {DRIFT_LINHA_BASE} não encontrado")
+        return None
+    monitor = MonitorDrift(
+        carregar_linha_base(DRIFT_LINHA_BASE),
+        capacidade_fila=int(os.getenv("DRIFT_CAPACIDADE_FILA", "10000")),
+        diretorio=os.getenv("METRICAS_DIRETORIO") or None,
+        intervalo=float(os.getenv("METRICAS_INTERVALO_AGREGACAO", "5"))
+    )
+    print(f"✓ Monitor de drift ativo (linha de base: {DRIFT_LINHA_BASE})")
+    return monitor
+
+monitor_de_drift = criar_monitor_drift()
+if monitor_de_drift is not None and not PRE_FORK:
+    monitor_de_drift.iniciar()
+
+@app.get("/drift")
+def relatorio_drift():
+    """
+    PSI/KS de cada campo e da probabilidade contra o treino, taxa de
+    categorias fora de `colunas_treino` por campo e alertas.
+    """
+    if monitor_de_drift is None:
+        raise HTTPException(status_code=404, detail="Monitor de drift desligado (DRIFT_ATIVO=0 ou sem linha de base)")
+    return {**monitor_de_drift.relatorio(), "versao_modelo": versao_atual().nome}
+
+# ==================== AVALIAÇÃO EM SOMBRA ====================
+# SOMBRA_DESAFIANTES="nome=diretorio,versao_do_registro" liga a comparação campeão ×
+# desafiantes: uma fração SOMBRA_AMOSTRA das requisições de /prever e /prever_lote
+# vai para uma fila limitada (SOMBRA_CAPACIDADE_FILA) e SOMBRA_WORKERS threads
+# pontuam com os desafiantes depois da resposta. Fila cheia descarta, nunca espera.
+SOMBRA_DESAFIANTES = os.getenv("SOMBRA_DESAFIANTES", "")
+
+def resolver_desafiante(item: str) -> str:
+    """Versão do registro (se existir com esse nome) ou diretório de artefatos."""
+    if item in registro_modelos.listar_versoes():
+        return registro_modelos.caminho(item)
+    if not os.path.isdir(item):
+        raise FileNotFoundError(f"Desafiante não encontrado no registro nem como diretório: {item}")
+    return item
+
+def criar_avaliador_sombra() -> Optional[AvaliadorSombra]:
+    if not SOMBRA_DESAFIANTES.strip():
+        return None
+    try:
+        desafiantes = carregar_desafiantes(SOMBRA_DESAFIANTES, resolver_desafiante, FORMATO_ARTEFATOS)
+    except Exception as e:
+        print(f"⚠️ Avaliação em sombra desligada: {e}")
+        logging.warning("Avaliação em sombra desligada: %s", e)
+        return None
+    avaliador = AvaliadorSombra(
+        desafiantes,
+        amostra=float(os.getenv("SOMBRA_AMOSTRA", "0.1")),
+        capacidade_fila=int(os.getenv("SOMBRA_CAPACIDADE_FILA", "1000")),
+        workers=int(os.getenv("SOMBRA_WORKERS", "1")),
+        diretorio=os.getenv("METRICAS_DIRETORIO") or None,
+        intervalo=float(os.getenv("METRICAS_INTERVALO_AGREGACAO", "5"))
+    )
+    print(f"✓ Avaliação em sombra ativa: {', '.join(d.nome for d in desafiantes)} "
+          f"(amostra {avaliador.amostra:.0%})")
+    return avaliador
+
+avaliador_sombra = criar_avaliador_sombra()
+if avaliador_sombra is not None and not PRE_FORK:
+    avaliador_sombra.iniciar()
+
+@app.get("/sombra")
+def relatorio_sombra():
+    """
+    Comparação do campeão com cada desafiante no tráfego amostrado:
+    concordância da classe, diferença de probabilidade e latência.
+    """
+    if avaliador_sombra is None:
+        raise HTTPException(status_code=404, detail="Avaliação em sombra desligada (SOMBRA_DESAFIANTES vazio)")
+    return {**avaliador_sombra.relatorio(), "versao_modelo": versao_atual().nome}
+
+# Com vários workers (servidor.py) cada processo grava um snapshot em METRICAS_DIRETORIO
+# e qualquer worker responde /metrics com a soma de todos
+agregador_metricas = None
+if os.getenv("METRICAS_DIRETORIO"):
+    agregador_metricas = AgregadorMultiprocesso(
+        registro_metricas, os.getenv("METRICAS_DIRETORIO"),
+        intervalo=float(os.getenv("METRICAS_INTERVALO_AGREGACAO", "5"))
+    )
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def exportar_metricas():
+    """Métricas no formato texto do Prometheus (para scrape)."""
+    texto = agregador_metricas.exportar() if agregador_metricas else registro_metricas.exportar()
+    return PlainTextResponse(texto, media_type="text/plain; version=0.0.4")
+
+app.add_middleware(
+    MiddlewareMetricas,
+    registro=registro_metricas,
+    requisicoes=metrica_requisicoes,
+    latencia=metrica_latencia_requisicao,
+    rotas=[rota.path for rota in app.routes]
+)
+
+# ==================== MODO MULTIPROCESSO ====================
+def iniciar_worker(fila_log=None) -> None:
+    """
+    Chamado em cada worker logo após o fork (ver `servidor.py`).
+    
+    Modelo, scaler e codificador já vieram carregados do processo principal;
+    aqui só sobem as threads, que não sobrevivem ao fork: envio do log ao
+    processo principal, snapshot de métricas, monitor de drift, avaliação em sombra
+    e observador do registro.
+    """
+    global observador_registro
+    if fila_log is not None:
+        pipeline_log.redirecionar_para_processo_principal(fila_log)
+    if agregador_metricas is not None:
+        agregador_metricas.iniciar()
+    if monitor_de_drift is not None:
+        monitor_de_drift.iniciar()
+    if avaliador_sombra is not None:
+        avaliador_sombra.iniciar()
+    observador_registro = iniciar_observador_registro()
+
+def encerrar_worker() -> None:
+    """Entrega o log pendente e grava os snapshots finais de métricas, drift e sombra do worker."""
+    if observador_registro is not None:
+        observador_registro.parar()
+    if agregador_metricas is not None:
+        agregador_metricas.parar()
+    if monitor_de_drift is not None:
+        monitor_de_drift.parar()
+    if avaliador_sombra is not None:
+        avaliador_sombra.parar()
+    pipeline_log.parar()
+
 # ==================== EXECUÇÃO ====================
 if __name__ == "__main__":
     import uvicorn
     print("\n" + "="*70)
     print("🚀 INICIANDO API DE PREDIÇÃO DE ACIDENTES AÉREOS FATAIS")
     print("="*70)
-    print(f"📊 Threshold: {THRESHOLD_OTIMIZADO:.4f}")
-    print(f"📈 F1-Score: {F1_SCORE_OTIMIZADO:.4f}" if F1_SCORE_OTIMIZADO else "")
-    print(f"🔢 Features: {len(colunas_treino)}")
+    versao = versao_atual()
+    print(f"🏷️ Versão do modelo: {versao.nome}")
+    print(f"📊 Threshold: {versao.threshold:.4f}")
+    print(f"📈 F1-Score: {versao.f1_score:.4f}" if versao.f1_score else "")
+    print(f"🔢 Features: {len(versao.colunas_treino)}")
     print("="*70)
     print("\n🌐 Acesse:")
     print("   • API: http://localhost:8000")
@@ -0,0 +1,209 @@
+import hashlib
+import logging
+import os
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from codificador import CodificadorCompilado, PontuadorEsparso, sparse
+from pacote_modelo import PACOTE_PATH, carregar_pacote, ler_cabecalho_pacote
+
+# ==================== ESQUEMA DAS FEATURES ====================
+COLUNAS_CATEGORICAS = ['fase_operacao', 'cat_aeronave', 'regiao', 'uf',
+                       'modelo_aeronave', 'nome_fabricante']
+CAMPOS_NUMERICOS = ['latitude', 'longitude', 'peso_max_decolagem', 'numero_assentos',
+                    'ano_ocorrencia', 'mes_ocorrencia']
+CAMPO_ROTULO = 'les_fatais_trip'
+# Registro realista: exemplo do Swagger e base das verificações de paridade
+EXEMPLO_ACIDENTE = {
+    "latitude": -23.5505,
+    "longitude": -46.6333,
+    "peso_max_decolagem": 5700.0,
+    "numero_assentos": 9,
+    "fase_operacao": "DECOLAGEM",
+    "cat_aeronave": "AVIÃO",
+    "regiao": "SUDESTE",
+    "uf": "SP",
+    "modelo_aeronave": "EMB-110",
+    "nome_fabricante": "EMBRAER",
+    "ano_ocorrencia": 2023,
+    "mes_ocorrencia": 6
+}
+
+NIVEIS_RISCO = ["CRÍTICO", "ALTO", "MODERADO", "BAIXO"]
+LIMITES_RISCO = [0.70, 0.50, 0.30]
+# Código numérico do nível nas respostas enxutas: 0 = BAIXO ... 3 = CRÍTICO
+CODIGOS_RISCO = {nivel: codigo for codigo, nivel in enumerate(reversed(NIVEIS_RISCO))}
+
+# ==================== ARQUIVOS EXPORTADOS PELO NOTEBOOK ====================
+MODELO_PATH = "modelo_lr.pkl"
+SCALER_PATH = "scaler.pkl"
+COLUNAS_PATH = "colunas_treino.pkl"
+THRESHOLD_PATH = "threshold_otimizado.txt"
+IMPUTER_MEDIANA_PATH = "imputer_mediana.pkl"
+IMPUTER_MODA_PATH = "imputer_moda.pkl"
+THRESHOLD_PADRAO = 0.26
+FORMATOS_ARTEFATOS = ("auto", "pacote", "pickle")
+# Arquivos que definem o modelo servido; a impressão deles vai no cabeçalho do pacote
+ARQUIVOS_IMPRESSAO = (MODELO_PATH, SCALER_PATH, COLUNAS_PATH, THRESHOLD_PATH)
+
+
+def ler_threshold(caminho: str) -> Tuple[float, Optional[float]]:
+    """
+    Lê `threshold_otimizado.txt` (linhas `THRESHOLD_OTIMIZADO = x` e `F1-SCORE = y`).
+
+    Levanta FileNotFoundError se o arquivo não existir.
+    """
+    with open(caminho, "r") as f:
+        linhas = f.readlines()
+    threshold = float(linhas[0].split("=")[1].strip())
+    f1_score = float(linhas[1].split("=")[1].strip()) if len(linhas) > 1 else None
+    return threshold, f1_score
+
+
+def impressao_pickles(diretorio: str) -> Optional[str]:
+    """
+    SHA-256 do conteúdo dos pickles e do threshold de `diretorio`, ou None
+    se não houver `modelo_lr.pkl`.
+    """
+    if not os.path.isfile(os.path.join(diretorio, MODELO_PATH)):
+        return None
+    resumo = hashlib.sha256()
+    for nome in ARQUIVOS_IMPRESSAO:
+        caminho = os.path.join(diretorio, nome)
+        resumo.update(nome.encode("utf-8") + b"\0")
+        if os.path.isfile(caminho):
+            with open(caminho, "rb") as f:
+                resumo.update(f.read())
+        resumo.update(b"\0")
+    return resumo.hexdigest()
+
+
+def pacote_atualizado(diretorio: str, caminho_pacote: str) -> bool:
+    """
+    True se o pacote foi gerado a partir dos pickles presentes em `diretorio`
+    (ou se não há pickles para comparar).
+
+    Um pacote sem impressão, ou com impressão diferente, indica pickles
+    reexportados sem `python pacote_modelo.py exportar`.
+    """
+    atual = impressao_pickles(diretorio)
+    if atual is None:
+        return True
+    return ler_cabecalho_pacote(caminho_pacote).get("impressao_pickles") == atual
+
+
+def interpretar_risco_lote(probabilidades: np.ndarray) -> np.ndarray:
+    """Classifica vários níveis de risco de uma vez (mesmos limites de `interpretar_risco`)."""
+    condicoes = [probabilidades >= limite for limite in LIMITES_RISCO]
+    return np.select(condicoes, NIVEIS_RISCO[:-1], default=NIVEIS_RISCO[-1])
+
+
+def codigos_risco_lote(probabilidades: np.ndarray) -> np.ndarray:
+    """
+    Códigos de `CODIGOS_RISCO` sem passar pelos textos dos níveis.
+
+    Probabilidade NaN não passa em nenhum limite e fica em BAIXO, como em
+    `interpretar_risco` e `interpretar_risco_lote` (o `searchsorted` puro a
+    ordenaria depois de todos os limites, em CRÍTICO).
+    """
+    probabilidades = np.asarray(probabilidades, dtype=np.float64)
+    codigos = np.searchsorted(sorted(LIMITES_RISCO), probabilidades, side="right")
+    codigos[np.isnan(probabilidades)] = CODIGOS_RISCO[NIVEIS_RISCO[-1]]
+    return codigos
+
+
+class ArtefatosModelo:
+    """
+    Modelo, scaler, colunas e threshold carregados juntos, com o codificador compilado.
+
+    Para regressões logísticas binárias (e com scipy instalado) a pontuação usa a
+    codificação esparsa, cujo custo não depende do tamanho do vocabulário.
+    """
+
+    def __init__(self, modelo, scaler, colunas_treino: List[str], threshold: float,
+                 f1_score: Optional[float] = None, formato: str = "pickle"):
+        self.modelo = modelo
+        self.scaler = scaler
+        self.colunas_treino = colunas_treino
+        self.threshold = threshold
+        self.f1_score = f1_score
+        self.formato = formato
+        self.codificador = CodificadorCompilado.a_partir_do_scaler(
+            colunas_treino, scaler, CAMPOS_NUMERICOS, COLUNAS_CATEGORICAS
+        )
+        self.pontuador_esparso = self._criar_pontuador_esparso()
+
+    def _criar_pontuador_esparso(self) -> Optional[PontuadorEsparso]:
+        """Retorna o pontuador esparso ou None se o modelo não é linear binário."""
+        coef = getattr(self.modelo, "coef_", None)
+        if sparse is None or coef is None or np.shape(coef)[0] != 1:
+            return None
+        return PontuadorEsparso.a_partir_do_modelo(self.codificador, self.modelo)
+
+    def probabilidades(self, registros: List[Dict]) -> np.ndarray:
+        """Probabilidade de fatalidade de cada registro (campos de `AcidenteAereo`)."""
+        if not registros:
+            return np.empty(0)
+        if self.pontuador_esparso is not None:
+            return self.pontuador_esparso.probabilidades_lote(registros)
+        return self.modelo.predict_proba(self.codificador.codificar_lote(registros))[:, 1]
+
+    def probabilidades_colunas(self, colunas: Dict, n: int) -> np.ndarray:
+        """Igual a `probabilidades`, recebendo os dados por coluna (ex.: um DataFrame)."""
+        if n == 0:
+            return np.empty(0)
+        if self.pontuador_esparso is not None:
+            return self.pontuador_esparso.probabilidades_colunas(colunas, n)
+        return self.modelo.predict_proba(self.codificador.codificar_colunas(colunas, n))[:, 1]
+
+
+def carregar_artefatos(diretorio: str = ".", formato: str = "auto") -> ArtefatosModelo:
+    """
+    Carrega os artefatos exportados pelo notebook a partir de `diretorio`.
+
+    `formato="pacote"` lê `modelo_pacote.bin` (sem scikit-learn); `"pickle"`
+    lê os arquivos do joblib; `"auto"` prefere o pacote quando ele existe e
+    foi gerado a partir dos pickles atuais do diretório.
+    """
+    if formato not in FORMATOS_ARTEFATOS:
+        raise ValueError(f"Formato de artefatos inválido: {formato}")
+    caminho_pacote = os.path.join(diretorio, PACOTE_PATH)
+    if formato == "auto" and os.path.isfile(caminho_pacote) and not pacote_atualizado(diretorio, caminho_pacote):
+        print(f"⚠️ {caminho_pacote} não corresponde aos pickles de {diretorio}. Usando os pickles; "
+              f"regenere com: python pacote_modelo.py exportar {diretorio}")
+        logging.warning("Pacote %s desatualizado em relação aos pickles; carregando os pickles", caminho_pacote)
+        formato = "pickle"
+    if formato == "pacote" or (formato == "auto" and os.path.isfile(caminho_pacote)):
+        modelo, scaler, colunas_treino, threshold, f1_score = carregar_pacote(caminho_pacote)
+        return ArtefatosModelo(modelo, scaler, colunas_treino, threshold, f1_score, formato="pacote")
+
+    try:
+        threshold, f1_score = ler_threshold(os.path.join(diretorio, THRESHOLD_PATH))
+    except FileNotFoundError:
+        threshold, f1_score = THRESHOLD_PADRAO, None
+
+    import joblib
+    return ArtefatosModelo(
+        modelo=joblib.load(os.path.join(diretorio, MODELO_PATH)),
+        scaler=joblib.load(os.path.join(diretorio, SCALER_PATH)),
+        colunas_treino=joblib.load(os.path.join(diretorio, COLUNAS_PATH)),
+        threshold=threshold,
+        f1_score=f1_score
+    )
+
+
+def carregar_valores_imputacao(diretorio: str = ".") -> Dict:
+    """
+    Valores de preenchimento aprendidos no treino (`imputer_mediana.pkl`/`imputer_moda.pkl`).
+
+    Retorna `{coluna: valor}` a partir de `feature_names_in_`/`statistics_`,
+    equivalente ao `SimpleImputer.transform` para essas colunas.
+    """
+    import joblib
+    valores = {}
+    for nome in (IMPUTER_MEDIANA_PATH, IMPUTER_MODA_PATH):
+        imputer = joblib.load(os.path.join(diretorio, nome))
+        for coluna, valor in zip(imputer.feature_names_in_, imputer.statistics_):
+            valores[str(coluna)] = valor.item() if hasattr(valor, "item") else valor
+    return valores
@@ -0,0 +1,342 @@
+"""
+Avaliação em sombra: modelos desafiantes pontuando o tráfego real do campeão.
+
+Uma amostra das requisições de `/prever` e `/prever_lote` (SOMBRA_AMOSTRA)
+é copiada para uma fila limitada; threads em segundo plano pontuam as
+mesmas entradas com cada desafiante (qualquer diretório de artefatos no
+formato do notebook, inclusive versões do registro) e acumulam concordância
+da classe prevista, diferença de probabilidade e latência por desafiante.
+
+A resposta do campeão nunca espera: com a fila cheia a amostra é descartada
+e contada. Com vários workers cada processo grava seu estado em um
+diretório e o relatório soma todos.
+
+Exemplo:
+    SOMBRA_DESAFIANTES=2025-07-01,rf=../modelos/random_forest uvicorn api_fastapi:app
+    curl http://127.0.0.1:8000/sombra
+"""
+import json
+import os
+import queue
+import random
+import tempfile
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from artefatos import ArtefatosModelo, carregar_artefatos
+
+# Limites (ms) do histograma de latência dos desafiantes, por requisição espelhada
+LIMITES_LATENCIA_MS = [0.5, 1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000]
+# Limites de |probabilidade do desafiante - probabilidade do campeão|
+LIMITES_DELTA = [0.01, 0.05, 0.1, 0.2, 0.5]
+
+
+class Desafiante:
+    """Artefatos de um modelo desafiante e o threshold com que ele classificaria."""
+
+    def __init__(self, nome: str, diretorio: str, artefatos: ArtefatosModelo):
+        self.nome = nome
+        self.diretorio = diretorio
+        self.artefatos = artefatos
+        self.threshold = artefatos.threshold
+
+    def probabilidades(self, registros: List[Dict]) -> np.ndarray:
+        return self.artefatos.probabilidades(registros)
+
+
+def interpretar_desafiantes(especificacao: str) -> List[Tuple[str, str]]:
+    """
+    `"nome=caminho,caminho2"` -> `[(nome, caminho), (caminho2, caminho2)]`.
+
+    Sem `nome=`, o próprio item (versão do registro ou diretório) dá o nome.
+    """
+    desafiantes = []
+    for item in especificacao.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        nome, _, caminho = item.partition("=")
+        desafiantes.append((nome.strip(), caminho.strip()) if caminho else (item, item))
+    return desafiantes
+
+
+def carregar_desafiantes(especificacao: str, resolver: Optional[Callable[[str], str]] = None,
+                         formato: str = "auto") -> List[Desafiante]:
+    """
+    Carrega os desafiantes de `especificacao` (ver `interpretar_desafiantes`).
+
+    `resolver(item) -> diretório` permite usar nomes de versões do registro;
+    sem ele cada item é um diretório.
+    """
+    desafiantes = []
+    for nome, item in interpretar_desafiantes(especificacao):
+        diretorio = resolver(item) if resolver else item
+        desafiantes.append(Desafiante(nome, diretorio, carregar_artefatos(diretorio, formato)))
+    return desafiantes
+
+
+class AvaliadorSombra:
+    """
+    Fila limitada de requisições amostradas e pool de threads que as pontuam
+    com os desafiantes.
+
+    Estado por desafiante: registros e requisições avaliados, concordâncias
+    de classe (cada modelo com o próprio threshold), quantas vezes só o
+    campeão ou só o desafiante previu FATAL, somas da diferença de
+    probabilidade (desafiante - campeão), histogramas de |diferença| e de
+    latência e erros.
+    """
+
+    def __init__(self, desafiantes: Sequence[Desafiante], amostra: float = 0.1, capacidade_fila: int = 1000,
+                 workers: int = 1, diretorio: Optional[str] = None, intervalo: float = 5.0,
+                 semente: Optional[int] = None):
+        if not 0 <= amostra <= 1:
+            raise ValueError(f"Amostra deve estar entre 0 e 1: {amostra}")
+        self.desafiantes = list(desafiantes)
+        self.amostra = amostra
+        self.workers = max(1, workers)
+        self.diretorio = diretorio
+        self.intervalo = intervalo
+        self._aleatorio = random.Random(semente)
+        self._fila: queue.Queue = queue.Queue(maxsize=capacidade_fila)
+        self._trava = threading.Lock()
+        self._parar = threading.Event()
+        self._threads: List[threading.Thread] = []
+        self.estado = self.estado_vazio()
+
+    def estado_vazio(self) -> Dict:
+        return {
+            "espelhadas": 0,
+            "descartadas": 0,
+            "desafiantes": {d.nome: {
+                "requisicoes": 0, "registros": 0, "concordantes": 0,
+                "somente_campeao_fatal": 0, "somente_desafiante_fatal": 0,
+                "soma_delta": 0.0, "soma_delta_abs": 0.0, "max_delta_abs": 0.0,
+                "delta_abs": [0] * (len(LIMITES_DELTA) + 1),
+                "latencia_ms": [0] * (len(LIMITES_LATENCIA_MS) + 1), "soma_latencia_ms": 0.0,
+                "erros": 0
+            } for d in self.desafiantes}
+        }
+
+    # ---------- caminho da requisição ----------
+    def espelhar(self, registros: Sequence, probabilidades, threshold: float) -> bool:
+        """
+        Sorteia a requisição e, se escolhida, enfileira sem esperar.
+
+        `registros` (dicts ou modelos pydantic) são convertidos na thread do
+        avaliador. Retorna True se a requisição foi enfileirada.
+        """
+        if not self.desafiantes or self._aleatorio.random() >= self.amostra:
+            return False
+        try:
+            self._fila.put_nowait((registros, probabilidades, threshold))
+        except queue.Full:
+            with self._trava:
+                self.estado["descartadas"] += 1
+            return False
+        return True
+
+    # ---------- threads do avaliador ----------
+    def avaliar(self, registros: Sequence, probabilidades, threshold: float) -> None:
+        """Pontua uma requisição com cada desafiante e acumula a comparação com o campeão."""
+        registros = [r if isinstance(r, dict) else r.model_dump() for r in registros]
+        campeao = np.atleast_1d(np.asarray(probabilidades, dtype=np.float64))
+        fatal_campeao = campeao >= threshold
+        resultados = {}
+        for desafiante in self.desafiantes:
+            inicio = time.perf_counter()
+            try:
+                probabilidades_desafiante = desafiante.probabilidades(registros)
+            except Exception:
+                resultados[desafiante.nome] = None
+                continue
+            latencia_ms = (time.perf_counter() - inicio) * 1000
+            fatal_desafiante = probabilidades_desafiante >= desafiante.threshold
+            delta = probabilidades_desafiante - campeao
+            delta_abs = np.abs(delta)
+            resultados[desafiante.nome] = {
+                "registros": len(registros),
+                "concordantes": int(np.count_nonzero(fatal_campeao == fatal_desafiante)),
+                "somente_campeao_fatal": int(np.count_nonzero(fatal_campeao & ~fatal_desafiante)),
+                "somente_desafiante_fatal": int(np.count_nonzero(fatal_desafiante & ~fatal_campeao)),
+                "soma_delta": float(delta.sum()),
+                "soma_delta_abs": float(delta_abs.sum()),
+                "max_delta_abs": float(delta_abs.max()) if len(delta_abs) else 0.0,
+                "delta_abs": np.bincount(np.searchsorted(LIMITES_DELTA, delta_abs),
+                                         minlength=len(LIMITES_DELTA) + 1),
+                "latencia_ms": latencia_ms
+            }
+
+        with self._trava:
+            self.estado["espelhadas"] += 1
+            for nome, resultado in resultados.items():
+                alvo = self.estado["desafiantes"][nome]
+                if resultado is None:
+                    alvo["erros"] += 1
+                    continue
+                alvo["requisicoes"] += 1
+                for chave in ("registros", "concordantes", "somente_campeao_fatal", "somente_desafiante_fatal",
+                              "soma_delta", "soma_delta_abs"):
+                    alvo[chave] += resultado[chave]
+                alvo["max_delta_abs"] = max(alvo["max_delta_abs"], resultado["max_delta_abs"])
+                alvo["delta_abs"] = (np.asarray(alvo["delta_abs"]) + resultado["delta_abs"]).tolist()
+                alvo["latencia_ms"][int(np.searchsorted(LIMITES_LATENCIA_MS, resultado["latencia_ms"]))] += 1
+                alvo["soma_latencia_ms"] += resultado["latencia_ms"]
+
+    def iniciar(self) -> None:
+        self._parar.clear()
+        self._threads = [threading.Thread(target=self._executar, name=f"avaliacao-sombra-{i}", daemon=True)
+                         for i in range(self.workers)]
+        for thread in self._threads:
+            thread.start()
+        if self.diretorio:
+            thread = threading.Thread(target=self._gravar_periodicamente, name="avaliacao-sombra-snapshot",
+                                      daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def _executar(self) -> None:
+        while not self._parar.is_set():
+            try:
+                item = self._fila.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            try:
+                self.avaliar(*item)
+            finally:
+                self._fila.task_done()
+
+    def _gravar_periodicamente(self) -> None:
+        while not self._parar.wait(self.intervalo):
+            self.gravar()
+
+    def parar(self) -> None:
+        """Encerra as threads; o que ficou na fila é descartado e contado."""
+        self._parar.set()
+        for thread in self._threads:
+            thread.join(timeout=5)
+        while True:
+            try:
+                self._fila.get_nowait()
+            except queue.Empty:
+                break
+            self._fila.task_done()
+            with self._trava:
+                self.estado["descartadas"] += 1
+        if self.diretorio:
+            self.gravar()
+
+    def aguardar(self, timeout: float = 5.0) -> None:
+        """Espera a fila esvaziar (antes de um relatório pontual, por exemplo)."""
+        limite = time.monotonic() + timeout
+        while self._fila.unfinished_tasks and time.monotonic() < limite:
+            time.sleep(0.01)
+
+    # ---------- vários workers ----------
+    @property
+    def caminho(self) -> str:
+        return os.path.join(self.diretorio, f"sombra-{os.getpid()}.json")
+
+    def gravar(self) -> None:
+        """Grava o estado deste processo em `diretorio` (escrita atômica)."""
+        with self._trava:
+            snapshot = json.dumps({"pid": os.getpid(), "estado": self.estado})
+        descritor, temporario = tempfile.mkstemp(dir=self.diretorio, prefix=".sombra.")
+        with os.fdopen(descritor, "w") as f:
+            f.write(snapshot)
+        os.replace(temporario, self.caminho)
+
+    def estado_agregado(self) -> Dict:
+        """Estado somando os snapshots de todos os workers (ou só deste processo)."""
+        if not self.diretorio:
+            with self._trava:
+                return json.loads(json.dumps(self.estado))
+        self.gravar()
+        total = self.estado_vazio()
+        for nome in os.listdir(self.diretorio):
+            if not (nome.startswith("sombra-") and nome.endswith(".json")):
+                continue
+            try:
+                with open(os.path.join(self.diretorio, nome)) as f:
+                    snapshot = json.load(f)
+            except (OSError, ValueError):
+                continue
+            mesclar_estado(total, snapshot["estado"])
+        return total
+
+    # ---------- relatório ----------
+    def relatorio(self) -> Dict:
+        """Concordância, diferenças de probabilidade e latência de cada desafiante."""
+        estado = self.estado_agregado()
+        relatorio = {
+            "amostra": self.amostra,
+            "espelhadas": estado["espelhadas"],
+            "descartadas": estado["descartadas"],
+            "fila": self._fila.qsize(),
+            "desafiantes": {}
+        }
+        for desafiante in self.desafiantes:
+            atual = estado["desafiantes"][desafiante.nome]
+            registros, requisicoes = atual["registros"], atual["requisicoes"]
+            relatorio["desafiantes"][desafiante.nome] = {
+                "diretorio": desafiante.diretorio,
+                "threshold": desafiante.threshold,
+                "requisicoes": requisicoes,
+                "registros": registros,
+                "erros": atual["erros"],
+                "taxa_concordancia": _razao(atual["concordantes"], registros),
+                "somente_campeao_fatal": atual["somente_campeao_fatal"],
+                "somente_desafiante_fatal": atual["somente_desafiante_fatal"],
+                "delta_probabilidade": {
+                    "medio": _razao(atual["soma_delta"], registros),
+                    "medio_absoluto": _razao(atual["soma_delta_abs"], registros),
+                    "maximo_absoluto": round(atual["max_delta_abs"], 4),
+                    "distribuicao_absoluta": _rotular_faixas(LIMITES_DELTA, atual["delta_abs"])
+                },
+                "latencia_ms": {
+                    "media": _razao(atual["soma_latencia_ms"], requisicoes),
+                    "p50": quantil_histograma(LIMITES_LATENCIA_MS, atual["latencia_ms"], 0.50),
+                    "p95": quantil_histograma(LIMITES_LATENCIA_MS, atual["latencia_ms"], 0.95),
+                    "p99": quantil_histograma(LIMITES_LATENCIA_MS, atual["latencia_ms"], 0.99)
+                }
+            }
+        return relatorio
+
+
+def mesclar_estado(total: Dict, estado: Dict) -> None:
+    """Soma `estado` em `total` (desafiantes ausentes de `total` são ignorados)."""
+    total["espelhadas"] += estado["espelhadas"]
+    total["descartadas"] += estado["descartadas"]
+    for nome, atual in estado["desafiantes"].items():
+        alvo = total["desafiantes"].get(nome)
+        if alvo is None:
+            continue
+        for chave, valor in atual.items():
+            if chave == "max_delta_abs":
+                alvo[chave] = max(alvo[chave], valor)
+            elif isinstance(valor, list):
+                alvo[chave] = [a + b for a, b in zip(alvo[chave], valor)]
+            else:
+                alvo[chave] += valor
+
+
+def quantil_histograma(limites: Sequence[float], contagens: Sequence[int], q: float) -> Optional[float]:
+    """Limite superior da faixa que contém o quantil `q` (None sem observações ou acima do último limite)."""
+    total = sum(contagens)
+    if total == 0:
+        return None
+    acumulado = np.cumsum(contagens)
+    faixa = int(np.searchsorted(acumulado, q * total))
+    return float(limites[faixa]) if faixa < len(limites) else None
+
+
+def _rotular_faixas(limites: Sequence[float], contagens: Sequence[int]) -> Dict[str, int]:
+    rotulos = [f"<={limite}" for limite in limites] + [f">{limites[-1]}"]
+    return dict(zip(rotulos, contagens))
+
+
+def _razao(parte: float, total: int) -> Optional[float]:
+    return round(parte / total, 4) if total else None
@@ -0,0 +1,565 @@
+"""
+Benchmark de latência e throughput da API de predição.
+
+Substitui a cronometragem avulsa de `testar_api_real.py` por execuções
+reprodutíveis: dispara uma mistura configurável de `/prever` e
+`/prever_lote` com concorrência fixa e grava p50/p95/p99, throughput e
+memória em JSON, para comparar execuções e detectar regressões.
+
+Exemplos:
+    # Dentro do processo (ASGI, sem rede)
+    python benchmark_api.py --modo asgi --requisicoes 2000 --concorrencia 16
+
+    # Contra um uvicorn local iniciado pelo próprio benchmark
+    python benchmark_api.py --modo uvicorn --mix prever=0.9,prever_lote=0.1 --tamanhos-lote 10,100,1000
+
+    # Escalonamento com vários workers (servidor.py): 1, 2 e 4 processos
+    python benchmark_api.py --modo servidor --workers 1,2,4 --concorrencia 32
+
+    # Custo de serialização: resposta completa x enxuta em lotes grandes
+    python benchmark_api.py --modo serializacao --tamanhos-lote 1000,10000 --repeticoes 10
+
+    # Memória e latência da codificação densa x esparsa com vocabulário crescente
+    python benchmark_api.py --modo vocabulario --vocabularios 1000,10000,50000 --tamanhos-lote 1,100,1000
+
+    # Comparar com uma execução anterior (falha se piorar mais que 10%)
+    python benchmark_api.py --saida atual.json --comparar base.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+DIRETORIO_API = os.path.dirname(os.path.abspath(__file__))
+DATASET_PATH = os.path.join(DIRETORIO_API, "..", "docs", "teste.csv")
+CAMPOS_ACIDENTE = ['latitude', 'longitude', 'peso_max_decolagem', 'numero_assentos',
+                   'fase_operacao', 'cat_aeronave', 'regiao', 'uf', 'modelo_aeronave',
+                   'nome_fabricante', 'ano_ocorrencia', 'mes_ocorrencia']
+CAMPOS_INTEIROS = ['numero_assentos', 'ano_ocorrencia', 'mes_ocorrencia']
+
+
+# ==================== CARGA DE TESTE ====================
+def carregar_payloads(caminho: str = DATASET_PATH) -> List[Dict]:
+    """Registros reais de `docs/teste.csv` já no formato de `AcidenteAereo`."""
+    sys.path.insert(0, DIRETORIO_API)
+    from artefatos import COLUNAS_CATEGORICAS, carregar_valores_imputacao
+    from ingestao import limpar_dataframe_bruto
+
+    df = limpar_dataframe_bruto(pd.read_csv(caminho), carregar_valores_imputacao(DIRETORIO_API),
+                                COLUNAS_CATEGORICAS)
+    payloads = []
+    for registro in df[CAMPOS_ACIDENTE].to_dict("records"):
+        for campo in CAMPOS_INTEIROS:
+            registro[campo] = int(registro[campo])
+        payloads.append(registro)
+    return payloads
+
+
+def montar_plano(payloads: List[Dict], requisicoes: int, mix: Dict[str, float],
+                 tamanhos_lote: List[int], semente: int) -> List[tuple]:
+    """Sequência determinística de (cenário, endpoint, corpo, nº de registros)."""
+    aleatorio = random.Random(semente)
+    endpoints = list(mix)
+    pesos = [mix[e] for e in endpoints]
+    plano = []
+    for _ in range(requisicoes):
+        endpoint = aleatorio.choices(endpoints, weights=pesos)[0]
+        if endpoint == "prever":
+            plano.append(("prever", "/prever", aleatorio.choice(payloads), 1))
+        else:
+            tamanho = aleatorio.choice(tamanhos_lote)
+            corpo = [aleatorio.choice(payloads) for _ in range(tamanho)]
+            plano.append((f"prever_lote[{tamanho}]", "/prever_lote", corpo, tamanho))
+    return plano
+
+
+# ==================== MEDIÇÃO ====================
+def rss_mb(pid: Optional[int] = None) -> Optional[float]:
+    """RSS atual do processo (Linux: /proc; demais: pico via getrusage)."""
+    caminho = f"/proc/{pid or 'self'}/status"
+    if os.path.exists(caminho):
+        with open(caminho) as f:
+            for linha in f:
+                if linha.startswith("VmRSS:"):
+                    return round(int(linha.split()[1]) / 1024, 1)
+    if pid is None:
+        maximo = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return round(maximo / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+    return None
+
+
+def memoria_servidor(pid: int) -> Dict[str, Optional[float]]:
+    """
+    RSS e PSS (MB) somados do processo e de todos os filhos (Linux).
+
+    O PSS divide cada página compartilhada entre os processos que a usam,
+    então mostra quanto os workers pré-forkados realmente economizam.
+    """
+    pids, pendentes = [], [pid]
+    while pendentes:
+        atual = pendentes.pop()
+        pids.append(atual)
+        try:
+            with open(f"/proc/{atual}/task/{atual}/children") as f:
+                pendentes.extend(int(filho) for filho in f.read().split())
+        except OSError:
+            pass
+
+    rss = pss = 0.0
+    for atual in pids:
+        rss += rss_mb(atual) or 0.0
+        try:
+            with open(f"/proc/{atual}/smaps_rollup") as f:
+                for linha in f:
+                    if linha.startswith("Pss:"):
+                        pss += int(linha.split()[1]) / 1024
+        except OSError:
+            return {"processos": len(pids), "rss_total": round(rss, 1) or None, "pss_total": None}
+    return {"processos": len(pids), "rss_total": round(rss, 1), "pss_total": round(pss, 1)}
+
+
+def resumir(latencias: List[float], erros: int, registros: int, segundos: float) -> Dict:
+    """Percentis de latência (ms) e throughput de um cenário."""
+    amostras = np.array(latencias) * 1000
+    return {
+        "requisicoes": len(latencias) + erros,
+        "erros": erros,
+        "p50_ms": round(float(np.percentile(amostras, 50)), 3) if len(amostras) else None,
+        "p95_ms": round(float(np.percentile(amostras, 95)), 3) if len(amostras) else None,
+        "p99_ms": round(float(np.percentile(amostras, 99)), 3) if len(amostras) else None,
+        "media_ms": round(float(amostras.mean()), 3) if len(amostras) else None,
+        "max_ms": round(float(amostras.max()), 3) if len(amostras) else None,
+        "requisicoes_por_segundo": round(len(latencias) / segundos, 1) if segundos > 0 else 0.0,
+        "registros_por_segundo": round(registros / segundos, 1) if segundos > 0 else 0.0
+    }
+
+
+async def disparar(cliente, plano: List[tuple], concorrencia: int) -> Dict:
+    """Executa o plano com `concorrencia` requisições simultâneas."""
+    fila: asyncio.Queue = asyncio.Queue()
+    for item in plano:
+        fila.put_nowait(item)
+    medicoes: Dict[str, Dict] = {}
+
+    async def trabalhador():
+        while True:
+            try:
+                cenario, endpoint, corpo, n = fila.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            m = medicoes.setdefault(cenario, {"latencias": [], "erros": 0, "registros": 0})
+            inicio = time.perf_counter()
+            try:
+                resposta = await cliente.post(endpoint, json=corpo)
+                ok = resposta.status_code == 200
+            except Exception:
+                ok = False
+            if ok:
+                m["latencias"].append(time.perf_counter() - inicio)
+                m["registros"] += n
+            else:
+                m["erros"] += 1
+
+    inicio = time.perf_counter()
+    await asyncio.gather(*(trabalhador() for _ in range(concorrencia)))
+    segundos = time.perf_counter() - inicio
+
+    cenarios = {nome: resumir(m["latencias"], m["erros"], m["registros"], segundos)
+                for nome, m in sorted(medicoes.items())}
+    todas = [lat for m in medicoes.values() for lat in m["latencias"]]
+    total = resumir(todas, sum(m["erros"] for m in medicoes.values()),
+                    sum(m["registros"] for m in medicoes.values()), segundos)
+    total["segundos"] = round(segundos, 3)
+    return {"total": total, "cenarios": cenarios}
+
+
+# ==================== MODOS DE EXECUÇÃO ====================
+async def executar_asgi(plano: List[tuple], aquecimento: List[tuple], concorrencia: int) -> Dict:
+    """Roda a API no próprio processo via transporte ASGI do httpx (sem rede)."""
+    import httpx
+    os.chdir(DIRETORIO_API)
+    sys.path.insert(0, DIRETORIO_API)
+    rss_antes = rss_mb()
+    import api_fastapi
+
+    transporte = httpx.ASGITransport(app=api_fastapi.app)
+    async with httpx.AsyncClient(transport=transporte, base_url="http://benchmark") as cliente:
+        await disparar(cliente, aquecimento, concorrencia)
+        rss_aquecido = rss_mb()
+        resultado = await disparar(cliente, plano, concorrencia)
+    resultado["memoria_mb"] = {"rss_antes_import": rss_antes, "rss_apos_aquecimento": rss_aquecido,
+                               "rss_final": rss_mb()}
+    return resultado
+
+
+async def executar_http(url: str, plano: List[tuple], aquecimento: List[tuple], concorrencia: int,
+                        pid_servidor: Optional[int] = None) -> Dict:
+    """Roda contra um servidor HTTP (uvicorn local ou URL informada)."""
+    import httpx
+    limites = httpx.Limits(max_connections=concorrencia, max_keepalive_connections=concorrencia)
+    async with httpx.AsyncClient(base_url=url, limits=limites, timeout=120) as cliente:
+        await disparar(cliente, aquecimento, concorrencia)
+        rss_aquecido = rss_mb(pid_servidor) if pid_servidor else None
+        resultado = await disparar(cliente, plano, concorrencia)
+    resultado["memoria_mb"] = {"rss_servidor_apos_aquecimento": rss_aquecido,
+                               "rss_servidor_final": rss_mb(pid_servidor) if pid_servidor else None}
+    return resultado
+
+
+async def executar_serializacao(payloads: List[Dict], tamanhos: List[int], repeticoes: int,
+                                semente: int) -> Dict:
+    """
+    Mede, em processo e sem concorrência, o mesmo lote respondido de três
+    formas: `/prever_lote` completo, `/prever_lote?resposta=enxuta` e
+    `/prever_colunar?resposta=enxuta`. Reporta latência e bytes da resposta.
+    """
+    import httpx
+    os.chdir(DIRETORIO_API)
+    sys.path.insert(0, DIRETORIO_API)
+    import api_fastapi
+
+    aleatorio = random.Random(semente)
+    variantes = [
+        ("prever_lote", "/prever_lote", False),
+        ("prever_lote_enxuta", "/prever_lote?resposta=enxuta", False),
+        ("prever_colunar_enxuta", "/prever_colunar?resposta=enxuta", True),
+    ]
+    cenarios = {}
+    transporte = httpx.ASGITransport(app=api_fastapi.app)
+    async with httpx.AsyncClient(transport=transporte, base_url="http://benchmark", timeout=300) as cliente:
+        for tamanho in tamanhos:
+            corpo = [aleatorio.choice(payloads) for _ in range(tamanho)]
+            colunas = {campo: [registro[campo] for registro in corpo] for campo in CAMPOS_ACIDENTE}
+            for nome, endpoint, colunar in variantes:
+                enviar = colunas if colunar else corpo
+                await cliente.post(endpoint, json=enviar)
+                latencias, tamanho_resposta = [], 0
+                for _ in range(repeticoes):
+                    inicio = time.perf_counter()
+                    resposta = await cliente.post(endpoint, json=enviar)
+                    latencias.append(time.perf_counter() - inicio)
+                    tamanho_resposta = len(resposta.content)
+                metricas = resumir(latencias, 0, tamanho * repeticoes, sum(latencias))
+                metricas["bytes_resposta"] = tamanho_resposta
+                cenarios[f"{nome}[{tamanho}]"] = metricas
+
+    print(f"\n{'cenário':<30} {'p50 ms':>9} {'reg/s':>11} {'KB resposta':>12} {'vs completa':>12}")
+    for tamanho in tamanhos:
+        base = cenarios[f"prever_lote[{tamanho}]"]
+        for nome, _, _ in variantes:
+            m = cenarios[f"{nome}[{tamanho}]"]
+            print(f"{nome + f'[{tamanho}]':<30} {m['p50_ms']:>9.2f} {m['registros_por_segundo']:>11.1f} "
+                  f"{m['bytes_resposta'] / 1024:>12.1f} {base['p50_ms'] / m['p50_ms']:>11.2f}x")
+    return {"cenarios": cenarios}
+
+
+def vocabulario_sintetico(colunas_treino: List[str], media: np.ndarray, escala: np.ndarray, total: int,
+                          aleatorio: np.random.Generator) -> tuple:
+    """
+    Estende `colunas_treino` com modelos de aeronave fictícios até `total`
+    colunas, com média/escala de dummies raras como as do StandardScaler.
+    """
+    extras = max(0, total - len(colunas_treino))
+    colunas = list(colunas_treino) + [f"modelo_aeronave_SINTETICO-{i}" for i in range(extras)]
+    frequencia = aleatorio.uniform(1e-4, 1e-2, extras)
+    media = np.concatenate([media, frequencia])
+    escala = np.concatenate([escala, np.sqrt(frequencia * (1 - frequencia))])
+    return colunas, media, escala
+
+
+def executar_vocabulario(payloads: List[Dict], vocabularios: List[int], tamanhos: List[int],
+                         repeticoes: int, semente: int) -> Dict:
+    """
+    Mede, sem HTTP, a pontuação com a matriz densa (`codificar_lote` +
+    `predict_proba`) e com a CSR (`PontuadorEsparso`) à medida que o
+    vocabulário de `modelo_aeronave` cresce. Reporta latência e o pico de
+    memória alocada (tracemalloc) por lote.
+    """
+    os.chdir(DIRETORIO_API)
+    from artefatos import CAMPOS_NUMERICOS, COLUNAS_CATEGORICAS, carregar_artefatos
+    from codificador import CodificadorCompilado, PontuadorEsparso
+    from pacote_modelo import ModeloLinearPacote
+
+    artefatos = carregar_artefatos(".")
+    aleatorio = np.random.default_rng(semente)
+    cenarios = {}
+    for total in vocabularios:
+        colunas, media, escala = vocabulario_sintetico(
+            artefatos.colunas_treino, artefatos.codificador.media, artefatos.codificador.escala, total, aleatorio
+        )
+        codificador = CodificadorCompilado(colunas, media, escala, CAMPOS_NUMERICOS, COLUNAS_CATEGORICAS)
+        modelo = ModeloLinearPacote(aleatorio.normal(0, 0.1, (1, len(colunas))), np.array([-2.0]))
+        pontuador = PontuadorEsparso.a_partir_do_modelo(codificador, modelo)
+        modelos = [c[len("modelo_aeronave_"):] for c in colunas if c.startswith("modelo_aeronave_")]
+
+        for tamanho in tamanhos:
+            lote = [dict(payloads[i % len(payloads)], modelo_aeronave=modelos[aleatorio.integers(len(modelos))])
+                    for i in range(tamanho)]
+            # Um registro segue o caminho de /prever: linha única e pontuação sem montar a CSR
+            if tamanho == 1:
+                variantes = {
+                    "denso": lambda: modelo.predict_proba(codificador.codificar(lote[0]))[:, 1],
+                    "esparso": lambda: np.array([pontuador.probabilidade(lote[0])]),
+                }
+            else:
+                variantes = {
+                    "denso": lambda: modelo.predict_proba(codificador.codificar_lote(lote))[:, 1],
+                    "esparso": lambda: pontuador.probabilidades_lote(lote),
+                }
+            referencia = None
+            for nome, pontuar in variantes.items():
+                tracemalloc.start()
+                probabilidades = pontuar()
+                pico = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+                if referencia is None:
+                    referencia = probabilidades
+                latencias = []
+                for _ in range(repeticoes):
+                    inicio = time.perf_counter()
+                    pontuar()
+                    latencias.append(time.perf_counter() - inicio)
+                metricas = resumir(latencias, 0, tamanho * repeticoes, sum(latencias))
+                metricas["pico_memoria_mb"] = round(pico / 1024 ** 2, 3)
+                metricas["diferenca_maxima"] = float(np.max(np.abs(probabilidades - referencia)))
+                cenarios[f"{nome}[{len(colunas)}x{tamanho}]"] = metricas
+
+    print(f"\n{'colunas':>8} {'lote':>6} {'denso ms':>10} {'esparso ms':>11} {'denso MB':>10} "
+          f"{'esparso MB':>11} {'ganho':>7} {'dif. máx':>9}")
+    for chave in [c[len("denso"):] for c in cenarios if c.startswith("denso")]:
+        denso, esparso = cenarios["denso" + chave], cenarios["esparso" + chave]
+        colunas_lote, tamanho = chave.strip("[]").split("x")
+        print(f"{colunas_lote:>8} {tamanho:>6} {denso['p50_ms']:>10.3f} {esparso['p50_ms']:>11.3f} "
+              f"{denso['pico_memoria_mb']:>10.2f} {esparso['pico_memoria_mb']:>11.2f} "
+              f"{denso['p50_ms'] / esparso['p50_ms']:>6.1f}x {esparso['diferenca_maxima']:>9.1e}")
+    return {"cenarios": cenarios}
+
+
+def iniciar_uvicorn(porta: int, ambiente: Dict[str, str], workers: Optional[int] = None) -> subprocess.Popen:
+    """
+    Sobe `uvicorn api_fastapi:app` (ou `servidor.py --workers N`) em segundo
+    plano e espera o /health responder.
+    """
+    import httpx
+    if workers is None:
+        comando = [sys.executable, "-m", "uvicorn", "api_fastapi:app", "--port", str(porta), "--log-level", "warning"]
+    else:
+        comando = [sys.executable, "servidor.py", "--host", "127.0.0.1", "--porta", str(porta),
+                   "--workers", str(workers)]
+    processo = subprocess.Popen(
+        comando, cwd=DIRETORIO_API, env={**os.environ, **ambiente},
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    limite = time.time() + 60
+    while time.time() < limite:
+        if processo.poll() is not None:
+            raise RuntimeError("❌ uvicorn encerrou durante a inicialização")
+        try:
+            if httpx.get(f"http://127.0.0.1:{porta}/health", timeout=1).status_code == 200:
+                return processo
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    processo.terminate()
+    raise RuntimeError("❌ uvicorn não respondeu em 60s")
+
+
+# ==================== COMPARAÇÃO ENTRE EXECUÇÕES ====================
+def comparar(atual: Dict, base: Dict, tolerancia: float) -> List[str]:
+    """
+    Compara p50/p95/p99 e throughput por cenário e retorna as regressões
+    acima de `tolerancia` (fração, ex.: 0.10 = 10%).
+    """
+    regressoes = []
+    print(f"\n📊 COMPARAÇÃO COM {base.get('gerado_em', 'execução base')}")
+    for cenario, metricas in atual["resultado"]["cenarios"].items():
+        anteriores = base["resultado"]["cenarios"].get(cenario)
+        if not anteriores:
+            continue
+        for chave, maior_e_pior in (("p50_ms", True), ("p95_ms", True), ("p99_ms", True),
+                                    ("registros_por_segundo", False)):
+            antes, depois = anteriores.get(chave), metricas.get(chave)
+            if not antes or depois is None:
+                continue
+            variacao = (depois - antes) / antes
+            piorou = variacao > tolerancia if maior_e_pior else variacao < -tolerancia
+            marcador = "❌" if piorou else "  "
+            print(f"   {marcador} {cenario:<22} {chave:<24} {antes:>10.3f} -> {depois:>10.3f} ({variacao:+.1%})")
+            if piorou:
+                regressoes.append(f"{cenario}.{chave}: {variacao:+.1%}")
+    return regressoes
+
+
+def executar_escalonamento(porta: int, ambiente: Dict[str, str], workers: List[int], plano: List[tuple],
+                           aquecimento: List[tuple], concorrencia: int) -> Dict:
+    """
+    Roda o mesmo plano contra `servidor.py` com cada quantidade de workers.
+
+    Os cenários saem como `<cenário>@<n>w`, então `--comparar` funciona
+    igual aos outros modos.
+    """
+    por_workers = {}
+    for n in workers:
+        print(f"\n⚙️ {n} worker(s)...")
+        servidor = iniciar_uvicorn(porta, ambiente, workers=n)
+        try:
+            resultado = asyncio.run(executar_http(f"http://127.0.0.1:{porta}", plano, aquecimento, concorrencia))
+            resultado["memoria_mb"] = memoria_servidor(servidor.pid)
+        finally:
+            servidor.terminate()
+            servidor.wait(timeout=60)
+        imprimir_resultado(resultado)
+        por_workers[n] = resultado
+
+    base = por_workers[workers[0]]
+    print(f"\n📈 ESCALONAMENTO (CPUs na máquina: {os.cpu_count()})")
+    print(f"{'cenário':<22} {'workers':>8} {'reg/s':>11} {'speedup':>8} {'p99 ms':>9}")
+    for cenario in list(base["cenarios"]) + ["TOTAL"]:
+        for n, resultado in por_workers.items():
+            m = resultado["total"] if cenario == "TOTAL" else resultado["cenarios"].get(cenario)
+            ref = base["total"] if cenario == "TOTAL" else base["cenarios"][cenario]
+            if not m:
+                continue
+            speedup = m["registros_por_segundo"] / ref["registros_por_segundo"] if ref["registros_por_segundo"] else 0
+            print(f"{cenario:<22} {n:>8} {m['registros_por_segundo']:>11.1f} {speedup:>7.2f}x {m['p99_ms'] or 0:>9.2f}")
+
+    return {
+        "cenarios": {f"{cenario}@{n}w": metricas for n, resultado in por_workers.items()
+                     for cenario, metricas in list(resultado["cenarios"].items()) + [("TOTAL", resultado["total"])]},
+        "por_workers": {str(n): resultado for n, resultado in por_workers.items()}
+    }
+
+
+def imprimir_resultado(resultado: Dict) -> None:
+    print(f"\n{'cenário':<22} {'req':>6} {'erros':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'reg/s':>11}")
+    for nome, m in list(resultado["cenarios"].items()) + [("TOTAL", resultado["total"])]:
+        print(f"{nome:<22} {m['requisicoes']:>6} {m['erros']:>6} {m['p50_ms'] or 0:>9.2f} "
+              f"{m['p95_ms'] or 0:>9.2f} {m['p99_ms'] or 0:>9.2f} {m['registros_por_segundo']:>11.1f}")
+    print(f"\n💾 Memória (MB): {resultado['memoria_mb']}")
+
+
+def interpretar_mix(texto: str) -> Dict[str, float]:
+    mix = {}
+    for parte in texto.split(","):
+        nome, peso = parte.split("=")
+        if nome not in ("prever", "prever_lote"):
+            raise argparse.ArgumentTypeError(f"Endpoint desconhecido no mix: {nome}")
+        mix[nome] = float(peso)
+    return mix
+
+
+def main(argumentos: Optional[list] = None) -> None:
+    parser = argparse.ArgumentParser(description="Benchmark de latência/throughput da API")
+    parser.add_argument("--modo", choices=["asgi", "uvicorn", "servidor", "url", "serializacao", "vocabulario"], default="asgi")
+    parser.add_argument("--url", default="http://localhost:8000", help="Usado com --modo url")
+    parser.add_argument("--porta", type=int, default=8765, help="Porta do uvicorn no --modo uvicorn")
+    parser.add_argument("--workers", default="1,2,4",
+                        help="Quantidades de workers no --modo servidor (ex.: 1,2,4,8)")
+    parser.add_argument("--requisicoes", type=int, default=1000)
+    parser.add_argument("--aquecimento", type=int, default=50)
+    parser.add_argument("--concorrencia", type=int, default=8)
+    parser.add_argument("--mix", type=interpretar_mix, default=interpretar_mix("prever=0.8,prever_lote=0.2"))
+    parser.add_argument("--tamanhos-lote", default="10,100",
+                        help="Tamanhos de lote sorteados para /prever_lote")
+    parser.add_argument("--semente", type=int, default=42)
+    parser.add_argument("--repeticoes", type=int, default=10,
+                        help="Repetições por lote nos modos serializacao e vocabulario")
+    parser.add_argument("--vocabularios", default="1000,10000,50000",
+                        help="Total de colunas simuladas no --modo vocabulario")
+    parser.add_argument("--com-cache", action="store_true",
+                        help="Mantém o cache de predições (por padrão é desligado para medir o cálculo)")
+    parser.add_argument("--micro-lotes", action="store_true",
+                        help="Liga o agrupamento de /prever em micro-lotes (MICRO_LOTES_ATIVO=1)")
+    parser.add_argument("--saida", default=None, help="Arquivo JSON com o resultado")
+    parser.add_argument("--comparar", default=None, help="JSON de uma execução anterior")
+    parser.add_argument("--tolerancia", type=float, default=0.10)
+    args = parser.parse_args(argumentos)
+    # O modo asgi muda o diretório para o da API (caminhos relativos dos artefatos)
+    saida = os.path.abspath(args.saida) if args.saida else None
+    arquivo_base = os.path.abspath(args.comparar) if args.comparar else None
+
+    # Não misturar o log do benchmark com o log de produção
+    ambiente = {"LOG_ARQUIVO": os.path.join(tempfile.gettempdir(), "benchmark_api.log")}
+    if not args.com_cache:
+        ambiente["CACHE_PREDICOES_TAMANHO"] = "0"
+    if args.micro_lotes:
+        ambiente["MICRO_LOTES_ATIVO"] = "1"
+    os.environ.update(ambiente)
+
+    tamanhos_lote = [int(t) for t in args.tamanhos_lote.split(",")]
+    payloads = carregar_payloads()
+    plano = montar_plano(payloads, args.requisicoes, args.mix, tamanhos_lote, args.semente)
+    aquecimento = montar_plano(payloads, args.aquecimento, args.mix, tamanhos_lote, args.semente + 1)
+
+    print("=" * 70)
+    print(f"⏱️ BENCHMARK DA API ({args.modo}) - {args.requisicoes} requisições, concorrência {args.concorrencia}")
+    print("=" * 70)
+
+    if args.modo == "asgi":
+        resultado = asyncio.run(executar_asgi(plano, aquecimento, args.concorrencia))
+    elif args.modo == "uvicorn":
+        servidor = iniciar_uvicorn(args.porta, ambiente)
+        try:
+            resultado = asyncio.run(executar_http(f"http://127.0.0.1:{args.porta}", plano, aquecimento,
+                                                  args.concorrencia, servidor.pid))
+        finally:
+            servidor.terminate()
+            servidor.wait(timeout=10)
+    elif args.modo == "servidor":
+        workers = [int(n) for n in args.workers.split(",")]
+        resultado = executar_escalonamento(args.porta, ambiente, workers, plano, aquecimento, args.concorrencia)
+    elif args.modo == "serializacao":
+        resultado = asyncio.run(executar_serializacao(payloads, tamanhos_lote, args.repeticoes, args.semente))
+    elif args.modo == "vocabulario":
+        vocabularios = [int(v) for v in args.vocabularios.split(",")]
+        resultado = executar_vocabulario(payloads, vocabularios, tamanhos_lote, args.repeticoes, args.semente)
+    else:
+        resultado = asyncio.run(executar_http(args.url, plano, aquecimento, args.concorrencia))
+
+    if args.modo not in ("servidor", "serializacao", "vocabulario"):
+        imprimir_resultado(resultado)
+
+    relatorio = {
+        "gerado_em": datetime.now().isoformat(timespec="seconds"),
+        "configuracao": {
+            "modo": args.modo, "requisicoes": args.requisicoes, "aquecimento": args.aquecimento,
+            "concorrencia": args.concorrencia, "mix": args.mix, "tamanhos_lote": tamanhos_lote,
+            "workers": args.workers if args.modo == "servidor" else None,
+            "semente": args.semente, "cache": args.com_cache, "micro_lotes": args.micro_lotes,
+            "repeticoes": args.repeticoes if args.modo in ("serializacao", "vocabulario") else None,
+            "vocabularios": args.vocabularios if args.modo == "vocabulario" else None
+        },
+        "ambiente": {"python": platform.python_version(), "plataforma": platform.platform(),
+                     "cpus": os.cpu_count()},
+        "resultado": resultado
+    }
+    if saida:
+        with open(saida, "w") as f:
+            json.dump(relatorio, f, indent=2, ensure_ascii=False)
+        print(f"\n💾 Resultado salvo em {saida}")
+
+    if arquivo_base:
+        with open(arquivo_base) as f:
+            base = json.load(f)
+        regressoes = comparar(relatorio, base, args.tolerancia)
+        if regressoes:
+            print(f"\n❌ {len(regressoes)} regressão(ões) acima de {args.tolerancia:.0%}")
+            sys.exit(1)
+        print("\n✅ Sem regressões acima da tolerância")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Hashable, Optional
+
+
+class CachePredicoes:
+    """
+    Cache LRU com expiração (TTL) para probabilidades já calculadas.
+
+    Limitado a `tamanho_maximo` entradas: ao estourar o limite, a entrada
+    usada há mais tempo é descartada. `tamanho_maximo=0` desativa o cache.
+    Seguro para uso concorrente (endpoints síncronos rodam no threadpool).
+    """
+
+    def __init__(self, tamanho_maximo: int = 10000, ttl_segundos: float = 300.0):
+        self.tamanho_maximo = max(0, int(tamanho_maximo))
+        self.ttl_segundos = float(ttl_segundos)
+        self._entradas: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.acertos = 0
+        self.falhas = 0
+        self.despejos = 0
+        self.expiracoes = 0
+        self.invalidacoes = 0
+
+    @property
+    def ativo(self) -> bool:
+        return self.tamanho_maximo > 0
+
+    def obter(self, chave: Hashable) -> Optional[float]:
+        """Retorna o valor em cache ou None (contabilizando acerto/falha)."""
+        if not self.ativo:
+            return None
+
+        with self._lock:
+            entrada = self._entradas.get(chave)
+            if entrada is None:
+                self.falhas += 1
+                return None
+
+            valor, expira_em = entrada
+            if self.ttl_segundos > 0 and time.monotonic() >= expira_em:
+                del self._entradas[chave]
+                self.expiracoes += 1
+                self.falhas += 1
+                return None
+
+            self._entradas.move_to_end(chave)
+            self.acertos += 1
+            return valor
+
+    def armazenar(self, chave: Hashable, valor: float) -> None:
+        """Insere ou atualiza uma entrada, despejando a menos recente se necessário."""
+        if not self.ativo:
+            return
+
+        expira_em = time.monotonic() + self.ttl_segundos
+        with self._lock:
+            self._entradas[chave] = (valor, expira_em)
+            self._entradas.move_to_end(chave)
+            while len(self._entradas) > self.tamanho_maximo:
+                self._entradas.popitem(last=False)
+                self.despejos += 1
+
+    def limpar(self) -> None:
+        """Descarta todas as entradas (ex.: após recarregar modelo, scaler ou threshold)."""
+        with self._lock:
+            self._entradas.clear()
+            self.invalidacoes += 1
+
+    def estatisticas(self) -> Dict:
+        """Contadores de uso do cache."""
+        with self._lock:
+            consultas = self.acertos + self.falhas
+            return {
+                "ativo": self.ativo,
+                "tamanho_maximo": self.tamanho_maximo,
+                "ttl_segundos": self.ttl_segundos,
+                "entradas": len(self._entradas),
+                "acertos": self.acertos,
+                "falhas": self.falhas,
+                "despejos": self.despejos,
+                "expiracoes": self.expiracoes,
+                "invalidacoes": self.invalidacoes,
+                "taxa_acerto": round(self.acertos / consultas, 4) if consultas > 0 else 0.0
+            }
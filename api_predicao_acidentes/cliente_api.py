@@ -0,0 +1,521 @@
+"""
+Cliente Python da API de predição, com interface síncrona e assíncrona.
+
+`testar_api_real.py` faz um `requests.post` em `/prever` por linha, abrindo
+uma conexão nova a cada chamada. Este cliente mantém um pool de conexões
+keep-alive (httpx), quebra DataFrames grandes em blocos de `/prever_lote`
+(`?resposta=enxuta`), limita quantos blocos ficam em voo ao mesmo tempo e
+repete com backoff exponencial as falhas transitórias (erro de conexão,
+429, 502, 503 e 504). Os resultados voltam como DataFrame alinhado ao
+índice de entrada, inteiro ou em partes, na ordem, conforme os blocos chegam.
+
+Exemplo:
+    from cliente_api import ClienteAPI, ClienteAPIAssincrono
+
+    with ClienteAPI("http://localhost:8000", tamanho_lote=500, concorrencia=4) as cliente:
+        resultado = cliente.prever_dataframe(df)
+        for parte in cliente.iterar_dataframe(df, geografico=True):
+            ...
+
+    async with ClienteAPIAssincrono("http://localhost:8000") as cliente:
+        resultado = await cliente.prever_dataframe(df)
+        async for parte in cliente.iterar_dataframe(df):
+            ...
+
+    # Throughput: requests sequencial (como testar_api_real.py) x cliente em lotes
+    python cliente_api.py comparar --url http://localhost:8000 --linhas 5000
+    python cliente_api.py comparar --uvicorn --linhas 5000
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, Dict, Iterator, List, Optional, Tuple
+
+import httpx
+import numpy as np
+import pandas as pd
+
+API_URL = os.getenv("API_URL", "http://localhost:8000")
+CAMPOS_ACIDENTE = ['latitude', 'longitude', 'peso_max_decolagem', 'numero_assentos',
+                   'fase_operacao', 'cat_aeronave', 'regiao', 'uf', 'modelo_aeronave',
+                   'nome_fabricante', 'ano_ocorrencia', 'mes_ocorrencia']
+CAMPOS_REAIS = ['latitude', 'longitude', 'peso_max_decolagem']
+CAMPOS_INTEIROS = ['numero_assentos', 'ano_ocorrencia', 'mes_ocorrencia']
+# Posição = código de CODIGOS_RISCO (artefatos.py), como vem na resposta enxuta
+NIVEIS_POR_CODIGO = np.array(["BAIXO", "MODERADO", "ALTO", "CRÍTICO"], dtype=object)
+# Colunas por registro que a resposta enxuta pode trazer além das numéricas
+COLUNAS_OPCIONAIS = ("explicacao", "contexto_geografico")
+STATUS_TRANSITORIOS = {429, 502, 503, 504}
+# levantar: a primeira falha interrompe; coletar: a falha fica na coluna `erro` e o resto segue
+MODOS_ERRO = ("levantar", "coletar")
+
+
+class ErroAPI(Exception):
+    """Resposta não-200 da API (após esgotar as tentativas, se transitória)."""
+
+    def __init__(self, status: int, detalhe):
+        super().__init__(f"HTTP {status}: {detalhe}")
+        self.status = status
+        self.detalhe = detalhe
+
+
+class ErroConversao(ValueError):
+    """Linhas do DataFrame que não viram um `AcidenteAereo` (`invalidas`: rótulo do índice -> motivo)."""
+
+    def __init__(self, invalidas: Dict):
+        self.invalidas = invalidas
+        amostra = "; ".join(f"índice {rotulo}: {motivo}" for rotulo, motivo in list(invalidas.items())[:5])
+        resto = f"; ... (+{len(invalidas) - 5})" if len(invalidas) > 5 else ""
+        super().__init__(f"{len(invalidas)} linha(s) não podem ser enviadas à API: {amostra}{resto}")
+
+
+# ==================== CONVERSÃO ====================
+def converter_dataframe(df: pd.DataFrame) -> Tuple[List[Optional[Dict]], Dict[int, str]]:
+    """
+    Linhas de `df` no formato de `AcidenteAereo`, com a mesma conversão de
+    tipos de `preparar_acidente_para_api`, mas por coluna.
+
+    Linhas com campo numérico ausente, não numérico ou infinito ficam como
+    None e o motivo sai no dicionário, por posição (ex.: `numero_assentos=nan`).
+    """
+    faltando = [campo for campo in CAMPOS_ACIDENTE if campo not in df.columns]
+    if faltando:
+        raise ValueError(f"Colunas ausentes no DataFrame: {faltando}")
+    colunas, motivos = [], {}
+    for campo in CAMPOS_ACIDENTE:
+        serie = df[campo]
+        if campo in CAMPOS_INTEIROS or campo in CAMPOS_REAIS:
+            valores = pd.to_numeric(serie, errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan, copy=True)
+            invalidos = ~np.isfinite(valores)
+            for posicao in np.flatnonzero(invalidos).tolist():
+                motivos.setdefault(posicao, []).append(f"{campo}={serie.iloc[posicao]}")
+            valores[invalidos] = 0
+            colunas.append(valores.astype(np.int64).tolist() if campo in CAMPOS_INTEIROS else valores.tolist())
+        else:
+            colunas.append(serie.astype(str).tolist())
+    registros = [dict(zip(CAMPOS_ACIDENTE, linha)) for linha in zip(*colunas)]
+    for posicao in motivos:
+        registros[posicao] = None
+    return registros, {posicao: ", ".join(campos) for posicao, campos in motivos.items()}
+
+
+def registros_do_dataframe(df: pd.DataFrame) -> List[Dict]:
+    """`converter_dataframe` que levanta `ErroConversao` se alguma linha for inválida."""
+    registros, motivos = converter_dataframe(df)
+    if motivos:
+        raise ErroConversao({df.index[posicao]: motivo for posicao, motivo in motivos.items()})
+    return registros
+
+
+def fatiar(total: int, tamanho: int) -> List[slice]:
+    return [slice(inicio, min(inicio + tamanho, total)) for inicio in range(0, total, tamanho)]
+
+
+def quadro_resultado(documento: Dict, indice: pd.Index) -> pd.DataFrame:
+    """DataFrame de uma resposta enxuta de `/prever_lote`, no índice do bloco."""
+    codigos = np.asarray(documento["codigo_risco"], dtype=np.int64)
+    quadro = pd.DataFrame({
+        "probabilidade_fatal": np.asarray(documento["probabilidade_fatal"], dtype=float),
+        "predicao_numerica": np.asarray(documento["predicao_numerica"], dtype=np.int64),
+        "codigo_risco": codigos,
+        "nivel_risco": NIVEIS_POR_CODIGO[codigos],
+    }, index=indice)
+    for coluna in COLUNAS_OPCIONAIS:
+        if coluna in documento:
+            quadro[coluna] = documento[coluna]
+    return quadro
+
+
+def quadro_vazio(indice: pd.Index) -> pd.DataFrame:
+    return quadro_resultado({"probabilidade_fatal": [], "predicao_numerica": [], "codigo_risco": []}, indice)
+
+
+def quadro_coletado(indice: pd.Index, validos: List[int], documento: Optional[Dict], erro: Optional[str],
+                    motivos: Dict[int, str]) -> pd.DataFrame:
+    """
+    Bloco no modo `erros="coletar"`: as linhas sem resultado (bloco que falhou
+    ou linha que não pôde ser convertida) ficam com NA e o motivo em `erro`.
+    `validos` e `motivos` usam posições relativas ao bloco.
+    """
+    if documento is not None:
+        quadro = quadro_resultado(documento, pd.Index(validos))
+    else:
+        quadro = quadro_vazio(pd.Index([], dtype=np.int64))
+    quadro = quadro.astype({"predicao_numerica": "Int64", "codigo_risco": "Int64"}).reindex(
+        pd.RangeIndex(len(indice)))
+    erros = np.full(len(indice), None, dtype=object)
+    if erro is not None:
+        erros[validos] = erro
+    for posicao, motivo in motivos.items():
+        erros[posicao] = motivo
+    quadro["erro"] = erros
+    quadro.index = indice
+    return quadro
+
+
+def dividir_blocos(df: pd.DataFrame, tamanho: int, erros: str) -> Iterator[tuple]:
+    """
+    `(fatia, registros válidos, posições válidas, motivos)` de cada bloco. Com
+    `erros="levantar"` uma linha inválida interrompe tudo antes do primeiro envio.
+    """
+    if erros not in MODOS_ERRO:
+        raise ValueError(f"erros deve ser um de {MODOS_ERRO}: {erros}")
+    if erros == "levantar":
+        registros, motivos = registros_do_dataframe(df), {}
+    else:
+        registros, motivos = converter_dataframe(df)
+    for fatia in fatiar(len(registros), tamanho):
+        validos = [p - fatia.start for p in range(fatia.start, fatia.stop) if registros[p] is not None]
+        yield (fatia, [registros[fatia.start + p] for p in validos], validos,
+               {p - fatia.start: m for p, m in motivos.items() if fatia.start <= p < fatia.stop})
+
+
+def conteudo(resposta: httpx.Response):
+    if resposta.status_code != 200:
+        try:
+            detalhe = resposta.json().get("detail", resposta.text)
+        except ValueError:
+            detalhe = resposta.text
+        raise ErroAPI(resposta.status_code, detalhe)
+    return resposta.json()
+
+
+class _Repeticao:
+    """Política de novas tentativas compartilhada pelos dois clientes."""
+
+    def __init__(self, tentativas: int, espera_base: float, espera_maxima: float):
+        self.tentativas = tentativas
+        self.espera_base = espera_base
+        self.espera_maxima = espera_maxima
+
+    def espera(self, tentativa: int, resposta: Optional[httpx.Response] = None) -> float:
+        """Retry-After quando a API informa; senão backoff exponencial com jitter."""
+        if resposta is not None:
+            try:
+                return min(float(resposta.headers["Retry-After"]), self.espera_maxima)
+            except (KeyError, ValueError):
+                pass
+        return min(self.espera_base * 2 ** tentativa, self.espera_maxima) * random.uniform(0.5, 1.0)
+
+    def repetir(self, tentativa: int, resposta: Optional[httpx.Response] = None) -> bool:
+        if tentativa >= self.tentativas:
+            return False
+        return resposta is None or resposta.status_code in STATUS_TRANSITORIOS
+
+
+# ==================== CLIENTE SÍNCRONO ====================
+class ClienteAPI:
+    """
+    Cliente bloqueante. Os blocos de um DataFrame são enviados por
+    `concorrencia` threads que compartilham o mesmo pool de conexões.
+    """
+
+    def __init__(self, url: str = API_URL, tamanho_lote: int = 500, concorrencia: int = 4,
+                 tentativas: int = 3, espera_base: float = 0.2, espera_maxima: float = 5.0,
+                 timeout: float = 30.0, transporte: Optional[httpx.BaseTransport] = None):
+        if tamanho_lote < 1 or concorrencia < 1:
+            raise ValueError("tamanho_lote e concorrencia devem ser >= 1")
+        self.tamanho_lote = tamanho_lote
+        self.concorrencia = concorrencia
+        self.repeticao = _Repeticao(tentativas, espera_base, espera_maxima)
+        limites = httpx.Limits(max_connections=concorrencia, max_keepalive_connections=concorrencia)
+        self._http = httpx.Client(base_url=url, limits=limites, timeout=timeout, transport=transporte)
+
+    def __enter__(self) -> "ClienteAPI":
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.fechar()
+
+    def fechar(self) -> None:
+        self._http.close()
+
+    def _enviar(self, metodo: str, caminho: str, **kwargs):
+        tentativa = 0
+        while True:
+            try:
+                resposta = self._http.request(metodo, caminho, **kwargs)
+            except httpx.TransportError:
+                if not self.repeticao.repetir(tentativa):
+                    raise
+                time.sleep(self.repeticao.espera(tentativa))
+            else:
+                if not self.repeticao.repetir(tentativa, resposta):
+                    return conteudo(resposta)
+                time.sleep(self.repeticao.espera(tentativa, resposta))
+            tentativa += 1
+
+    def saude(self) -> Dict:
+        return self._enviar("GET", "/health")
+
+    def prever(self, acidente: Dict, **parametros) -> Dict:
+        return self._enviar("POST", "/prever", json=acidente, params=parametros)
+
+    def prever_lote(self, acidentes: List[Dict], **parametros) -> Dict:
+        return self._enviar("POST", "/prever_lote", json=acidentes, params=parametros)
+
+    def _pontuar_bloco(self, registros: List[Dict], erros: str, parametros: Dict) -> tuple:
+        """`(documento, erro)` de um bloco; com `erros="coletar"` a falha vira a mensagem."""
+        if not registros:
+            return None, None
+        try:
+            return self.prever_lote(registros, resposta="enxuta", **parametros), None
+        except (ErroAPI, httpx.HTTPError) as erro:
+            if erros == "levantar":
+                raise
+            return None, f"{type(erro).__name__}: {erro}"
+
+    def iterar_dataframe(self, df: pd.DataFrame, erros: str = "levantar", **parametros) -> Iterator[pd.DataFrame]:
+        """
+        Envia `df` em blocos de `tamanho_lote` e entrega um DataFrame por
+        bloco, na ordem de `df`, com no máximo `concorrencia` blocos em voo.
+
+        Com `erros="coletar"` um bloco que falha, ou uma linha que não pode
+        ser convertida, não interrompe os demais: essas linhas saem com NA e
+        o motivo na coluna `erro`.
+        """
+        pendentes = deque()
+
+        def entregar():
+            fatia, validos, motivos, tarefa = pendentes.popleft()
+            documento, erro = tarefa.result()
+            if erros == "levantar":
+                return quadro_resultado(documento, df.index[fatia])
+            return quadro_coletado(df.index[fatia], validos, documento, erro, motivos)
+
+        with ThreadPoolExecutor(max_workers=self.concorrencia) as executor:
+            try:
+                for fatia, registros, validos, motivos in dividir_blocos(df, self.tamanho_lote, erros):
+                    tarefa = executor.submit(self._pontuar_bloco, registros, erros, parametros)
+                    pendentes.append((fatia, validos, motivos, tarefa))
+                    if len(pendentes) >= self.concorrencia:
+                        yield entregar()
+                while pendentes:
+                    yield entregar()
+            finally:
+                for *_, tarefa in pendentes:
+                    tarefa.cancel()
+
+    def prever_dataframe(self, df: pd.DataFrame, erros: str = "levantar", **parametros) -> pd.DataFrame:
+        partes = list(self.iterar_dataframe(df, erros, **parametros))
+        return pd.concat(partes) if partes else quadro_vazio(df.index)
+
+
+# ==================== CLIENTE ASSÍNCRONO ====================
+class ClienteAPIAssincrono:
+    """
+    Cliente asyncio. Um semáforo limita as requisições simultâneas de toda a
+    instância, inclusive chamadas avulsas de `prever` disparadas com gather.
+    """
+
+    def __init__(self, url: str = API_URL, tamanho_lote: int = 500, concorrencia: int = 4,
+                 tentativas: int = 3, espera_base: float = 0.2, espera_maxima: float = 5.0,
+                 timeout: float = 30.0, transporte: Optional[httpx.AsyncBaseTransport] = None):
+        if tamanho_lote < 1 or concorrencia < 1:
+            raise ValueError("tamanho_lote e concorrencia devem ser >= 1")
+        self.tamanho_lote = tamanho_lote
+        self.concorrencia = concorrencia
+        self.repeticao = _Repeticao(tentativas, espera_base, espera_maxima)
+        self._semaforo = asyncio.Semaphore(concorrencia)
+        limites = httpx.Limits(max_connections=concorrencia, max_keepalive_connections=concorrencia)
+        self._http = httpx.AsyncClient(base_url=url, limits=limites, timeout=timeout, transport=transporte)
+
+    async def __aenter__(self) -> "ClienteAPIAssincrono":
+        return self
+
+    async def __aexit__(self, *_) -> None:
+        await self.fechar()
+
+    async def fechar(self) -> None:
+        await self._http.aclose()
+
+    async def _enviar(self, metodo: str, caminho: str, **kwargs):
+        tentativa = 0
+        while True:
+            try:
+                async with self._semaforo:
+                    resposta = await self._http.request(metodo, caminho, **kwargs)
+            except httpx.TransportError:
+                if not self.repeticao.repetir(tentativa):
+                    raise
+                await asyncio.sleep(self.repeticao.espera(tentativa))
+            else:
+                if not self.repeticao.repetir(tentativa, resposta):
+                    return conteudo(resposta)
+                await asyncio.sleep(self.repeticao.espera(tentativa, resposta))
+            tentativa += 1
+
+    async def saude(self) -> Dict:
+        return await self._enviar("GET", "/health")
+
+    async def prever(self, acidente: Dict, **parametros) -> Dict:
+        return await self._enviar("POST", "/prever", json=acidente, params=parametros)
+
+    async def prever_lote(self, acidentes: List[Dict], **parametros) -> Dict:
+        return await self._enviar("POST", "/prever_lote", json=acidentes, params=parametros)
+
+    async def _pontuar_bloco(self, registros: List[Dict], erros: str, parametros: Dict) -> tuple:
+        if not registros:
+            return None, None
+        try:
+            return await self.prever_lote(registros, resposta="enxuta", **parametros), None
+        except (ErroAPI, httpx.HTTPError) as erro:
+            if erros == "levantar":
+                raise
+            return None, f"{type(erro).__name__}: {erro}"
+
+    async def iterar_dataframe(self, df: pd.DataFrame, erros: str = "levantar",
+                               **parametros) -> AsyncIterator[pd.DataFrame]:
+        """Igual a `ClienteAPI.iterar_dataframe`, com tarefas asyncio no lugar de threads."""
+        pendentes = deque()
+
+        async def entregar():
+            fatia, validos, motivos, tarefa = pendentes.popleft()
+            documento, erro = await tarefa
+            if erros == "levantar":
+                return quadro_resultado(documento, df.index[fatia])
+            return quadro_coletado(df.index[fatia], validos, documento, erro, motivos)
+
+        try:
+            for fatia, registros, validos, motivos in dividir_blocos(df, self.tamanho_lote, erros):
+                tarefa = asyncio.ensure_future(self._pontuar_bloco(registros, erros, parametros))
+                pendentes.append((fatia, validos, motivos, tarefa))
+                if len(pendentes) >= self.concorrencia:
+                    yield await entregar()
+            while pendentes:
+                yield await entregar()
+        finally:
+            for *_, tarefa in pendentes:
+                tarefa.cancel()
+
+    async def prever_dataframe(self, df: pd.DataFrame, erros: str = "levantar", **parametros) -> pd.DataFrame:
+        partes = [parte async for parte in self.iterar_dataframe(df, erros, **parametros)]
+        return pd.concat(partes) if partes else quadro_vazio(df.index)
+
+
+# ==================== COMPARAÇÃO DE THROUGHPUT ====================
+def dataframe_de_teste(linhas: int) -> pd.DataFrame:
+    """`docs/teste.csv` limpo como em `benchmark_api.py`, repetido até `linhas`."""
+    from benchmark_api import carregar_payloads
+    payloads = carregar_payloads()
+    return pd.DataFrame([payloads[i % len(payloads)] for i in range(linhas)])
+
+
+def sequencial_requests(url: str, df: pd.DataFrame) -> np.ndarray:
+    """O laço de `gerar_relatorio_completo`: um `requests.post` sem sessão por linha."""
+    import requests
+    probabilidades = []
+    for acidente in registros_do_dataframe(df):
+        resposta = requests.post(f"{url}/prever", json=acidente, timeout=10)
+        resposta.raise_for_status()
+        probabilidades.append(resposta.json()["probabilidade_fatal"])
+    return np.array(probabilidades)
+
+
+def sequencial_keepalive(url: str, df: pd.DataFrame) -> np.ndarray:
+    """Ainda uma linha por requisição, mas reaproveitando a conexão."""
+    with ClienteAPI(url, concorrencia=1) as cliente:
+        return np.array([cliente.prever(acidente)["probabilidade_fatal"]
+                         for acidente in registros_do_dataframe(df)])
+
+
+def comparar_throughput(url: str, linhas: int, linhas_sequencial: int, tamanho_lote: int,
+                        concorrencia: int) -> Dict:
+    df = dataframe_de_teste(linhas)
+    amostra = df.iloc[:linhas_sequencial]
+    cenarios = {
+        "sequencial_requests": (amostra, lambda: sequencial_requests(url, amostra)),
+        "sequencial_keepalive": (amostra, lambda: sequencial_keepalive(url, amostra)),
+    }
+
+    def lotes_sincrono():
+        with ClienteAPI(url, tamanho_lote=tamanho_lote, concorrencia=concorrencia) as cliente:
+            return cliente.prever_dataframe(df)["probabilidade_fatal"].to_numpy()
+
+    async def lotes_assincrono():
+        async with ClienteAPIAssincrono(url, tamanho_lote=tamanho_lote, concorrencia=concorrencia) as cliente:
+            return (await cliente.prever_dataframe(df))["probabilidade_fatal"].to_numpy()
+
+    cenarios["lotes_sincrono"] = (df, lotes_sincrono)
+    cenarios["lotes_assincrono"] = (df, lambda: asyncio.run(lotes_assincrono()))
+
+    resultado = {}
+    referencia = None
+    for nome, (entrada, executar) in cenarios.items():
+        print(f"🔄 {nome} ({len(entrada)} linhas)...")
+        inicio = time.perf_counter()
+        probabilidades = executar()
+        segundos = time.perf_counter() - inicio
+        if referencia is None:
+            referencia = probabilidades
+        n = min(len(referencia), len(probabilidades))
+        resultado[nome] = {
+            "linhas": len(entrada),
+            "segundos": round(segundos, 3),
+            "linhas_por_segundo": round(len(entrada) / segundos, 1),
+            "diferenca_maxima": float(np.max(np.abs(probabilidades[:n] - referencia[:n]))) if n else 0.0,
+        }
+
+    base = resultado["sequencial_requests"]["linhas_por_segundo"]
+    print(f"\n{'cenário':<22} {'linhas':>7} {'segundos':>9} {'linhas/s':>10} {'ganho':>8} {'dif. máx':>9}")
+    for nome, m in resultado.items():
+        print(f"{nome:<22} {m['linhas']:>7} {m['segundos']:>9.2f} {m['linhas_por_segundo']:>10.1f} "
+              f"{m['linhas_por_segundo'] / base:>7.1f}x {m['diferenca_maxima']:>9.1e}")
+    return resultado
+
+
+def main(argumentos: Optional[list] = None) -> None:
+    parser = argparse.ArgumentParser(description="Cliente da API de predição")
+    sub = parser.add_subparsers(dest="comando", required=True)
+
+    p_comparar = sub.add_parser("comparar", help="Throughput: requests sequencial x cliente em lotes")
+    p_comparar.add_argument("--url", default=API_URL)
+    p_comparar.add_argument("--uvicorn", action="store_true",
+                            help="Sobe um uvicorn local (porta --porta) em vez de usar --url")
+    p_comparar.add_argument("--porta", type=int, default=8766)
+    p_comparar.add_argument("--linhas", type=int, default=5000, help="Linhas enviadas pelo cliente em lotes")
+    p_comparar.add_argument("--linhas-sequencial", type=int, default=500,
+                            help="Linhas dos cenários sequenciais (lentos)")
+    p_comparar.add_argument("--tamanho-lote", type=int, default=500)
+    p_comparar.add_argument("--concorrencia", type=int, default=4)
+    p_comparar.add_argument("--saida", help="Grava o resultado em JSON")
+
+    args = parser.parse_args(argumentos)
+
+    print("=" * 70)
+    print(f"🚀 COMPARAÇÃO DE THROUGHPUT DO CLIENTE (lote {args.tamanho_lote}, concorrência {args.concorrencia})")
+    print("=" * 70)
+
+    servidor = None
+    url = args.url
+    if args.uvicorn:
+        from benchmark_api import iniciar_uvicorn
+        # Sem cache de predições: as linhas se repetem e o cache mascararia o custo por requisição
+        servidor = iniciar_uvicorn(args.porta, {
+            "LOG_ARQUIVO": os.path.join(tempfile.gettempdir(), "cliente_api.log"),
+            "CACHE_PREDICOES_TAMANHO": "0",
+        })
+        url = f"http://127.0.0.1:{args.porta}"
+    try:
+        resultado = comparar_throughput(url, args.linhas, args.linhas_sequencial, args.tamanho_lote,
+                                        args.concorrencia)
+    finally:
+        if servidor is not None:
+            servidor.terminate()
+            servidor.wait(timeout=10)
+
+    if args.saida:
+        with open(args.saida, "w") as f:
+            json.dump(resultado, f, indent=2, ensure_ascii=False)
+        print(f"\n💾 Resultado salvo em {args.saida}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
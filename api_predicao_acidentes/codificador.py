@@ -0,0 +1,475 @@
+import math
+import numpy as np
+from typing import Dict, List, Mapping, Optional, Sequence
+
+try:
+    from scipy import sparse
+except ImportError:
+    sparse = None
+
+
+class CodificadorCompilado:
+    """
+    Codificador de features pré-compilado a partir de `colunas_treino` e do scaler.
+
+    Reproduz exatamente `pd.get_dummies` + `reindex(colunas_treino, fill_value=0)`
+    + `scaler.transform`, mas sem pandas: as colunas categóricas são resolvidas
+    por um dicionário `"campo_valor" -> índice` e a normalização usa arrays de
+    média/escala calculados uma única vez.
+    """
+
+    def __init__(self, colunas: Sequence[str], media: Optional[np.ndarray],
+                 escala: Optional[np.ndarray], campos_numericos: Sequence[str],
+                 campos_categoricos: Sequence[str]):
+        self.colunas = list(colunas)
+        self.n_features = len(self.colunas)
+        self.indice_coluna: Dict[str, int] = {nome: i for i, nome in enumerate(self.colunas)}
+
+        # StandardScaler com with_mean/with_std=False guarda None nesses atributos
+        self.media = np.zeros(self.n_features) if media is None else np.asarray(media, dtype=np.float64)
+        self.escala = np.ones(self.n_features) if escala is None else np.asarray(escala, dtype=np.float64)
+
+        # Campos numéricos ausentes do treino são descartados pelo reindex
+        self.campos_numericos = [c for c in campos_numericos if c in self.indice_coluna]
+        self.indices_numericos = np.array([self.indice_coluna[c] for c in self.campos_numericos], dtype=np.intp)
+        self.campos_categoricos = list(campos_categoricos)
+
+        # Valores já normalizados para uma coluna em 0 (ausente) e em 1 (dummy ativa)
+        self.linha_base = (np.zeros(self.n_features) - self.media) / self.escala
+        self.valor_ativo = (np.ones(self.n_features) - self.media) / self.escala
+
+        # Representação esparsa: numéricas normalizadas e dummies ativas valendo 1/σ,
+        # sem centralizar. A parte constante das colunas categóricas (linha_base)
+        # fica em `base_categorica`, somada uma única vez por quem consome a matriz.
+        self.valor_esparso = 1.0 / self.escala
+        self.base_categorica = self.linha_base.copy()
+        self.base_categorica[self.indices_numericos] = 0.0
+
+    @classmethod
+    def a_partir_do_scaler(cls, colunas: Sequence[str], scaler, campos_numericos: Sequence[str],
+                           campos_categoricos: Sequence[str]) -> "CodificadorCompilado":
+        """Constrói o codificador a partir de um `StandardScaler` treinado."""
+        return cls(colunas, getattr(scaler, "mean_", None), getattr(scaler, "scale_", None),
+                   campos_numericos, campos_categoricos)
+
+    def indice_categoria(self, campo: str, valor) -> int:
+        """Retorna o índice da dummy `campo_valor` ou -1 se ela não existe no treino."""
+        return self.indice_coluna.get(f"{campo}_{valor}", -1)
+
+    def codificar(self, registro: Dict, saida: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Codifica e normaliza um registro, escrevendo direto em uma linha NumPy.
+
+        Se `saida` for informada (vetor de tamanho `n_features`), ela é
+        reutilizada; caso contrário uma nova linha é alocada.
+        Retorna uma matriz (1, n_features), como `preprocessar_entrada`.
+        """
+        if saida is None:
+            linha = self.linha_base.copy()
+        else:
+            linha = saida
+            linha[:] = self.linha_base
+
+        for campo, idx in zip(self.campos_numericos, self.indices_numericos):
+            linha[idx] = (float(registro[campo]) - self.media[idx]) / self.escala[idx]
+
+        for campo in self.campos_categoricos:
+            idx = self.indice_categoria(campo, registro[campo])
+            if idx >= 0:
+                linha[idx] = self.valor_ativo[idx]
+
+        return linha.reshape(1, -1)
+
+    def codificar_lote(self, registros: List[Dict]) -> np.ndarray:
+        """Versão vetorizada de `codificar` para vários registros."""
+        n = len(registros)
+        X = np.tile(self.linha_base, (n, 1))
+        if n == 0:
+            return X
+
+        if len(self.indices_numericos) > 0:
+            numericos = np.array(
+                [[float(r[campo]) for campo in self.campos_numericos] for r in registros],
+                dtype=np.float64
+            )
+            X[:, self.indices_numericos] = (
+                (numericos - self.media[self.indices_numericos]) / self.escala[self.indices_numericos]
+            )
+
+        linhas, colunas = [], []
+        for i, registro in enumerate(registros):
+            for campo in self.campos_categoricos:
+                idx = self.indice_categoria(campo, registro[campo])
+                if idx >= 0:
+                    linhas.append(i)
+                    colunas.append(idx)
+        if linhas:
+            colunas = np.array(colunas, dtype=np.intp)
+            X[np.array(linhas, dtype=np.intp), colunas] = self.valor_ativo[colunas]
+
+        return X
+
+    def codificar_colunas(self, colunas: Mapping[str, Sequence], n: int) -> np.ndarray:
+        """
+        Versão colunar de `codificar_lote`: `colunas[campo]` é a sequência de
+        valores do campo (ex.: um DataFrame ou dicionário de arrays) com `n` linhas.
+        """
+        X = np.tile(self.linha_base, (n, 1))
+        if n == 0:
+            return X
+
+        if len(self.indices_numericos) > 0:
+            numericos = np.column_stack(
+                [np.asarray(colunas[campo], dtype=np.float64) for campo in self.campos_numericos]
+            )
+            X[:, self.indices_numericos] = (
+                (numericos - self.media[self.indices_numericos]) / self.escala[self.indices_numericos]
+            )
+
+        for campo in self.campos_categoricos:
+            indices = np.fromiter(
+                (self.indice_categoria(campo, valor) for valor in colunas[campo]), dtype=np.intp, count=n
+            )
+            conhecidos = np.flatnonzero(indices >= 0)
+            X[conhecidos, indices[conhecidos]] = self.valor_ativo[indices[conhecidos]]
+
+        return X
+
+    def codificar_esparso(self, registros: List[Dict]):
+        """
+        Versão esparsa (CSR) de `codificar_lote`.
+
+        Cada linha guarda só os campos numéricos e as dummies ativas, então a
+        memória cresce com o nº de registros e não com o vocabulário. A matriz
+        densa equivalente é `X.toarray() + base_categorica`.
+        """
+        return self._montar_esparsa(*self.numericos_e_indices(registros))
+
+    def numericos_e_indices(self, registros: List[Dict]) -> tuple:
+        """
+        Campos numéricos brutos (n × nº numéricos) e índice da dummy ativa de
+        cada campo categórico (n × nº categóricos, -1 se fora do treino).
+        """
+        n = len(registros)
+        numericos = np.array(
+            [[float(r[campo]) for campo in self.campos_numericos] for r in registros], dtype=np.float64
+        ).reshape(n, len(self.campos_numericos))
+        indices = np.array(
+            [[self.indice_categoria(campo, r[campo]) for campo in self.campos_categoricos] for r in registros],
+            dtype=np.intp
+        ).reshape(n, len(self.campos_categoricos))
+        return numericos, indices
+
+    def codificar_colunas_esparso(self, colunas: Mapping[str, Sequence], n: int):
+        """Versão colunar de `codificar_esparso` (mesmo formato de `codificar_colunas`)."""
+        numericos = np.empty((n, len(self.campos_numericos)), dtype=np.float64)
+        for j, campo in enumerate(self.campos_numericos):
+            numericos[:, j] = np.asarray(colunas[campo], dtype=np.float64)
+        indices = np.empty((n, len(self.campos_categoricos)), dtype=np.intp)
+        for j, campo in enumerate(self.campos_categoricos):
+            # Um lookup por valor distinto: blocos grandes repetem muito as categorias
+            distintos, posicoes = np.unique(np.asarray(colunas[campo], dtype=str), return_inverse=True)
+            indices[:, j] = np.array([self.indice_categoria(campo, valor) for valor in distintos],
+                                     dtype=np.intp)[posicoes.ravel()]
+        return self._montar_esparsa(numericos, indices)
+
+    def _montar_esparsa(self, numericos: np.ndarray, indices: np.ndarray):
+        """Monta a CSR direto de `indptr`: numéricas sempre armazenadas, dummies só se conhecidas."""
+        if sparse is None:
+            raise ImportError("scipy não está instalado: a codificação esparsa não está disponível")
+
+        n = numericos.shape[0]
+        conhecidos = indices >= 0
+        colunas = np.concatenate(
+            [np.broadcast_to(self.indices_numericos, numericos.shape), indices], axis=1
+        )
+        valores = np.concatenate(
+            [(numericos - self.media[self.indices_numericos]) / self.escala[self.indices_numericos],
+             self.valor_esparso[np.where(conhecidos, indices, 0)]], axis=1
+        )
+        # Seleção em ordem de linha: numéricas primeiro, depois as dummies conhecidas
+        armazenar = np.concatenate([np.ones(numericos.shape, dtype=bool), conhecidos], axis=1)
+        indptr = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(armazenar.sum(axis=1), out=indptr[1:])
+        return sparse.csr_matrix((valores[armazenar], colunas[armazenar], indptr),
+                                 shape=(n, self.n_features))
+
+
+def registros_de_cobertura(codificador: CodificadorCompilado, exemplo: Dict) -> List[Dict]:
+    """
+    Gera registros sintéticos que ativam cada dummy conhecida ao menos uma vez.
+
+    Usado na verificação de paridade: parte de `exemplo` e percorre o
+    vocabulário de cada campo categórico, incluindo um valor inexistente.
+    """
+    vocabulario = {
+        campo: [nome[len(campo) + 1:] for nome in codificador.colunas if nome.startswith(f"{campo}_")]
+        for campo in codificador.campos_categoricos
+    }
+    n = max([len(v) for v in vocabulario.values()] + [1])
+
+    registros = [dict(exemplo)]
+    for i in range(n):
+        registro = dict(exemplo)
+        for campo, valores in vocabulario.items():
+            if valores:
+                registro[campo] = valores[i % len(valores)]
+        for j, campo in enumerate(codificador.campos_numericos):
+            registro[campo] = type(exemplo[campo])(exemplo[campo] + (i + 1) * (j + 1))
+        registros.append(registro)
+
+    desconhecido = dict(exemplo)
+    for campo in codificador.campos_categoricos:
+        desconhecido[campo] = "__CATEGORIA_INEXISTENTE__"
+    registros.append(desconhecido)
+
+    return registros
+
+
+class KernelLinearFundido:
+    """
+    Kernel de pontuação que incorpora o StandardScaler nos pesos da regressão logística.
+
+    Como z = b + Σ w_j (x_j - μ_j) / σ_j = (b - Σ w_j μ_j / σ_j) + Σ (w_j / σ_j) x_j,
+    os pesos e o intercepto são reescalados uma única vez. Cada predição passa a
+    ser a soma dos campos numéricos ponderados mais um peso por valor
+    categórico, seguida da sigmoide: O(nº de campos) em vez de O(nº de dummies).
+    """
+
+    def __init__(self, codificador: CodificadorCompilado, coeficientes: np.ndarray, intercepto: float):
+        coeficientes = np.asarray(coeficientes, dtype=np.float64).ravel()
+        if coeficientes.shape[0] != codificador.n_features:
+            raise ValueError(
+                f"Modelo com {coeficientes.shape[0]} coeficientes e codificador com "
+                f"{codificador.n_features} colunas"
+            )
+
+        self.codificador = codificador
+        self.pesos = coeficientes / codificador.escala
+        self.intercepto = float(intercepto) - float(np.dot(self.pesos, codificador.media))
+        self.pesos_numericos = self.pesos[codificador.indices_numericos]
+
+    @classmethod
+    def a_partir_do_modelo(cls, codificador: CodificadorCompilado, modelo) -> "KernelLinearFundido":
+        """Constrói o kernel a partir de uma `LogisticRegression` binária treinada."""
+        if modelo.coef_.shape[0] != 1:
+            raise ValueError("Kernel fundido suporta apenas regressão logística binária")
+        return cls(codificador, modelo.coef_[0], modelo.intercept_[0])
+
+    def decisao(self, registro: Dict) -> float:
+        """Calcula o logit de um registro."""
+        cod = self.codificador
+        z = self.intercepto
+        for campo, peso in zip(cod.campos_numericos, self.pesos_numericos):
+            z += peso * float(registro[campo])
+        for campo in cod.campos_categoricos:
+            idx = cod.indice_categoria(campo, registro[campo])
+            if idx >= 0:
+                z += self.pesos[idx]
+        return z
+
+    def probabilidade(self, registro: Dict) -> float:
+        """Probabilidade da classe positiva (equivalente a `predict_proba(X)[0, 1]`)."""
+        return _sigmoide(self.decisao(registro))
+
+    def probabilidades_lote(self, registros: List[Dict]) -> np.ndarray:
+        """Versão vetorizada de `probabilidade` para vários registros."""
+        cod = self.codificador
+        n = len(registros)
+        z = np.full(n, self.intercepto)
+        if n == 0:
+            return z
+
+        if len(cod.indices_numericos) > 0:
+            numericos = np.array(
+                [[float(r[campo]) for campo in cod.campos_numericos] for r in registros],
+                dtype=np.float64
+            )
+            z += numericos @ self.pesos_numericos
+
+        for campo in cod.campos_categoricos:
+            indices = np.array([cod.indice_categoria(campo, r[campo]) for r in registros], dtype=np.intp)
+            conhecidos = indices >= 0
+            z[conhecidos] += self.pesos[indices[conhecidos]]
+
+        return _sigmoide(z)
+
+    def probabilidades_colunas(self, colunas: Mapping[str, Sequence], n: int) -> np.ndarray:
+        """Versão colunar de `probabilidades_lote` (mesmo formato de `codificar_colunas`)."""
+        cod = self.codificador
+        z = np.full(n, self.intercepto)
+        if n == 0:
+            return z
+
+        if len(cod.indices_numericos) > 0:
+            numericos = np.column_stack(
+                [np.asarray(colunas[campo], dtype=np.float64) for campo in cod.campos_numericos]
+            )
+            z += numericos @ self.pesos_numericos
+
+        for campo in cod.campos_categoricos:
+            indices = np.fromiter(
+                (cod.indice_categoria(campo, valor) for valor in colunas[campo]), dtype=np.intp, count=n
+            )
+            conhecidos = indices >= 0
+            z[conhecidos] += self.pesos[indices[conhecidos]]
+
+        return _sigmoide(z)
+
+
+class PontuadorEsparso:
+    """
+    Regressão logística aplicada direto na saída de `codificar_esparso`.
+
+    Como a linha densa é S + base_categorica, z = (b + w · base_categorica) + S · w:
+    o termo constante entra uma vez no intercepto e cada registro custa só os
+    valores armazenados, sem materializar n × nº de colunas.
+    """
+
+    def __init__(self, codificador: CodificadorCompilado, coeficientes: np.ndarray, intercepto: float):
+        coeficientes = np.asarray(coeficientes, dtype=np.float64).ravel()
+        if coeficientes.shape[0] != codificador.n_features:
+            raise ValueError(
+                f"Modelo com {coeficientes.shape[0]} coeficientes e codificador com "
+                f"{codificador.n_features} colunas"
+            )
+        if sparse is None:
+            raise ImportError("scipy não está instalado: a pontuação esparsa não está disponível")
+
+        self.codificador = codificador
+        self.coeficientes = coeficientes
+        self.intercepto = float(intercepto) + float(np.dot(coeficientes, codificador.base_categorica))
+
+    @classmethod
+    def a_partir_do_modelo(cls, codificador: CodificadorCompilado, modelo) -> "PontuadorEsparso":
+        """Constrói o pontuador a partir de uma `LogisticRegression` binária treinada."""
+        if modelo.coef_.shape[0] != 1:
+            raise ValueError("Pontuação esparsa suporta apenas regressão logística binária")
+        return cls(codificador, modelo.coef_[0], modelo.intercept_[0])
+
+    def probabilidade(self, registro: Dict) -> float:
+        """Um único registro: o mesmo produto esparso, sem o custo de montar a CSR."""
+        cod = self.codificador
+        z = self.intercepto
+        for campo, idx in zip(cod.campos_numericos, cod.indices_numericos):
+            z += self.coeficientes[idx] * (float(registro[campo]) - cod.media[idx]) / cod.escala[idx]
+        for campo in cod.campos_categoricos:
+            idx = cod.indice_categoria(campo, registro[campo])
+            if idx >= 0:
+                z += self.coeficientes[idx] * cod.valor_esparso[idx]
+        return _sigmoide(z)
+
+    def probabilidades_matriz(self, X) -> np.ndarray:
+        """Probabilidades da classe positiva para uma matriz de `codificar_esparso`."""
+        return _sigmoide(X @ self.coeficientes + self.intercepto)
+
+    def probabilidades_lote(self, registros: List[Dict]) -> np.ndarray:
+        """Equivalente a `predict_proba(codificar_lote(registros))[:, 1]`."""
+        return self.probabilidades_matriz(self.codificador.codificar_esparso(registros))
+
+    def probabilidades_colunas(self, colunas: Mapping[str, Sequence], n: int) -> np.ndarray:
+        """Versão colunar de `probabilidades_lote`."""
+        return self.probabilidades_matriz(self.codificador.codificar_colunas_esparso(colunas, n))
+
+
+class ExplicadorLinear:
+    """
+    Contribuição de cada campo para o logit de uma regressão logística.
+
+    Na decomposição de `PontuadorEsparso`, z = intercepto + Σ contribuições:
+    um campo numérico contribui coeficiente × valor padronizado e um campo
+    categórico o coeficiente × 1/σ da dummy ativa (a parte constante das
+    dummies já está no intercepto; categoria fora do treino contribui 0).
+    Os pesos são calculados uma vez por versão e um lote é explicado com
+    operações vetorizadas sobre a matriz n × nº de campos.
+    """
+
+    def __init__(self, codificador: CodificadorCompilado, coeficientes: np.ndarray, intercepto: float):
+        coeficientes = np.asarray(coeficientes, dtype=np.float64).ravel()
+        if coeficientes.shape[0] != codificador.n_features:
+            raise ValueError(
+                f"Modelo com {coeficientes.shape[0]} coeficientes e codificador com "
+                f"{codificador.n_features} colunas"
+            )
+
+        self.codificador = codificador
+        self.campos = codificador.campos_numericos + codificador.campos_categoricos
+        self.intercepto = float(intercepto) + float(np.dot(coeficientes, codificador.base_categorica))
+        indices = codificador.indices_numericos
+        self.pesos_numericos = coeficientes[indices]
+        self.media_numericos = codificador.media[indices]
+        self.escala_numericos = codificador.escala[indices]
+        # Última posição: contribuição 0 para categorias fora do treino (índice -1)
+        self.contribuicao_dummy = np.append(coeficientes * codificador.valor_esparso, 0.0)
+
+    @classmethod
+    def a_partir_do_modelo(cls, codificador: CodificadorCompilado, modelo) -> "ExplicadorLinear":
+        """Constrói o explicador a partir de uma `LogisticRegression` binária treinada."""
+        if modelo.coef_.shape[0] != 1:
+            raise ValueError("Explicação linear suporta apenas regressão logística binária")
+        return cls(codificador, modelo.coef_[0], modelo.intercept_[0])
+
+    def contribuicoes(self, registros: List[Dict]) -> tuple:
+        """Matriz n × nº de campos com as contribuições e os índices das dummies ativas."""
+        numericos, indices = self.codificador.numericos_e_indices(registros)
+        contribuicoes = np.concatenate(
+            [(numericos - self.media_numericos) / self.escala_numericos * self.pesos_numericos,
+             self.contribuicao_dummy[indices]], axis=1
+        )
+        return contribuicoes, indices
+
+    def logits(self, registros: List[Dict]) -> np.ndarray:
+        """Soma das contribuições mais o intercepto (igual ao logit do modelo)."""
+        return self.contribuicoes(registros)[0].sum(axis=1) + self.intercepto
+
+    def explicar_lote(self, registros: List[Dict], k: int) -> List[List[Dict]]:
+        """
+        As `k` maiores contribuições em valor absoluto de cada registro, em ordem
+        decrescente: `feature` (coluna do treino, ou `campo_valor` fora do treino),
+        `valor` recebido e `contribuicao` no logit.
+        """
+        n = len(registros)
+        k = min(k, len(self.campos))
+        if n == 0 or k <= 0:
+            return [[] for _ in range(n)]
+
+        contribuicoes, indices = self.contribuicoes(registros)
+        magnitude = np.abs(contribuicoes)
+        if k < magnitude.shape[1]:
+            topo = np.argpartition(-magnitude, k - 1, axis=1)[:, :k]
+        else:
+            topo = np.broadcast_to(np.arange(magnitude.shape[1]), (n, k))
+        ordem = np.take_along_axis(topo, np.argsort(-np.take_along_axis(magnitude, topo, axis=1), axis=1), axis=1)
+        valores = np.take_along_axis(contribuicoes, ordem, axis=1).tolist()
+
+        colunas = self.codificador.colunas
+        n_numericos = len(self.codificador.campos_numericos)
+        explicacoes = []
+        for i, (registro, posicoes) in enumerate(zip(registros, ordem.tolist())):
+            itens = []
+            for posicao, contribuicao in zip(posicoes, valores[i]):
+                campo = self.campos[posicao]
+                if posicao < n_numericos:
+                    feature = campo
+                else:
+                    idx = int(indices[i, posicao - n_numericos])
+                    feature = colunas[idx] if idx >= 0 else f"{campo}_{registro[campo]}"
+                itens.append({"feature": feature, "valor": registro[campo], "contribuicao": round(contribuicao, 4)})
+            explicacoes.append(itens)
+        return explicacoes
+
+    def explicar(self, registro: Dict, k: int) -> List[Dict]:
+        """`explicar_lote` para um único registro."""
+        return self.explicar_lote([registro], k)[0]
+
+
+def _sigmoide(z):
+    """Sigmoide logística sem overflow para logits muito negativos."""
+    if np.ndim(z) == 0:
+        z = float(z)
+        if z >= 0:
+            return 1.0 / (1.0 + math.exp(-z))
+        ez = math.exp(z)
+        return ez / (1.0 + ez)
+    ez = np.exp(-np.abs(z))
+    return np.where(z >= 0, 1.0 / (1.0 + ez), ez / (1.0 + ez))
@@ -0,0 +1,199 @@
+"""
+Entrada e saída colunar para lotes grandes (`POST /prever_colunar`).
+
+Em vez de uma lista de objetos, o corpo traz uma coluna por campo
+(`{"latitude": [...], "uf": [...], ...}`), e a validação é feita por coluna
+com NumPy em vez de um modelo pydantic por registro. Formatos, escolhidos
+pelo `Content-Type` (entrada) e pelo `Accept` (saída):
+
+- `application/json`: objeto de colunas (sem dependências extras)
+- `application/msgpack`: o mesmo objeto em MessagePack (requer `msgpack`)
+- `application/vnd.apache.arrow.stream`: Arrow IPC stream (requer `pyarrow`)
+"""
+import json
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+TIPOS_MIDIA = {
+    "application/json": "json",
+    "application/msgpack": "msgpack",
+    "application/x-msgpack": "msgpack",
+    "application/vnd.apache.arrow.stream": "arrow",
+}
+TIPO_POR_FORMATO = {
+    "json": "application/json",
+    "msgpack": "application/msgpack",
+    "arrow": "application/vnd.apache.arrow.stream",
+}
+DEPENDENCIAS = {"msgpack": "msgpack", "arrow": "pyarrow"}
+
+# Exibido no máximo este número de linhas inválidas por coluna
+MAX_ERROS_POR_COLUNA = 5
+
+
+class ErroValidacaoColunar(ValueError):
+    """Colunas ausentes ou com valores inválidos; `erros` segue o formato de detalhe do FastAPI."""
+
+    def __init__(self, erros: List[Dict]):
+        super().__init__("; ".join(f"{'.'.join(map(str, e['loc']))}: {e['msg']}" for e in erros))
+        self.erros = erros
+
+
+def formato_disponivel(formato: str) -> bool:
+    if formato == "msgpack":
+        return msgpack is not None
+    if formato == "arrow":
+        return pa is not None
+    return formato == "json"
+
+
+def formato_do_tipo(tipo_conteudo: str) -> Optional[str]:
+    """Formato de um `Content-Type` (parâmetros como `charset` são ignorados)."""
+    return TIPOS_MIDIA.get(tipo_conteudo.split(";")[0].strip().lower())
+
+
+def negociar_formato_saida(accept: str, formato_entrada: str) -> Optional[str]:
+    """
+    Primeiro formato conhecido e instalado do `Accept`, na ordem do cabeçalho.
+
+    Sem `Accept` (ou com `*/*`) responde no mesmo formato da entrada;
+    None se nenhum tipo aceito puder ser produzido.
+    """
+    tipos = [parte.split(";")[0].strip().lower() for parte in accept.split(",") if parte.strip()]
+    if not tipos:
+        return formato_entrada
+    for tipo in tipos:
+        if tipo in ("*/*", "application/*"):
+            return formato_entrada
+        formato = TIPOS_MIDIA.get(tipo)
+        if formato is not None and formato_disponivel(formato):
+            return formato
+    return None
+
+
+def decodificar_colunas(corpo: bytes, formato: str) -> Dict[str, Sequence]:
+    """Lê o corpo como um mapeamento `campo -> coluna` (listas ou arrays NumPy)."""
+    if formato == "arrow":
+        with pa.ipc.open_stream(corpo) as leitor:
+            tabela = leitor.read_all()
+        colunas = {}
+        for nome in tabela.column_names:
+            coluna = tabela.column(nome)
+            if pa.types.is_string(coluna.type) or pa.types.is_large_string(coluna.type) or coluna.null_count:
+                # Texto e colunas com nulos seguem como listas (nulos viram None e são rejeitados)
+                colunas[nome] = coluna.to_pylist()
+            else:
+                colunas[nome] = coluna.to_numpy()
+        return colunas
+
+    colunas = msgpack.unpackb(corpo, raw=False) if formato == "msgpack" else json.loads(corpo)
+    if not isinstance(colunas, dict) or not all(isinstance(v, list) for v in colunas.values()):
+        raise ErroValidacaoColunar([{
+            "loc": ["body"], "msg": "O corpo deve ser um objeto com uma lista de valores por campo",
+            "type": "colunas_invalidas"
+        }])
+    return colunas
+
+
+def _linhas_invalidas(mascara: np.ndarray) -> List[int]:
+    return np.flatnonzero(mascara)[:MAX_ERROS_POR_COLUNA].tolist()
+
+
+def validar_colunas(colunas: Dict[str, Sequence], campos_float: Sequence[str], campos_int: Sequence[str],
+                    campos_texto: Sequence[str]) -> tuple:
+    """
+    Valida e converte as colunas de uma vez: floats e inteiros viram arrays
+    NumPy, texto continua lista de `str`. Mesmas regras do `AcidenteAereo`
+    (inteiro aceita float sem parte fracionária; nulos são rejeitados).
+
+    Retorna `(colunas_validas, n)`; levanta `ErroValidacaoColunar` com todas
+    as colunas problemáticas.
+    """
+    campos = list(campos_float) + list(campos_int) + list(campos_texto)
+    erros = [{"loc": ["body", campo], "msg": "Field required", "type": "missing"}
+             for campo in campos if campo not in colunas]
+    if erros:
+        raise ErroValidacaoColunar(erros)
+
+    tamanhos = {campo: len(colunas[campo]) for campo in campos}
+    n = tamanhos[campos[0]]
+    if len(set(tamanhos.values())) > 1:
+        raise ErroValidacaoColunar([{
+            "loc": ["body"], "msg": f"Colunas com tamanhos diferentes: {tamanhos}", "type": "tamanho_colunas"
+        }])
+
+    validas = {}
+    for campo in list(campos_float) + list(campos_int):
+        valores = colunas[campo]
+        if isinstance(valores, list) and None in valores:
+            erros.append({"loc": ["body", campo, valores.index(None)], "msg": "Valor nulo", "type": "nulo"})
+            continue
+        try:
+            array = np.asarray(valores, dtype=np.float64)
+        except (TypeError, ValueError):
+            erros.append({"loc": ["body", campo], "msg": "Valores não numéricos", "type": "float_parsing"})
+            continue
+        if array.ndim != 1:
+            # Listas aninhadas viram matrizes; um valor por linha é obrigatório
+            erros.append({"loc": ["body", campo], "msg": "Um valor numérico por linha esperado",
+                          "type": "float_type"})
+            continue
+        if campo in campos_int:
+            fracionarios = ~np.isfinite(array) | (array != np.trunc(array))
+            if fracionarios.any():
+                erros.extend({"loc": ["body", campo, i], "msg": "Inteiro esperado", "type": "int_from_float"}
+                             for i in _linhas_invalidas(fracionarios))
+                continue
+            array = array.astype(np.int64)
+        validas[campo] = array
+
+    for campo in campos_texto:
+        valores = colunas[campo]
+        if isinstance(valores, np.ndarray):
+            valores = valores.tolist()
+        if set(map(type, valores)) - {str}:
+            nao_texto = np.fromiter((type(v) is not str for v in valores), dtype=bool, count=n)
+            erros.extend({"loc": ["body", campo, i], "msg": "Texto esperado", "type": "string_type"}
+                         for i in _linhas_invalidas(nao_texto))
+            continue
+        validas[campo] = valores
+
+    if erros:
+        raise ErroValidacaoColunar(erros)
+    return validas, n
+
+
+def codificar_resposta(colunas: Dict[str, Sequence], resumo: Dict, formato: str) -> bytes:
+    """
+    Serializa as colunas de saída e o resumo do lote.
+
+    JSON/MessagePack: `{**resumo, "colunas": {...}}`. Arrow: uma tabela com as
+    colunas e o resumo em JSON nos metadados do schema (chave `resumo`).
+    """
+    if formato == "arrow":
+        tabela = pa.table({nome: valores for nome, valores in colunas.items()})
+        tabela = tabela.replace_schema_metadata({"resumo": json.dumps(resumo, ensure_ascii=False)})
+        saida = pa.BufferOutputStream()
+        with pa.ipc.new_stream(saida, tabela.schema) as escritor:
+            escritor.write_table(tabela)
+        return saida.getvalue().to_pybytes()
+
+    documento = dict(resumo)
+    documento["colunas"] = {
+        nome: valores.tolist() if isinstance(valores, np.ndarray) else valores
+        for nome, valores in colunas.items()
+    }
+    if formato == "msgpack":
+        return msgpack.packb(documento, use_bin_type=True)
+    return json.dumps(documento, ensure_ascii=False).encode("utf-8")
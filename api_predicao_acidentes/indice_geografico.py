@@ -0,0 +1,464 @@
+"""
+Índice geográfico pré-calculado: grade regular sobre o Brasil, mapeável em memória.
+
+Gerado offline a partir das coordenadas históricas de `docs/treino.csv`.
+Cada célula da grade guarda:
+
+- o nº de eventos históricos na vizinhança;
+- a taxa de fatalidade local, suavizada em direção à taxa global;
+- o evento histórico e o evento fatal mais próximos do centro da célula
+  (a distância devolvida é até esse evento: erro de no máximo uma
+  diagonal de célula, ~15 km na resolução padrão);
+- as UFs esperadas ali, como máscara de bits.
+
+A API resolve uma coordenada para uma célula com duas divisões, então
+cada consulta é O(1) e um lote é só indexação NumPy, sem polígonos nem
+busca espacial por requisição.
+
+As UFs esperadas vêm dos eventos históricos da vizinhança. Com
+`--malha-uf` elas vêm de uma malha GeoJSON das UFs (ex.: a do IBGE),
+rasterizada uma única vez na exportação.
+
+Layout do arquivo (o mesmo de `modelo_pacote.bin`):
+    MAGIC (8 bytes) | tamanho do cabeçalho (uint64 little-endian) |
+    cabeçalho JSON (UTF-8) | arrays little-endian alinhados em 64 bytes
+
+Exemplo:
+    python indice_geografico.py exportar ../docs/treino.csv .
+    python indice_geografico.py exportar ../docs/treino.csv . --malha-uf ufs_ibge.geojson
+    python indice_geografico.py consultar . -23.43 -46.47 SP
+"""
+import argparse
+import json
+import math
+import mmap
+import os
+import struct
+import tempfile
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+try:
+    from scipy.spatial import cKDTree
+except ImportError:
+    cKDTree = None
+
+MAGIC = b"ACIDGEO1"
+VERSAO_FORMATO = 1
+ALINHAMENTO = 64
+INDICE_GEOGRAFICO_PATH = "indice_geografico.bin"
+
+# Retângulo que cobre o território brasileiro, em graus
+LIMITES_BRASIL = {"lat_min": -34.0, "lat_max": 6.0, "lon_min": -74.0, "lon_max": -28.0}
+RESOLUCAO_PADRAO = 0.1           # graus (~11 km no equador)
+RAIO_TAXA_CELULAS = 5            # vizinhança (2r+1)² células da taxa local
+RAIO_UF_CELULAS = 2              # tolerância de fronteira na checagem de UF
+PESO_PRIOR = 5.0                 # eventos "virtuais" com a taxa global na suavização
+RAIO_TERRA_KM = 6371.0088
+
+UFS_BRASIL = ["AC", "AL", "AP", "AM", "BA", "CE", "DF", "ES", "GO", "MA", "MT", "MS", "MG", "PA",
+              "PB", "PR", "PE", "PI", "RJ", "RN", "RS", "RO", "RR", "SC", "SP", "SE", "TO"]
+BIT_UF = {uf: 1 << i for i, uf in enumerate(UFS_BRASIL)}
+
+UF_CONSISTENTE = "consistente"
+UF_INCONSISTENTE = "inconsistente"
+UF_SEM_REFERENCIA = "sem_referencia"
+FORA_DA_GRADE = "fora_da_grade"
+
+
+def _alinhar(posicao: int) -> int:
+    return (posicao + ALINHAMENTO - 1) // ALINHAMENTO * ALINHAMENTO
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """Distância de grande círculo em km (escalares ou arrays NumPy)."""
+    lat1, lon1, lat2, lon2 = (np.radians(valor) for valor in (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * RAIO_TERRA_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+# ==================== CONSTRUÇÃO (OFFLINE) ====================
+def soma_janela(grade: np.ndarray, raio: int) -> np.ndarray:
+    """Soma de cada janela (2·raio+1)² da grade, com somas acumuladas 2D."""
+    acumulada = np.pad(grade, ((raio + 1, raio), (raio + 1, raio))).cumsum(axis=0).cumsum(axis=1)
+    lado = 2 * raio + 1
+    return (acumulada[lado:, lado:] - acumulada[:-lado, lado:]
+            - acumulada[lado:, :-lado] + acumulada[:-lado, :-lado])
+
+
+def _unitarios(latitudes: np.ndarray, longitudes: np.ndarray) -> np.ndarray:
+    """Coordenadas na esfera unitária: a distância euclidiana preserva a ordem do haversine."""
+    lat, lon = np.radians(latitudes), np.radians(longitudes)
+    return np.column_stack([np.cos(lat) * np.cos(lon), np.cos(lat) * np.sin(lon), np.sin(lat)])
+
+
+def vizinho_mais_proximo(pontos: np.ndarray, consultas: np.ndarray, bloco: int = 4096) -> np.ndarray:
+    """Índice do ponto mais próximo de cada consulta (cKDTree se houver scipy, senão força bruta em blocos)."""
+    if len(pontos) == 0:
+        return np.full(len(consultas), -1, dtype=np.int32)
+    if cKDTree is not None:
+        return cKDTree(pontos).query(consultas)[1].astype(np.int32)
+    indices = np.empty(len(consultas), dtype=np.int32)
+    for inicio in range(0, len(consultas), bloco):
+        parte = consultas[inicio:inicio + bloco]
+        indices[inicio:inicio + bloco] = np.argmax(parte @ pontos.T, axis=1)
+    return indices
+
+
+def rasterizar_malha(caminho: str, latitudes: np.ndarray, longitudes: np.ndarray) -> np.ndarray:
+    """
+    Máscara de UFs por célula a partir de um GeoJSON de polígonos das UFs.
+
+    A sigla vem da primeira propriedade de cada feição cujo valor é uma UF.
+    Usa par-ímpar por aresta, vetorizado sobre os centros das células dentro
+    do retângulo de cada polígono, então anéis internos (buracos) são respeitados.
+    """
+    with open(caminho, encoding="utf-8") as f:
+        malha = json.load(f)
+    mascara = np.zeros((len(latitudes), len(longitudes)), dtype=np.uint32)
+    for feicao in malha.get("features", []):
+        uf = next((str(v).upper() for v in (feicao.get("properties") or {}).values()
+                   if str(v).upper() in BIT_UF), None)
+        geometria = feicao.get("geometry") or {}
+        if uf is None or geometria.get("type") not in ("Polygon", "MultiPolygon"):
+            continue
+        poligonos = [geometria["coordinates"]] if geometria["type"] == "Polygon" else geometria["coordinates"]
+        for aneis in poligonos:
+            vertices = np.concatenate([np.asarray(anel, dtype=np.float64)[:, :2] for anel in aneis])
+            linhas = np.flatnonzero((latitudes >= vertices[:, 1].min()) & (latitudes <= vertices[:, 1].max()))
+            colunas = np.flatnonzero((longitudes >= vertices[:, 0].min()) & (longitudes <= vertices[:, 0].max()))
+            if len(linhas) == 0 or len(colunas) == 0:
+                continue
+            lat = latitudes[linhas][:, None]
+            lon = longitudes[colunas][None, :]
+            dentro = np.zeros((len(linhas), len(colunas)), dtype=bool)
+            for anel in aneis:
+                anel = np.asarray(anel, dtype=np.float64)[:, :2]
+                for (x1, y1), (x2, y2) in zip(anel, np.roll(anel, -1, axis=0)):
+                    if y1 == y2:
+                        continue
+                    cruza = (y1 > lat) != (y2 > lat)
+                    dentro ^= cruza & (lon < x1 + (lat - y1) * (x2 - x1) / (y2 - y1))
+            mascara[np.ix_(linhas, colunas)] |= np.where(dentro, np.uint32(BIT_UF[uf]), np.uint32(0))
+    return mascara
+
+
+def construir_indice(latitudes: np.ndarray, longitudes: np.ndarray, fatais: np.ndarray,
+                     ufs: Optional[Sequence] = None, resolucao: float = RESOLUCAO_PADRAO,
+                     raio_taxa: int = RAIO_TAXA_CELULAS, raio_uf: int = RAIO_UF_CELULAS,
+                     peso_prior: float = PESO_PRIOR, malha_uf: Optional[str] = None) -> Dict:
+    """
+    Calcula os arrays da grade a partir dos eventos históricos.
+
+    Eventos fora de `LIMITES_BRASIL` ou sem coordenadas são ignorados.
+    Retorna `{"cabecalho": ..., "arrays": ...}` no formato de `salvar_indice`.
+    """
+    latitudes = np.asarray(latitudes, dtype=np.float64)
+    longitudes = np.asarray(longitudes, dtype=np.float64)
+    fatais = np.asarray(fatais, dtype=np.float64)
+    ufs = np.asarray(ufs if ufs is not None else [""] * len(latitudes), dtype=object)
+    lim = LIMITES_BRASIL
+    validos = (np.isfinite(latitudes) & np.isfinite(longitudes) & np.isfinite(fatais)
+               & (latitudes >= lim["lat_min"]) & (latitudes < lim["lat_max"])
+               & (longitudes >= lim["lon_min"]) & (longitudes < lim["lon_max"]))
+    latitudes, longitudes, fatais, ufs = latitudes[validos], longitudes[validos], fatais[validos], ufs[validos]
+
+    n_linhas = int(math.ceil((lim["lat_max"] - lim["lat_min"]) / resolucao))
+    n_colunas = int(math.ceil((lim["lon_max"] - lim["lon_min"]) / resolucao))
+    linha = ((latitudes - lim["lat_min"]) // resolucao).astype(np.intp)
+    coluna = ((longitudes - lim["lon_min"]) // resolucao).astype(np.intp)
+
+    eventos = np.zeros((n_linhas, n_colunas))
+    np.add.at(eventos, (linha, coluna), 1)
+    fatais_grade = np.zeros((n_linhas, n_colunas))
+    np.add.at(fatais_grade, (linha, coluna), fatais)
+    eventos_vizinhanca = soma_janela(eventos, raio_taxa)
+    fatais_vizinhanca = soma_janela(fatais_grade, raio_taxa)
+    taxa_global = float(fatais.mean()) if len(fatais) else 0.0
+    taxa = (fatais_vizinhanca + peso_prior * taxa_global) / (eventos_vizinhanca + peso_prior)
+
+    centros_lat = lim["lat_min"] + (np.arange(n_linhas) + 0.5) * resolucao
+    centros_lon = lim["lon_min"] + (np.arange(n_colunas) + 0.5) * resolucao
+    grade_lat, grade_lon = np.meshgrid(centros_lat, centros_lon, indexing="ij")
+    centros = _unitarios(grade_lat.ravel(), grade_lon.ravel())
+    pontos = _unitarios(latitudes, longitudes)
+    evento_proximo = vizinho_mais_proximo(pontos, centros).reshape(n_linhas, n_colunas)
+    indices_fatais = np.flatnonzero(fatais > 0)
+    if len(indices_fatais):
+        fatal_proximo = indices_fatais[vizinho_mais_proximo(pontos[indices_fatais], centros)]
+    else:
+        fatal_proximo = np.full(len(centros), -1)
+    fatal_proximo = fatal_proximo.reshape(n_linhas, n_colunas)
+
+    mascara = np.zeros((n_linhas, n_colunas), dtype=np.uint32)
+    if malha_uf:
+        rasterizada = rasterizar_malha(malha_uf, centros_lat, centros_lon)
+        for uf, bit in BIT_UF.items():
+            presente = ((rasterizada & bit) > 0).astype(np.float64)
+            mascara[soma_janela(presente, raio_uf) > 0] |= np.uint32(bit)
+        fonte_ufs = "malha"
+    else:
+        for uf, bit in BIT_UF.items():
+            selecionados = ufs == uf
+            if not selecionados.any():
+                continue
+            presente = np.zeros((n_linhas, n_colunas))
+            presente[linha[selecionados], coluna[selecionados]] = 1
+            mascara[soma_janela(presente, raio_uf) > 0] |= np.uint32(bit)
+        fonte_ufs = "eventos"
+
+    return {
+        "cabecalho": {
+            "versao_formato": VERSAO_FORMATO,
+            "gerado_em": datetime.now().isoformat(timespec="seconds"),
+            **lim,
+            "resolucao": resolucao,
+            "linhas": n_linhas,
+            "colunas": n_colunas,
+            "eventos": int(len(latitudes)),
+            "taxa_global": taxa_global,
+            "raio_taxa_celulas": raio_taxa,
+            "raio_uf_celulas": raio_uf,
+            "peso_prior": peso_prior,
+            "fonte_ufs": fonte_ufs,
+            "ufs": UFS_BRASIL
+        },
+        "arrays": {
+            "eventos_vizinhanca": np.rint(eventos_vizinhanca).astype("<u4"),
+            "taxa_fatal": taxa.astype("<f4"),
+            "evento_proximo": evento_proximo.astype("<i4"),
+            "fatal_proximo": fatal_proximo.astype("<i4"),
+            "ufs": mascara.astype("<u4"),
+            "eventos_lat": latitudes.astype("<f8"),
+            "eventos_lon": longitudes.astype("<f8")
+        }
+    }
+
+
+def salvar_indice(caminho: str, indice: Dict) -> None:
+    """Grava o índice com escrita atômica (temporário + rename), como `exportar_pacote`."""
+    arrays = indice["arrays"]
+    descricao_arrays, deslocamento = {}, 0
+    for nome, array in arrays.items():
+        descricao_arrays[nome] = {"deslocamento": deslocamento, "formato": list(array.shape),
+                                  "dtype": array.dtype.str}
+        deslocamento = _alinhar(deslocamento + array.nbytes)
+    cabecalho = json.dumps({**indice["cabecalho"], "arrays": descricao_arrays},
+                           ensure_ascii=False).encode("utf-8")
+    inicio_dados = _alinhar(len(MAGIC) + 8 + len(cabecalho))
+
+    diretorio = os.path.dirname(os.path.abspath(caminho))
+    descritor, temporario = tempfile.mkstemp(dir=diretorio, prefix=".indice_geografico.")
+    try:
+        with os.fdopen(descritor, "wb") as f:
+            f.write(MAGIC + struct.pack("<Q", len(cabecalho)) + cabecalho)
+            for nome, array in arrays.items():
+                f.seek(inicio_dados + descricao_arrays[nome]["deslocamento"])
+                f.write(np.ascontiguousarray(array).tobytes())
+            f.truncate(inicio_dados + deslocamento)
+        os.chmod(temporario, 0o644)
+        os.replace(temporario, caminho)
+    except Exception:
+        os.unlink(temporario)
+        raise
+
+
+def exportar(entrada: str, diretorio: str, encoding: str = "utf-8", resolucao: float = RESOLUCAO_PADRAO,
+             malha_uf: Optional[str] = None) -> str:
+    """
+    Gera `indice_geografico.bin` em `diretorio` a partir do CSV bruto de treino.
+
+    Usa só as coordenadas informadas: linhas sem latitude/longitude ficam de
+    fora, em vez de entrarem com a mediana do imputer.
+    """
+    from artefatos import CAMPO_ROTULO
+    from ingestao import limpar_dataframe_bruto
+
+    df = pd.read_csv(entrada, encoding=encoding).drop_duplicates().reset_index(drop=True)
+    df = limpar_dataframe_bruto(df, {}, ["uf"])
+    indice = construir_indice(df["latitude"].to_numpy(), df["longitude"].to_numpy(),
+                              pd.to_numeric(df[CAMPO_ROTULO], errors="coerce").to_numpy(),
+                              df["uf"].astype(str).str.strip().str.upper().to_numpy(),
+                              resolucao=resolucao, malha_uf=malha_uf)
+    caminho = os.path.join(diretorio, INDICE_GEOGRAFICO_PATH)
+    salvar_indice(caminho, indice)
+    return caminho
+
+
+# ==================== CONSULTA (API) ====================
+class IndiceGeografico:
+    """
+    Índice mapeado em memória (somente leitura, páginas compartilhadas entre workers).
+
+    `consultar` resolve um ponto com aritmética escalar e `consultar_lote`
+    resolve um lote com indexação vetorizada; ambos devolvem o mesmo dicionário.
+    """
+
+    def __init__(self, caminho: str):
+        with open(caminho, "rb") as f:
+            mapa = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if mapa[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{caminho} não é um índice geográfico")
+        (tamanho_cabecalho,) = struct.unpack_from("<Q", mapa, len(MAGIC))
+        inicio_cabecalho = len(MAGIC) + 8
+        cabecalho = json.loads(bytes(mapa[inicio_cabecalho:inicio_cabecalho + tamanho_cabecalho]).decode("utf-8"))
+        if cabecalho["versao_formato"] != VERSAO_FORMATO:
+            raise ValueError(f"Versão de índice geográfico não suportada: {cabecalho['versao_formato']}")
+
+        inicio_dados = _alinhar(inicio_cabecalho + tamanho_cabecalho)
+        self.arrays = {}
+        for nome, descricao in cabecalho.pop("arrays").items():
+            formato = tuple(descricao["formato"])
+            self.arrays[nome] = np.frombuffer(mapa, dtype=np.dtype(descricao["dtype"]),
+                                              count=int(np.prod(formato)),
+                                              offset=inicio_dados + descricao["deslocamento"]).reshape(formato)
+        self.caminho = caminho
+        self.cabecalho = cabecalho
+        self.lat_min, self.lon_min = cabecalho["lat_min"], cabecalho["lon_min"]
+        self.resolucao = cabecalho["resolucao"]
+        self.linhas, self.colunas = cabecalho["linhas"], cabecalho["colunas"]
+        self.ufs = cabecalho["ufs"]
+        self.bit_uf = {uf: 1 << i for i, uf in enumerate(self.ufs)}
+
+    def _celula(self, latitude: float, longitude: float) -> Optional[tuple]:
+        if not (math.isfinite(latitude) and math.isfinite(longitude)):
+            return None
+        i = int((latitude - self.lat_min) // self.resolucao)
+        j = int((longitude - self.lon_min) // self.resolucao)
+        if 0 <= i < self.linhas and 0 <= j < self.colunas:
+            return i, j
+        return None
+
+    def consultar(self, latitude: float, longitude: float, uf: Optional[str] = None) -> Dict:
+        """Contexto de um ponto e checagem da UF informada (O(1))."""
+        latitude, longitude = float(latitude), float(longitude)
+        celula = self._celula(latitude, longitude)
+        if celula is None:
+            return self._fora_da_grade()
+        a = self.arrays
+        evento, fatal = int(a["evento_proximo"][celula]), int(a["fatal_proximo"][celula])
+        mascara = int(a["ufs"][celula])
+        return self._montar(
+            int(a["eventos_vizinhanca"][celula]), float(a["taxa_fatal"][celula]),
+            self._distancia(latitude, longitude, evento), self._distancia(latitude, longitude, fatal),
+            mascara, uf
+        )
+
+    def consultar_lote(self, latitudes: Sequence[float], longitudes: Sequence[float],
+                       ufs: Optional[Sequence[str]] = None) -> List[Dict]:
+        """Versão vetorizada de `consultar` para vários pontos."""
+        latitudes = np.asarray(latitudes, dtype=np.float64)
+        longitudes = np.asarray(longitudes, dtype=np.float64)
+        n = len(latitudes)
+        ufs = list(ufs) if ufs is not None else [None] * n
+        if n == 0:
+            return []
+        with np.errstate(invalid="ignore"):
+            # Mesma divisão inteira de `_celula` e de `construir_indice`: floor(x / r)
+            # diverge de x // r nas bordas das células (ex.: -19.0 com r = 0.1)
+            i = np.floor_divide(latitudes - self.lat_min, self.resolucao)
+            j = np.floor_divide(longitudes - self.lon_min, self.resolucao)
+        dentro = (i >= 0) & (i < self.linhas) & (j >= 0) & (j < self.colunas)
+        i = np.where(dentro, i, 0).astype(np.intp)
+        j = np.where(dentro, j, 0).astype(np.intp)
+
+        a = self.arrays
+        eventos = a["eventos_vizinhanca"][i, j].tolist()
+        taxas = a["taxa_fatal"][i, j].tolist()
+        mascaras = a["ufs"][i, j].tolist()
+        distancias = [self._distancias(latitudes, longitudes, a[nome][i, j]) for nome in
+                      ("evento_proximo", "fatal_proximo")]
+
+        return [
+            self._montar(eventos[k], taxas[k], distancias[0][k], distancias[1][k], mascaras[k], ufs[k])
+            if dentro[k] else self._fora_da_grade()
+            for k in range(n)
+        ]
+
+    def _distancia(self, latitude: float, longitude: float, indice: int) -> Optional[float]:
+        if indice < 0:
+            return None
+        # Escalar com `math`: a versão NumPy custa mais que a própria consulta
+        lat1, lon1 = math.radians(latitude), math.radians(longitude)
+        lat2 = math.radians(float(self.arrays["eventos_lat"][indice]))
+        lon2 = math.radians(float(self.arrays["eventos_lon"][indice]))
+        a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+        return 2 * RAIO_TERRA_KM * math.asin(math.sqrt(min(a, 1.0)))
+
+    def _distancias(self, latitudes: np.ndarray, longitudes: np.ndarray, indices: np.ndarray) -> List:
+        validos = indices >= 0
+        seguros = np.where(validos, indices, 0)
+        if len(self.arrays["eventos_lat"]) == 0:
+            return [None] * len(indices)
+        with np.errstate(invalid="ignore"):
+            distancias = haversine_km(latitudes, longitudes, self.arrays["eventos_lat"][seguros],
+                                      self.arrays["eventos_lon"][seguros])
+        return [d if ok else None for d, ok in zip(distancias.tolist(), validos.tolist())]
+
+    def _montar(self, eventos: int, taxa: float, distancia: Optional[float], distancia_fatal: Optional[float],
+                mascara: int, uf: Optional[str]) -> Dict:
+        ufs_regiao = [nome for nome, bit in self.bit_uf.items() if mascara & bit]
+        if not mascara:
+            situacao = UF_SEM_REFERENCIA
+        elif uf is not None and mascara & self.bit_uf.get(str(uf).strip().upper(), 0):
+            situacao = UF_CONSISTENTE
+        else:
+            situacao = UF_INCONSISTENTE if uf is not None else UF_SEM_REFERENCIA
+        return {
+            "eventos_proximos": eventos,
+            "taxa_fatal_local": round(taxa, 4),
+            "distancia_evento_km": None if distancia is None else round(distancia, 1),
+            "distancia_evento_fatal_km": None if distancia_fatal is None else round(distancia_fatal, 1),
+            "uf_coordenadas": situacao,
+            "ufs_na_regiao": ufs_regiao
+        }
+
+    @staticmethod
+    def _fora_da_grade() -> Dict:
+        return {
+            "eventos_proximos": 0,
+            "taxa_fatal_local": None,
+            "distancia_evento_km": None,
+            "distancia_evento_fatal_km": None,
+            "uf_coordenadas": FORA_DA_GRADE,
+            "ufs_na_regiao": []
+        }
+
+
+def carregar_indice(caminho: str) -> IndiceGeografico:
+    return IndiceGeografico(caminho)
+
+
+def main(argumentos: Optional[list] = None) -> None:
+    parser = argparse.ArgumentParser(description="Índice geográfico pré-calculado")
+    comandos = parser.add_subparsers(dest="comando", required=True)
+    exportar_parser = comandos.add_parser("exportar", help="Gera indice_geografico.bin a partir do treino")
+    exportar_parser.add_argument("entrada", help="CSV bruto no formato de docs/treino.csv")
+    exportar_parser.add_argument("diretorio", nargs="?", default=".", help="Diretório de saída")
+    exportar_parser.add_argument("--encoding", default="utf-8")
+    exportar_parser.add_argument("--resolucao", type=float, default=RESOLUCAO_PADRAO, help="Lado da célula em graus")
+    exportar_parser.add_argument("--malha-uf", default=None, help="GeoJSON com os polígonos das UFs")
+    consultar_parser = comandos.add_parser("consultar", help="Consulta um ponto no índice")
+    consultar_parser.add_argument("diretorio")
+    consultar_parser.add_argument("latitude", type=float)
+    consultar_parser.add_argument("longitude", type=float)
+    consultar_parser.add_argument("uf", nargs="?", default=None)
+    args = parser.parse_args(argumentos)
+
+    if args.comando == "exportar":
+        caminho = exportar(args.entrada, args.diretorio, args.encoding, args.resolucao, args.malha_uf)
+        indice = carregar_indice(caminho)
+        cabecalho = indice.cabecalho
+        print(f"✅ Índice gravado em {caminho} ({os.path.getsize(caminho) / 1024:.0f} KB): "
+              f"{cabecalho['linhas']}×{cabecalho['colunas']} células de {cabecalho['resolucao']}°, "
+              f"{cabecalho['eventos']} eventos, UFs por {cabecalho['fonte_ufs']}")
+    else:
+        indice = carregar_indice(os.path.join(args.diretorio, INDICE_GEOGRAFICO_PATH))
+        print(json.dumps(indice.consultar(args.latitude, args.longitude, args.uf), ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+import codecs
+import csv
+import io
+import json
+from datetime import datetime
+from typing import AsyncIterator, Dict, List, Optional
+
+import pandas as pd
+
+# Campos numéricos que no CSV do CENIPA podem vir com vírgula decimal ("-22,3689")
+CAMPOS_DECIMAIS = ['latitude', 'longitude', 'peso_max_decolagem', 'numero_assentos']
+FORMATOS_DATA = ['%d/%m/%Y', '%Y-%m-%d']
+
+
+def normalizar_registro_bruto(registro: Dict) -> Dict:
+    """
+    Converte uma linha no formato de `docs/teste.csv` para os campos da API.
+
+    Mesma limpeza feita por `carregar_dados_reais` em `testar_api_real.py`:
+    vírgula decimal em coordenadas e `dt_ocorrencia` -> `ano_ocorrencia`/`mes_ocorrencia`.
+    Valores vazios viram None; colunas extras são mantidas (o pydantic as ignora).
+    """
+    normalizado = {
+        chave: (None if isinstance(valor, str) and valor.strip() == "" else valor)
+        for chave, valor in registro.items()
+    }
+
+    for campo in CAMPOS_DECIMAIS:
+        valor = normalizado.get(campo)
+        if isinstance(valor, str):
+            normalizado[campo] = valor.strip().replace(',', '.')
+
+    data = normalizado.get('dt_ocorrencia')
+    if data is not None and (normalizado.get('ano_ocorrencia') is None
+                             or normalizado.get('mes_ocorrencia') is None):
+        data_convertida = _converter_data(str(data))
+        if data_convertida is not None:
+            normalizado.setdefault('ano_ocorrencia', None)
+            normalizado.setdefault('mes_ocorrencia', None)
+            if normalizado['ano_ocorrencia'] is None:
+                normalizado['ano_ocorrencia'] = data_convertida.year
+            if normalizado['mes_ocorrencia'] is None:
+                normalizado['mes_ocorrencia'] = data_convertida.month
+
+    return normalizado
+
+
+def limpar_dataframe_bruto(df: pd.DataFrame, valores_imputacao: Dict,
+                           colunas_categoricas: List[str],
+                           nulos_preenchidos: Optional[Dict[str, int]] = None) -> pd.DataFrame:
+    """
+    Versão vetorizada de `normalizar_registro_bruto` para um DataFrame inteiro,
+    com os nulos preenchidos pelos valores persistidos dos imputers do treino
+    (nunca recalculados a partir do próprio lote).
+
+    Categóricas sem valor de imputação ficam como "DESCONHECIDO", o que
+    equivale a todas as dummies do campo zeradas. Se `nulos_preenchidos` for
+    informado, recebe quantos valores foram preenchidos em cada coluna.
+    Altera `df` no lugar.
+    """
+    for campo in CAMPOS_DECIMAIS:
+        if campo in df.columns and not pd.api.types.is_numeric_dtype(df[campo]):
+            df[campo] = pd.to_numeric(
+                df[campo].astype(str).str.strip().str.replace(',', '.', regex=False),
+                errors='coerce'
+            )
+
+    if 'dt_ocorrencia' in df.columns:
+        # Mesmas regras de `_converter_data`: cada formato tenta só as datas ainda não lidas
+        textos = df['dt_ocorrencia'].astype(str).str.strip().str[:10]
+        datas = pd.to_datetime(textos, format=FORMATOS_DATA[0], errors='coerce')
+        for formato in FORMATOS_DATA[1:]:
+            faltantes = datas.isna()
+            if faltantes.any():
+                datas[faltantes] = pd.to_datetime(textos[faltantes], format=formato, errors='coerce')
+        for campo, componente in (('ano_ocorrencia', datas.dt.year), ('mes_ocorrencia', datas.dt.month)):
+            df[campo] = df[campo].fillna(componente) if campo in df.columns else componente
+
+    preenchimentos = {coluna: valor for coluna, valor in valores_imputacao.items() if coluna in df.columns}
+    if nulos_preenchidos is not None:
+        colunas = list(dict.fromkeys(list(preenchimentos) + [c for c in colunas_categoricas if c in df.columns]))
+        for coluna, quantidade in df[colunas].isna().sum().items():
+            if quantidade:
+                nulos_preenchidos[coluna] = int(quantidade)
+    df.fillna(preenchimentos, inplace=True)
+    for campo in colunas_categoricas:
+        if campo in df.columns:
+            df[campo] = df[campo].fillna('DESCONHECIDO')
+
+    return df
+
+
+def ler_dataframe_bruto(corpo: bytes, formato: str) -> pd.DataFrame:
+    """
+    Lê um lote de registros brutos: CSV com cabeçalho (como `docs/teste.csv`)
+    ou uma lista JSON de objetos. Textos vazios viram nulos, como em
+    `normalizar_registro_bruto`; as conversões ficam para `limpar_dataframe_bruto`.
+    """
+    if formato == "csv":
+        df = pd.read_csv(io.BytesIO(corpo), dtype=str, encoding="utf-8-sig")
+    elif formato == "json":
+        registros = json.loads(corpo)
+        if not isinstance(registros, list) or not all(isinstance(r, dict) for r in registros):
+            raise ValueError("Esperada uma lista de objetos")
+        df = pd.DataFrame.from_records(registros)
+    else:
+        raise ValueError(f"Formato de entrada não suportado: {formato}")
+
+    df.columns = [str(coluna).strip() for coluna in df.columns]
+    textos = df.select_dtypes(include=["object", "string"]).columns
+    if len(textos):
+        df[textos] = df[textos].mask(df[textos].apply(lambda coluna: coluna.str.strip() == ""))
+    return df
+
+
+def _converter_data(texto: str) -> Optional[datetime]:
+    for formato in FORMATOS_DATA:
+        try:
+            return datetime.strptime(texto.strip()[:10], formato)
+        except ValueError:
+            continue
+    return None
+
+
+async def iterar_linhas(blocos: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """Converte um corpo recebido em blocos (upload chunked) em linhas de texto."""
+    decodificador = codecs.getincrementaldecoder('utf-8-sig')()
+    pendente = ""
+    async for bloco in blocos:
+        pendente += decodificador.decode(bloco)
+        *linhas, pendente = pendente.split("\n")
+        for linha in linhas:
+            yield linha.rstrip("\r")
+    pendente += decodificador.decode(b"", final=True)
+    if pendente:
+        yield pendente.rstrip("\r")
+
+
+class LeitorRegistros:
+    """
+    Interpreta linhas de NDJSON ou CSV (com cabeçalho) como dicionários.
+
+    Para CSV a primeira linha não vazia é o cabeçalho; as demais usam o
+    `csv` da biblioteca padrão para respeitar campos entre aspas.
+    """
+
+    def __init__(self, formato: str):
+        if formato not in ("ndjson", "csv"):
+            raise ValueError(f"Formato de entrada não suportado: {formato}")
+        self.formato = formato
+        self.cabecalho: Optional[List[str]] = None
+
+    def interpretar(self, linha: str) -> Optional[Dict]:
+        """Retorna o registro da linha, ou None para linhas vazias/cabeçalho."""
+        if not linha.strip():
+            return None
+        if self.formato == "ndjson":
+            registro = json.loads(linha)
+            if not isinstance(registro, dict):
+                raise ValueError("Cada linha NDJSON deve ser um objeto")
+            return registro
+
+        valores = next(csv.reader([linha]))
+        if self.cabecalho is None:
+            self.cabecalho = [coluna.strip() for coluna in valores]
+            return None
+        if len(valores) != len(self.cabecalho):
+            raise ValueError(f"Esperadas {len(self.cabecalho)} colunas, recebidas {len(valores)}")
+        return dict(zip(self.cabecalho, valores))
+
+
+def escrever_csv(linhas: List[List]) -> str:
+    """Serializa linhas de saída em CSV."""
+    saida = io.StringIO()
+    csv.writer(saida, lineterminator="\n").writerows(linhas)
+    return saida.getvalue()
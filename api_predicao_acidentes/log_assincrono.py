@@ -0,0 +1,230 @@
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+import threading
+from datetime import datetime
+from typing import Dict, Optional
+
+
+class _FlushEmLoteMixin:
+    """Permite adiar o flush do arquivo até o fim de um lote de registros."""
+    _adiar_flush = False
+
+    def flush(self):
+        if not self._adiar_flush:
+            super().flush()
+
+
+class _ArquivoRotativoPorTamanho(_FlushEmLoteMixin, logging.handlers.RotatingFileHandler):
+    pass
+
+
+class _ArquivoRotativoPorTempo(_FlushEmLoteMixin, logging.handlers.TimedRotatingFileHandler):
+    pass
+
+
+class FormatadorJSON(logging.Formatter):
+    """Uma linha JSON por registro, incluindo os campos estruturados de `extra={"evento": ...}`."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        dados = {
+            "timestamp": datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "nivel": record.levelname,
+            "mensagem": record.getMessage()
+        }
+        evento = getattr(record, "evento", None)
+        if evento:
+            dados.update(evento)
+        return json.dumps(dados, ensure_ascii=False, default=str)
+
+
+class _HandlerFilaNaoBloqueante(logging.handlers.QueueHandler):
+    """
+    QueueHandler que nunca bloqueia quem registra o log.
+
+    Não formata a mensagem na thread da requisição (isso fica com o
+    escritor em segundo plano) e descarta o registro se a fila estiver cheia.
+    """
+
+    def __init__(self, fila: queue.Queue):
+        super().__init__(fila)
+        self.descartados = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.descartados += 1
+
+
+class _HandlerFilaProcessos(_HandlerFilaNaoBloqueante):
+    """
+    Envia os registros de um processo worker para o processo principal.
+
+    O registro precisa ser serializável (pickle): argumentos que não sejam
+    tipos simples e tracebacks são convertidos em texto antes do envio.
+    """
+
+    _TIPOS_SIMPLES = (str, int, float, bool, type(None))
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        if record.args and not all(isinstance(arg, self._TIPOS_SIMPLES) for arg in record.args):
+            record.msg = record.getMessage()
+            record.args = None
+        return record
+
+
+class PipelineLogAssincrono:
+    """
+    Pipeline de log em segundo plano: fila limitada + thread escritora.
+
+    A thread escritora drena a fila em lotes de até `tamanho_lote` registros,
+    grava todos e faz um único flush por lote. A rotação do arquivo é por
+    tamanho (`rotacao="tamanho"`) ou por tempo (`rotacao="tempo"`).
+    """
+
+    def __init__(self, caminho: str, formato: str = "texto", rotacao: str = "tamanho",
+                 max_bytes: int = 10 * 1024 * 1024, backups: int = 5, intervalo: str = "midnight",
+                 tamanho_fila: int = 10000, tamanho_lote: int = 256):
+        if rotacao == "tempo":
+            self.handler_arquivo = _ArquivoRotativoPorTempo(
+                caminho, when=intervalo, backupCount=backups, encoding="utf-8"
+            )
+        else:
+            self.handler_arquivo = _ArquivoRotativoPorTamanho(
+                caminho, maxBytes=max_bytes, backupCount=backups, encoding="utf-8"
+            )
+
+        if formato == "json":
+            self.handler_arquivo.setFormatter(FormatadorJSON())
+        else:
+            self.handler_arquivo.setFormatter(
+                logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
+            )
+
+        self.formato = formato
+        self.modo = "local"
+        self.fila: queue.Queue = queue.Queue(maxsize=tamanho_fila)
+        self.handler_fila = _HandlerFilaNaoBloqueante(self.fila)
+        self.tamanho_lote = tamanho_lote
+        self.lotes_gravados = 0
+        self.registros_gravados = 0
+        self._parar = threading.Event()
+        self._thread = threading.Thread(target=self._escrever, name="escritor-log", daemon=True)
+        self._thread_receptor: Optional[threading.Thread] = None
+        self._parar_receptor = threading.Event()
+
+    def iniciar(self) -> None:
+        self._thread.start()
+
+    def _escrever(self) -> None:
+        while not (self._parar.is_set() and self.fila.empty()):
+            try:
+                lote = [self.fila.get(timeout=0.5)]
+            except queue.Empty:
+                continue
+            while len(lote) < self.tamanho_lote:
+                try:
+                    lote.append(self.fila.get_nowait())
+                except queue.Empty:
+                    break
+            self._gravar_lote(lote)
+
+    def _gravar_lote(self, lote) -> None:
+        handler = self.handler_arquivo
+        handler._adiar_flush = True
+        try:
+            for record in lote:
+                handler.handle(record)
+        finally:
+            handler._adiar_flush = False
+            handler.flush()
+        self.lotes_gravados += 1
+        self.registros_gravados += len(lote)
+
+    def receber_de_processos(self, fila_processos) -> None:
+        """
+        No processo principal: repassa para este pipeline os registros que
+        os workers enviam por `fila_processos` (um `multiprocessing.Queue`),
+        de modo que um único escritor grava e rotaciona o arquivo.
+        """
+        def repassar():
+            while True:
+                try:
+                    record = fila_processos.get(timeout=0.5)
+                except queue.Empty:
+                    if self._parar_receptor.is_set():
+                        return
+                    continue
+                except (EOFError, OSError):
+                    return
+                self.handler_fila.enqueue(record)
+
+        self._thread_receptor = threading.Thread(target=repassar, name="receptor-log-workers", daemon=True)
+        self._thread_receptor.start()
+
+    def redirecionar_para_processo_principal(self, fila_processos) -> None:
+        """
+        Num worker criado por fork: troca a escrita local pelo envio dos
+        registros ao processo principal. A thread escritora não existe no
+        filho, e o arquivo herdado nunca é escrito por dois processos.
+        """
+        raiz = logging.getLogger()
+        raiz.removeHandler(self.handler_fila)
+        self.fila_processos = fila_processos
+        self.handler_fila = _HandlerFilaProcessos(fila_processos)
+        raiz.addHandler(self.handler_fila)
+        self.modo = "worker"
+
+    def parar(self) -> None:
+        """Grava o que resta na fila e fecha o arquivo."""
+        if self._parar.is_set():
+            return
+        if self.modo == "worker":
+            # Espera a fila entre processos entregar o que ainda está em trânsito
+            self._parar.set()
+            self.fila_processos.close()
+            self.fila_processos.join_thread()
+            return
+        if self._thread_receptor is not None:
+            # Primeiro esvazia o que os workers enviaram, depois encerra o escritor
+            self._parar_receptor.set()
+            self._thread_receptor.join(timeout=5)
+        self._parar.set()
+        if self._thread.is_alive():
+            self._thread.join(timeout=5)
+        self.handler_arquivo.close()
+
+    def estatisticas(self) -> Dict:
+        return {
+            "formato": self.formato,
+            "modo": self.modo,
+            "pendentes": self.fila.qsize(),
+            "registros_gravados": self.registros_gravados,
+            "lotes_gravados": self.lotes_gravados,
+            "descartados": self.handler_fila.descartados
+        }
+
+
+def configurar_logging(caminho: str, nivel: int = logging.INFO, **opcoes) -> PipelineLogAssincrono:
+    """
+    Substitui `logging.basicConfig(filename=...)` pelo pipeline assíncrono.
+
+    Os registros do logger raiz passam a ir para a fila; a escrita em disco
+    acontece na thread do pipeline, que é encerrada no `atexit`.
+    """
+    pipeline = PipelineLogAssincrono(caminho, **opcoes)
+    raiz = logging.getLogger()
+    raiz.setLevel(nivel)
+    raiz.addHandler(pipeline.handler_fila)
+    pipeline.iniciar()
+    atexit.register(pipeline.parar)
+    return pipeline
@@ -0,0 +1,337 @@
+import bisect
+import json
+import os
+import tempfile
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+# Limites em segundos: de 50µs (kernel compilado) a 10s (lotes grandes)
+BUCKETS_LATENCIA = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01,
+                    0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BUCKETS_TAMANHO_LOTE = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 50000)
+
+
+def _formatar_rotulos(nomes: Tuple[str, ...], valores: Tuple[str, ...], extra: str = "") -> str:
+    partes = [f'{nome}="{_escapar(valor)}"' for nome, valor in zip(nomes, valores)]
+    if extra:
+        partes.append(extra)
+    return "{" + ",".join(partes) + "}" if partes else ""
+
+
+def _escapar(valor: str) -> str:
+    return str(valor).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _formatar_numero(valor: float) -> str:
+    if valor == float("inf"):
+        return "+Inf"
+    return repr(float(valor)) if not float(valor).is_integer() else str(int(valor))
+
+
+class Contador:
+    """Contador monotônico com rótulos (tipo `counter` do Prometheus)."""
+
+    tipo = "counter"
+
+    def __init__(self, nome: str, descricao: str, rotulos: Iterable[str] = ()):
+        self.nome = nome
+        self.descricao = descricao
+        self.rotulos = tuple(rotulos)
+        self._valores: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def incrementar(self, *valores_rotulos: str, valor: float = 1.0) -> None:
+        with self._lock:
+            self._valores[valores_rotulos] = self._valores.get(valores_rotulos, 0.0) + valor
+
+    def estado(self) -> Dict[Tuple[str, ...], float]:
+        with self._lock:
+            return dict(self._valores)
+
+    @staticmethod
+    def mesclar(estados: Iterable[Dict]) -> Dict[Tuple[str, ...], float]:
+        total: Dict[Tuple[str, ...], float] = {}
+        for estado in estados:
+            for rot, valor in estado.items():
+                total[rot] = total.get(rot, 0.0) + valor
+        return total
+
+    def formatar(self, estado: Dict, rotulos: Optional[Tuple[str, ...]] = None) -> List[str]:
+        rotulos = self.rotulos if rotulos is None else rotulos
+        return [f"{self.nome}{_formatar_rotulos(rotulos, rot)} {_formatar_numero(v)}"
+                for rot, v in sorted(estado.items())]
+
+    def amostras(self) -> List[str]:
+        return self.formatar(self.estado())
+
+
+class Histograma:
+    """Histograma com buckets fixos (tipo `histogram` do Prometheus)."""
+
+    tipo = "histogram"
+
+    def __init__(self, nome: str, descricao: str, rotulos: Iterable[str] = (),
+                 buckets: Tuple[float, ...] = BUCKETS_LATENCIA):
+        self.nome = nome
+        self.descricao = descricao
+        self.rotulos = tuple(rotulos)
+        self.buckets = tuple(sorted(buckets))
+        # Por combinação de rótulos: [contagens por bucket (+Inf no fim), soma, total]
+        self._series: Dict[Tuple[str, ...], list] = {}
+        self._lock = threading.Lock()
+
+    def observar(self, valor: float, *valores_rotulos: str) -> None:
+        indice = bisect.bisect_left(self.buckets, valor)
+        with self._lock:
+            serie = self._series.get(valores_rotulos)
+            if serie is None:
+                serie = [[0] * (len(self.buckets) + 1), 0.0, 0]
+                self._series[valores_rotulos] = serie
+            serie[0][indice] += 1
+            serie[1] += valor
+            serie[2] += 1
+
+    def estado(self) -> Dict[Tuple[str, ...], tuple]:
+        with self._lock:
+            return {rot: ([*s[0]], s[1], s[2]) for rot, s in self._series.items()}
+
+    @staticmethod
+    def mesclar(estados: Iterable[Dict]) -> Dict[Tuple[str, ...], tuple]:
+        total: Dict[Tuple[str, ...], tuple] = {}
+        for estado in estados:
+            for rot, (contagens, soma, n) in estado.items():
+                if rot in total:
+                    anteriores, soma_anterior, n_anterior = total[rot]
+                    contagens = [a + b for a, b in zip(anteriores, contagens)]
+                    soma, n = soma + soma_anterior, n + n_anterior
+                total[rot] = (list(contagens), soma, n)
+        return total
+
+    def formatar(self, estado: Dict, rotulos: Optional[Tuple[str, ...]] = None) -> List[str]:
+        rotulos = self.rotulos if rotulos is None else rotulos
+        linhas = []
+        for rot, (contagens, soma, total) in sorted(estado.items()):
+            acumulado = 0
+            for limite, contagem in zip(self.buckets + (float("inf"),), contagens):
+                acumulado += contagem
+                le = f'le="{_formatar_numero(limite)}"'
+                linhas.append(f"{self.nome}_bucket{_formatar_rotulos(rotulos, rot, le)} {acumulado}")
+            linhas.append(f"{self.nome}_sum{_formatar_rotulos(rotulos, rot)} {_formatar_numero(soma)}")
+            linhas.append(f"{self.nome}_count{_formatar_rotulos(rotulos, rot)} {total}")
+        return linhas
+
+    def amostras(self) -> List[str]:
+        return self.formatar(self.estado())
+
+
+class MedidorColetado:
+    """Gauge cujo valor é lido de uma função no momento da coleta (ex.: estatísticas do cache)."""
+
+    tipo = "gauge"
+
+    def __init__(self, nome: str, descricao: str, coletar: Callable[[], Dict[Tuple[str, ...], float]],
+                 rotulos: Iterable[str] = ()):
+        self.nome = nome
+        self.descricao = descricao
+        self.rotulos = tuple(rotulos)
+        self.coletar = coletar
+
+    def estado(self) -> Dict[Tuple[str, ...], float]:
+        return self.coletar()
+
+    def formatar(self, estado: Dict, rotulos: Optional[Tuple[str, ...]] = None) -> List[str]:
+        rotulos = self.rotulos if rotulos is None else rotulos
+        return [f"{self.nome}{_formatar_rotulos(rotulos, rot)} {_formatar_numero(v)}"
+                for rot, v in sorted(estado.items())]
+
+    def amostras(self) -> List[str]:
+        return self.formatar(self.estado())
+
+
+class RegistroMetricas:
+    """
+    Conjunto de métricas exposto no formato texto do Prometheus.
+
+    Com `ativo=False` as chamadas de registro viram no-op e `/metrics`
+    devolve apenas um comentário, eliminando o custo da instrumentação.
+    """
+
+    def __init__(self, ativo: bool = True):
+        self.ativo = ativo
+        self._metricas: List = []
+
+    def registrar(self, metrica):
+        self._metricas.append(metrica)
+        return metrica
+
+    def contador(self, nome: str, descricao: str, rotulos: Iterable[str] = ()) -> Contador:
+        return self.registrar(Contador(nome, descricao, rotulos))
+
+    def histograma(self, nome: str, descricao: str, rotulos: Iterable[str] = (),
+                   buckets: Tuple[float, ...] = BUCKETS_LATENCIA) -> Histograma:
+        return self.registrar(Histograma(nome, descricao, rotulos, buckets))
+
+    def medidor(self, nome: str, descricao: str, coletar: Callable, rotulos: Iterable[str] = ()):
+        return self.registrar(MedidorColetado(nome, descricao, coletar, rotulos))
+
+    @property
+    def metricas(self) -> List:
+        return list(self._metricas)
+
+    def exportar(self) -> str:
+        if not self.ativo:
+            return "# métricas desativadas (METRICAS_ATIVAS=0)\n"
+        return renderizar([(metrica, metrica.amostras()) for metrica in self._metricas])
+
+
+def renderizar(itens: Iterable[Tuple[object, List[str]]]) -> str:
+    """Texto do Prometheus a partir de pares (métrica, linhas de amostra)."""
+    blocos = []
+    for metrica, amostras in itens:
+        blocos.append(f"# HELP {metrica.nome} {metrica.descricao}")
+        blocos.append(f"# TYPE {metrica.nome} {metrica.tipo}")
+        blocos.extend(amostras)
+    return "\n".join(blocos) + "\n"
+
+
+class AgregadorMultiprocesso:
+    """
+    Soma as métricas de vários processos workers num único `/metrics`.
+
+    Cada processo grava periodicamente um snapshot JSON do seu registro em
+    `diretorio` (`metricas-<pid>.json`). Ao exportar, contadores e
+    histogramas de todos os snapshots são somados (inclusive de workers já
+    encerrados, para manter os contadores monotônicos); medidores recebem
+    o rótulo `worker` e só aparecem para processos vivos.
+    """
+
+    def __init__(self, registro: RegistroMetricas, diretorio: str, intervalo: float = 5.0):
+        self.registro = registro
+        self.diretorio = diretorio
+        self.intervalo = intervalo
+        self._parar = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        os.makedirs(diretorio, exist_ok=True)
+
+    @property
+    def caminho(self) -> str:
+        return os.path.join(self.diretorio, f"metricas-{os.getpid()}.json")
+
+    def gravar(self) -> None:
+        """Grava o snapshot deste processo (escrita atômica)."""
+        snapshot = {
+            "pid": os.getpid(),
+            "metricas": {
+                metrica.nome: [[list(rot), valor] for rot, valor in metrica.estado().items()]
+                for metrica in self.registro.metricas
+            }
+        }
+        descritor, temporario = tempfile.mkstemp(dir=self.diretorio, prefix=".metricas.")
+        with os.fdopen(descritor, "w") as f:
+            json.dump(snapshot, f)
+        os.replace(temporario, self.caminho)
+
+    def _ler_snapshots(self) -> List[Dict]:
+        snapshots = []
+        for nome in os.listdir(self.diretorio):
+            if not (nome.startswith("metricas-") and nome.endswith(".json")):
+                continue
+            try:
+                with open(os.path.join(self.diretorio, nome)) as f:
+                    snapshots.append(json.load(f))
+            except (OSError, ValueError):
+                continue
+        return snapshots
+
+    def exportar(self) -> str:
+        if not self.registro.ativo:
+            return self.registro.exportar()
+        self.gravar()
+        snapshots = self._ler_snapshots()
+        itens = []
+        for metrica in self.registro.metricas:
+            estados = [
+                {tuple(rot): (tuple(valor) if isinstance(valor, list) else valor)
+                 for rot, valor in snapshot["metricas"].get(metrica.nome, [])}
+                for snapshot in snapshots
+            ]
+            if isinstance(metrica, MedidorColetado):
+                estado = {
+                    rot + (str(snapshot["pid"]),): valor
+                    for snapshot, estado_worker in zip(snapshots, estados)
+                    if _processo_vivo(snapshot["pid"])
+                    for rot, valor in estado_worker.items()
+                }
+                itens.append((metrica, metrica.formatar(estado, metrica.rotulos + ("worker",))))
+            else:
+                itens.append((metrica, metrica.formatar(type(metrica).mesclar(estados))))
+        return renderizar(itens)
+
+    def iniciar(self) -> None:
+        self._thread = threading.Thread(target=self._executar, name="agregador-metricas", daemon=True)
+        self._thread.start()
+
+    def _executar(self) -> None:
+        while not self._parar.wait(self.intervalo):
+            try:
+                self.gravar()
+            except OSError:
+                pass
+
+    def parar(self) -> None:
+        """Interrompe a thread e grava o snapshot final."""
+        self._parar.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.intervalo + 1)
+        self.gravar()
+
+
+def _processo_vivo(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class MiddlewareMetricas:
+    """
+    Middleware ASGI puro: marca o início da requisição em `scope["state"]`
+    e conta requisições/latência total por rota e status.
+
+    `rotas` limita os rótulos às rotas conhecidas; o resto vira "outras".
+    """
+
+    def __init__(self, app, registro: RegistroMetricas, requisicoes: Contador,
+                 latencia: Histograma, rotas: Optional[Iterable[str]] = None):
+        self.app = app
+        self.registro = registro
+        self.requisicoes = requisicoes
+        self.latencia = latencia
+        self.rotas = set(rotas) if rotas is not None else None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.registro.ativo:
+            await self.app(scope, receive, send)
+            return
+
+        inicio = time.perf_counter()
+        scope.setdefault("state", {})["inicio_requisicao"] = inicio
+        status = {"codigo": 500}
+
+        async def enviar(mensagem):
+            if mensagem["type"] == "http.response.start":
+                status["codigo"] = mensagem["status"]
+            await send(mensagem)
+
+        try:
+            await self.app(scope, receive, enviar)
+        finally:
+            rota = scope["path"]
+            if self.rotas is not None and rota not in self.rotas:
+                rota = "outras"
+            self.requisicoes.incrementar(rota, str(status["codigo"]))
+            self.latencia.observar(time.perf_counter() - inicio, rota)
@@ -0,0 +1,144 @@
+"""
+Micro-lotes para o endpoint individual.
+
+Sob concorrência, várias requisições de `/prever` chegam quase juntas e cada
+uma pagaria sozinha a codificação e o `predict_proba`. O agrupador segura
+cada chamada por uma janela curta (ex.: 2 ms), junta o que chegou e pontua
+tudo numa única chamada vetorizada; cada requisição recebe o seu resultado.
+Com tráfego baixo o custo é no máximo a janela de espera.
+"""
+import asyncio
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from fastapi.concurrency import run_in_threadpool
+
+
+class AgrupadorMicroLotes:
+    """
+    Junta chamadas individuais concorrentes em micro-lotes.
+
+    Cada `await pontuar(item)` entra numa lista de pendentes; o lote é
+    despachado quando passa `janela_segundos` desde o primeiro item ou quando
+    atinge `tamanho_maximo`. `funcao_lote(itens) -> resultados` roda uma vez
+    por lote no threadpool e cada chamador recebe o seu resultado.
+
+    Se o lote inteiro falhar, os itens são repontuados um a um: só o chamador
+    do item problemático recebe a exceção, os demais recebem o resultado.
+
+    `ao_despachar(tamanho, espera_segundos, duracao_segundos)` é chamado a
+    cada lote concluído (ex.: para alimentar histogramas).
+    """
+
+    def __init__(self, funcao_lote: Callable[[List[Any]], List[Any]], janela_segundos: float = 0.002,
+                 tamanho_maximo: int = 64,
+                 ao_despachar: Optional[Callable[[int, float, float], None]] = None):
+        if tamanho_maximo < 1:
+            raise ValueError("tamanho_maximo deve ser >= 1")
+        self.funcao_lote = funcao_lote
+        self.janela_segundos = janela_segundos
+        self.tamanho_maximo = tamanho_maximo
+        self.ao_despachar = ao_despachar
+        self._pendentes: List[tuple] = []
+        self._temporizador: Optional[asyncio.TimerHandle] = None
+        # O loop guarda só referências fracas às tarefas
+        self._tarefas = set()
+        self._lock = threading.Lock()
+        self.lotes = 0
+        self.itens = 0
+        self.maior_lote = 0
+        self.lotes_cheios = 0
+        self.soma_espera = 0.0
+        self.soma_duracao = 0.0
+        self.erros = 0
+        self.itens_isolados = 0
+        self.itens_com_erro = 0
+
+    async def pontuar(self, item: Any) -> Any:
+        loop = asyncio.get_running_loop()
+        futuro = loop.create_future()
+        self._pendentes.append((item, futuro, time.perf_counter()))
+        if len(self._pendentes) >= self.tamanho_maximo:
+            self._despachar()
+        elif self._temporizador is None:
+            self._temporizador = loop.call_later(self.janela_segundos, self._despachar)
+        return await futuro
+
+    def _despachar(self) -> None:
+        if self._temporizador is not None:
+            self._temporizador.cancel()
+            self._temporizador = None
+        lote, self._pendentes = self._pendentes, []
+        if lote:
+            tarefa = asyncio.get_running_loop().create_task(self._executar(lote))
+            self._tarefas.add(tarefa)
+            tarefa.add_done_callback(self._tarefas.discard)
+
+    async def _executar(self, lote: List[tuple]) -> None:
+        inicio = time.perf_counter()
+        espera = inicio - lote[0][2]
+        try:
+            resultados = await run_in_threadpool(self.funcao_lote, [item for item, _, _ in lote])
+            erros = [None] * len(lote)
+        except Exception as e:
+            with self._lock:
+                self.erros += 1
+                self.itens_com_erro += len(lote) == 1
+            if len(lote) == 1:
+                resultados, erros = [None], [e]
+            else:
+                resultados, erros = await run_in_threadpool(self._pontuar_isolados, [item for item, _, _ in lote])
+
+        for (_, futuro, _), resultado, erro in zip(lote, resultados, erros):
+            # Chamador que desistiu (cliente desconectou) já tem o futuro cancelado
+            if futuro.done():
+                continue
+            if erro is not None:
+                futuro.set_exception(erro)
+            else:
+                futuro.set_result(resultado)
+
+        duracao = time.perf_counter() - inicio
+        with self._lock:
+            self.lotes += 1
+            self.itens += len(lote)
+            self.maior_lote = max(self.maior_lote, len(lote))
+            self.lotes_cheios += len(lote) >= self.tamanho_maximo
+            self.soma_espera += espera
+            self.soma_duracao += duracao
+        if self.ao_despachar is not None:
+            self.ao_despachar(len(lote), espera, duracao)
+
+    def _pontuar_isolados(self, itens: List[Any]) -> tuple:
+        """Repontua item a item após a falha do lote; devolve (resultados, erros)."""
+        resultados, erros = [], []
+        for item in itens:
+            try:
+                resultados.append(self.funcao_lote([item])[0])
+                erros.append(None)
+            except Exception as e:
+                resultados.append(None)
+                erros.append(e)
+        with self._lock:
+            self.itens_isolados += len(itens)
+            self.itens_com_erro += sum(erro is not None for erro in erros)
+        return resultados, erros
+
+    def estatisticas(self) -> Dict:
+        with self._lock:
+            return {
+                "janela_ms": self.janela_segundos * 1000,
+                "tamanho_maximo": self.tamanho_maximo,
+                "lotes": self.lotes,
+                "itens": self.itens,
+                "tamanho_medio": round(self.itens / self.lotes, 2) if self.lotes else 0.0,
+                "maior_lote": self.maior_lote,
+                "lotes_cheios": self.lotes_cheios,
+                "espera_media_ms": round(self.soma_espera / self.lotes * 1000, 3) if self.lotes else 0.0,
+                "duracao_media_ms": round(self.soma_duracao / self.lotes * 1000, 3) if self.lotes else 0.0,
+                "pendentes": len(self._pendentes),
+                "erros": self.erros,
+                "itens_isolados": self.itens_isolados,
+                "itens_com_erro": self.itens_com_erro
+            }
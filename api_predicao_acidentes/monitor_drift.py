@@ -0,0 +1,497 @@
+"""
+Monitor de drift das entradas e das probabilidades da API.
+
+Compara o tráfego de produção com a linha de base do treino
+(`linha_base_drift.json`, gravada na exportação do notebook, seção 12,
+ou por `exportar` deste script):
+histogramas de tamanho fixo por campo numérico e para a probabilidade,
+contagens por categoria com a taxa de valores fora de `colunas_treino`
+(que viram dummies todas zeradas) e PSI/KS contra o treino.
+
+A requisição só enfileira uma referência aos dados (O(1), sem bloquear);
+os histogramas são atualizados por uma thread em segundo plano. Com a fila
+cheia a observação é descartada e contada, nunca espera.
+
+Exemplo:
+    python monitor_drift.py exportar ../docs/treino.csv .
+    curl http://127.0.0.1:8000/drift
+"""
+import argparse
+import json
+import os
+import queue
+import tempfile
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Mapping, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from artefatos import CAMPOS_NUMERICOS, COLUNAS_CATEGORICAS
+
+LINHA_BASE_PATH = "linha_base_drift.json"
+NUMERO_FAIXAS = 20
+# Categorias guardadas por campo na linha de base; as demais vão para OUTRAS
+MAX_CATEGORIAS = 200
+CATEGORIA_OUTRAS = "__OUTRAS__"
+# Exemplos distintos de categorias não vistas guardados por campo (memória fixa)
+MAX_EXEMPLOS_NAO_VISTOS = 20
+# PSI: < 0.1 estável, 0.1-0.25 moderado, > 0.25 significativo
+LIMITE_PSI_MODERADO = 0.1
+LIMITE_PSI_SIGNIFICATIVO = 0.25
+LIMITE_TAXA_NAO_VISTAS = 0.05
+ESPERA_LOTE = 0.25  # segundos entre drenagens da fila
+EPSILON_PSI = 1e-4
+
+
+# ==================== LINHA DE BASE ====================
+def faixas_quantis(valores: np.ndarray, numero_faixas: int = NUMERO_FAIXAS) -> List[float]:
+    """Limites internos por quantis (sem repetições); `len(limites) + 1` faixas."""
+    valores = np.asarray(valores, dtype=np.float64)
+    valores = valores[np.isfinite(valores)]
+    if len(valores) == 0:
+        return []
+    quantis = np.quantile(valores, np.linspace(0, 1, numero_faixas + 1)[1:-1])
+    return np.unique(quantis).tolist()
+
+
+def contar_faixas(valores: np.ndarray, limites: Sequence[float]) -> np.ndarray:
+    """Contagem por faixa; a faixa i cobre `[limites[i-1], limites[i])`."""
+    faixas = np.searchsorted(np.asarray(limites, dtype=np.float64), valores, side="right")
+    return np.bincount(faixas, minlength=len(limites) + 1)
+
+
+def calcular_linha_base(df: pd.DataFrame, probabilidades: Optional[np.ndarray] = None,
+                        numero_faixas: int = NUMERO_FAIXAS) -> Dict:
+    """
+    Estatísticas de referência das features de treino (antes do one-hot).
+
+    `df` tem os campos de `CAMPOS_NUMERICOS` e `COLUNAS_CATEGORICAS`;
+    `probabilidades` são as do modelo no próprio treino.
+    """
+    linha_base = {
+        "gerada_em": datetime.now().isoformat(timespec="seconds"),
+        "linhas": int(len(df)),
+        "numericos": {},
+        "categoricos": {},
+        "probabilidade": None
+    }
+    for campo in CAMPOS_NUMERICOS:
+        if campo not in df.columns:
+            continue
+        valores = pd.to_numeric(df[campo], errors="coerce").to_numpy(dtype=np.float64)
+        limites = faixas_quantis(valores, numero_faixas)
+        linha_base["numericos"][campo] = {
+            "limites": limites,
+            "contagens": contar_faixas(valores[np.isfinite(valores)], limites).tolist(),
+            "minimo": float(np.nanmin(valores)),
+            "maximo": float(np.nanmax(valores))
+        }
+    for campo in COLUNAS_CATEGORICAS:
+        if campo not in df.columns:
+            continue
+        frequencias = df[campo].astype(str).value_counts()
+        categorias = {str(valor): int(qtd) for valor, qtd in frequencias.iloc[:MAX_CATEGORIAS].items()}
+        outras = int(frequencias.iloc[MAX_CATEGORIAS:].sum())
+        if outras:
+            categorias[CATEGORIA_OUTRAS] = outras
+        linha_base["categoricos"][campo] = {"categorias": categorias}
+    if probabilidades is not None:
+        probabilidades = np.asarray(probabilidades, dtype=np.float64)
+        limites = faixas_quantis(probabilidades, numero_faixas)
+        linha_base["probabilidade"] = {
+            "limites": limites,
+            "contagens": contar_faixas(probabilidades, limites).tolist()
+        }
+    return linha_base
+
+
+def salvar_linha_base(caminho: str, linha_base: Dict) -> None:
+    """Grava a linha de base em JSON (escrita atômica)."""
+    diretorio = os.path.dirname(os.path.abspath(caminho))
+    descritor, temporario = tempfile.mkstemp(dir=diretorio, prefix=".linha_base.")
+    with os.fdopen(descritor, "w", encoding="utf-8") as f:
+        json.dump(linha_base, f, ensure_ascii=False, indent=2)
+    os.chmod(temporario, 0o644)
+    os.replace(temporario, caminho)
+
+
+def carregar_linha_base(caminho: str) -> Dict:
+    with open(caminho, encoding="utf-8") as f:
+        return json.load(f)
+
+
+# ==================== ESTATÍSTICAS ====================
+def psi(esperado: Sequence[float], observado: Sequence[float]) -> Optional[float]:
+    """Population Stability Index entre duas contagens nas mesmas faixas."""
+    esperado = np.asarray(esperado, dtype=np.float64)
+    observado = np.asarray(observado, dtype=np.float64)
+    if esperado.sum() == 0 or observado.sum() == 0:
+        return None
+    p = np.maximum(esperado / esperado.sum(), EPSILON_PSI)
+    q = np.maximum(observado / observado.sum(), EPSILON_PSI)
+    return float(np.sum((q - p) * np.log(q / p)))
+
+
+def ks_faixas(esperado: Sequence[float], observado: Sequence[float]) -> Optional[float]:
+    """
+    Estatística KS calculada nas faixas do histograma: maior diferença entre
+    as distribuições acumuladas nos limites (cota inferior do KS exato).
+    """
+    esperado = np.asarray(esperado, dtype=np.float64)
+    observado = np.asarray(observado, dtype=np.float64)
+    if esperado.sum() == 0 or observado.sum() == 0:
+        return None
+    return float(np.max(np.abs(np.cumsum(esperado) / esperado.sum() - np.cumsum(observado) / observado.sum())))
+
+
+def classificar_psi(valor: Optional[float]) -> Optional[str]:
+    if valor is None:
+        return None
+    if valor > LIMITE_PSI_SIGNIFICATIVO:
+        return "significativo"
+    return "moderado" if valor > LIMITE_PSI_MODERADO else "estavel"
+
+
+# ==================== MONITOR ====================
+class MonitorDrift:
+    """
+    Histogramas de produção com memória fixa, comparados à linha de base.
+
+    Estado: uma contagem por faixa de cada campo numérico (mais abaixo do
+    mínimo / acima do máximo do treino), uma por categoria da linha de base
+    (mais OUTRAS) e por faixa de probabilidade, o total de valores fora do
+    vocabulário do modelo e até `MAX_EXEMPLOS_NAO_VISTOS` exemplos deles.
+    """
+
+    def __init__(self, linha_base: Dict, capacidade_fila: int = 10000, diretorio: Optional[str] = None,
+                 intervalo: float = 5.0):
+        self.linha_base = linha_base
+        self.diretorio = diretorio
+        self.intervalo = intervalo
+        self._fila: queue.Queue = queue.Queue(maxsize=capacidade_fila)
+        self._trava = threading.Lock()
+        self._parar = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.descartados = 0
+
+        self._limites = {campo: np.asarray(info["limites"], dtype=np.float64)
+                         for campo, info in linha_base["numericos"].items()}
+        self._categorias = {campo: {valor: i for i, valor in enumerate(info["categorias"])}
+                            for campo, info in linha_base["categoricos"].items()}
+        self._outras = {campo: indices.get(CATEGORIA_OUTRAS, len(indices))
+                        for campo, indices in self._categorias.items()}
+        probabilidade = linha_base.get("probabilidade") or {"limites": []}
+        self._limites_probabilidade = np.asarray(probabilidade["limites"], dtype=np.float64)
+        self.estado = self.estado_vazio()
+
+    def estado_vazio(self) -> Dict:
+        return {
+            "observados": 0,
+            "numericos": {campo: {"contagens": [0] * (len(limites) + 1), "abaixo": 0, "acima": 0}
+                          for campo, limites in self._limites.items()},
+            "categoricos": {campo: {"contagens": [0] * (len(indices) + (CATEGORIA_OUTRAS not in indices)),
+                                    "nao_vistas": 0, "exemplos_nao_vistos": {}}
+                            for campo, indices in self._categorias.items()},
+            "probabilidade": [0] * (len(self._limites_probabilidade) + 1)
+        }
+
+    # ---------- caminho da requisição ----------
+    def observar(self, colunas: Mapping[str, Sequence], probabilidades, codificador=None) -> None:
+        """
+        Enfileira um lote já pontuado (colunas por campo, como `codificar_colunas`).
+
+        `codificador` (o `CodificadorCompilado` da versão que pontuou) define
+        quais categorias o modelo conhece; sem ele vale a linha de base.
+        """
+        self._enfileirar(("colunas", colunas, probabilidades, codificador))
+
+    def observar_registros(self, registros: Sequence, probabilidades, codificador=None) -> None:
+        """Igual a `observar`, com registros (dicts ou modelos pydantic) convertidos na thread do monitor."""
+        self._enfileirar(("registros", registros, probabilidades, codificador))
+
+    def _enfileirar(self, item: tuple) -> None:
+        try:
+            self._fila.put_nowait(item)
+        except queue.Full:
+            self.descartados += 1
+
+    # ---------- thread do monitor ----------
+    def _como_colunas(self, item: tuple) -> tuple:
+        """Converte um item da fila em `(colunas, probabilidades, codificador)`."""
+        tipo, dados, probabilidades, codificador = item
+        if tipo == "registros":
+            registros = [r if isinstance(r, dict) else r.model_dump() for r in dados]
+            campos = [c for c in list(self._limites) + list(self._categorias) if registros and c in registros[0]]
+            dados = {campo: [r[campo] for r in registros] for campo in campos}
+        else:
+            dados = {campo: list(dados[campo]) for campo in list(self._limites) + list(self._categorias)
+                     if campo in dados}
+        return dados, np.atleast_1d(np.asarray(probabilidades, dtype=np.float64)).tolist(), codificador
+
+    def processar_itens(self, itens: List[tuple]) -> None:
+        """
+        Junta os itens retirados da fila num único lote por codificador e
+        atualiza os histogramas uma vez, em vez de uma vez por requisição.
+        """
+        grupos: Dict[int, list] = {}
+        for item in itens:
+            dados, probabilidades, codificador = self._como_colunas(item)
+            grupo = grupos.setdefault(id(codificador), [{}, [], codificador])
+            for campo, valores in dados.items():
+                grupo[0].setdefault(campo, []).extend(valores)
+            grupo[1].extend(probabilidades)
+        for colunas, probabilidades, codificador in grupos.values():
+            self.processar(colunas, probabilidades, codificador)
+
+    def processar(self, dados: Mapping[str, Sequence], probabilidades, codificador=None) -> None:
+        """Atualiza os histogramas com um lote em colunas."""
+        probabilidades = np.atleast_1d(np.asarray(probabilidades, dtype=np.float64))
+        numericos = {}
+        for campo, limites in self._limites.items():
+            if campo in dados:
+                valores = np.asarray(dados[campo], dtype=np.float64)
+                numericos[campo] = (contar_faixas(valores, limites), valores)
+        categoricos = {}
+        for campo, indices in self._categorias.items():
+            if campo not in dados:
+                continue
+            valores = [str(v) for v in dados[campo]]
+            distintos, contagens = np.unique(valores, return_counts=True)
+            categoricos[campo] = [(valor, int(qtd), indices.get(valor, self._outras[campo]),
+                                   (codificador.indice_categoria(campo, valor) < 0) if codificador is not None
+                                   else valor not in indices)
+                                  for valor, qtd in zip(distintos.tolist(), contagens.tolist())]
+        contagem_probabilidade = contar_faixas(probabilidades, self._limites_probabilidade)
+
+        with self._trava:
+            estado = self.estado
+            estado["observados"] += len(probabilidades)
+            for campo, (contagens, valores) in numericos.items():
+                alvo = estado["numericos"][campo]
+                alvo["contagens"] = (np.asarray(alvo["contagens"]) + contagens).tolist()
+                info = self.linha_base["numericos"][campo]
+                alvo["abaixo"] += int(np.count_nonzero(valores < info["minimo"]))
+                alvo["acima"] += int(np.count_nonzero(valores > info["maximo"]))
+            for campo, grupos in categoricos.items():
+                alvo = estado["categoricos"][campo]
+                for valor, qtd, indice, nao_vista in grupos:
+                    alvo["contagens"][indice] += qtd
+                    if nao_vista:
+                        alvo["nao_vistas"] += qtd
+                        exemplos = alvo["exemplos_nao_vistos"]
+                        if valor in exemplos or len(exemplos) < MAX_EXEMPLOS_NAO_VISTOS:
+                            exemplos[valor] = exemplos.get(valor, 0) + qtd
+            estado["probabilidade"] = (np.asarray(estado["probabilidade"]) + contagem_probabilidade).tolist()
+
+    def iniciar(self) -> None:
+        self._thread = threading.Thread(target=self._executar, name="monitor-drift", daemon=True)
+        self._thread.start()
+
+    def _executar(self) -> None:
+        proxima_gravacao = time.monotonic() + self.intervalo
+        while not self._parar.wait(ESPERA_LOTE):
+            # Acordar a cada ESPERA_LOTE (e não a cada item) junta as requisições
+            # do intervalo num lote só e mantém a thread longe do GIL do servidor
+            itens = self._drenar(timeout=0, maximo=self._fila.maxsize or 1000)
+            if itens:
+                try:
+                    self.processar_itens(itens)
+                except Exception:
+                    # Um lote malformado não derruba o monitor
+                    self.descartados += len(itens)
+                for _ in itens:
+                    self._fila.task_done()
+            if self.diretorio and time.monotonic() >= proxima_gravacao:
+                self.gravar()
+                proxima_gravacao = time.monotonic() + self.intervalo
+
+    def _drenar(self, timeout: float, maximo: int = 1000) -> List[tuple]:
+        """Espera o primeiro item e retira os demais que já estiverem na fila."""
+        try:
+            itens = [self._fila.get(timeout=timeout)]
+        except queue.Empty:
+            return []
+        while len(itens) < maximo:
+            try:
+                itens.append(self._fila.get_nowait())
+            except queue.Empty:
+                break
+        return itens
+
+    def parar(self) -> None:
+        """Processa o que restou na fila e grava o snapshot final."""
+        self._parar.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        itens = self._drenar(timeout=0, maximo=self._fila.maxsize or 1000)
+        while itens:
+            self.processar_itens(itens)
+            for _ in itens:
+                self._fila.task_done()
+            itens = self._drenar(timeout=0, maximo=self._fila.maxsize or 1000)
+        if self.diretorio:
+            self.gravar()
+
+    def aguardar(self, timeout: float = 5.0) -> None:
+        """Espera a fila esvaziar (antes de um relatório pontual, por exemplo)."""
+        limite = time.monotonic() + timeout
+        while self._fila.unfinished_tasks and time.monotonic() < limite:
+            time.sleep(0.01)
+
+    # ---------- vários workers ----------
+    @property
+    def caminho(self) -> str:
+        return os.path.join(self.diretorio, f"drift-{os.getpid()}.json")
+
+    def gravar(self) -> None:
+        """Grava o estado deste processo em `diretorio` (escrita atômica)."""
+        with self._trava:
+            snapshot = json.dumps({"pid": os.getpid(), "descartados": self.descartados, "estado": self.estado})
+        descritor, temporario = tempfile.mkstemp(dir=self.diretorio, prefix=".drift.")
+        with os.fdopen(descritor, "w") as f:
+            f.write(snapshot)
+        os.replace(temporario, self.caminho)
+
+    def estado_agregado(self) -> tuple:
+        """`(estado, descartados)` somando os snapshots de todos os workers (ou só este processo)."""
+        if not self.diretorio:
+            with self._trava:
+                return json.loads(json.dumps(self.estado)), self.descartados
+        self.gravar()
+        total, descartados = self.estado_vazio(), 0
+        for nome in os.listdir(self.diretorio):
+            if not (nome.startswith("drift-") and nome.endswith(".json")):
+                continue
+            try:
+                with open(os.path.join(self.diretorio, nome)) as f:
+                    snapshot = json.load(f)
+            except (OSError, ValueError):
+                continue
+            descartados += snapshot["descartados"]
+            mesclar_estado(total, snapshot["estado"])
+        return total, descartados
+
+    # ---------- relatório ----------
+    def relatorio(self) -> Dict:
+        """PSI/KS por campo e da probabilidade, taxas de categorias não vistas e alertas."""
+        estado, descartados = self.estado_agregado()
+        observados = estado["observados"]
+        relatorio = {
+            "linha_base": {"gerada_em": self.linha_base.get("gerada_em"), "linhas": self.linha_base.get("linhas")},
+            "observados": observados,
+            "descartados": descartados,
+            "numericos": {},
+            "categoricos": {},
+            "probabilidade": None,
+            "alertas": []
+        }
+        for campo, atual in estado["numericos"].items():
+            base = self.linha_base["numericos"][campo]["contagens"]
+            valor_psi = psi(base, atual["contagens"])
+            relatorio["numericos"][campo] = {
+                "psi": _arredondar(valor_psi),
+                "ks": _arredondar(ks_faixas(base, atual["contagens"])),
+                "situacao": classificar_psi(valor_psi),
+                "taxa_fora_da_faixa_treino": _taxa(atual["abaixo"] + atual["acima"], observados)
+            }
+        for campo, atual in estado["categoricos"].items():
+            base = list(self.linha_base["categoricos"][campo]["categorias"].values())
+            base += [0] * (len(atual["contagens"]) - len(base))
+            valor_psi = psi(base, atual["contagens"])
+            taxa = _taxa(atual["nao_vistas"], observados)
+            relatorio["categoricos"][campo] = {
+                "psi": _arredondar(valor_psi),
+                "situacao": classificar_psi(valor_psi),
+                "taxa_nao_vistas": taxa,
+                "exemplos_nao_vistos": dict(sorted(atual["exemplos_nao_vistos"].items(),
+                                                   key=lambda item: -item[1]))
+            }
+            if taxa is not None and taxa > LIMITE_TAXA_NAO_VISTAS:
+                relatorio["alertas"].append(f"{campo}: {taxa:.1%} de categorias fora do treino")
+        if self.linha_base.get("probabilidade"):
+            base = self.linha_base["probabilidade"]["contagens"]
+            valor_psi = psi(base, estado["probabilidade"])
+            relatorio["probabilidade"] = {
+                "psi": _arredondar(valor_psi),
+                "ks": _arredondar(ks_faixas(base, estado["probabilidade"])),
+                "situacao": classificar_psi(valor_psi)
+            }
+        for grupo in ("numericos", "categoricos"):
+            for campo, info in relatorio[grupo].items():
+                if info["situacao"] == "significativo":
+                    relatorio["alertas"].append(f"{campo}: PSI {info['psi']}")
+        if relatorio["probabilidade"] and relatorio["probabilidade"]["situacao"] == "significativo":
+            relatorio["alertas"].append(f"probabilidade: PSI {relatorio['probabilidade']['psi']}")
+        return relatorio
+
+
+def mesclar_estado(total: Dict, estado: Dict) -> None:
+    """Soma `estado` em `total` (contagens são aditivas entre workers)."""
+    total["observados"] += estado["observados"]
+    for campo, atual in estado["numericos"].items():
+        alvo = total["numericos"].get(campo)
+        if alvo is None or len(alvo["contagens"]) != len(atual["contagens"]):
+            continue
+        alvo["contagens"] = [a + b for a, b in zip(alvo["contagens"], atual["contagens"])]
+        alvo["abaixo"] += atual["abaixo"]
+        alvo["acima"] += atual["acima"]
+    for campo, atual in estado["categoricos"].items():
+        alvo = total["categoricos"].get(campo)
+        if alvo is None or len(alvo["contagens"]) != len(atual["contagens"]):
+            continue
+        alvo["contagens"] = [a + b for a, b in zip(alvo["contagens"], atual["contagens"])]
+        alvo["nao_vistas"] += atual["nao_vistas"]
+        for valor, qtd in atual["exemplos_nao_vistos"].items():
+            if valor in alvo["exemplos_nao_vistos"] or len(alvo["exemplos_nao_vistos"]) < MAX_EXEMPLOS_NAO_VISTOS:
+                alvo["exemplos_nao_vistos"][valor] = alvo["exemplos_nao_vistos"].get(valor, 0) + qtd
+    if len(total["probabilidade"]) == len(estado["probabilidade"]):
+        total["probabilidade"] = [a + b for a, b in zip(total["probabilidade"], estado["probabilidade"])]
+
+
+def _taxa(parte: int, total: int) -> Optional[float]:
+    return round(parte / total, 4) if total else None
+
+
+def _arredondar(valor: Optional[float]) -> Optional[float]:
+    return None if valor is None else round(valor, 4)
+
+
+# ==================== CLI ====================
+def exportar(entrada: str, diretorio: str, encoding: str = "utf-8") -> str:
+    """
+    Gera `linha_base_drift.json` em `diretorio` a partir do CSV bruto de treino,
+    com a mesma limpeza da API e as probabilidades dos artefatos do diretório.
+    """
+    from artefatos import carregar_artefatos, carregar_valores_imputacao
+    from ingestao import limpar_dataframe_bruto
+
+    df = pd.read_csv(entrada, encoding=encoding).drop_duplicates().reset_index(drop=True)
+    df = limpar_dataframe_bruto(df, carregar_valores_imputacao(diretorio), COLUNAS_CATEGORICAS)
+    artefatos = carregar_artefatos(diretorio)
+    probabilidades = artefatos.probabilidades_colunas(df, len(df))
+    caminho = os.path.join(diretorio, LINHA_BASE_PATH)
+    salvar_linha_base(caminho, calcular_linha_base(df, probabilidades))
+    return caminho
+
+
+def main(argumentos: Optional[list] = None) -> None:
+    parser = argparse.ArgumentParser(description="Linha de base e relatório de drift")
+    comandos = parser.add_subparsers(dest="comando", required=True)
+    exportar_parser = comandos.add_parser("exportar", help="Gera linha_base_drift.json a partir do treino")
+    exportar_parser.add_argument("entrada", help="CSV bruto no formato de docs/treino.csv")
+    exportar_parser.add_argument("diretorio", nargs="?", default=".", help="Diretório dos artefatos")
+    exportar_parser.add_argument("--encoding", default="utf-8")
+    args = parser.parse_args(argumentos)
+
+    if args.comando == "exportar":
+        caminho = exportar(args.entrada, args.diretorio, args.encoding)
+        linha_base = carregar_linha_base(caminho)
+        print(f"✅ Linha de base gravada em {caminho}: {linha_base['linhas']} linhas, "
+              f"{len(linha_base['numericos'])} campos numéricos, {len(linha_base['categoricos'])} categóricos")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,286 @@
+"""
+Pacote compacto do modelo: um único arquivo mapeável em memória.
+
+Guarda coeficientes, intercepto, média/escala do scaler, vocabulário de
+colunas e threshold. A API lê o pacote com `mmap` (os processos
+compartilham as páginas) e pontua só com NumPy, sem importar scikit-learn
+nem desserializar pickles.
+
+Layout do arquivo:
+    MAGIC (8 bytes) | tamanho do cabeçalho (uint64 little-endian) |
+    cabeçalho JSON (UTF-8) | arrays float64 little-endian alinhados em 64 bytes
+
+Exemplo:
+    python pacote_modelo.py exportar .          # pickles -> modelo_pacote.bin
+    python pacote_modelo.py medir .             # tempo de import e RSS: pickle x pacote
+"""
+import argparse
+import json
+import mmap
+import os
+import struct
+import subprocess
+import sys
+import tempfile
+from typing import Dict, List, Optional
+
+import numpy as np
+
+MAGIC = b"ACIDMDL1"
+VERSAO_FORMATO = 1
+ALINHAMENTO = 64
+PACOTE_PATH = "modelo_pacote.bin"
+
+
+class ScalerPacote:
+    """Equivalente ao `StandardScaler.transform` treinado, a partir de média e escala."""
+
+    def __init__(self, media: np.ndarray, escala: np.ndarray, variancia: Optional[np.ndarray] = None,
+                 n_amostras: Optional[int] = None):
+        self.mean_ = media
+        self.scale_ = escala
+        self.n_features_in_ = len(media)
+        # Só o treino incremental usa; pacotes antigos não têm (ver `exportar_pacote`)
+        if variancia is not None:
+            self.var_ = variancia
+        if n_amostras is not None:
+            self.n_samples_seen_ = n_amostras
+
+    def transform(self, X) -> np.ndarray:
+        X = np.array(X, dtype=np.float64)
+        X -= self.mean_
+        X /= self.scale_
+        return X
+
+
+class ModeloLinearPacote:
+    """Equivalente ao `LogisticRegression` binário treinado (`decision_function`/`predict_proba`)."""
+
+    def __init__(self, coeficientes: np.ndarray, intercepto: np.ndarray):
+        self.coef_ = coeficientes
+        self.intercept_ = intercepto
+        self.classes_ = np.array([0, 1])
+        self.n_features_in_ = coeficientes.shape[1]
+
+    def decision_function(self, X) -> np.ndarray:
+        return (np.asarray(X, dtype=np.float64) @ self.coef_.T + self.intercept_).reshape(-1)
+
+    def predict_proba(self, X) -> np.ndarray:
+        probabilidade = self.decision_function(X)
+        # Mesma expressão da `expit` usada pelo scikit-learn
+        probabilidade = 1.0 / (1.0 + np.exp(-probabilidade))
+        return np.vstack([1 - probabilidade, probabilidade]).T
+
+    def predict(self, X) -> np.ndarray:
+        return (self.decision_function(X) > 0).astype(np.int64)
+
+
+def _alinhar(posicao: int) -> int:
+    return (posicao + ALINHAMENTO - 1) // ALINHAMENTO * ALINHAMENTO
+
+
+def exportar_pacote(caminho: str, modelo, scaler, colunas_treino: List[str], threshold: float,
+                    f1_score: Optional[float] = None, impressao_pickles: Optional[str] = None) -> None:
+    """
+    Grava o pacote a partir do modelo e scaler treinados no notebook.
+
+    `impressao_pickles` (ver `artefatos.impressao_pickles`) identifica os
+    pickles de origem; com ela o carregamento `auto` percebe um pacote que
+    ficou para trás depois de uma nova exportação do notebook.
+
+    A escrita vai para um arquivo temporário renomeado no fim, então um
+    processo lendo o pacote nunca vê um arquivo pela metade.
+    """
+    if modelo.coef_.shape[0] != 1:
+        raise ValueError("O pacote suporta apenas regressão logística binária")
+    n = len(colunas_treino)
+    arrays = {
+        "coeficientes": np.asarray(modelo.coef_, dtype="<f8"),
+        "intercepto": np.asarray(modelo.intercept_, dtype="<f8"),
+        "media": np.zeros(n, dtype="<f8") if getattr(scaler, "mean_", None) is None
+        else np.asarray(scaler.mean_, dtype="<f8"),
+        "escala": np.ones(n, dtype="<f8") if getattr(scaler, "scale_", None) is None
+        else np.asarray(scaler.scale_, dtype="<f8")
+    }
+    # Variância e nº de amostras permitem continuar o scaler no treino incremental
+    # (a escala sozinha perde as colunas constantes, que o scikit-learn guarda com escala 1)
+    if getattr(scaler, "var_", None) is not None:
+        arrays["variancia"] = np.asarray(scaler.var_, dtype="<f8")
+    n_amostras = getattr(scaler, "n_samples_seen_", None)
+    for nome in [nome for nome in arrays if nome != "intercepto"]:
+        array = arrays[nome]
+        if array.shape[-1] != n:
+            raise ValueError(f"{nome} tem {array.shape[-1]} posições, colunas_treino tem {n}")
+
+    descricao_arrays = {}
+    deslocamento = 0
+    for nome, array in arrays.items():
+        descricao_arrays[nome] = {"deslocamento": deslocamento, "formato": list(array.shape)}
+        deslocamento = _alinhar(deslocamento + array.nbytes)
+    cabecalho = json.dumps({
+        "versao_formato": VERSAO_FORMATO,
+        "threshold": float(threshold),
+        "f1_score": None if f1_score is None else float(f1_score),
+        "colunas": [str(coluna) for coluna in colunas_treino],
+        "n_amostras": None if n_amostras is None else int(np.max(n_amostras)),
+        "impressao_pickles": impressao_pickles,
+        "arrays": descricao_arrays
+    }, ensure_ascii=False).encode("utf-8")
+    inicio_dados = _alinhar(len(MAGIC) + 8 + len(cabecalho))
+
+    diretorio = os.path.dirname(os.path.abspath(caminho))
+    descritor, temporario = tempfile.mkstemp(dir=diretorio, prefix=".pacote.")
+    try:
+        with os.fdopen(descritor, "wb") as f:
+            f.write(MAGIC + struct.pack("<Q", len(cabecalho)) + cabecalho)
+            for nome, array in arrays.items():
+                f.seek(inicio_dados + descricao_arrays[nome]["deslocamento"])
+                f.write(array.tobytes())
+        os.chmod(temporario, 0o644)
+        os.replace(temporario, caminho)
+    except Exception:
+        os.unlink(temporario)
+        raise
+
+
+def ler_cabecalho_pacote(caminho: str) -> Dict:
+    """Só o cabeçalho JSON do pacote, sem mapear os arrays."""
+    with open(caminho, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{caminho} não é um pacote de modelo")
+        (tamanho_cabecalho,) = struct.unpack("<Q", f.read(8))
+        return json.loads(f.read(tamanho_cabecalho).decode("utf-8"))
+
+
+def ler_pacote(caminho: str) -> Dict:
+    """
+    Mapeia o pacote em memória e retorna cabeçalho e arrays (somente leitura).
+
+    Os arrays apontam para o `mmap`; nada é copiado para a memória privada
+    do processo.
+    """
+    with open(caminho, "rb") as f:
+        mapa = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    if mapa[:len(MAGIC)] != MAGIC:
+        raise ValueError(f"{caminho} não é um pacote de modelo")
+    (tamanho_cabecalho,) = struct.unpack_from("<Q", mapa, len(MAGIC))
+    inicio_cabecalho = len(MAGIC) + 8
+    cabecalho = json.loads(bytes(mapa[inicio_cabecalho:inicio_cabecalho + tamanho_cabecalho]).decode("utf-8"))
+    if cabecalho["versao_formato"] != VERSAO_FORMATO:
+        raise ValueError(f"Versão de pacote não suportada: {cabecalho['versao_formato']}")
+
+    inicio_dados = _alinhar(inicio_cabecalho + tamanho_cabecalho)
+    arrays = {}
+    for nome, descricao in cabecalho["arrays"].items():
+        formato = tuple(descricao["formato"])
+        arrays[nome] = np.frombuffer(mapa, dtype="<f8", count=int(np.prod(formato)),
+                                     offset=inicio_dados + descricao["deslocamento"]).reshape(formato)
+    return {"cabecalho": cabecalho, "arrays": arrays}
+
+
+def carregar_pacote(caminho: str) -> tuple:
+    """Retorna `(modelo, scaler, colunas_treino, threshold, f1_score)` lidos do pacote."""
+    pacote = ler_pacote(caminho)
+    cabecalho, arrays = pacote["cabecalho"], pacote["arrays"]
+    return (
+        ModeloLinearPacote(arrays["coeficientes"], arrays["intercepto"]),
+        ScalerPacote(arrays["media"], arrays["escala"], arrays.get("variancia"), cabecalho.get("n_amostras")),
+        cabecalho["colunas"],
+        cabecalho["threshold"],
+        cabecalho["f1_score"]
+    )
+
+
+def exportar_de_pickles(diretorio: str, saida: Optional[str] = None) -> Dict[str, float]:
+    """
+    Converte os pickles de `diretorio` em pacote e confere o resultado.
+
+    A conferência parte de um registro realista (`EXEMPLO_ACIDENTE`) e
+    ativa todas as dummies. Retorna as maiores diferenças absolutas de logit
+    (`decision_function`) e de probabilidade entre o scikit-learn e o pacote,
+    além da faixa de probabilidades coberta, para mostrar que a comparação
+    não foi feita só em probabilidades ~0.
+    """
+    from artefatos import (CAMPOS_NUMERICOS, COLUNAS_CATEGORICAS, EXEMPLO_ACIDENTE, carregar_artefatos,
+                           impressao_pickles)
+    from codificador import CodificadorCompilado, registros_de_cobertura
+
+    artefatos = carregar_artefatos(diretorio, formato="pickle")
+    saida = saida or os.path.join(diretorio, PACOTE_PATH)
+    exportar_pacote(saida, artefatos.modelo, artefatos.scaler, artefatos.colunas_treino,
+                    artefatos.threshold, artefatos.f1_score, impressao_pickles(diretorio))
+
+    modelo, scaler, colunas, _, _ = carregar_pacote(saida)
+    if list(colunas) != list(artefatos.colunas_treino):
+        raise ValueError("Vocabulário de colunas divergiu na exportação")
+    registros = registros_de_cobertura(artefatos.codificador, EXEMPLO_ACIDENTE)
+    # Cada lado codifica com o próprio scaler: a conferência cobre média/escala do pacote
+    X_referencia = artefatos.codificador.codificar_lote(registros)
+    X_pacote = CodificadorCompilado.a_partir_do_scaler(
+        colunas, scaler, CAMPOS_NUMERICOS, COLUNAS_CATEGORICAS
+    ).codificar_lote(registros)
+    probabilidades = artefatos.modelo.predict_proba(X_referencia)[:, 1]
+    return {
+        "logit": float(np.max(np.abs(artefatos.modelo.decision_function(X_referencia)
+                                     - modelo.decision_function(X_pacote)))),
+        "probabilidade": float(np.max(np.abs(probabilidades - modelo.predict_proba(X_pacote)[:, 1]))),
+        "probabilidade_minima": float(probabilidades.min()),
+        "probabilidade_maxima": float(probabilidades.max()),
+        "registros": len(registros)
+    }
+
+
+def medir_inicializacao(diretorio: str, formato: str) -> Dict:
+    """Importa `api_fastapi` num processo novo e mede tempo, RSS e se o scikit-learn foi carregado."""
+    codigo = (
+        "import time, resource, sys, json\n"
+        "inicio = time.perf_counter()\n"
+        "import api_fastapi\n"
+        "segundos = time.perf_counter() - inicio\n"
+        "print(json.dumps({'segundos_import': round(segundos, 3),"
+        " 'rss_max_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),"
+        " 'sklearn_importado': 'sklearn' in sys.modules,"
+        " 'formato': api_fastapi.versao_atual().formato}))\n"
+    )
+    with tempfile.TemporaryDirectory() as temporario:
+        ambiente = dict(os.environ, FORMATO_ARTEFATOS=formato, PYTHONPATH=os.path.dirname(os.path.abspath(__file__)),
+                        LOG_ARQUIVO=os.path.join(temporario, "api.log"))
+        saida = subprocess.run([sys.executable, "-c", codigo], cwd=diretorio, env=ambiente,
+                               capture_output=True, text=True, check=True)
+    return json.loads(saida.stdout.strip().splitlines()[-1])
+
+
+def main(argumentos: Optional[list] = None) -> None:
+    parser = argparse.ArgumentParser(description="Pacote compacto do modelo (sem pickle/scikit-learn)")
+    comandos = parser.add_subparsers(dest="comando", required=True)
+
+    exportar = comandos.add_parser("exportar", help="Converte os pickles de um diretório em pacote")
+    exportar.add_argument("diretorio", help="Diretório com modelo_lr.pkl, scaler.pkl, colunas_treino.pkl")
+    exportar.add_argument("--saida", default=None, help=f"Arquivo de saída (padrão: <diretorio>/{PACOTE_PATH})")
+
+    medir = comandos.add_parser("medir", help="Tempo de import e RSS da API: pickle x pacote")
+    medir.add_argument("diretorio", help="Diretório com os pickles e o pacote")
+    medir.add_argument("--repeticoes", type=int, default=3)
+    args = parser.parse_args(argumentos)
+
+    if args.comando == "exportar":
+        conferencia = exportar_de_pickles(args.diretorio, args.saida)
+        print(f"✅ Pacote gerado: {args.saida or os.path.join(args.diretorio, PACOTE_PATH)}")
+        print(f"   • {conferencia['registros']} registros de conferência, probabilidades entre "
+              f"{conferencia['probabilidade_minima']:.4f} e {conferencia['probabilidade_maxima']:.4f}")
+        print(f"   • Diferença máxima vs scikit-learn: logit {conferencia['logit']:.2e}, "
+              f"probabilidade {conferencia['probabilidade']:.2e}")
+        return
+
+    print("=" * 70)
+    print("⏱️ INICIALIZAÇÃO DA API: PICKLE x PACOTE")
+    print("=" * 70)
+    for formato in ("pickle", "pacote"):
+        medicoes = [medir_inicializacao(args.diretorio, formato) for _ in range(args.repeticoes)]
+        melhor = min(medicoes, key=lambda m: m["segundos_import"])
+        print(f"{formato:>7}: import {melhor['segundos_import']:.3f}s | RSS máx {melhor['rss_max_mb']:.1f} MB"
+              f" | scikit-learn importado: {'sim' if melhor['sklearn_importado'] else 'não'}")
+
+
+if __name__ == "__main__":
+    main()
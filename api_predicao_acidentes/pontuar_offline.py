@@ -0,0 +1,186 @@
+"""
+Pontuação offline de bases históricas, sem passar pelo servidor HTTP.
+
+Lê um CSV/Parquet no formato de `docs/treino.csv` em blocos, distribui os
+blocos entre processos e grava as predições em um arquivo de saída.
+Usa os mesmos artefatos e o mesmo pré-processamento da API.
+
+Exemplo:
+    python pontuar_offline.py ../docs/treino.csv predicoes.csv --processos 4
+"""
+import argparse
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterator, Optional
+
+import numpy as np
+import pandas as pd
+
+from artefatos import (
+    CAMPOS_NUMERICOS, COLUNAS_CATEGORICAS, carregar_artefatos, carregar_valores_imputacao,
+    interpretar_risco_lote
+)
+from ingestao import limpar_dataframe_bruto
+
+DIRETORIO_ARTEFATOS = os.path.dirname(os.path.abspath(__file__))
+COLUNAS_PREDICAO = ["probabilidade_fatal", "predicao", "predicao_numerica", "nivel_risco"]
+
+# Carregados uma vez por processo (no inicializador do pool)
+_artefatos = None
+_valores_imputacao = None
+
+
+def inicializar_worker(diretorio_artefatos: str) -> None:
+    """Carrega modelo, scaler, colunas, threshold e imputers no processo atual."""
+    global _artefatos, _valores_imputacao
+    _artefatos = carregar_artefatos(diretorio_artefatos)
+    _valores_imputacao = carregar_valores_imputacao(diretorio_artefatos)
+
+
+def pontuar_bloco(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Limpa um bloco de linhas brutas e retorna as colunas de predição.
+
+    Mesma limpeza de `carregar_dados_reais` (vírgula decimal, `dt_ocorrencia`
+    -> ano/mês, imputação), mas com as estatísticas persistidas do treino.
+    """
+    df = limpar_dataframe_bruto(df, _valores_imputacao, COLUNAS_CATEGORICAS)
+    faltando = [c for c in CAMPOS_NUMERICOS + COLUNAS_CATEGORICAS if c not in df.columns]
+    if faltando:
+        raise ValueError(f"Colunas ausentes na entrada: {faltando}")
+
+    probabilidades = _artefatos.probabilidades_colunas(df, len(df))
+    predicoes = (probabilidades >= _artefatos.threshold).astype(np.int64)
+
+    return pd.DataFrame({
+        "probabilidade_fatal": np.round(probabilidades, 4),
+        "predicao": np.where(predicoes == 1, "FATAL", "NÃO FATAL"),
+        "predicao_numerica": predicoes,
+        "nivel_risco": interpretar_risco_lote(probabilidades)
+    }, index=df.index)
+
+
+def ler_blocos(caminho: str, tamanho_bloco: int) -> Iterator[pd.DataFrame]:
+    """Lê CSV ou Parquet em blocos de `tamanho_bloco` linhas."""
+    if caminho.lower().endswith(".parquet"):
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise SystemExit("❌ Leitura de Parquet requer pyarrow (pip install pyarrow)")
+        for lote in pq.ParquetFile(caminho).iter_batches(batch_size=tamanho_bloco):
+            yield lote.to_pandas()
+    else:
+        yield from pd.read_csv(caminho, chunksize=tamanho_bloco)
+
+
+class EscritorSaida:
+    """Grava blocos de resultado em CSV (append) ou Parquet (um row group por bloco)."""
+
+    def __init__(self, caminho: str):
+        self.caminho = caminho
+        self.parquet = caminho.lower().endswith(".parquet")
+        self._primeiro = True
+        self._escritor_parquet = None
+
+    def escrever(self, df: pd.DataFrame) -> None:
+        if self.parquet:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            if self._escritor_parquet is None:
+                tabela = pa.Table.from_pandas(df, preserve_index=False)
+                self._escritor_parquet = pq.ParquetWriter(self.caminho, tabela.schema)
+            else:
+                tabela = pa.Table.from_pandas(df, schema=self._escritor_parquet.schema, preserve_index=False)
+            self._escritor_parquet.write_table(tabela)
+        else:
+            df.to_csv(self.caminho, mode="w" if self._primeiro else "a", header=self._primeiro, index=False)
+        self._primeiro = False
+
+    def fechar(self) -> None:
+        if self._escritor_parquet is not None:
+            self._escritor_parquet.close()
+
+
+def executar(entrada: str, saida: str, processos: int = 1, tamanho_bloco: int = 50000,
+             diretorio_artefatos: str = DIRETORIO_ARTEFATOS, somente_predicoes: bool = False) -> Dict:
+    """
+    Pontua `entrada` e grava em `saida`, mantendo a ordem das linhas.
+
+    No máximo `2 * processos` blocos ficam em memória ao mesmo tempo.
+    Retorna estatísticas da execução (linhas, segundos, linhas/s).
+    """
+    inicio = time.perf_counter()
+    escritor = EscritorSaida(saida)
+    total_linhas = 0
+    total_fatais = 0
+
+    def concluir(bloco: pd.DataFrame, resultado: pd.DataFrame) -> None:
+        nonlocal total_linhas, total_fatais
+        total_linhas += len(resultado)
+        total_fatais += int(resultado["predicao_numerica"].sum())
+        if somente_predicoes:
+            escritor.escrever(resultado.reset_index(drop=True))
+        else:
+            escritor.escrever(pd.concat([bloco, resultado], axis=1))
+
+    try:
+        if processos <= 1:
+            inicializar_worker(diretorio_artefatos)
+            for bloco in ler_blocos(entrada, tamanho_bloco):
+                concluir(bloco, pontuar_bloco(bloco.copy()))
+        else:
+            pendentes = deque()
+            with ProcessPoolExecutor(max_workers=processos, initializer=inicializar_worker,
+                                     initargs=(diretorio_artefatos,)) as pool:
+                for bloco in ler_blocos(entrada, tamanho_bloco):
+                    pendentes.append((bloco, pool.submit(pontuar_bloco, bloco)))
+                    if len(pendentes) >= 2 * processos:
+                        bloco_pronto, futuro = pendentes.popleft()
+                        concluir(bloco_pronto, futuro.result())
+                while pendentes:
+                    bloco_pronto, futuro = pendentes.popleft()
+                    concluir(bloco_pronto, futuro.result())
+    finally:
+        escritor.fechar()
+
+    segundos = time.perf_counter() - inicio
+    return {
+        "linhas": total_linhas,
+        "previstos_fatais": total_fatais,
+        "segundos": round(segundos, 3),
+        "linhas_por_segundo": round(total_linhas / segundos, 1) if segundos > 0 else 0.0
+    }
+
+
+def main(argumentos: Optional[list] = None) -> None:
+    parser = argparse.ArgumentParser(description="Pontuação offline de acidentes aéreos em lote")
+    parser.add_argument("entrada", help="CSV ou Parquet no formato de docs/treino.csv")
+    parser.add_argument("saida", help="Arquivo de saída (.csv ou .parquet)")
+    parser.add_argument("--processos", type=int, default=os.cpu_count() or 1,
+                        help="Número de processos (padrão: nº de CPUs)")
+    parser.add_argument("--tamanho-bloco", type=int, default=50000, help="Linhas por bloco")
+    parser.add_argument("--artefatos", default=DIRETORIO_ARTEFATOS,
+                        help="Diretório com modelo_lr.pkl, scaler.pkl, colunas_treino.pkl etc.")
+    parser.add_argument("--somente-predicoes", action="store_true",
+                        help="Não repetir as colunas de entrada na saída")
+    args = parser.parse_args(argumentos)
+
+    print("=" * 70)
+    print("🚀 PONTUAÇÃO OFFLINE DE ACIDENTES AÉREOS")
+    print("=" * 70)
+    print(f"📂 Entrada: {args.entrada}")
+    print(f"💾 Saída: {args.saida}")
+    print(f"⚙️ Processos: {args.processos} | Bloco: {args.tamanho_bloco} linhas")
+
+    estatisticas = executar(args.entrada, args.saida, args.processos, args.tamanho_bloco,
+                            args.artefatos, args.somente_predicoes)
+
+    print(f"\n✅ {estatisticas['linhas']} linhas pontuadas em {estatisticas['segundos']:.2f}s")
+    print(f"   • Previstos como FATAIS: {estatisticas['previstos_fatais']}")
+    print(f"   • Throughput: {estatisticas['linhas_por_segundo']:.0f} linhas/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+"""
+Registro versionado dos artefatos exportados pelo notebook.
+
+Cada versão é um subdiretório com `modelo_lr.pkl`, `scaler.pkl`,
+`colunas_treino.pkl` e `threshold_otimizado.txt` (ou o `modelo_pacote.bin`
+de `pacote_modelo.py`), mais os imputers quando existirem; o arquivo `ATIVA`
+guarda o nome da versão em produção. A API observa esse arquivo (ou
+recebe `POST /admin/recarregar`) e troca de versão sem reiniciar.
+
+Exemplo:
+    python registro_modelos.py publicar . --versao 2025-06-01 --ativar
+    python registro_modelos.py listar
+    python registro_modelos.py ativar 2025-06-01
+"""
+import argparse
+import os
+import shutil
+import tempfile
+import threading
+from datetime import datetime
+from typing import Callable, List, Optional
+
+from artefatos import (
+    COLUNAS_PATH, IMPUTER_MEDIANA_PATH, IMPUTER_MODA_PATH, MODELO_PATH, SCALER_PATH, THRESHOLD_PATH
+)
+from pacote_modelo import PACOTE_PATH
+
+# Uma versão tem os pickles exportados pelo notebook, o pacote compacto, ou ambos
+ARQUIVOS_VERSAO = [MODELO_PATH, SCALER_PATH, COLUNAS_PATH, THRESHOLD_PATH]
+# Copiados quando presentes: o pacote e os imputers usados por POST /prever_bruto
+ARQUIVOS_OPCIONAIS = [PACOTE_PATH, IMPUTER_MEDIANA_PATH, IMPUTER_MODA_PATH]
+ARQUIVO_ATIVA = "ATIVA"
+
+
+class RegistroModelos:
+    """Diretório de versões de artefatos com um ponteiro para a versão ativa."""
+
+    def __init__(self, diretorio: str):
+        self.diretorio = diretorio
+
+    def caminho(self, versao: str) -> str:
+        if not versao or versao != os.path.basename(versao) or versao.startswith("."):
+            raise ValueError(f"Nome de versão inválido: {versao!r}")
+        return os.path.join(self.diretorio, versao)
+
+    def versao_completa(self, versao: str) -> bool:
+        """True se o diretório da versão tem os pickles completos ou o pacote compacto."""
+        caminho = self.caminho(versao)
+        return (os.path.isfile(os.path.join(caminho, PACOTE_PATH))
+                or all(os.path.isfile(os.path.join(caminho, nome)) for nome in ARQUIVOS_VERSAO))
+
+    def listar_versoes(self) -> List[str]:
+        """Versões completas, em ordem alfabética (use nomes ordenáveis, ex.: datas)."""
+        if not os.path.isdir(self.diretorio):
+            return []
+        return sorted(
+            nome for nome in os.listdir(self.diretorio)
+            if not nome.startswith(".") and os.path.isdir(os.path.join(self.diretorio, nome))
+            and self.versao_completa(nome)
+        )
+
+    def versao_ativa(self) -> Optional[str]:
+        """Versão indicada em `ATIVA`; sem ponteiro, a mais recente; None se vazio."""
+        try:
+            with open(os.path.join(self.diretorio, ARQUIVO_ATIVA), "r") as f:
+                versao = f.read().strip()
+            if versao:
+                return versao
+        except FileNotFoundError:
+            pass
+        versoes = self.listar_versoes()
+        return versoes[-1] if versoes else None
+
+    def ativar(self, versao: str) -> None:
+        """Aponta `ATIVA` para `versao` (escrita atômica via arquivo temporário)."""
+        if not self.versao_completa(versao):
+            raise FileNotFoundError(f"Versão incompleta ou inexistente: {versao}")
+        descritor, temporario = tempfile.mkstemp(dir=self.diretorio, prefix=".ATIVA.")
+        with os.fdopen(descritor, "w") as f:
+            f.write(versao + "\n")
+        os.chmod(temporario, 0o644)
+        os.replace(temporario, os.path.join(self.diretorio, ARQUIVO_ATIVA))
+
+    def publicar(self, origem: str, versao: Optional[str] = None, ativar: bool = False) -> str:
+        """
+        Copia os artefatos de `origem` para uma nova versão do registro.
+
+        Os arquivos são copiados para um diretório temporário e renomeados
+        de uma vez, então uma versão nunca aparece pela metade.
+        """
+        versao = versao or datetime.now().strftime("%Y%m%d-%H%M%S")
+        destino = self.caminho(versao)
+        if os.path.exists(destino):
+            raise FileExistsError(f"Versão já existe: {versao}")
+        arquivos = [nome for nome in ARQUIVOS_VERSAO + ARQUIVOS_OPCIONAIS if os.path.isfile(os.path.join(origem, nome))]
+        faltando = [nome for nome in ARQUIVOS_VERSAO if nome not in arquivos]
+        if faltando and PACOTE_PATH not in arquivos:
+            raise FileNotFoundError(f"Arquivos ausentes em {origem}: {faltando}")
+
+        os.makedirs(self.diretorio, exist_ok=True)
+        temporario = tempfile.mkdtemp(dir=self.diretorio, prefix=f".{versao}.")
+        try:
+            for nome in arquivos:
+                shutil.copy2(os.path.join(origem, nome), os.path.join(temporario, nome))
+            os.rename(temporario, destino)
+        except Exception:
+            shutil.rmtree(temporario, ignore_errors=True)
+            raise
+
+        if ativar:
+            self.ativar(versao)
+        return versao
+
+
+class ObservadorRegistro:
+    """
+    Thread que consulta o registro a cada `intervalo` segundos e chama
+    `ao_mudar(versao)` quando a versão ativa muda.
+    """
+
+    def __init__(self, registro: RegistroModelos, intervalo: float,
+                 versao_atual: Callable[[], Optional[str]], ao_mudar: Callable[[str], None]):
+        self.registro = registro
+        self.intervalo = intervalo
+        self.versao_atual = versao_atual
+        self.ao_mudar = ao_mudar
+        self._parar = threading.Event()
+        self._thread = threading.Thread(target=self._executar, name="observador-registro", daemon=True)
+
+    def iniciar(self) -> None:
+        self._thread.start()
+
+    def parar(self) -> None:
+        self._parar.set()
+        self._thread.join(timeout=self.intervalo + 1)
+
+    def _executar(self) -> None:
+        rejeitada = None
+        while not self._parar.wait(self.intervalo):
+            versao = None
+            try:
+                versao = self.registro.versao_ativa()
+                if versao is None or versao == self.versao_atual() or versao == rejeitada:
+                    continue
+                self.ao_mudar(versao)
+                rejeitada = None
+            except Exception:
+                # A falha já foi registrada por `ao_mudar`; não tenta a mesma versão de novo
+                rejeitada = versao
+
+
+def main(argumentos: Optional[list] = None) -> None:
+    parser = argparse.ArgumentParser(description="Registro versionado de artefatos do modelo")
+    parser.add_argument("--registro", default=os.getenv("REGISTRO_MODELOS", "registro_modelos"),
+                        help="Diretório do registro (padrão: registro_modelos)")
+    comandos = parser.add_subparsers(dest="comando", required=True)
+
+    publicar = comandos.add_parser("publicar", help="Copia artefatos exportados para uma nova versão")
+    publicar.add_argument("origem", help="Diretório com os pickles e threshold, ou com modelo_pacote.bin")
+    publicar.add_argument("--versao", help="Nome da versão (padrão: data e hora atuais)")
+    publicar.add_argument("--ativar", action="store_true", help="Torna a nova versão ativa")
+
+    ativar = comandos.add_parser("ativar", help="Aponta a versão ativa")
+    ativar.add_argument("versao")
+
+    comandos.add_parser("listar", help="Lista as versões do registro")
+    args = parser.parse_args(argumentos)
+
+    registro = RegistroModelos(args.registro)
+    if args.comando == "publicar":
+        versao = registro.publicar(args.origem, args.versao, args.ativar)
+        print(f"✅ Versão publicada: {versao}" + (" (ativa)" if args.ativar else ""))
+    elif args.comando == "ativar":
+        registro.ativar(args.versao)
+        print(f"✅ Versão ativa: {args.versao}")
+    else:
+        ativa = registro.versao_ativa()
+        versoes = registro.listar_versoes()
+        if not versoes:
+            print(f"⚠️ Nenhuma versão em {args.registro}")
+        for versao in versoes:
+            print(f"{'*' if versao == ativa else ' '} {versao}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,356 @@
+"""
+Seleção de modelos com validação cruzada em paralelo e dobras em cache.
+
+Avalia os modelos do notebook (Baseline, Regressão Logística, Árvore de
+Decisão, Random Forest e MLP) com uma grade de hiperparâmetros cada, em
+validação cruzada estratificada sobre o treino. Cada par candidato × dobra
+é uma tarefa independente, distribuída entre processos pelo joblib.
+
+As dobras já pré-processadas e balanceadas (SMOTE, como no notebook, ou o
+peso equivalente) ficam gravadas em `--cache` com uma chave derivada dos
+dados e dos parâmetros, assim como as probabilidades de cada candidato em
+cada dobra: numa nova execução só o que mudou é recalculado.
+
+O threshold de cada candidato é o de maior F1 nas probabilidades fora da
+dobra (`buscar_threshold_f1`). A regressão logística com melhor F1 é
+reajustada em todo o treino e exportada com `threshold_otimizado.txt` e os
+demais artefatos, porque a API serve apenas o modelo linear.
+
+Exemplo:
+    python selecao_modelos.py ../docs/treino.csv --saida selecao --processos 4
+    python selecao_modelos.py ../docs/treino.csv --modelos regressao_logistica,random_forest --balanceamento peso
+"""
+import argparse
+import hashlib
+import json
+import os
+import tempfile
+import time
+from functools import partial
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import sklearn
+from joblib import Parallel, delayed
+from scipy import sparse
+from sklearn.dummy import DummyClassifier
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+from sklearn.metrics import roc_auc_score
+from sklearn.model_selection import ParameterGrid, StratifiedKFold
+from sklearn.neural_network import MLPClassifier
+from sklearn.tree import DecisionTreeClassifier
+from sklearn.utils.validation import has_fit_parameter
+
+from treino_streaming import (
+    FRACAO_VALIDACAO, PROPORCAO_POSITIVOS, ajustar_regressao, balancear_por_peso, buscar_threshold_f1,
+    exportar_artefatos, metricas_classificacao, preparar_matrizes
+)
+
+try:
+    from imblearn.over_sampling import SMOTE
+except ImportError:
+    SMOTE = None
+
+# nome -> (classe, parâmetros fixos, grade de hiperparâmetros); fixos iguais aos do notebook
+CANDIDATOS = {
+    "baseline": (DummyClassifier, {"strategy": "most_frequent", "random_state": 42}, {}),
+    "regressao_logistica": (LogisticRegression, {"random_state": 42, "max_iter": 1000},
+                            {"C": [0.01, 0.1, 1.0]}),
+    "arvore_decisao": (DecisionTreeClassifier, {"random_state": 42}, {"max_depth": [None, 5, 10]}),
+    "random_forest": (RandomForestClassifier, {"n_estimators": 100, "random_state": 42, "n_jobs": 1},
+                      {"max_depth": [None, 10]}),
+    "rede_neural": (MLPClassifier, {"hidden_layer_sizes": (100, 50), "max_iter": 500, "random_state": 42},
+                    {"alpha": [1e-4, 1e-2]}),
+}
+BALANCEAMENTOS = ("smote", "peso", "nenhum")
+RESULTADOS_PATH = "resultados_selecao.csv"
+
+
+# ==================== CACHE EM DISCO ====================
+def impressao_digital(*partes) -> str:
+    """Chave curta e estável para matrizes (esparsas ou não) e parâmetros."""
+    h = hashlib.sha1()
+    for parte in partes:
+        if sparse.issparse(parte):
+            parte = parte.tocsr()
+            h.update(str(parte.shape).encode())
+            for array in (parte.data, parte.indices, parte.indptr):
+                h.update(np.ascontiguousarray(array).tobytes())
+        elif isinstance(parte, np.ndarray):
+            h.update(str((parte.shape, parte.dtype.str)).encode())
+            h.update(np.ascontiguousarray(parte).tobytes())
+        else:
+            h.update(json.dumps(parte, sort_keys=True, default=str).encode())
+    return h.hexdigest()[:16]
+
+
+def salvar_npz(caminho: str, **arrays) -> None:
+    """`np.savez` num temporário renomeado no fim: um processo nunca lê uma dobra pela metade."""
+    descritor, temporario = tempfile.mkstemp(dir=os.path.dirname(caminho), prefix=".dobra.", suffix=".npz")
+    try:
+        with os.fdopen(descritor, "wb") as f:
+            np.savez(f, **arrays)
+        os.replace(temporario, caminho)
+    except Exception:
+        os.unlink(temporario)
+        raise
+
+
+def _componentes(nome: str, X: sparse.csr_matrix) -> Dict[str, np.ndarray]:
+    X = sparse.csr_matrix(X)
+    return {f"{nome}_data": X.data, f"{nome}_indices": X.indices, f"{nome}_indptr": X.indptr,
+            f"{nome}_shape": np.array(X.shape)}
+
+
+def _matriz(arquivo, nome: str) -> sparse.csr_matrix:
+    return sparse.csr_matrix(
+        (arquivo[f"{nome}_data"], arquivo[f"{nome}_indices"], arquivo[f"{nome}_indptr"]),
+        shape=tuple(arquivo[f"{nome}_shape"])
+    )
+
+
+# ==================== DOBRAS ====================
+def balancear_smote(X: sparse.csr_matrix, y: np.ndarray, proporcao_positivos: float, semente: int = 42) -> Tuple:
+    """SMOTE do notebook (`sampling_strategy=proporcao_positivos`); retorna `(X, y, None)`."""
+    X_balanceado, y_balanceado = SMOTE(random_state=semente, sampling_strategy=proporcao_positivos).fit_resample(X, y)
+    return sparse.csr_matrix(X_balanceado), np.asarray(y_balanceado), None
+
+
+def gerar_dobra(caminho: str, X: sparse.csr_matrix, y: np.ndarray, indices_treino: np.ndarray,
+                indices_validacao: np.ndarray, balanceamento: str, proporcao_positivos: float,
+                semente: int) -> None:
+    """Balanceia a parte de treino da dobra (nunca a de validação) e grava tudo em `caminho`."""
+    X_treino, y_treino = X[indices_treino], y[indices_treino]
+    pesos = None
+    if balanceamento == "smote":
+        X_treino, y_treino, pesos = balancear_smote(X_treino, y_treino, proporcao_positivos, semente)
+    elif balanceamento == "peso":
+        X_treino, y_treino, pesos = balancear_por_peso(X_treino, y_treino, proporcao_positivos)
+    salvar_npz(
+        caminho, **_componentes("X_treino", X_treino), **_componentes("X_validacao", X[indices_validacao]),
+        y_treino=y_treino, y_validacao=y[indices_validacao], indices_validacao=indices_validacao,
+        pesos=np.ones(len(y_treino)) if pesos is None else pesos
+    )
+
+
+def preparar_dobras(X: sparse.csr_matrix, y: np.ndarray, cache: str, n_dobras: int = 5, semente: int = 42,
+                    balanceamento: str = "smote", proporcao_positivos: float = PROPORCAO_POSITIVOS,
+                    processos: int = 1) -> Tuple[List[str], List[np.ndarray], int]:
+    """
+    Caminhos das dobras em cache (gerando em paralelo as que faltam), os
+    índices de validação de cada uma e quantas foram reaproveitadas.
+    """
+    os.makedirs(cache, exist_ok=True)
+    chave_dados = impressao_digital(X, y)
+    divisor = StratifiedKFold(n_splits=n_dobras, shuffle=True, random_state=semente)
+    caminhos, validacoes, pendentes = [], [], []
+    for k, (indices_treino, indices_validacao) in enumerate(divisor.split(np.zeros(len(y)), y)):
+        chave = impressao_digital(chave_dados, n_dobras, semente, k, balanceamento, proporcao_positivos)
+        caminho = os.path.join(cache, f"dobra_{k}_{chave}.npz")
+        caminhos.append(caminho)
+        validacoes.append(indices_validacao)
+        if not os.path.isfile(caminho):
+            pendentes.append((caminho, indices_treino, indices_validacao))
+
+    Parallel(n_jobs=min(processos, max(1, len(pendentes))))(
+        delayed(gerar_dobra)(caminho, X, y, indices_treino, indices_validacao, balanceamento,
+                             proporcao_positivos, semente)
+        for caminho, indices_treino, indices_validacao in pendentes
+    )
+    return caminhos, validacoes, n_dobras - len(pendentes)
+
+
+# ==================== CANDIDATOS ====================
+def expandir_grade(nomes: List[str]) -> List[Tuple[str, Dict]]:
+    """Pares `(modelo, hiperparâmetros)` de todas as combinações da grade de cada modelo."""
+    desconhecidos = [nome for nome in nomes if nome not in CANDIDATOS]
+    if desconhecidos:
+        raise ValueError(f"Modelos desconhecidos: {desconhecidos}. Disponíveis: {list(CANDIDATOS)}")
+    return [(nome, dict(parametros)) for nome in nomes for parametros in ParameterGrid(CANDIDATOS[nome][2])]
+
+
+def chave_predicao(caminho_dobra: str, nome: str, parametros: Dict) -> str:
+    """
+    Chave da predição em cache de um candidato numa dobra. Usa os parâmetros
+    efetivos (fixos + grade), então mudar `max_iter` ou `n_estimators` em
+    `CANDIDATOS` recalcula a predição em vez de reaproveitar a antiga.
+    """
+    classe, fixos, _ = CANDIDATOS[nome]
+    return impressao_digital(os.path.basename(caminho_dobra), nome, classe.__name__, {**fixos, **parametros},
+                             sklearn.__version__)
+
+
+def avaliar_tarefa(caminho_dobra: str, nome: str, parametros: Dict, caminho_predicao: str) -> Dict:
+    """Ajusta um candidato no treino de uma dobra e grava as probabilidades da validação."""
+    if os.path.isfile(caminho_predicao):
+        with np.load(caminho_predicao) as salvo:
+            return {"probabilidades": salvo["probabilidades"], "segundos": float(salvo["segundos"]), "cache": True}
+
+    inicio = time.perf_counter()
+    with np.load(caminho_dobra) as dobra:
+        X_treino, X_validacao = _matriz(dobra, "X_treino"), _matriz(dobra, "X_validacao")
+        y_treino, pesos = dobra["y_treino"], dobra["pesos"]
+
+    classe, fixos, _ = CANDIDATOS[nome]
+    estimador = classe(**{**fixos, **parametros})
+    if np.all(pesos == 1) or not has_fit_parameter(estimador, "sample_weight"):
+        estimador.fit(X_treino, y_treino)
+    else:
+        estimador.fit(X_treino, y_treino, sample_weight=pesos)
+    colunas = list(estimador.classes_)
+    probabilidades = (estimador.predict_proba(X_validacao)[:, colunas.index(1)] if 1 in colunas
+                      else np.zeros(X_validacao.shape[0]))
+
+    segundos = time.perf_counter() - inicio
+    salvar_npz(caminho_predicao, probabilidades=probabilidades, segundos=np.float64(segundos))
+    return {"probabilidades": probabilidades, "segundos": segundos, "cache": False}
+
+
+def resumir_candidato(nome: str, parametros: Dict, resultados: List[Dict], validacoes: List[np.ndarray],
+                      y: np.ndarray) -> Dict:
+    """Métricas de um candidato: F1 por dobra em 0.5 (como o `cross_val_score` do notebook) e fora da dobra."""
+    f1_dobras = [
+        metricas_classificacao(resultado["probabilidades"], y[indices], 0.5)["f1_score"]
+        for resultado, indices in zip(resultados, validacoes)
+    ]
+    fora_da_dobra = np.empty(len(y))
+    for resultado, indices in zip(resultados, validacoes):
+        fora_da_dobra[indices] = resultado["probabilidades"]
+    threshold, _ = buscar_threshold_f1(fora_da_dobra, y)
+    otimizado = metricas_classificacao(fora_da_dobra, y, threshold)
+    return {
+        "modelo": nome,
+        "parametros": json.dumps(parametros, sort_keys=True),
+        "f1_cv_050": round(float(np.mean(f1_dobras)), 4),
+        "f1_cv_050_desvio": round(float(np.std(f1_dobras)), 4),
+        "auc_fora_dobra": round(float(roc_auc_score(y, fora_da_dobra)), 4) if 0 < y.sum() < len(y) else None,
+        "threshold_otimizado": otimizado["threshold"],
+        "f1_otimizado": otimizado["f1_score"],
+        "precisao_otimizada": otimizado["precisao"],
+        "recall_otimizado": otimizado["recall"],
+        "segundos": round(sum(resultado["segundos"] for resultado in resultados), 3),
+        "dobras_em_cache": sum(resultado["cache"] for resultado in resultados)
+    }
+
+
+# ==================== EXECUÇÃO ====================
+def executar(entrada: str, saida: str, modelos: Optional[List[str]] = None, n_dobras: int = 5,
+             processos: int = 1, balanceamento: str = "smote", proporcao_positivos: float = PROPORCAO_POSITIVOS,
+             cache: Optional[str] = None, tamanho_bloco: int = 100000, fracao_validacao: float = FRACAO_VALIDACAO,
+             semente: int = 42) -> Dict:
+    """
+    Roda a validação cruzada de todos os candidatos, grava a tabela em
+    `saida/resultados_selecao.csv` e exporta a melhor regressão logística.
+
+    Retorna a tabela (DataFrame ordenado por F1 otimizado), o resultado do
+    reajuste final e estatísticas do cache.
+    """
+    if balanceamento not in BALANCEAMENTOS:
+        raise ValueError(f"Balanceamento inválido: {balanceamento}")
+    if balanceamento == "smote" and SMOTE is None:
+        raise SystemExit("❌ --balanceamento smote requer imbalanced-learn (pip install imbalanced-learn)")
+    candidatos = expandir_grade(modelos or list(CANDIDATOS))
+    cache = cache or os.path.join(saida, ".cache")
+    os.makedirs(saida, exist_ok=True)
+
+    matrizes = preparar_matrizes(entrada, tamanho_bloco, fracao_validacao)
+    X, y = matrizes["X_treino"], matrizes["y_treino"]
+    caminhos, validacoes, dobras_reaproveitadas = preparar_dobras(
+        X, y, cache, n_dobras, semente, balanceamento, proporcao_positivos, processos
+    )
+
+    tarefas = []
+    for nome, parametros in candidatos:
+        for caminho in caminhos:
+            tarefas.append((caminho, nome, parametros,
+                            os.path.join(cache, f"predicao_{chave_predicao(caminho, nome, parametros)}.npz")))
+    # Tarefas já em cache são lidas aqui mesmo, sem subir o pool de processos
+    inicio = time.perf_counter()
+    resultados = [avaliar_tarefa(*tarefa) if os.path.isfile(tarefa[-1]) else None for tarefa in tarefas]
+    pendentes = [i for i, resultado in enumerate(resultados) if resultado is None]
+    if pendentes:
+        calculados = Parallel(n_jobs=min(processos, len(pendentes)))(
+            delayed(avaliar_tarefa)(*tarefas[i]) for i in pendentes
+        )
+        for i, resultado in zip(pendentes, calculados):
+            resultados[i] = resultado
+    segundos_cv = time.perf_counter() - inicio
+
+    linhas = [
+        resumir_candidato(nome, parametros, resultados[i * n_dobras:(i + 1) * n_dobras], validacoes, y)
+        for i, (nome, parametros) in enumerate(candidatos)
+    ]
+    tabela = pd.DataFrame(linhas).sort_values(["f1_otimizado", "auc_fora_dobra"], ascending=False,
+                                              kind="mergesort").reset_index(drop=True)
+    tabela.to_csv(os.path.join(saida, RESULTADOS_PATH), index=False)
+
+    # Reajuste da melhor regressão logística em todo o treino; threshold escolhido na validação
+    final = None
+    lineares = tabela[tabela["modelo"] == "regressao_logistica"]
+    if not lineares.empty:
+        C = json.loads(lineares.iloc[0]["parametros"])["C"]
+        if balanceamento == "smote":
+            balancear = partial(balancear_smote, proporcao_positivos=proporcao_positivos, semente=semente)
+        else:
+            balancear = partial(balancear_por_peso,
+                                proporcao_positivos=proporcao_positivos if balanceamento == "peso" else 0)
+        final = ajustar_regressao(matrizes, C, balancear)
+        final["C"] = C
+        final["arquivos"] = exportar_artefatos(saida, final)
+
+    return {
+        "tabela": tabela,
+        "final": final,
+        "tarefas": len(tarefas),
+        "tarefas_em_cache": sum(resultado["cache"] for resultado in resultados),
+        "dobras_reaproveitadas": dobras_reaproveitadas,
+        "segundos_cv": round(segundos_cv, 3)
+    }
+
+
+def main(argumentos: Optional[list] = None) -> None:
+    parser = argparse.ArgumentParser(description="Seleção de modelos em paralelo com dobras em cache")
+    parser.add_argument("entrada", help="CSV bruto no formato de docs/treino.csv")
+    parser.add_argument("--saida", default="selecao_modelos", help="Diretório da tabela e dos artefatos")
+    parser.add_argument("--modelos", default=",".join(CANDIDATOS),
+                        help=f"Modelos separados por vírgula (padrão: {','.join(CANDIDATOS)})")
+    parser.add_argument("--dobras", type=int, default=5)
+    parser.add_argument("--processos", type=int, default=os.cpu_count() or 1,
+                        help="Número de processos (padrão: nº de CPUs)")
+    parser.add_argument("--balanceamento", choices=BALANCEAMENTOS, default="smote")
+    parser.add_argument("--proporcao-positivos", type=float, default=PROPORCAO_POSITIVOS,
+                        help="sampling_strategy do SMOTE (ou proporção equivalente em peso)")
+    parser.add_argument("--cache", default=None, help="Diretório do cache (padrão: <saida>/.cache)")
+    parser.add_argument("--tamanho-bloco", type=int, default=100000, help="Linhas por bloco na leitura")
+    args = parser.parse_args(argumentos)
+
+    print("=" * 70)
+    print("🔬 SELEÇÃO DE MODELOS")
+    print("=" * 70)
+    print(f"📂 Entrada: {args.entrada} | Dobras: {args.dobras} | Processos: {args.processos} | "
+          f"Balanceamento: {args.balanceamento}")
+
+    resultado = executar(args.entrada, args.saida, args.modelos.split(","), args.dobras, args.processos,
+                         args.balanceamento, args.proporcao_positivos, args.cache, args.tamanho_bloco)
+    print(f"⏱️ Validação cruzada: {resultado['segundos_cv']:.2f}s | "
+          f"{resultado['tarefas_em_cache']}/{resultado['tarefas']} tarefas e "
+          f"{resultado['dobras_reaproveitadas']}/{args.dobras} dobras vindas do cache")
+    print()
+    print(resultado["tabela"].to_string(index=False))
+
+    final = resultado["final"]
+    if final is None:
+        print("\n⚠️ Nenhuma regressão logística avaliada; nenhum artefato exportado.")
+        return
+    melhor = resultado["tabela"].iloc[0]
+    if melhor["modelo"] != "regressao_logistica":
+        print(f"\n⚠️ Melhor F1 foi de {melhor['modelo']}, mas a API serve apenas a regressão logística.")
+    otimizado = final["resumo"]["validacao"].get("otimizado", {})
+    print(f"\n✅ Regressão logística (C={final['C']}) exportada em {args.saida}: "
+          f"threshold {final['threshold']:.4f}, F1 na validação {otimizado.get('f1_score')}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,239 @@
+"""
+Servidor de produção com vários workers uvicorn e modelo carregado antes do fork.
+
+O processo principal importa `api_fastapi` uma única vez (modelo, scaler,
+codificador e kernel ficam prontos), abre o socket e cria os workers com
+`fork`: os artefatos são compartilhados copy-on-write e o `modelo_pacote.bin`
+mapeado em memória é literalmente a mesma página para todos.
+
+- Log: os workers enviam os registros ao processo principal, que é o único
+  a escrever e rotacionar `api_predicoes.log`.
+- Métricas: cada worker grava um snapshot em METRICAS_DIRETORIO e qualquer
+  um responde `/metrics` com a soma de todos. Snapshots de execuções
+  anteriores são apagados ao subir, para não entrarem na soma.
+- Encerramento: SIGTERM/SIGINT param de aceitar conexões, esperam as
+  requisições em andamento (até `--timeout-encerramento`) e só então saem.
+  Workers que morrerem sem pedido de encerramento são recriados.
+
+Exemplo:
+    python servidor.py --workers 4 --porta 8000
+"""
+import argparse
+import gc
+import logging
+import multiprocessing
+import os
+import shutil
+import signal
+import socket
+import sys
+import tempfile
+import time
+from typing import Dict, Optional
+
+# Snapshots por processo gravados em METRICAS_DIRETORIO (`<prefixo>-<pid>.json`):
+# métricas Prometheus, monitor de drift e avaliação em sombra
+PREFIXOS_SNAPSHOTS = ("metricas", "drift", "sombra")
+
+
+def criar_socket(host: str, porta: int, backlog: int = 2048) -> socket.socket:
+    """Socket de escuta compartilhado por todos os workers."""
+    sock = socket.socket(socket.AF_INET6 if ":" in host else socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, porta))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+def limpar_snapshots(diretorio: str) -> int:
+    """
+    Apaga de `diretorio` os snapshots deixados por uma execução anterior
+    (e temporários de escritas interrompidas); devolve quantos removeu.
+
+    Os contadores somados de workers encerrados só valem dentro da mesma
+    execução: um snapshot antigo seria somado para sempre ao `/metrics`.
+    """
+    if not os.path.isdir(diretorio):
+        return 0
+    removidos = 0
+    for nome in os.listdir(diretorio):
+        antigo = any(
+            (nome.startswith(f"{prefixo}-") and nome.endswith(".json")) or nome.startswith(f".{prefixo}.")
+            for prefixo in PREFIXOS_SNAPSHOTS
+        )
+        if not antigo:
+            continue
+        try:
+            os.remove(os.path.join(diretorio, nome))
+            removidos += 1
+        except FileNotFoundError:
+            pass
+    return removidos
+
+
+def executar_worker(api, sock: socket.socket, fila_log, args) -> None:
+    """Corpo do processo filho: sobe o uvicorn no socket herdado e sai sem voltar ao laço do pai."""
+    import uvicorn
+
+    codigo_saida = 0
+    try:
+        # Grupo próprio: CTRL+C chega só ao processo principal, que repassa um único SIGTERM
+        os.setpgid(0, 0)
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        signal.signal(signal.SIGINT, signal.SIG_DFL)
+        api.iniciar_worker(fila_log)
+        config = uvicorn.Config(
+            api.app, log_level=args.log_level, access_log=False,
+            timeout_graceful_shutdown=args.timeout_encerramento
+        )
+        uvicorn.Server(config).run(sockets=[sock])
+    except Exception as e:
+        print(f"❌ Worker {os.getpid()} falhou: {e}", file=sys.stderr)
+        codigo_saida = 1
+    finally:
+        try:
+            api.encerrar_worker()
+        finally:
+            sys.stdout.flush()
+            sys.stderr.flush()
+            # Não executa os atexit herdados do processo principal
+            os._exit(codigo_saida)
+
+
+class Supervisor:
+    """Cria, acompanha e encerra os workers."""
+
+    def __init__(self, api, sock: socket.socket, fila_log, args):
+        self.api = api
+        self.sock = sock
+        self.fila_log = fila_log
+        self.args = args
+        self.workers: Dict[int, int] = {}
+        self.encerrando = False
+
+    def criar_worker(self, indice: int) -> None:
+        pid = os.fork()
+        if pid == 0:
+            executar_worker(self.api, self.sock, self.fila_log, self.args)
+        self.workers[pid] = indice
+
+    def pedir_encerramento(self, sinal, _frame) -> None:
+        if not self.encerrando:
+            print(f"\n🛑 Sinal {signal.Signals(sinal).name}: encerrando {len(self.workers)} workers...")
+        self.encerrando = True
+
+    def executar(self) -> None:
+        signal.signal(signal.SIGTERM, self.pedir_encerramento)
+        signal.signal(signal.SIGINT, self.pedir_encerramento)
+
+        for indice in range(self.args.workers):
+            self.criar_worker(indice)
+        print(f"✓ {len(self.workers)} workers ativos: {sorted(self.workers)}")
+
+        while not self.encerrando:
+            pid, status = self._aguardar_filho(timeout=0.5)
+            if pid and not self.encerrando:
+                indice = self.workers.pop(pid)
+                print(f"⚠️ Worker {pid} saiu (status {status}); criando outro")
+                logging.warning("Worker %d saiu com status %d; recriado", pid, status)
+                time.sleep(1)
+                self.criar_worker(indice)
+
+        self.encerrar()
+
+    def _aguardar_filho(self, timeout: float):
+        limite = time.monotonic() + timeout
+        while time.monotonic() < limite and not self.encerrando:
+            pid, status = os.waitpid(-1, os.WNOHANG)
+            if pid:
+                return pid, os.waitstatus_to_exitcode(status)
+            time.sleep(0.05)
+        return 0, 0
+
+    def encerrar(self) -> None:
+        for pid in list(self.workers):
+            self._sinalizar(pid, signal.SIGTERM)
+
+        limite = time.monotonic() + self.args.timeout_encerramento + 5
+        while self.workers and time.monotonic() < limite:
+            pid, _ = os.waitpid(-1, os.WNOHANG)
+            if pid:
+                self.workers.pop(pid, None)
+            else:
+                time.sleep(0.05)
+
+        for pid in list(self.workers):
+            print(f"⚠️ Worker {pid} não encerrou a tempo; SIGKILL")
+            self._sinalizar(pid, signal.SIGKILL)
+            os.waitpid(pid, 0)
+        self.workers.clear()
+        self.sock.close()
+
+    @staticmethod
+    def _sinalizar(pid: int, sinal: int) -> None:
+        try:
+            os.kill(pid, sinal)
+        except ProcessLookupError:
+            pass
+
+
+def main(argumentos: Optional[list] = None) -> None:
+    parser = argparse.ArgumentParser(description="API de predição com vários workers (pre-fork)")
+    parser.add_argument("--host", default=os.getenv("API_HOST", "0.0.0.0"))
+    parser.add_argument("--porta", type=int, default=int(os.getenv("API_PORTA", "8000")))
+    parser.add_argument("--workers", type=int, default=int(os.getenv("API_WORKERS", str(os.cpu_count() or 1))),
+                        help="Número de processos (padrão: nº de CPUs)")
+    parser.add_argument("--timeout-encerramento", type=int, default=30,
+                        help="Segundos para concluir requisições em andamento ao encerrar")
+    parser.add_argument("--log-level", default="warning", help="Nível de log do uvicorn")
+    args = parser.parse_args(argumentos)
+
+    if not hasattr(os, "fork"):
+        raise SystemExit("❌ O modo multiprocesso requer fork (Linux/macOS). Use: python api_fastapi.py")
+
+    # Precisa estar no ambiente antes de importar a API
+    diretorio_metricas_temporario = None
+    if not os.getenv("METRICAS_DIRETORIO"):
+        diretorio_metricas_temporario = tempfile.mkdtemp(prefix="api_metricas_")
+        os.environ["METRICAS_DIRETORIO"] = diretorio_metricas_temporario
+    else:
+        removidos = limpar_snapshots(os.environ["METRICAS_DIRETORIO"])
+        if removidos:
+            print(f"🧹 {removidos} snapshots de uma execução anterior removidos de {os.environ['METRICAS_DIRETORIO']}")
+    os.environ["API_PRE_FORK"] = "1"
+    # Um /admin/recarregar atinge um só worker; os outros seguem o ponteiro ATIVA
+    os.environ.setdefault("REGISTRO_OBSERVAR_SEGUNDOS", "5")
+
+    print("=" * 70)
+    print("🚀 API DE PREDIÇÃO DE ACIDENTES AÉREOS - MODO MULTIPROCESSO")
+    print("=" * 70)
+    inicio = time.perf_counter()
+    import api_fastapi
+    versao = api_fastapi.versao_atual()
+    print(f"✓ Modelo {versao.nome} ({versao.formato}) carregado em {time.perf_counter() - inicio:.2f}s, antes do fork")
+
+    contexto = multiprocessing.get_context("fork")
+    fila_log = contexto.Queue(maxsize=int(os.getenv("LOG_TAMANHO_FILA", "10000")))
+    api_fastapi.pipeline_log.receber_de_processos(fila_log)
+
+    sock = criar_socket(args.host, args.porta)
+    print(f"🌐 Escutando em http://{args.host}:{args.porta} com {args.workers} workers")
+
+    # Objetos já carregados saem do rastreamento do GC: as coletas nos workers
+    # não tocam essas páginas e elas continuam compartilhadas
+    gc.collect()
+    gc.freeze()
+
+    supervisor = Supervisor(api_fastapi, sock, fila_log, args)
+    try:
+        supervisor.executar()
+    finally:
+        api_fastapi.pipeline_log.parar()
+        if diretorio_metricas_temporario:
+            shutil.rmtree(diretorio_metricas_temporario, ignore_errors=True)
+    print("✅ Servidor encerrado")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,6 +4,8 @@ import pandas as pd
 from typing import List, Dict
 import time
 
+from cliente_api import ClienteAPI
+
 # ==================== CONFIGURAÇÕES ====================
 API_URL = "http://localhost:8000"
 DATASET_PATH = "../docs/teste.csv"
@@ -241,33 +243,30 @@ def gerar_relatorio_completo(df: pd.DataFrame):
     print("=" * 80)
     
     resultados = []
+    processados = 0
     
     print(f"🔄 Testando {len(df)} acidentes...")
     
-    for idx, (_, row) in enumerate(df.iterrows(), 1):
-        acidente = preparar_acidente_para_api(row)
-        
-        try:
-            response = requests.post(f"{API_URL}/prever", json=acidente, timeout=10)
-            
-            if response.status_code == 200:
-                pred = response.json()
-                
+    # Blocos de /prever_lote por conexões keep-alive em vez de um POST por linha;
+    # um bloco que falha (ou uma linha inválida) é relatado e o teste segue
+    with ClienteAPI(API_URL, tamanho_lote=50) as cliente:
+        for parte in cliente.iterar_dataframe(df, erros="coletar"):
+            reais = df['les_fatais_trip'].iloc[processados:processados + len(parte)]
+            processados += len(parte)
+            for fatal_real, (rotulo, pred) in zip(reais, parte.iterrows()):
+                if pred['erro'] is not None:
+                    print(f"   ⚠️ Erro no acidente {rotulo}: {pred['erro']}")
+                    continue
+                classe_real = 'FATAL' if fatal_real == 1 else 'NÃO FATAL'
+                classe_prevista = 'FATAL' if pred['predicao_numerica'] == 1 else 'NÃO FATAL'
                 resultados.append({
-                    'classe_real': 'FATAL' if row['les_fatais_trip'] == 1 else 'NÃO FATAL',
-                    'classe_prevista': pred['predicao'],
+                    'classe_real': classe_real,
+                    'classe_prevista': classe_prevista,
                     'probabilidade': pred['probabilidade_fatal'],
                     'nivel_risco': pred['nivel_risco'],
-                    'acerto': pred['predicao'] == ('FATAL' if row['les_fatais_trip'] == 1 else 'NÃO FATAL')
+                    'acerto': classe_prevista == classe_real
                 })
-            
-            # Exibir progresso
-            if idx % 5 == 0:
-                print(f"   Progresso: {idx}/{len(df)} ({idx/len(df)*100:.0f}%)")
-                
-        except Exception as e:
-            print(f"   ⚠️ Erro no acidente {idx}: {e}")
-            continue
+            print(f"   Progresso: {processados}/{len(df)} ({processados/len(df)*100:.0f}%)")
     
     if resultados:
         df_resultados = pd.DataFrame(resultados)
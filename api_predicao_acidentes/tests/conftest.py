@@ -0,0 +1,53 @@
+"""
+Configuração comum dos testes da API.
+
+Os módulos da API são planos e leem os artefatos por caminho relativo, então
+os testes rodam com o diretório da API no `sys.path` e como diretório atual.
+
+Exemplo:
+    cd api_predicao_acidentes
+    python -m pytest -q tests
+"""
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+DIRETORIO_API = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DIRETORIO_DOCS = os.path.join(DIRETORIO_API, "..", "docs")
+sys.path.insert(0, DIRETORIO_API)
+os.chdir(DIRETORIO_API)
+
+
+@pytest.fixture(scope="session")
+def artefatos():
+    from artefatos import carregar_artefatos
+    return carregar_artefatos(DIRETORIO_API, formato="pickle")
+
+
+@pytest.fixture(scope="session")
+def registros_reais():
+    """Linhas de `docs/teste.csv` limpas como na ingestão, no formato de `AcidenteAereo`."""
+    from benchmark_api import carregar_payloads
+    return carregar_payloads(os.path.join(DIRETORIO_DOCS, "teste.csv"))
+
+
+@pytest.fixture(scope="session")
+def treino_bruto():
+    return pd.read_csv(os.path.join(DIRETORIO_DOCS, "treino.csv"))
+
+
+@pytest.fixture(scope="session")
+def api(tmp_path_factory):
+    """`api_fastapi` importado sem escrever no log de produção nem ligar o monitor de drift."""
+    os.environ["LOG_ARQUIVO"] = str(tmp_path_factory.mktemp("log") / "api_predicoes.log")
+    os.environ["DRIFT_ATIVO"] = "0"
+    import api_fastapi
+    return api_fastapi
+
+
+@pytest.fixture
+def cliente(api):
+    from fastapi.testclient import TestClient
+    return TestClient(api.app)
@@ -0,0 +1,38 @@
+from conftest import DIRETORIO_API
+
+
+def test_recarga_com_mesmo_nome_nao_reaproveita_cache(api):
+    acidente = api.AcidenteAereo(**api.EXEMPLO_ACIDENTE)
+    antiga = api.preparar_versao("local", DIRETORIO_API)
+    nova = api.preparar_versao("local", DIRETORIO_API)
+    assert api.chave_cache(acidente, antiga) != api.chave_cache(acidente, nova)
+
+    # Requisição iniciada antes da troca grava depois da invalidação
+    api.invalidar_cache_predicoes()
+    api.cache_predicoes.armazenar(api.chave_cache(acidente, antiga), 0.999)
+    assert api.cache_predicoes.obter(api.chave_cache(acidente, nova)) is None
+    assert api.prever_probabilidade(acidente, nova) != 0.999
+
+
+class MonitorRegistrador:
+    """Substitui o monitor de drift contando o que cada endpoint observou."""
+
+    def __init__(self):
+        self.observados = 0
+
+    def observar_registros(self, registros, probabilidades, codificador):
+        self.observados += len(registros)
+
+    def observar(self, colunas, probabilidades, codificador):
+        self.observados += len(probabilidades)
+
+
+def test_drift_observa_tambem_acertos_do_cache(api, cliente, monkeypatch):
+    monitor = MonitorRegistrador()
+    monkeypatch.setattr(api, "monitor_de_drift", monitor)
+    api.invalidar_cache_predicoes()
+
+    for _ in range(3):
+        assert cliente.post("/prever", json=api.EXEMPLO_ACIDENTE).status_code == 200
+    assert cliente.post("/prever_lote", json=[api.EXEMPLO_ACIDENTE] * 4).status_code == 200
+    assert monitor.observados == 7
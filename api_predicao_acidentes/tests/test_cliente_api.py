@@ -0,0 +1,72 @@
+import asyncio
+import json
+
+import httpx
+import numpy as np
+import pandas as pd
+import pytest
+
+from cliente_api import ClienteAPI, ClienteAPIAssincrono, ErroAPI, ErroConversao
+
+
+def responder(requisicao: httpx.Request) -> httpx.Response:
+    """API falsa: bloco com uf "XX" falha; senão devolve a latitude como probabilidade."""
+    registros = json.loads(requisicao.content)
+    if any(r["uf"] == "XX" for r in registros):
+        return httpx.Response(500, json={"detail": "falha no bloco"})
+    return httpx.Response(200, json={
+        "probabilidade_fatal": [r["latitude"] for r in registros],
+        "predicao_numerica": [1] * len(registros),
+        "codigo_risco": [3] * len(registros),
+    })
+
+
+@pytest.fixture
+def df(registros_reais):
+    quadro = pd.DataFrame([dict(registros_reais[i % len(registros_reais)], latitude=i / 100) for i in range(30)])
+    quadro.index = [f"linha{i}" for i in range(30)]
+    quadro.loc["linha12", "uf"] = "XX"
+    quadro["numero_assentos"] = quadro["numero_assentos"].astype(float)
+    quadro.loc["linha25", "numero_assentos"] = np.nan
+    return quadro
+
+
+def conferir_coletado(df, resultado):
+    assert list(resultado.index) == list(df.index)
+    # Bloco de 10 com a linha 12 falhou inteiro; a linha 25 não pôde ser convertida
+    falhas = resultado["erro"].notna()
+    assert list(resultado.index[falhas]) == [f"linha{i}" for i in range(10, 20)] + ["linha25"]
+    assert "HTTP 500" in resultado.loc["linha12", "erro"]
+    assert "numero_assentos=nan" in resultado.loc["linha25", "erro"]
+    assert resultado.loc[~falhas, "probabilidade_fatal"].tolist() == df.loc[~falhas, "latitude"].tolist()
+    assert resultado.loc[falhas, "predicao_numerica"].isna().all()
+
+
+def test_sincrono_coleta_erros_por_bloco_e_por_linha(df):
+    with ClienteAPI("http://api", tamanho_lote=10, concorrencia=2, transporte=httpx.MockTransport(responder)) as c:
+        conferir_coletado(df, c.prever_dataframe(df, erros="coletar"))
+        with pytest.raises(ErroConversao, match="índice linha25: numero_assentos=nan"):
+            c.prever_dataframe(df)
+        with pytest.raises(ErroAPI):
+            c.prever_dataframe(df.drop(index="linha25"))
+
+
+def test_assincrono_coleta_erros_por_bloco_e_por_linha(df):
+    async def executar():
+        async with ClienteAPIAssincrono("http://api", tamanho_lote=10, concorrencia=2,
+                                        transporte=httpx.MockTransport(responder)) as c:
+            return await c.prever_dataframe(df, erros="coletar")
+
+    conferir_coletado(df, asyncio.run(executar()))
+
+
+def test_repete_falhas_transitorias():
+    tentativas = []
+
+    def instavel(requisicao):
+        tentativas.append(requisicao)
+        return httpx.Response(503 if len(tentativas) < 3 else 200, json={"status": "ok"})
+
+    with ClienteAPI("http://api", espera_base=0.001, transporte=httpx.MockTransport(instavel)) as c:
+        assert c.saude() == {"status": "ok"}
+    assert len(tentativas) == 3
@@ -0,0 +1,109 @@
+"""
+Equivalência dos caminhos rápidos com a referência em pandas + scikit-learn.
+
+A API só liga cada caminho depois de uma checagem na inicialização; estes
+testes cobrem o mesmo contrato com registros reais de `docs/teste.csv`,
+categorias fora do treino e numéricos ausentes ou extremos.
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from artefatos import COLUNAS_CATEGORICAS
+from codificador import ExplicadorLinear, KernelLinearFundido, PontuadorEsparso
+
+TOLERANCIA = 1e-9
+
+
+def referencia_pandas(registros, artefatos) -> np.ndarray:
+    """O pré-processamento original da API: get_dummies + reindex + scaler.transform."""
+    dummies = pd.get_dummies(pd.DataFrame(registros), columns=COLUNAS_CATEGORICAS)
+    return artefatos.scaler.transform(dummies.reindex(columns=artefatos.colunas_treino, fill_value=0))
+
+
+def probabilidades_referencia(registros, artefatos) -> np.ndarray:
+    """
+    `predict_proba` nas linhas finitas. O scikit-learn recusa NaN; nessas
+    linhas os caminhos rápidos devem devolver NaN, e não um número qualquer.
+    """
+    X = referencia_pandas(registros, artefatos)
+    finitas = np.isfinite(X).all(axis=1)
+    probabilidades = np.full(len(registros), np.nan)
+    probabilidades[finitas] = artefatos.modelo.predict_proba(X[finitas])[:, 1]
+    return probabilidades
+
+
+@pytest.fixture(scope="module")
+def registros(registros_reais):
+    base = registros_reais[0]
+    inexistentes = [dict(r, **{campo: f"__{campo.upper()}_FORA_DO_TREINO__"}) for r, campo in
+                    zip(registros_reais, COLUNAS_CATEGORICAS)]
+    casos_limite = [
+        dict(base, latitude=float("nan")),
+        dict(base, peso_max_decolagem=float("nan"), longitude=float("nan")),
+        dict(base, peso_max_decolagem=1e12, numero_assentos=10 ** 6),
+        dict(base, latitude=-90.0, longitude=180.0, ano_ocorrencia=1900, mes_ocorrencia=1),
+        dict(base, peso_max_decolagem=-1e300, ano_ocorrencia=2100, mes_ocorrencia=12),
+        dict(base, uf="", regiao=" ", modelo_aeronave="emb-110"),
+        {**base, **{campo: "__NOVA__" for campo in COLUNAS_CATEGORICAS}},
+    ]
+    return registros_reais + inexistentes + casos_limite
+
+
+def test_codificador_compilado_igual_ao_pandas(artefatos, registros):
+    referencia = referencia_pandas(registros, artefatos)
+    codificador = artefatos.codificador
+
+    np.testing.assert_array_equal(codificador.codificar_lote(registros), referencia)
+    for registro, linha in zip(registros, referencia):
+        np.testing.assert_array_equal(codificador.codificar(registro)[0], linha)
+    colunas = {campo: [r[campo] for r in registros] for campo in registros[0]}
+    np.testing.assert_array_equal(codificador.codificar_colunas(colunas, len(registros)), referencia)
+    # A CSR guarda o desvio em relação a base_categorica (ver codificar_esparso)
+    np.testing.assert_allclose(codificador.codificar_esparso(registros).toarray() + codificador.base_categorica,
+                               referencia, rtol=0, atol=1e-12)
+
+
+def test_kernel_fundido_igual_a_predict_proba(artefatos, registros):
+    referencia = probabilidades_referencia(registros, artefatos)
+    kernel = KernelLinearFundido.a_partir_do_modelo(artefatos.codificador, artefatos.modelo)
+    colunas = {campo: [r[campo] for r in registros] for campo in registros[0]}
+
+    np.testing.assert_allclose(kernel.probabilidades_lote(registros), referencia, rtol=0, atol=TOLERANCIA)
+    np.testing.assert_allclose(kernel.probabilidades_colunas(colunas, len(registros)), referencia,
+                               rtol=0, atol=TOLERANCIA)
+    np.testing.assert_allclose([kernel.probabilidade(r) for r in registros], referencia, rtol=0, atol=TOLERANCIA)
+
+
+def test_pontuador_esparso_igual_a_predict_proba(artefatos, registros):
+    referencia = probabilidades_referencia(registros, artefatos)
+    pontuador = PontuadorEsparso.a_partir_do_modelo(artefatos.codificador, artefatos.modelo)
+    colunas = {campo: [r[campo] for r in registros] for campo in registros[0]}
+
+    np.testing.assert_allclose(pontuador.probabilidades_lote(registros), referencia, rtol=0, atol=TOLERANCIA)
+    np.testing.assert_allclose(pontuador.probabilidades_colunas(colunas, len(registros)), referencia,
+                               rtol=0, atol=TOLERANCIA)
+    np.testing.assert_allclose([pontuador.probabilidade(r) for r in registros], referencia,
+                               rtol=0, atol=TOLERANCIA)
+
+
+def test_explicacoes_somam_o_logit(artefatos, registros):
+    X = referencia_pandas(registros, artefatos)
+    logits = np.full(len(registros), np.nan)
+    finitas = np.isfinite(X).all(axis=1)
+    logits[finitas] = artefatos.modelo.decision_function(X[finitas])
+    explicador = ExplicadorLinear.a_partir_do_modelo(artefatos.codificador, artefatos.modelo)
+
+    np.testing.assert_allclose(explicador.logits(registros), logits, rtol=1e-12, atol=TOLERANCIA)
+
+    finitos = [r for r, z in zip(registros, logits) if np.isfinite(z)]
+    contribuicoes, _ = explicador.contribuicoes(finitos)
+    todas = explicador.explicar_lote(finitos, len(explicador.campos))
+    for explicacao, linha in zip(todas, contribuicoes):
+        magnitudes = [abs(item["contribuicao"]) for item in explicacao]
+        assert magnitudes == sorted(magnitudes, reverse=True)
+        assert sorted(item["contribuicao"] for item in explicacao) == sorted(np.round(linha, 4).tolist())
+    # Categoria fora do treino aparece como campo_valor e não contribui
+    fora = [item for item in explicador.explicar({**finitos[0], "uf": "__NOVA__"}, len(explicador.campos))
+            if item["feature"] == "uf___NOVA__"]
+    assert fora and fora[0]["contribuicao"] == 0.0
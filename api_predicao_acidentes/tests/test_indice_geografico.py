@@ -0,0 +1,34 @@
+import os
+
+import numpy as np
+import pytest
+
+from conftest import DIRETORIO_DOCS
+from indice_geografico import FORA_DA_GRADE, carregar_indice, exportar
+
+
+@pytest.fixture(scope="module")
+def indice(tmp_path_factory):
+    caminho = exportar(os.path.join(DIRETORIO_DOCS, "treino.csv"), str(tmp_path_factory.mktemp("indice")))
+    return carregar_indice(caminho)
+
+
+def test_consulta_escalar_e_lote_concordam_nas_bordas(indice):
+    # Coordenadas arredondadas a 0,1° caem exatamente nas bordas das células
+    aleatorio = np.random.default_rng(0)
+    latitudes = np.round(aleatorio.uniform(-34, 6, 20000), 1)
+    longitudes = np.round(aleatorio.uniform(-74, -34, 20000), 1)
+    ufs = aleatorio.choice(indice.ufs, 20000).tolist()
+
+    lote = indice.consultar_lote(latitudes, longitudes, ufs)
+    escalar = [indice.consultar(lat, lon, uf) for lat, lon, uf in zip(latitudes, longitudes, ufs)]
+    divergentes = [k for k in range(len(lote)) if lote[k] != escalar[k]]
+    assert not divergentes, [(latitudes[k], longitudes[k], escalar[k], lote[k]) for k in divergentes[:3]]
+
+
+def test_consulta_fora_da_grade_e_coordenada_invalida(indice):
+    pontos = [(float("nan"), -46.0), (-23.0, float("inf")), (80.0, 10.0)]
+    lote = indice.consultar_lote([p[0] for p in pontos], [p[1] for p in pontos], ["SP"] * 3)
+    for (latitude, longitude), contexto in zip(pontos, lote):
+        assert contexto == indice.consultar(latitude, longitude, "SP")
+        assert contexto["uf_coordenadas"] == FORA_DA_GRADE
@@ -0,0 +1,25 @@
+"""A limpeza vetorizada (`/prever_bruto`, `pontuar_offline`) aceita as mesmas datas que a de `/prever_stream`."""
+import pandas as pd
+
+from ingestao import limpar_dataframe_bruto, normalizar_registro_bruto
+
+DATAS = ["05/01/2020", "2021-11-30", " 2019-07-04 ", "2018-02-03 14:25:00", "31/12/2017", "", None, "03-2020"]
+
+
+def test_datas_iguais_na_limpeza_vetorizada_e_por_registro():
+    registros = [{"dt_ocorrencia": data} for data in DATAS]
+    df = limpar_dataframe_bruto(pd.DataFrame(registros), {}, [])
+
+    for registro, (_, linha) in zip(registros, df.iterrows()):
+        esperado = normalizar_registro_bruto(registro)
+        for campo in ("ano_ocorrencia", "mes_ocorrencia"):
+            valor = linha[campo]
+            assert (None if pd.isna(valor) else int(valor)) == esperado.get(campo), (registro, campo)
+
+
+def test_data_iso_nao_e_imputada():
+    nulos = {}
+    df = limpar_dataframe_bruto(pd.DataFrame({"dt_ocorrencia": ["2021-11-30"]}),
+                                {"ano_ocorrencia": 2000, "mes_ocorrencia": 1}, [], nulos)
+    assert df.loc[0, "ano_ocorrencia"] == 2021 and df.loc[0, "mes_ocorrencia"] == 11
+    assert nulos == {}
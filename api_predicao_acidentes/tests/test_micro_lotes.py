@@ -0,0 +1,37 @@
+"""Isolamento de falhas no agrupador de micro-lotes."""
+import asyncio
+
+import pytest
+
+from micro_lotes import AgrupadorMicroLotes
+
+
+def dobrar(itens):
+    if any(item < 0 for item in itens):
+        raise ValueError("item negativo")
+    return [item * 2 for item in itens]
+
+
+def test_falha_no_lote_so_atinge_o_item_problematico():
+    agrupador = AgrupadorMicroLotes(dobrar, janela_segundos=0.01, tamanho_maximo=8)
+
+    async def cenario():
+        return await asyncio.gather(*(agrupador.pontuar(item) for item in [1, 2, -1, 4]),
+                                    return_exceptions=True)
+
+    resultados = asyncio.run(cenario())
+    assert resultados[:2] == [2, 4] and resultados[3] == 8
+    assert isinstance(resultados[2], ValueError)
+
+    estatisticas = agrupador.estatisticas()
+    assert estatisticas["erros"] == 1
+    assert estatisticas["itens_isolados"] == 4
+    assert estatisticas["itens_com_erro"] == 1
+
+
+def test_item_sozinho_que_falha_recebe_a_excecao():
+    agrupador = AgrupadorMicroLotes(dobrar, janela_segundos=0.001)
+
+    with pytest.raises(ValueError):
+        asyncio.run(agrupador.pontuar(-3))
+    assert agrupador.estatisticas()["itens_isolados"] == 0
@@ -0,0 +1,21 @@
+"""Os três caminhos de classificação de risco concordam, inclusive fora de [0, 1]."""
+import numpy as np
+
+from artefatos import CODIGOS_RISCO, LIMITES_RISCO, codigos_risco_lote, interpretar_risco_lote
+
+
+def test_escalar_lote_e_codigos_concordam(api):
+    probabilidades = np.concatenate([
+        np.linspace(0.0, 1.0, 1001),
+        LIMITES_RISCO,
+        np.nextafter(LIMITES_RISCO, 0.0),
+        [np.nan, np.inf, -np.inf, -0.5, 1.5]
+    ])
+
+    escalar = [api.interpretar_risco(float(p)) for p in probabilidades]
+    assert interpretar_risco_lote(probabilidades).tolist() == escalar
+    assert codigos_risco_lote(probabilidades).tolist() == [CODIGOS_RISCO[nivel] for nivel in escalar]
+
+
+def test_nan_fica_em_baixo():
+    assert codigos_risco_lote(np.array([np.nan])).tolist() == [CODIGOS_RISCO["BAIXO"]]
@@ -0,0 +1,52 @@
+import os
+import shutil
+
+import numpy as np
+import pytest
+
+from artefatos import (COLUNAS_PATH, MODELO_PATH, SCALER_PATH, THRESHOLD_PATH, carregar_artefatos,
+                       impressao_pickles)
+from conftest import DIRETORIO_API
+from pacote_modelo import PACOTE_PATH, exportar_de_pickles, ler_cabecalho_pacote
+
+
+@pytest.fixture
+def diretorio_pickles(tmp_path):
+    for nome in (MODELO_PATH, SCALER_PATH, COLUNAS_PATH, THRESHOLD_PATH):
+        shutil.copy2(os.path.join(DIRETORIO_API, nome), tmp_path / nome)
+    return str(tmp_path)
+
+
+def test_pacote_reproduz_logits_em_registros_reais(diretorio_pickles, registros_reais):
+    conferencia = exportar_de_pickles(diretorio_pickles)
+    assert conferencia["logit"] < 1e-9
+    assert conferencia["probabilidade_maxima"] > 0.5
+
+    pickle = carregar_artefatos(diretorio_pickles, formato="pickle")
+    pacote = carregar_artefatos(diretorio_pickles, formato="pacote")
+    np.testing.assert_allclose(
+        pacote.modelo.decision_function(pacote.codificador.codificar_lote(registros_reais)),
+        pickle.modelo.decision_function(pickle.codificador.codificar_lote(registros_reais)),
+        rtol=0, atol=1e-9
+    )
+
+
+def test_auto_ignora_pacote_desatualizado(diretorio_pickles):
+    exportar_de_pickles(diretorio_pickles)
+    assert ler_cabecalho_pacote(os.path.join(diretorio_pickles, PACOTE_PATH))["impressao_pickles"] == \
+        impressao_pickles(diretorio_pickles)
+    assert carregar_artefatos(diretorio_pickles).formato == "pacote"
+
+    # Notebook reexportou os pickles (aqui, só o threshold) sem regenerar o pacote
+    with open(os.path.join(diretorio_pickles, THRESHOLD_PATH), "w") as f:
+        f.write("THRESHOLD_OTIMIZADO = 0.5\n")
+    artefatos = carregar_artefatos(diretorio_pickles)
+    assert artefatos.formato == "pickle"
+    assert artefatos.threshold == 0.5
+
+
+def test_auto_usa_pacote_sem_pickles_ao_lado(diretorio_pickles, tmp_path_factory):
+    exportar_de_pickles(diretorio_pickles)
+    somente_pacote = tmp_path_factory.mktemp("pacote")
+    shutil.copy2(os.path.join(diretorio_pickles, PACOTE_PATH), somente_pacote / PACOTE_PATH)
+    assert carregar_artefatos(str(somente_pacote)).formato == "pacote"
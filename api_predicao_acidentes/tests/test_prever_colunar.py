@@ -0,0 +1,80 @@
+"""`POST /prever_colunar`: negociação de formato, erros por coluna e resposta enxuta."""
+import json
+
+import numpy as np
+import pytest
+
+
+def colunas_de(registros):
+    return {campo: [registro[campo] for registro in registros] for campo in registros[0]}
+
+
+@pytest.fixture
+def colunas(registros_reais):
+    return colunas_de(registros_reais[:50])
+
+
+def postar(cliente, colunas, tipo="application/json", accept=None, **parametros):
+    if tipo == "application/msgpack":
+        corpo = pytest.importorskip("msgpack").packb(colunas)
+    else:
+        corpo = json.dumps(colunas)
+    cabecalhos = {"Content-Type": tipo, **({"Accept": accept} if accept else {})}
+    return cliente.post("/prever_colunar", content=corpo, headers=cabecalhos, params=parametros)
+
+
+def test_content_type_nao_suportado_e_415(cliente, colunas):
+    assert postar(cliente, colunas, tipo="text/csv").status_code == 415
+
+
+def test_accept_sem_formato_disponivel_e_406(cliente, colunas):
+    assert postar(cliente, colunas, accept="text/html, application/xml").status_code == 406
+
+
+def test_saida_segue_o_accept(cliente, colunas):
+    msgpack = pytest.importorskip("msgpack")
+    resposta = postar(cliente, colunas, tipo="application/msgpack", accept="application/json")
+    assert resposta.status_code == 200
+    assert resposta.headers["content-type"] == "application/json"
+    assert len(resposta.json()["colunas"]["probabilidade_fatal"]) == 50
+
+    resposta = postar(cliente, colunas, tipo="application/msgpack")
+    assert resposta.headers["content-type"] == "application/msgpack"
+    assert msgpack.unpackb(resposta.content)["total_acidentes"] == 50
+
+
+@pytest.mark.parametrize("campo, valores, tipo", [
+    ("latitude", [[-23.4, -46.4]], "float_type"),
+    ("latitude", [[-23.4], [-23.5]], "float_type"),
+    ("longitude", ["abc", 1.0], "float_parsing"),
+    ("ano_ocorrencia", [2020.5, 2021], "int_from_float"),
+    ("mes_ocorrencia", [None, 3], "nulo"),
+    ("uf", ["SP", 7], "string_type"),
+])
+def test_erro_de_coluna_e_422_com_o_campo(cliente, colunas, campo, valores, tipo):
+    colunas = {nome: coluna[:len(valores)] for nome, coluna in colunas.items()}
+    colunas[campo] = valores
+    resposta = postar(cliente, colunas)
+    assert resposta.status_code == 422
+    erros = resposta.json()["detail"]
+    assert [erro["loc"][1] for erro in erros] == [campo]
+    assert erros[0]["type"] == tipo
+
+
+def test_campo_ausente_e_422(cliente, colunas):
+    del colunas["uf"]
+    resposta = postar(cliente, colunas)
+    assert resposta.status_code == 422
+    assert resposta.json()["detail"][0]["loc"] == ["body", "uf"]
+
+
+def test_resposta_enxuta_confere_com_prever_lote(cliente, colunas, registros_reais):
+    resposta = postar(cliente, colunas, resposta="enxuta")
+    assert resposta.status_code == 200
+    saida = resposta.json()["colunas"]
+    assert set(saida) == {"probabilidade_fatal", "predicao_numerica", "codigo_risco"}
+
+    lote = cliente.post("/prever_lote", json=registros_reais[:50], params={"resposta": "enxuta"}).json()
+    np.testing.assert_allclose(saida["probabilidade_fatal"], lote["probabilidade_fatal"], atol=5e-5)
+    assert saida["predicao_numerica"] == lote["predicao_numerica"]
+    assert saida["codigo_risco"] == lote["codigo_risco"]
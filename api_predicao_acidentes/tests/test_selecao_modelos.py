@@ -0,0 +1,12 @@
+import selecao_modelos
+from selecao_modelos import CANDIDATOS, chave_predicao
+
+
+def test_chave_muda_com_parametros_fixos(monkeypatch):
+    antes = chave_predicao("dobra_0.npz", "regressao_logistica", {"C": 0.1})
+    assert antes == chave_predicao("dobra_0.npz", "regressao_logistica", {"C": 0.1})
+
+    classe, fixos, grade = CANDIDATOS["regressao_logistica"]
+    monkeypatch.setitem(selecao_modelos.CANDIDATOS, "regressao_logistica",
+                        (classe, {**fixos, "max_iter": fixos["max_iter"] + 1}, grade))
+    assert chave_predicao("dobra_0.npz", "regressao_logistica", {"C": 0.1}) != antes
@@ -0,0 +1,17 @@
+"""Limpeza dos snapshots de execuções anteriores em METRICAS_DIRETORIO."""
+import os
+
+from servidor import limpar_snapshots
+
+
+def test_limpar_snapshots_remove_so_os_snapshots(tmp_path):
+    for nome in ["metricas-101.json", "drift-101.json", "sombra-102.json", ".metricas.abc123"]:
+        (tmp_path / nome).write_text("{}")
+    (tmp_path / "notas.json").write_text("{}")
+
+    assert limpar_snapshots(str(tmp_path)) == 4
+    assert os.listdir(tmp_path) == ["notas.json"]
+
+
+def test_limpar_snapshots_sem_diretorio(tmp_path):
+    assert limpar_snapshots(str(tmp_path / "inexistente")) == 0
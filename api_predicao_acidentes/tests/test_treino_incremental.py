@@ -0,0 +1,35 @@
+import numpy as np
+import pytest
+
+from artefatos import carregar_artefatos
+from conftest import DIRETORIO_API
+from pacote_modelo import ScalerPacote
+from treino_incremental import EscalonadorIncremental, TreinadorIncremental
+
+
+def test_pacote_continua_o_scaler_com_amostras_e_variancia_reais(artefatos, tmp_path):
+    pacote = carregar_artefatos(DIRETORIO_API, formato="pacote")
+    do_pacote = EscalonadorIncremental.a_partir_do_scaler(pacote.scaler)
+    do_pickle = EscalonadorIncremental.a_partir_do_scaler(artefatos.scaler)
+
+    assert do_pacote.n_amostras == artefatos.scaler.n_samples_seen_
+    np.testing.assert_array_equal(do_pacote.m2, do_pickle.m2)
+    treinador = TreinadorIncremental.a_partir_de_artefatos(str(tmp_path), pacote, "local")
+    assert treinador.metadados["amostras_base"] == artefatos.scaler.n_samples_seen_
+    assert not treinador.metadados["amostras_base_assumidas"]
+
+
+def test_scaler_sem_amostras_exige_valor_explicito():
+    scaler = ScalerPacote(np.zeros(3), np.ones(3))
+    with pytest.raises(ValueError):
+        EscalonadorIncremental.a_partir_do_scaler(scaler)
+    assert EscalonadorIncremental.a_partir_do_scaler(scaler, 1000).n_amostras == 1000
+
+
+def test_coluna_constante_mantem_variancia_zero():
+    # scikit-learn guarda escala 1 para colunas constantes; a variância real é 0
+    scaler = ScalerPacote(np.array([5.0, 0.0]), np.array([2.0, 1.0]), np.array([4.0, 0.0]), 100)
+    escalonador = EscalonadorIncremental.a_partir_do_scaler(scaler)
+    np.testing.assert_array_equal(escalonador.m2, [400.0, 0.0])
+    escalonador.partial_fit(np.array([[5.0, 1.0]]))
+    assert escalonador.scale_[1] == pytest.approx(np.sqrt(100 / 101 ** 2))
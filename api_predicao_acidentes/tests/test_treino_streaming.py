@@ -0,0 +1,25 @@
+import os
+
+import numpy as np
+import pytest
+
+from artefatos import carregar_artefatos
+from conftest import DIRETORIO_DOCS
+from treino_streaming import exportar_artefatos, treinar
+
+
+@pytest.fixture(scope="module")
+def exportado(tmp_path_factory):
+    resultado = treinar(os.path.join(DIRETORIO_DOCS, "treino.csv"))
+    diretorio = str(tmp_path_factory.mktemp("treino"))
+    exportar_artefatos(diretorio, resultado)
+    return resultado, diretorio
+
+
+def test_pickle_e_pacote_exportados_tem_o_mesmo_threshold(exportado):
+    resultado, diretorio = exportado
+    pickle = carregar_artefatos(diretorio, formato="pickle")
+    pacote = carregar_artefatos(diretorio, formato="pacote")
+    assert pickle.threshold == pacote.threshold
+    assert pickle.threshold <= resultado["threshold"] < pickle.threshold + 1e-6
+
@@ -0,0 +1,436 @@
+"""
+Retreino incremental a partir do desfecho real dos acidentes pontuados.
+
+A API grava em FEEDBACK_ARQUIVO (NDJSON) cada acidente com o rótulo
+`les_fatais_trip`. O treinador consome só as linhas novas desde o último
+checkpoint e atualiza, sem reprocessar o histórico nem rodar o notebook:
+
+- vocabulário de colunas: categorias inéditas (ex.: um `modelo_aeronave`
+  novo) viram colunas novas, com peso zero e estatística de "sempre 0";
+- média/variância do scaler, acumuladas (fórmula de Chan);
+- pesos de uma regressão logística por SGD (`partial_fit`), partindo dos
+  coeficientes da versão em produção.
+
+Uma parte fixa do feedback (por hash do registro) nunca é treinada e serve
+de reserva para comparar candidato e versão ativa. O candidato é exportado
+como `modelo_pacote.bin` e publicado no registro sem ativar; a promoção é o
+`POST /admin/recarregar?versao=...` de sempre.
+
+Exemplo:
+    python treino_incremental.py treinar --feedback feedback.ndjson --registro registro_modelos
+    python treino_incremental.py status
+"""
+import argparse
+import json
+import os
+import shutil
+import tempfile
+import threading
+import zlib
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from artefatos import (
+    CAMPO_ROTULO, CAMPOS_NUMERICOS, COLUNAS_CATEGORICAS, IMPUTER_MEDIANA_PATH, IMPUTER_MODA_PATH, ArtefatosModelo,
+    carregar_artefatos
+)
+from codificador import CodificadorCompilado
+from pacote_modelo import PACOTE_PATH, ModeloLinearPacote, ScalerPacote, exportar_pacote
+from registro_modelos import ARQUIVO_ATIVA, RegistroModelos
+
+ESTADO_PATH = "estado.npz"
+RESERVA_PATH = "reserva.ndjson"
+# 1 em cada FRACAO_RESERVA registros (por hash) fica fora do treino
+FRACAO_RESERVA = 5
+
+
+# ==================== FEEDBACK ====================
+class ArquivoFeedback:
+    """NDJSON de registros rotulados; cada chamada de `anexar` é uma única escrita em modo append."""
+
+    def __init__(self, caminho: str):
+        self.caminho = caminho
+        self._lock = threading.Lock()
+
+    def anexar(self, registros: List[Dict]) -> None:
+        linhas = "".join(json.dumps(registro, ensure_ascii=False) + "\n" for registro in registros)
+        with self._lock, open(self.caminho, "a", encoding="utf-8") as f:
+            f.write(linhas)
+
+    def ler_a_partir_de(self, posicao: int) -> Tuple[List[Dict], int]:
+        """Registros completos após o byte `posicao` e a nova posição (linha pela metade fica para depois)."""
+        if not os.path.isfile(self.caminho):
+            return [], posicao
+        with open(self.caminho, "rb") as f:
+            f.seek(posicao)
+            dados = f.read()
+        fim = dados.rfind(b"\n") + 1
+        registros = [json.loads(linha) for linha in dados[:fim].decode("utf-8").splitlines() if linha.strip()]
+        return registros, posicao + fim
+
+
+def na_reserva(registro: Dict) -> bool:
+    """Separação estável treino/reserva: o mesmo registro cai sempre do mesmo lado."""
+    chave = json.dumps({campo: registro[campo] for campo in CAMPOS_NUMERICOS + COLUNAS_CATEGORICAS},
+                       sort_keys=True, ensure_ascii=False)
+    return zlib.crc32(chave.encode("utf-8")) % FRACAO_RESERVA == 0
+
+
+# ==================== MODELO INCREMENTAL ====================
+class EscalonadorIncremental:
+    """`StandardScaler` com `partial_fit` por lotes e colunas que podem crescer."""
+
+    def __init__(self, n_amostras: int, media: np.ndarray, m2: np.ndarray):
+        self.n_amostras = int(n_amostras)
+        self.media = np.asarray(media, dtype=np.float64).copy()
+        self.m2 = np.asarray(m2, dtype=np.float64).copy()
+
+    @classmethod
+    def a_partir_do_scaler(cls, scaler, amostras_padrao: Optional[int] = None) -> "EscalonadorIncremental":
+        """
+        Parte das estatísticas do scaler treinado (`n_samples_seen_` e `var_`,
+        do pickle ou de um pacote que as guarda).
+
+        Sem o nº de amostras o peso do histórico seria inventado, então ele só
+        é assumido se `amostras_padrao` for informado; senão levanta ValueError.
+        """
+        n = getattr(scaler, "n_samples_seen_", None)
+        if n is None:
+            if amostras_padrao is None:
+                raise ValueError("O scaler da versão ativa não tem o nº de amostras do treino: regenere o "
+                                 "pacote (python pacote_modelo.py exportar) ou informe --amostras-base")
+            n = amostras_padrao
+        n = int(np.max(n))
+        variancia = getattr(scaler, "var_", None)
+        if variancia is None:
+            variancia = np.asarray(scaler.scale_) ** 2
+        return cls(n, scaler.mean_, np.asarray(variancia) * n)
+
+    @property
+    def mean_(self) -> np.ndarray:
+        return self.media
+
+    @property
+    def scale_(self) -> np.ndarray:
+        escala = np.sqrt(self.m2 / max(self.n_amostras, 1))
+        # Mesmo tratamento do scikit-learn para colunas constantes
+        escala[escala < 10 * np.finfo(np.float64).eps] = 1.0
+        return escala
+
+    def adicionar_colunas(self, quantidade: int) -> None:
+        """Colunas novas valiam 0 em todo o histórico: média 0 e variância 0."""
+        self.media = np.concatenate([self.media, np.zeros(quantidade)])
+        self.m2 = np.concatenate([self.m2, np.zeros(quantidade)])
+
+    def partial_fit(self, X: np.ndarray) -> "EscalonadorIncremental":
+        m = X.shape[0]
+        if m == 0:
+            return self
+        media_lote = X.mean(axis=0)
+        m2_lote = ((X - media_lote) ** 2).sum(axis=0)
+        total = self.n_amostras + m
+        delta = media_lote - self.media
+        self.media = self.media + delta * m / total
+        self.m2 = self.m2 + m2_lote + delta ** 2 * self.n_amostras * m / total
+        self.n_amostras = total
+        return self
+
+    def transform(self, X: np.ndarray) -> np.ndarray:
+        return (X - self.media) / self.scale_
+
+
+class RegressaoLogisticaSGD:
+    """Regressão logística binária com `partial_fit` (SGD em mini-lotes, penalidade L2)."""
+
+    def __init__(self, coeficientes: np.ndarray, intercepto: float, taxa_aprendizado: float = 0.01,
+                 alpha: float = 1e-4, epocas: int = 5, tamanho_lote: int = 32, semente: int = 42):
+        self.coef_ = np.asarray(coeficientes, dtype=np.float64).reshape(1, -1).copy()
+        self.intercept_ = np.array([float(intercepto)])
+        self.taxa_aprendizado = taxa_aprendizado
+        self.alpha = alpha
+        self.epocas = epocas
+        self.tamanho_lote = tamanho_lote
+        self._aleatorio = np.random.default_rng(semente)
+
+    def adicionar_colunas(self, quantidade: int) -> None:
+        self.coef_ = np.hstack([self.coef_, np.zeros((1, quantidade))])
+
+    def reescalar(self, media_antiga: np.ndarray, escala_antiga: np.ndarray,
+                  media_nova: np.ndarray, escala_nova: np.ndarray) -> None:
+        """
+        Reajusta os pesos para uma nova normalização sem mudar nenhuma predição.
+
+        Como em `KernelLinearFundido`: pesos no espaço original w/σ e intercepto
+        b - Σ w μ/σ são invariantes; voltam ao espaço normalizado com (μ', σ').
+        """
+        pesos_originais = self.coef_[0] / escala_antiga
+        intercepto_original = self.intercept_[0] - float(pesos_originais @ media_antiga)
+        self.coef_ = (pesos_originais * escala_nova).reshape(1, -1)
+        self.intercept_ = np.array([intercepto_original + float(pesos_originais @ media_nova)])
+
+    def partial_fit(self, X: np.ndarray, y: np.ndarray, peso_positivo: float = 1.0) -> "RegressaoLogisticaSGD":
+        y = np.asarray(y, dtype=np.float64)
+        pesos_amostra = np.where(y == 1, peso_positivo, 1.0)
+        w, b = self.coef_[0].copy(), self.intercept_[0]
+        for _ in range(self.epocas):
+            ordem = self._aleatorio.permutation(len(y))
+            for inicio in range(0, len(y), self.tamanho_lote):
+                indices = ordem[inicio:inicio + self.tamanho_lote]
+                z = np.clip(X[indices] @ w + b, -500, 500)
+                erro = (1.0 / (1.0 + np.exp(-z)) - y[indices]) * pesos_amostra[indices]
+                w -= self.taxa_aprendizado * (X[indices].T @ erro / len(indices) + self.alpha * w)
+                b -= self.taxa_aprendizado * erro.mean()
+        self.coef_ = w.reshape(1, -1)
+        self.intercept_ = np.array([b])
+        return self
+
+
+# ==================== TREINADOR ====================
+class TreinadorIncremental:
+    """Vocabulário, scaler e modelo incrementais, com checkpoint em `diretorio`."""
+
+    def __init__(self, diretorio: str, colunas: List[str], escalonador: EscalonadorIncremental,
+                 modelo: RegressaoLogisticaSGD, threshold: float, metadados: Dict):
+        self.diretorio = diretorio
+        self.colunas = list(colunas)
+        self.escalonador = escalonador
+        self.modelo = modelo
+        self.threshold = threshold
+        self.metadados = metadados
+
+    @classmethod
+    def a_partir_de_artefatos(cls, diretorio: str, artefatos: ArtefatosModelo, versao_base: str,
+                              amostras_padrao: Optional[int] = None, **parametros_sgd) -> "TreinadorIncremental":
+        modelo = RegressaoLogisticaSGD(artefatos.modelo.coef_[0], artefatos.modelo.intercept_[0], **parametros_sgd)
+        escalonador = EscalonadorIncremental.a_partir_do_scaler(artefatos.scaler, amostras_padrao)
+        return cls(diretorio, artefatos.colunas_treino, escalonador, modelo, artefatos.threshold,
+                   {"versao_base": versao_base, "posicao_feedback": 0, "treinados": 0, "reservados": 0,
+                    "colunas_adicionadas": 0, "candidatos": [],
+                    "amostras_base": escalonador.n_amostras,
+                    "amostras_base_assumidas": getattr(artefatos.scaler, "n_samples_seen_", None) is None,
+                    "variancia_base_assumida": getattr(artefatos.scaler, "var_", None) is None})
+
+    @classmethod
+    def carregar(cls, diretorio: str, **parametros_sgd) -> Optional["TreinadorIncremental"]:
+        caminho = os.path.join(diretorio, ESTADO_PATH)
+        if not os.path.isfile(caminho):
+            return None
+        with np.load(caminho, allow_pickle=False) as estado:
+            metadados = json.loads(str(estado["metadados"]))
+            escalonador = EscalonadorIncremental(int(estado["n_amostras"]), estado["media"], estado["m2"])
+            modelo = RegressaoLogisticaSGD(estado["coeficientes"], float(estado["intercepto"]), **parametros_sgd)
+            return cls(diretorio, estado["colunas"].tolist(), escalonador, modelo,
+                       float(estado["threshold"]), metadados)
+
+    def salvar(self) -> None:
+        """Checkpoint atômico: o estado nunca fica pela metade se o processo cair."""
+        os.makedirs(self.diretorio, exist_ok=True)
+        descritor, temporario = tempfile.mkstemp(dir=self.diretorio, prefix=".estado.", suffix=".npz")
+        try:
+            with os.fdopen(descritor, "wb") as f:
+                np.savez(f, colunas=np.array(self.colunas), n_amostras=self.escalonador.n_amostras,
+                         media=self.escalonador.media, m2=self.escalonador.m2,
+                         coeficientes=self.modelo.coef_[0], intercepto=self.modelo.intercept_[0],
+                         threshold=self.threshold, metadados=json.dumps(self.metadados, ensure_ascii=False))
+            os.replace(temporario, os.path.join(self.diretorio, ESTADO_PATH))
+        except Exception:
+            os.unlink(temporario)
+            raise
+
+    def estender_vocabulario(self, registros: List[Dict]) -> List[str]:
+        """Acrescenta ao fim das colunas as dummies de categorias ainda não vistas."""
+        conhecidas = set(self.colunas)
+        novas = []
+        for registro in registros:
+            for campo in COLUNAS_CATEGORICAS:
+                coluna = f"{campo}_{registro[campo]}"
+                if coluna not in conhecidas:
+                    conhecidas.add(coluna)
+                    novas.append(coluna)
+        if novas:
+            self.colunas.extend(novas)
+            self.escalonador.adicionar_colunas(len(novas))
+            self.modelo.adicionar_colunas(len(novas))
+            self.metadados["colunas_adicionadas"] += len(novas)
+        return novas
+
+    def atualizar(self, registros: List[Dict], rotulos: np.ndarray, peso_positivo: float = 1.0) -> List[str]:
+        """Um passo incremental: vocabulário, estatísticas do scaler e pesos."""
+        novas = self.estender_vocabulario(registros)
+        # Codificador sem normalização: dummies 0/1 e numéricos brutos
+        codificador = CodificadorCompilado(self.colunas, None, None, CAMPOS_NUMERICOS, COLUNAS_CATEGORICAS)
+        X = codificador.codificar_lote(registros)
+        media_antiga, escala_antiga = self.escalonador.mean_.copy(), self.escalonador.scale_
+        self.escalonador.partial_fit(X)
+        self.modelo.reescalar(media_antiga, escala_antiga, self.escalonador.mean_, self.escalonador.scale_)
+        self.modelo.partial_fit(self.escalonador.transform(X), rotulos, peso_positivo)
+        self.metadados["treinados"] += len(registros)
+        return novas
+
+    def artefatos(self) -> ArtefatosModelo:
+        """O candidato atual com a mesma interface dos artefatos carregados pela API."""
+        escalonador = self.escalonador
+        return ArtefatosModelo(ModeloLinearPacote(self.modelo.coef_.copy(), self.modelo.intercept_.copy()),
+                               ScalerPacote(escalonador.mean_.copy(), escalonador.scale_,
+                                            escalonador.m2 / max(escalonador.n_amostras, 1), escalonador.n_amostras),
+                               self.colunas, self.threshold, formato="pacote")
+
+
+# ==================== AVALIAÇÃO ====================
+def avaliar(probabilidades: np.ndarray, rotulos: np.ndarray, threshold: float) -> Dict:
+    """Métricas de classificação no threshold da versão, mais log loss."""
+    if len(rotulos) == 0:
+        return {"amostras": 0}
+    predicoes = probabilidades >= threshold
+    verdadeiros = int((predicoes & (rotulos == 1)).sum())
+    precisao = verdadeiros / int(predicoes.sum()) if predicoes.any() else 0.0
+    recall = verdadeiros / int((rotulos == 1).sum()) if (rotulos == 1).any() else 0.0
+    p = np.clip(probabilidades, 1e-15, 1 - 1e-15)
+    return {
+        "amostras": int(len(rotulos)),
+        "positivos": int((rotulos == 1).sum()),
+        "acuracia": round(float((predicoes == (rotulos == 1)).mean()), 4),
+        "precisao": round(precisao, 4),
+        "recall": round(recall, 4),
+        "f1_score": round(2 * precisao * recall / (precisao + recall), 4) if precisao + recall > 0 else 0.0,
+        "log_loss": round(float(-np.mean(rotulos * np.log(p) + (1 - rotulos) * np.log(1 - p))), 4)
+    }
+
+
+def separar_rotulos(registros: List[Dict]) -> Tuple[List[Dict], np.ndarray]:
+    return registros, np.array([int(r[CAMPO_ROTULO]) for r in registros], dtype=np.int64)
+
+
+# ==================== CANDIDATO ====================
+def garantir_ponteiro_ativo(registro: RegistroModelos, versao_ativa: str, diretorio_ativo: str) -> None:
+    """
+    Sem `ATIVA` o registro adota a versão mais recente no próximo início, que
+    seria o candidato. Fixa a versão em uso (publicando-a, se preciso) antes.
+    """
+    if os.path.isfile(os.path.join(registro.diretorio, ARQUIVO_ATIVA)):
+        return
+    if versao_ativa not in registro.listar_versoes():
+        registro.publicar(diretorio_ativo, versao_ativa)
+    registro.ativar(versao_ativa)
+
+
+def gerar_candidato(feedback: ArquivoFeedback, diretorio_estado: str, artefatos_ativos: ArtefatosModelo,
+                    versao_ativa: str, registro: Optional[RegistroModelos] = None,
+                    diretorio_ativo: str = ".", peso_positivo: float = 1.0, amostras_base: Optional[int] = None,
+                    **parametros_sgd) -> Dict:
+    """
+    Treina com o feedback novo, compara candidato e versão ativa na reserva e
+    publica o candidato (sem ativar) em `registro`.
+
+    Levanta ValueError se não houver feedback novo para treinar.
+    """
+    treinador = TreinadorIncremental.carregar(diretorio_estado, **parametros_sgd)
+    if treinador is None:
+        treinador = TreinadorIncremental.a_partir_de_artefatos(
+            diretorio_estado, artefatos_ativos, versao_ativa, amostras_base, **parametros_sgd
+        )
+
+    registros, posicao = feedback.ler_a_partir_de(treinador.metadados["posicao_feedback"])
+    treino = [r for r in registros if not na_reserva(r)]
+    reserva = [r for r in registros if na_reserva(r)]
+    if not treino:
+        raise ValueError("Nenhum feedback novo para treinar")
+
+    novas = treinador.atualizar(*separar_rotulos(treino), peso_positivo=peso_positivo)
+    treinador.metadados["posicao_feedback"] = posicao
+    treinador.metadados["reservados"] += len(reserva)
+
+    # A reserva só é gravada junto com o estado, para uma falha não duplicá-la na próxima execução
+    arquivo_reserva = ArquivoFeedback(os.path.join(diretorio_estado, RESERVA_PATH))
+    reservados, _ = arquivo_reserva.ler_a_partir_de(0)
+    reservados, rotulos = separar_rotulos(reservados + reserva)
+    candidato = treinador.artefatos()
+    avaliacao = {
+        "candidato": avaliar(candidato.probabilidades(reservados), rotulos, candidato.threshold),
+        "ativa": avaliar(artefatos_ativos.probabilidades(reservados), rotulos, artefatos_ativos.threshold)
+    }
+
+    nome = f"incremental-{datetime.now().strftime('%Y%m%d-%H%M%S')}"
+    if registro is not None:
+        existentes = set(registro.listar_versoes())
+        sufixo = 2
+        base = nome
+        while nome in existentes:
+            nome = f"{base}-{sufixo}"
+            sufixo += 1
+    with tempfile.TemporaryDirectory() as temporario:
+        exportar_pacote(os.path.join(temporario, PACOTE_PATH), candidato.modelo, candidato.scaler,
+                        candidato.colunas_treino, candidato.threshold, avaliacao["candidato"].get("f1_score"))
+        # O candidato herda os valores de imputação da versão ativa
+        for arquivo in (IMPUTER_MEDIANA_PATH, IMPUTER_MODA_PATH):
+            if os.path.isfile(os.path.join(diretorio_ativo, arquivo)):
+                shutil.copy2(os.path.join(diretorio_ativo, arquivo), os.path.join(temporario, arquivo))
+        if registro is not None:
+            garantir_ponteiro_ativo(registro, versao_ativa, diretorio_ativo)
+            registro.publicar(temporario, nome)
+
+    os.makedirs(diretorio_estado, exist_ok=True)
+    if reserva:
+        arquivo_reserva.anexar(reserva)
+    treinador.metadados["candidatos"].append(nome)
+    treinador.salvar()
+    return {
+        "candidato": nome if registro is not None else None,
+        "versao_base": treinador.metadados["versao_base"],
+        "amostras_base": treinador.metadados.get("amostras_base"),
+        "amostras_base_assumidas": treinador.metadados.get("amostras_base_assumidas"),
+        "treinados_agora": len(treino),
+        "reservados_agora": len(reserva),
+        "treinados_total": treinador.metadados["treinados"],
+        "colunas_novas": novas,
+        "total_colunas": len(treinador.colunas),
+        "avaliacao_reserva": avaliacao
+    }
+
+
+def main(argumentos: Optional[list] = None) -> None:
+    parser = argparse.ArgumentParser(description="Retreino incremental a partir de feedback rotulado")
+    parser.add_argument("--estado", default=os.getenv("TREINO_INCREMENTAL_DIR", "treino_incremental"),
+                        help="Diretório do checkpoint e da reserva")
+    comandos = parser.add_subparsers(dest="comando", required=True)
+
+    treinar = comandos.add_parser("treinar", help="Consome o feedback novo e publica um candidato")
+    treinar.add_argument("--feedback", default=os.getenv("FEEDBACK_ARQUIVO", "feedback.ndjson"))
+    treinar.add_argument("--artefatos", default=".", help="Diretório da versão local (sem registro)")
+    treinar.add_argument("--registro", default=os.getenv("REGISTRO_MODELOS", "registro_modelos"))
+    treinar.add_argument("--peso-positivo", type=float, default=1.0, help="Peso das amostras fatais no SGD")
+    treinar.add_argument("--taxa-aprendizado", type=float, default=0.01)
+    treinar.add_argument("--epocas", type=int, default=5)
+    treinar.add_argument("--amostras-base", type=int, default=None,
+                         help="Nº de amostras do treino original, se o scaler ativo não o informar (pacote antigo)")
+
+    comandos.add_parser("status", help="Mostra o checkpoint atual")
+    args = parser.parse_args(argumentos)
+
+    if args.comando == "status":
+        treinador = TreinadorIncremental.carregar(args.estado)
+        if treinador is None:
+            print(f"⚠️ Nenhum checkpoint em {args.estado}")
+            return
+        print(json.dumps({**treinador.metadados, "total_colunas": len(treinador.colunas)},
+                         indent=2, ensure_ascii=False))
+        return
+
+    # Mesma regra da API: versão ativa do registro ou, sem registro, os arquivos locais
+    registro = RegistroModelos(args.registro)
+    versao = registro.versao_ativa()
+    diretorio = registro.caminho(versao) if versao else args.artefatos
+    resultado = gerar_candidato(
+        ArquivoFeedback(args.feedback), args.estado, carregar_artefatos(diretorio), versao or "local",
+        registro, diretorio, peso_positivo=args.peso_positivo, amostras_base=args.amostras_base,
+        taxa_aprendizado=args.taxa_aprendizado, epocas=args.epocas
+    )
+    print(json.dumps(resultado, indent=2, ensure_ascii=False))
+    if resultado["candidato"]:
+        print(f"✅ Candidato publicado: {resultado['candidato']} (promover: POST /admin/recarregar?versao=...)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,469 @@
+"""
+Treino do modelo em blocos, para bases maiores que a memória do notebook.
+
+Mesmo pipeline de `projeto.ipynb` (remoção de duplicatas, limpeza,
+imputação por mediana/moda, one-hot, StandardScaler, regressão logística e
+busca do threshold por F1), mas o CSV é lido em blocos e as dummies ficam
+em matrizes esparsas CSR em vez de um DataFrame denso do `get_dummies`:
+
+1. Primeira passada: descarta duplicatas, separa treino/validação pelo hash
+   da linha e acumula medianas, modas e o vocabulário de cada categórica.
+2. Segunda passada: monta cada bloco imputado como CSR (numéricas + uma
+   dummy por campo categórico) e acumula as estatísticas do scaler.
+3. Ajusta a regressão logística na matriz esparsa, escolhe o threshold na
+   validação e grava os mesmos artefatos que a API consome.
+
+As dummies não são centralizadas no treino (isso destruiria a esparsidade).
+Como a média de uma coluna só soma uma constante ao logit, ela é
+incorporada ao intercepto no fim: o scaler exportado é um StandardScaler
+comum e o modelo dá as mesmas probabilidades que o pipeline denso.
+
+Exemplo:
+    python treino_streaming.py ../docs/treino.csv --saida modelo_novo --tamanho-bloco 100000
+    python registro_modelos.py publicar modelo_novo --versao 2025-07-01
+"""
+import argparse
+import copy
+import os
+import shutil
+import tempfile
+import time
+from collections import Counter
+from functools import partial
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+import joblib
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from sklearn.impute import SimpleImputer
+from sklearn.linear_model import LogisticRegression
+from sklearn.preprocessing import StandardScaler
+
+from artefatos import (
+    CAMPO_ROTULO, CAMPOS_NUMERICOS, COLUNAS_CATEGORICAS, COLUNAS_PATH, IMPUTER_MEDIANA_PATH,
+    IMPUTER_MODA_PATH, MODELO_PATH, SCALER_PATH, THRESHOLD_PATH, impressao_pickles
+)
+from codificador import CodificadorCompilado
+from ingestao import limpar_dataframe_bruto
+from pacote_modelo import PACOTE_PATH, exportar_pacote
+
+# Fração das linhas (por hash) separada para validação e escolha do threshold (test_size do notebook)
+FRACAO_VALIDACAO = 0.3
+# Peso dos positivos equivalente ao SMOTE(sampling_strategy=0.5) do notebook
+PROPORCAO_POSITIVOS = 0.5
+
+
+# ==================== LEITURA EM BLOCOS ====================
+def ler_blocos_csv(caminho: str, tamanho_bloco: int, encoding: str = "utf-8") -> Iterator[pd.DataFrame]:
+    """
+    Lê o CSV bruto em blocos com todas as colunas como texto.
+
+    Sem inferência de tipo por bloco, a mesma linha tem sempre o mesmo hash
+    (duplicatas entre blocos) e as categóricas nunca viram números.
+    """
+    yield from pd.read_csv(caminho, chunksize=tamanho_bloco, dtype=str, encoding=encoding)
+
+
+class FiltroLinhas:
+    """Remove duplicatas entre blocos e sorteia treino/validação pelo hash da linha bruta."""
+
+    def __init__(self, fracao_validacao: float = FRACAO_VALIDACAO):
+        self.fracao_validacao = fracao_validacao
+        self._vistos = set()
+        self.duplicadas = 0
+
+    def aplicar(self, bloco: pd.DataFrame) -> Tuple[pd.DataFrame, np.ndarray]:
+        """Retorna as linhas inéditas do bloco e a máscara das que vão para validação."""
+        hashes = pd.util.hash_pandas_object(bloco, index=False).to_numpy()
+        ineditas = np.ones(len(bloco), dtype=bool)
+        for i, valor in enumerate(hashes.tolist()):
+            if valor in self._vistos:
+                ineditas[i] = False
+            else:
+                self._vistos.add(valor)
+        self.duplicadas += int((~ineditas).sum())
+        validacao = (hashes[ineditas] % 10_000) < self.fracao_validacao * 10_000
+        return bloco[ineditas].reset_index(drop=True), validacao
+
+
+def limpar_bloco(bloco: pd.DataFrame, valores_imputacao: Dict) -> pd.DataFrame:
+    """Limpeza do notebook (vírgula decimal, data -> ano/mês, imputação) e rótulo inteiro."""
+    faltando = [c for c in [CAMPO_ROTULO, "dt_ocorrencia"] + COLUNAS_CATEGORICAS
+                + CAMPOS_NUMERICOS[:4] if c not in bloco.columns]
+    if faltando:
+        raise ValueError(f"Colunas ausentes na entrada: {faltando}")
+    bloco = limpar_dataframe_bruto(bloco, valores_imputacao, COLUNAS_CATEGORICAS if valores_imputacao else [])
+    bloco[CAMPO_ROTULO] = pd.to_numeric(bloco[CAMPO_ROTULO], errors="raise").astype(np.int64)
+    return bloco
+
+
+# ==================== PRIMEIRA PASSADA ====================
+def moda(contagem: Counter):
+    """Valor mais frequente; no empate, o menor (como `DataFrame.mode` e o SimpleImputer)."""
+    maximo = max(contagem.values())
+    return min(valor for valor, n in contagem.items() if n == maximo)
+
+
+def coletar_estatisticas(caminho: str, tamanho_bloco: int, fracao_validacao: float = FRACAO_VALIDACAO,
+                         encoding: str = "utf-8") -> Dict:
+    """
+    Primeira passada: valores de imputação, vocabulário e contagens.
+
+    As medianas precisam de todos os valores numéricos (6 floats por linha);
+    as categóricas guardam só a contagem por valor.
+    """
+    filtro = FiltroLinhas(fracao_validacao)
+    numericos = []
+    contagem_total = {campo: Counter() for campo in COLUNAS_CATEGORICAS}
+    contagem_treino = {campo: Counter() for campo in COLUNAS_CATEGORICAS}
+    nulos_treino = dict.fromkeys(COLUNAS_CATEGORICAS, 0)
+    linhas_treino = linhas_validacao = positivos_treino = 0
+
+    for bloco in ler_blocos_csv(caminho, tamanho_bloco, encoding):
+        bloco, validacao = filtro.aplicar(bloco)
+        bloco = limpar_bloco(bloco, {})
+        numericos.append(bloco[CAMPOS_NUMERICOS].to_numpy(dtype=np.float64))
+        treino = ~validacao
+        for campo in COLUNAS_CATEGORICAS:
+            contagem_total[campo].update(bloco[campo].dropna().tolist())
+            valores_treino = bloco.loc[treino, campo]
+            contagem_treino[campo].update(valores_treino.dropna().tolist())
+            nulos_treino[campo] += int(valores_treino.isna().sum())
+        linhas_treino += int(treino.sum())
+        linhas_validacao += int(validacao.sum())
+        positivos_treino += int(bloco.loc[treino, CAMPO_ROTULO].sum())
+
+    if linhas_treino == 0:
+        raise ValueError("Nenhuma linha de treino na entrada")
+    numericos = np.concatenate(numericos)
+    valores_imputacao = {campo: float(np.nanmedian(numericos[:, j])) for j, campo in enumerate(CAMPOS_NUMERICOS)}
+    valores_imputacao.update({campo: moda(contagem) for campo, contagem in contagem_total.items() if contagem})
+
+    # Vocabulário do treino depois da imputação, na ordem de colunas do `pd.get_dummies`
+    vocabulario = {}
+    for campo in COLUNAS_CATEGORICAS:
+        valores = set(contagem_treino[campo])
+        if nulos_treino[campo]:
+            valores.add(valores_imputacao.get(campo, "DESCONHECIDO"))
+        vocabulario[campo] = sorted(valores)
+
+    return {
+        "valores_imputacao": valores_imputacao,
+        "vocabulario": vocabulario,
+        "duplicadas": filtro.duplicadas,
+        "linhas_treino": linhas_treino,
+        "linhas_validacao": linhas_validacao,
+        "positivos_treino": positivos_treino
+    }
+
+
+# ==================== MATRIZES ESPARSAS ====================
+class MontadorEsparso:
+    """
+    Converte blocos limpos em CSR com as colunas de `colunas_treino`.
+
+    Usa a mesma codificação esparsa da API (`CodificadorCompilado`), sem
+    normalizar: cada linha guarda explicitamente as numéricas (mesmo quando
+    valem 0) e uma dummy por campo categórico com valor conhecido.
+    """
+
+    def __init__(self, vocabulario: Dict[str, List[str]]):
+        self.colunas = list(CAMPOS_NUMERICOS) + [
+            f"{campo}_{valor}" for campo in COLUNAS_CATEGORICAS for valor in vocabulario[campo]
+        ]
+        self.n_features = len(self.colunas)
+        self.codificador = CodificadorCompilado(self.colunas, None, None, CAMPOS_NUMERICOS, COLUNAS_CATEGORICAS)
+        self.indices_numericos = self.codificador.indices_numericos
+
+    def montar(self, bloco: pd.DataFrame) -> sparse.csr_matrix:
+        return self.codificador.codificar_colunas_esparso(bloco, len(bloco))
+
+
+def padronizar_esparsa(X: sparse.csr_matrix, centro: np.ndarray, escala: np.ndarray) -> sparse.csr_matrix:
+    """
+    `(X - centro) / escala` só nos valores armazenados, sem densificar.
+
+    Correto porque `centro` é zero fora das numéricas, que estão
+    armazenadas em todas as linhas.
+    """
+    X = X.copy()
+    X.data = (X.data - centro[X.indices]) / escala[X.indices]
+    return X
+
+
+# ==================== THRESHOLD ====================
+def buscar_threshold_f1(probabilidades: np.ndarray, rotulos: np.ndarray) -> Tuple[float, float]:
+    """
+    Threshold que maximiza o F1 de `probabilidades >= t`, entre todos os cortes possíveis.
+
+    Ordena uma vez e acumula verdadeiros/falsos positivos: O(n log n) em vez
+    de uma passada completa por threshold candidato. Cada corte é avaliado
+    no último índice do seu grupo de empates, como `>=` exige. Retorna
+    `(threshold, f1)`; sem positivos, `(0.5, 0.0)`.
+    """
+    rotulos = np.asarray(rotulos)
+    positivos = int(np.count_nonzero(rotulos == 1))
+    if positivos == 0 or len(probabilidades) == 0:
+        return 0.5, 0.0
+    ordem = np.argsort(-np.asarray(probabilidades), kind="mergesort")
+    ordenadas = np.asarray(probabilidades)[ordem]
+    vp = np.cumsum(rotulos[ordem] == 1)
+    preditos = np.arange(1, len(ordenadas) + 1)
+    fim_grupo = np.r_[ordenadas[1:] != ordenadas[:-1], True]
+    f1 = np.where(fim_grupo, 2 * vp / (preditos + positivos), -1.0)
+    melhor = int(np.argmax(f1))
+    return float(ordenadas[melhor]), float(f1[melhor])
+
+
+def metricas_classificacao(probabilidades: np.ndarray, rotulos: np.ndarray, threshold: float) -> Dict:
+    preditos = probabilidades >= threshold
+    vp = int(np.count_nonzero(preditos & (rotulos == 1)))
+    fp = int(np.count_nonzero(preditos & (rotulos == 0)))
+    fn = int(np.count_nonzero(~preditos & (rotulos == 1)))
+    precisao = vp / (vp + fp) if vp + fp else 0.0
+    recall = vp / (vp + fn) if vp + fn else 0.0
+    return {
+        "threshold": round(float(threshold), 4),
+        "acuracia": round(float(np.mean(preditos == (rotulos == 1))), 4) if len(rotulos) else 0.0,
+        "precisao": round(precisao, 4),
+        "recall": round(recall, 4),
+        "f1_score": round(2 * precisao * recall / (precisao + recall), 4) if precisao + recall else 0.0
+    }
+
+
+# ==================== TREINO ====================
+def preparar_matrizes(caminho: str, tamanho_bloco: int = 100000, fracao_validacao: float = FRACAO_VALIDACAO,
+                      encoding: str = "utf-8", escalar_dummies: bool = False) -> Dict:
+    """
+    As duas passadas sobre o CSV: matrizes CSR de treino e validação já
+    padronizadas, o scaler e o montador com `colunas_treino`.
+
+    Só as numéricas são padronizadas; o bloco one-hot fica com 0/1 (o scaler
+    exportado tem média 0 e escala 1 nessas colunas). `escalar_dummies=True`
+    divide as dummies pelo desvio, como o StandardScaler do notebook.
+    """
+    inicio = time.perf_counter()
+    estatisticas = coletar_estatisticas(caminho, tamanho_bloco, fracao_validacao, encoding)
+    montador = MontadorEsparso(estatisticas["vocabulario"])
+
+    # Segunda passada: CSR por bloco; o scaler acumula média/variância sem centralizar
+    scaler = StandardScaler(with_mean=False)
+    filtro = FiltroLinhas(fracao_validacao)
+    blocos_treino, blocos_validacao = [], []
+    rotulos_treino, rotulos_validacao = [], []
+    for bloco in ler_blocos_csv(caminho, tamanho_bloco, encoding):
+        bloco, validacao = filtro.aplicar(bloco)
+        bloco = limpar_bloco(bloco, estatisticas["valores_imputacao"])
+        X = montador.montar(bloco)
+        rotulos = bloco[CAMPO_ROTULO].to_numpy()
+        if (~validacao).any():
+            scaler.partial_fit(X[~validacao])
+            blocos_treino.append(X[~validacao])
+            rotulos_treino.append(rotulos[~validacao])
+        if validacao.any():
+            blocos_validacao.append(X[validacao])
+            rotulos_validacao.append(rotulos[validacao])
+
+    if not escalar_dummies:
+        dummies = np.ones(montador.n_features, dtype=bool)
+        dummies[montador.indices_numericos] = False
+        scaler.mean_[dummies], scaler.var_[dummies], scaler.scale_[dummies] = 0.0, 1.0, 1.0
+
+    centro = np.zeros(montador.n_features)
+    centro[montador.indices_numericos] = scaler.mean_[montador.indices_numericos]
+    matrizes = {
+        "montador": montador,
+        "scaler": scaler,
+        "estatisticas": estatisticas,
+        "X_treino": padronizar_esparsa(sparse.vstack(blocos_treino, format="csr"), centro, scaler.scale_),
+        "y_treino": np.concatenate(rotulos_treino),
+        "X_validacao": None,
+        "y_validacao": None
+    }
+    if blocos_validacao:
+        matrizes["X_validacao"] = padronizar_esparsa(
+            sparse.vstack(blocos_validacao, format="csr"), centro, scaler.scale_
+        )
+        matrizes["y_validacao"] = np.concatenate(rotulos_validacao)
+    matrizes["segundos_leitura"] = time.perf_counter() - inicio
+    return matrizes
+
+
+def balancear_por_peso(X: sparse.csr_matrix, y: np.ndarray,
+                       proporcao_positivos: float = PROPORCAO_POSITIVOS) -> Tuple:
+    """
+    Em vez de sintetizar linhas, dá aos fatais o peso que teriam depois do
+    SMOTE(sampling_strategy=proporcao_positivos). Retorna `(X, y, pesos)`.
+    """
+    pesos = np.ones(len(y))
+    positivos = int(y.sum())
+    if proporcao_positivos > 0 and 0 < positivos < len(y):
+        pesos[y == 1] = max(1.0, proporcao_positivos * (len(y) - positivos) / positivos)
+    return X, y, pesos
+
+
+def ajustar_regressao(matrizes: Dict, C: float = 0.1, balancear: Optional[Callable] = None,
+                      max_iter: int = 1000) -> Dict:
+    """
+    Ajusta a regressão logística, escolhe o threshold na validação e
+    converte modelo e scaler para o formato que a API carrega.
+
+    `balancear(X, y) -> (X, y, pesos)` trata o desbalanceamento
+    (padrão: `balancear_por_peso`).
+    """
+    inicio = time.perf_counter()
+    montador, scaler = matrizes["montador"], matrizes["scaler"]
+    X_ajuste, y_ajuste, pesos = (balancear or balancear_por_peso)(matrizes["X_treino"], matrizes["y_treino"])
+    modelo = LogisticRegression(random_state=42, max_iter=max_iter, C=C)
+    modelo.fit(X_ajuste, y_ajuste, sample_weight=pesos)
+    segundos_ajuste = time.perf_counter() - inicio
+
+    # Threshold na validação, com o modelo ainda no espaço do treino (dummies não centralizadas)
+    if matrizes["X_validacao"] is not None:
+        probabilidades = modelo.predict_proba(matrizes["X_validacao"])[:, 1]
+        threshold, _ = buscar_threshold_f1(probabilidades, matrizes["y_validacao"])
+        validacao = {
+            "otimizado": metricas_classificacao(probabilidades, matrizes["y_validacao"], threshold),
+            "padrao_050": metricas_classificacao(probabilidades, matrizes["y_validacao"], 0.5)
+        }
+    else:
+        threshold, validacao = 0.5, {}
+
+    # Centralização das dummies incorporada ao intercepto: w·(x - μ)/σ = w·x/σ - w·μ/σ (μ = 0 se não escaladas)
+    scaler = copy.deepcopy(scaler)
+    dummies = np.ones(montador.n_features, dtype=bool)
+    dummies[montador.indices_numericos] = False
+    modelo.intercept_ = modelo.intercept_ + modelo.coef_[:, dummies] @ (scaler.mean_[dummies] / scaler.scale_[dummies])
+    scaler.set_params(with_mean=True)
+    # Como no notebook, em que o scaler é ajustado num DataFrame
+    scaler.feature_names_in_ = np.asarray(montador.colunas, dtype=object)
+
+    estatisticas = matrizes["estatisticas"]
+    X_treino = matrizes["X_treino"]
+    return {
+        "modelo": modelo,
+        "scaler": scaler,
+        "colunas_treino": montador.colunas,
+        "threshold": threshold,
+        "f1_score": validacao.get("otimizado", {}).get("f1_score"),
+        "valores_imputacao": estatisticas["valores_imputacao"],
+        "resumo": {
+            "linhas_treino": estatisticas["linhas_treino"],
+            "linhas_validacao": estatisticas["linhas_validacao"],
+            "duplicadas": estatisticas["duplicadas"],
+            "positivos_treino": estatisticas["positivos_treino"],
+            "features": montador.n_features,
+            "nnz_treino": int(X_treino.nnz),
+            "densidade_treino": round(X_treino.nnz / max(1, X_treino.shape[0] * X_treino.shape[1]), 6),
+            "validacao": validacao,
+            "segundos_leitura": round(matrizes["segundos_leitura"], 3),
+            "segundos_ajuste": round(segundos_ajuste, 3)
+        }
+    }
+
+
+def treinar(caminho: str, tamanho_bloco: int = 100000, C: float = 0.1,
+            proporcao_positivos: float = PROPORCAO_POSITIVOS, fracao_validacao: float = FRACAO_VALIDACAO,
+            encoding: str = "utf-8", max_iter: int = 1000, escalar_dummies: bool = False) -> Dict:
+    """
+    Treina a regressão logística a partir do CSV bruto em `caminho`.
+
+    `proporcao_positivos` dá aos fatais o peso que teriam depois do SMOTE
+    do notebook (0 desliga); `escalar_dummies` segue o scaler do notebook
+    também nas dummies (ver `preparar_matrizes`). Retorna modelo, scaler, colunas, threshold,
+    valores de imputação e o resumo da execução.
+    """
+    matrizes = preparar_matrizes(caminho, tamanho_bloco, fracao_validacao, encoding, escalar_dummies)
+    return ajustar_regressao(matrizes, C, partial(balancear_por_peso, proporcao_positivos=proporcao_positivos),
+                             max_iter)
+
+
+# ==================== EXPORTAÇÃO ====================
+def imputers_ajustados(valores_imputacao: Dict) -> Tuple[SimpleImputer, SimpleImputer]:
+    """
+    SimpleImputers com as estatísticas já calculadas (`imputer_mediana.pkl`/`imputer_moda.pkl`).
+
+    Ajustados numa única linha com os próprios valores, o que reproduz
+    `statistics_` e `feature_names_in_` exatamente.
+    """
+    numericos = {c: [valores_imputacao[c]] for c in CAMPOS_NUMERICOS if c in valores_imputacao}
+    categoricos = {c: [valores_imputacao[c]] for c in COLUNAS_CATEGORICAS if c in valores_imputacao}
+    mediana = SimpleImputer(strategy="median").fit(pd.DataFrame(numericos))
+    moda_ = SimpleImputer(strategy="most_frequent").fit(pd.DataFrame(categoricos, dtype=object))
+    return mediana, moda_
+
+
+def exportar_artefatos(diretorio: str, resultado: Dict) -> List[str]:
+    """
+    Grava os artefatos da API em `diretorio`: pickles do notebook,
+    `threshold_otimizado.txt`, imputers e `modelo_pacote.bin`.
+
+    Tudo é escrito num diretório temporário ao lado e movido arquivo a
+    arquivo, então um leitor nunca vê um arquivo pela metade.
+    """
+    os.makedirs(diretorio, exist_ok=True)
+    mediana, moda_ = imputers_ajustados(resultado["valores_imputacao"])
+    # Arredondado para baixo: o corte continua incluindo a própria probabilidade escolhida.
+    # O mesmo valor vai para o .txt e para o pacote, então os dois formatos classificam igual
+    threshold = float(np.floor(resultado["threshold"] * 1e6) / 1e6)
+    temporario = tempfile.mkdtemp(dir=diretorio, prefix=".treino.")
+    try:
+        joblib.dump(resultado["modelo"], os.path.join(temporario, MODELO_PATH))
+        joblib.dump(resultado["scaler"], os.path.join(temporario, SCALER_PATH))
+        joblib.dump(resultado["colunas_treino"], os.path.join(temporario, COLUNAS_PATH))
+        joblib.dump(mediana, os.path.join(temporario, IMPUTER_MEDIANA_PATH))
+        joblib.dump(moda_, os.path.join(temporario, IMPUTER_MODA_PATH))
+        with open(os.path.join(temporario, THRESHOLD_PATH), "w") as f:
+            f.write(f"THRESHOLD_OTIMIZADO = {threshold:.6f}\n")
+            if resultado["f1_score"] is not None:
+                f.write(f"F1-SCORE = {resultado['f1_score']:.4f}\n")
+        exportar_pacote(os.path.join(temporario, PACOTE_PATH), resultado["modelo"], resultado["scaler"],
+                        resultado["colunas_treino"], threshold, resultado["f1_score"],
+                        impressao_pickles(temporario))
+
+        arquivos = sorted(os.listdir(temporario))
+        for nome in arquivos:
+            os.chmod(os.path.join(temporario, nome), 0o644)
+            os.replace(os.path.join(temporario, nome), os.path.join(diretorio, nome))
+        return arquivos
+    finally:
+        shutil.rmtree(temporario, ignore_errors=True)
+
+
+def main(argumentos: Optional[list] = None) -> None:
+    parser = argparse.ArgumentParser(description="Treino em blocos com one-hot esparso")
+    parser.add_argument("entrada", help="CSV bruto no formato de docs/treino.csv")
+    parser.add_argument("--saida", default="modelo_treinado", help="Diretório dos artefatos gerados")
+    parser.add_argument("--tamanho-bloco", type=int, default=100000, help="Linhas por bloco")
+    parser.add_argument("--C", type=float, default=0.1, help="Inverso da regularização (notebook: 0.1)")
+    parser.add_argument("--proporcao-positivos", type=float, default=PROPORCAO_POSITIVOS,
+                        help="Peso dos fatais equivalente ao SMOTE(sampling_strategy=...); 0 desliga")
+    parser.add_argument("--fracao-validacao", type=float, default=FRACAO_VALIDACAO)
+    parser.add_argument("--encoding", default="utf-8")
+    parser.add_argument("--escalar-dummies", action="store_true",
+                        help="Padroniza também as dummies, como o notebook (padrão: só as numéricas)")
+    args = parser.parse_args(argumentos)
+
+    print("=" * 70)
+    print("🏋️ TREINO EM BLOCOS (ONE-HOT ESPARSO)")
+    print("=" * 70)
+    print(f"📂 Entrada: {args.entrada} | Bloco: {args.tamanho_bloco} linhas")
+
+    resultado = treinar(args.entrada, args.tamanho_bloco, args.C, args.proporcao_positivos,
+                        args.fracao_validacao, args.encoding, escalar_dummies=args.escalar_dummies)
+    resumo = resultado["resumo"]
+    print(f"✓ Linhas: {resumo['linhas_treino']} treino, {resumo['linhas_validacao']} validação "
+          f"({resumo['duplicadas']} duplicatas removidas)")
+    print(f"✓ Features: {resumo['features']} (densidade {resumo['densidade_treino']:.4%})")
+    print(f"⏱️ Leitura: {resumo['segundos_leitura']:.2f}s | Ajuste: {resumo['segundos_ajuste']:.2f}s")
+    for nome, metricas in resumo["validacao"].items():
+        print(f"   • {nome}: threshold {metricas['threshold']:.2f} | F1 {metricas['f1_score']:.4f} | "
+              f"precisão {metricas['precisao']:.4f} | recall {metricas['recall']:.4f}")
+
+    arquivos = exportar_artefatos(args.saida, resultado)
+    print(f"\n✅ Artefatos gravados em {args.saida}: {', '.join(arquivos)}")
+
+
+if __name__ == "__main__":
+    main()